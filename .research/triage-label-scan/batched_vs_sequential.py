@@ -43,9 +43,9 @@ def main() -> None:
 
     # Collect all label names + system labels
     label_names = [c.label for c in categories]
-    system_labels = [settings.labels.mailroom_error]
-    if settings.labels.warnings_enabled:
-        system_labels.append(settings.labels.mailroom_warning)
+    system_labels = [settings.mailroom.label_error]
+    if settings.mailroom.warnings_enabled:
+        system_labels.append(settings.mailroom.label_warning)
 
     all_labels = label_names + system_labels
 
@@ -80,6 +80,7 @@ def main() -> None:
                 "accountId": client.account_id,
                 "filter": {"inMailbox": mb_id},
                 "limit": 0,  # We only need the total count
+                "calculateTotal": True,
             },
             f"q{i}",
         ])
@@ -133,6 +134,7 @@ def main() -> None:
                     "accountId": client.account_id,
                     "filter": {"inMailbox": mb_id},
                     "limit": 0,
+                    "calculateTotal": True,
                 },
                 "q0",
             ]
@@ -0,0 +1,98 @@
+"""Replay a recorded poll cycle through ScreenerWorkflow, optionally under cProfile.
+
+Record on the live service by setting ``http.record_file`` in config.yaml
+(request/response pairs are sanitized before they are written), copy the
+file here, then replay it with no network and no account:
+
+Usage:
+    python benchmarks/replay.py poll.jsonl                      # zero latency
+    python benchmarks/replay.py poll.jsonl --latency recorded   # original timings
+    python benchmarks/replay.py poll.jsonl --profile poll.pstats
+    python -m pstats poll.pstats                                # then: sort cumtime, stats 30
+
+The replay uses the categories from your config.yaml (MAILROOM_CONFIG), so
+record and replay with the same configuration.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import sys
+import time
+from pathlib import Path
+
+from mailroom.clients.recording import ReplayMismatch, ReplayTransport
+from mailroom.core.config import MailroomSettings
+from mailroom.core.logging import configure_logging
+from mailroom.testing.fake_fastmail import start_workflow
+from mailroom.workflows.screener import ScreenerWorkflow
+
+
+def replay_settings() -> MailroomSettings:
+    """config.yaml categories with dummy credentials and budgets lifted."""
+    return MailroomSettings(
+        jmap_token="replay",
+        carddav_username="replay@example.invalid",
+        carddav_password="replay",
+        polling={
+            "budget_seconds": 3600,
+            "sender_timeout_seconds": 3600,
+            "poll_timeout_seconds": 3600,
+        },
+        state={"session_cache": False},
+    )
+
+
+def replay(workflow: ScreenerWorkflow, transport: ReplayTransport) -> int:
+    """Poll until the recording is used up (or a poll consumes nothing). Returns polls run."""
+    polls = 0
+    while transport.remaining:
+        before = transport.remaining
+        workflow.poll()
+        polls += 1
+        if transport.remaining == before:
+            break
+    return polls
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", type=Path, help="JSONL file written via http.record_file")
+    parser.add_argument("--latency", choices=["none", "recorded"], default="none")
+    parser.add_argument("--profile", type=Path, help="Write cProfile stats to this file")
+    parser.add_argument("--log-level", default="critical")
+    args = parser.parse_args()
+
+    configure_logging(args.log_level)
+    transport = ReplayTransport(args.recording, latency=args.latency)
+    total = transport.remaining
+    settings = replay_settings()
+
+    profiler = cProfile.Profile() if args.profile else None
+    t0 = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        workflow = start_workflow(transport, settings)
+        polls = replay(workflow, transport)
+    except ReplayMismatch as exc:
+        print(f"Replay diverged from the recording: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        if profiler:
+            profiler.disable()
+    wall = time.perf_counter() - t0
+
+    print(f"Replayed {total - transport.remaining}/{total} responses in {polls} poll(s)")
+    print(f"Wall: {wall:.3f}s (latency={args.latency})")
+    if transport.remaining:
+        print(f"Unused responses: {transport.remaining}")
+    if profiler:
+        profiler.dump_stats(args.profile)
+        print(f"Profile written to {args.profile}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
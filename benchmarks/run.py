@@ -0,0 +1,166 @@
+"""Run Mailroom's end-to-end benchmarks against the in-process fake Fastmail.
+
+Each scenario runs in its own subprocess so peak RSS is per scenario.
+Results are written to benchmarks/results/<commit>.json; pass --compare to
+diff against an earlier result file.
+
+Usage:
+    python benchmarks/run.py                       # all scenarios
+    python benchmarks/run.py senders_10 conflict_storm
+    python benchmarks/run.py --latency 0.02        # 20ms simulated round-trip
+    python benchmarks/run.py --compare benchmarks/results/abc1234.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from datetime import UTC, datetime
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = BENCH_DIR / "results"
+REPO_ROOT = BENCH_DIR.parent
+
+# Growth that counts as a regression when comparing runs
+WALL_TOLERANCE = 0.20  # wall time is noisy; requests and RSS are not
+
+
+def _child(name: str, latency: float) -> None:
+    """Run one scenario in this process and print its result as JSON."""
+    sys.path.insert(0, str(BENCH_DIR))
+    from scenarios import SCENARIOS, run_scenario
+
+    from mailroom.core.logging import configure_logging
+
+    configure_logging("critical")
+    result = run_scenario(SCENARIOS[name], latency)
+    result["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps(result))
+
+
+def _run_in_subprocess(name: str, latency: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Path(tmp) / "config.yaml"
+        config.write_text("")
+        env = {**os.environ, "MAILROOM_CONFIG": str(config), "XDG_STATE_HOME": tmp}
+        proc = subprocess.run(
+            [sys.executable, __file__, "--child", name, "--latency", str(latency)],
+            capture_output=True,
+            text=True,
+            env=env,
+            check=False,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"scenario {name} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _commit() -> str:
+    try:
+        sha = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=REPO_ROOT,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=REPO_ROOT,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{sha}-dirty" if dirty else sha
+
+
+def _compare(current: dict, baseline: dict) -> list[str]:
+    """Return human-readable regressions of ``current`` against ``baseline``."""
+    regressions = []
+    for name, now in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        if now["requests"]["total"] > before["requests"]["total"]:
+            regressions.append(
+                f"{name}: requests {before['requests']['total']} -> {now['requests']['total']}"
+            )
+        if now["wall_seconds"] > before["wall_seconds"] * (1 + WALL_TOLERANCE):
+            regressions.append(
+                f"{name}: wall {before['wall_seconds']:.3f}s -> {now['wall_seconds']:.3f}s"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help="Scenario names (default: all)")
+    parser.add_argument(
+        "--latency", type=float, default=0.002, help="Simulated seconds per request"
+    )
+    parser.add_argument("--compare", type=Path, help="Earlier result file to diff against")
+    parser.add_argument("--no-save", action="store_true", help="Do not write a result file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.latency)
+        return 0
+
+    sys.path.insert(0, str(BENCH_DIR))
+    from scenarios import SCENARIOS
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    print(f"{'Scenario':<24} {'Wall':>9} {'Requests':>9} {'JMAP':>6} {'DAV':>6} {'Peak RSS':>10}")
+    print(f"{'-' * 24} {'-' * 9} {'-' * 9} {'-' * 6} {'-' * 6} {'-' * 10}")
+    results = {}
+    for name in names:
+        result = _run_in_subprocess(name, args.latency)
+        results[name] = result
+        req = result["requests"]
+        print(
+            f"{name:<24} {result['wall_seconds']:>8.3f}s {req['total']:>9} "
+            f"{req['jmap']:>6} {req['carddav']:>6} {result['peak_rss_kb'] / 1024:>8.1f}MB"
+        )
+
+    report = {
+        "commit": _commit(),
+        "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+        "latency": args.latency,
+        "python": sys.version.split()[0],
+        "scenarios": results,
+    }
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"{report['commit']}.json"
+        path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nSaved {path.relative_to(REPO_ROOT)}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if baseline.get("latency") != args.latency:
+            print(f"\nNote: baseline used latency={baseline.get('latency')}")
+        regressions = _compare(report, baseline)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.compare.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
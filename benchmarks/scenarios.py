@@ -0,0 +1,165 @@
+"""Benchmark scenarios: synthetic mailbox generators + the operation to time.
+
+Each scenario populates a FakeFastmail account, then times either a startup
+sequence or poll cycles (repeated until the sender queue is drained).
+"""
+
+from __future__ import annotations
+
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from mailroom.clients.session_cache import SessionCache, clear_memory
+from mailroom.core.config import MailroomSettings
+from mailroom.testing.fake_fastmail import FakeFastmail, start_workflow
+from mailroom.workflows.screener import ScreenerWorkflow
+
+# Labels cycled through when generating triaged senders
+TRIAGE_LABELS = ["@ToFeed", "@ToPaperTrail", "@ToImbox", "@ToJail"]
+
+
+@dataclass
+class Scenario:
+    """A named benchmark: ``populate`` builds the account, ``kind`` picks what is timed."""
+
+    name: str
+    description: str
+    populate: Callable[[FakeFastmail], None]
+    kind: str = "poll"  # "poll" (drain the queue) or "cold_start" / "warm_start"
+
+
+def bench_settings() -> MailroomSettings:
+    """Default config with budgets/deadlines lifted so one run drains everything."""
+    return MailroomSettings(
+        jmap_token="bench-token",
+        carddav_username="user@fastmail.com",
+        carddav_password="bench",
+        polling={
+            "budget_seconds": 3600,
+            "sender_timeout_seconds": 3600,
+            "poll_timeout_seconds": 3600,
+        },
+        state={"session_cache": False},
+    )
+
+
+def drain(workflow: ScreenerWorkflow) -> tuple[int, int]:
+    """Poll until no backlog remains. Returns (senders processed, polls run)."""
+    processed = workflow.poll()
+    polls = 1
+    while workflow.backlog:
+        processed += workflow.poll()
+        polls += 1
+    return processed, polls
+
+
+def run_scenario(scenario: Scenario, latency: float) -> dict:
+    """Populate, warm up and time one scenario. Returns its measurements."""
+    settings = bench_settings()
+    fake = FakeFastmail.for_settings(settings, latency=latency)
+    scenario.populate(fake)
+
+    processed = polls = 0
+    with tempfile.TemporaryDirectory() as cache_dir:
+        if scenario.kind == "poll":
+            workflow = start_workflow(fake, settings)
+            fake.reset_requests()
+            t0 = time.perf_counter()
+            processed, polls = drain(workflow)
+        else:
+            cache = SessionCache(cache_dir)
+            if scenario.kind == "warm_start":
+                start_workflow(fake, settings, cache)  # previous run left a cached session
+                clear_memory()  # ...but this is a new process
+            fake.reset_requests()
+            t0 = time.perf_counter()
+            workflow = start_workflow(fake, settings, cache)
+            processed, polls = drain(workflow)
+        wall = time.perf_counter() - t0
+
+    return {
+        "wall_seconds": round(wall, 4),
+        "requests": {
+            "total": fake.count(),
+            "jmap": fake.count("jmap"),
+            "carddav": fake.count("carddav"),
+        },
+        "processed": processed,
+        "polls": polls,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Generators
+# ---------------------------------------------------------------------------
+
+
+def triaged_senders(count: int) -> Callable[[FakeFastmail], None]:
+    """``count`` brand-new senders, one triaged Screener email each."""
+
+    def populate(fake: FakeFastmail) -> None:
+        fake.add_filler_emails(200)
+        fake.add_filler_contacts(200)
+        for i in range(count):
+            label = TRIAGE_LABELS[i % len(TRIAGE_LABELS)]
+            fake.add_email(f"sender{i}@example.com", ["Screener", label], name=f"Sender {i}")
+
+    return populate
+
+
+def retriage_deep_history(senders: int = 10, history: int = 300) -> Callable[[FakeFastmail], None]:
+    """Known senders (grouped contacts, long Feed history) re-triaged to Imbox."""
+
+    def populate(fake: FakeFastmail) -> None:
+        fake.add_filler_contacts(200)
+        for i in range(senders):
+            sender = f"regular{i}@example.com"
+            fake.add_contact(sender, name=f"Regular {i}", groups=["Feed", "Mailroom"])
+            for _ in range(history):
+                fake.add_email(sender, ["Feed"])
+            fake.add_email(sender, ["Screener", "@ToImbox"])
+
+    return populate
+
+
+def conflict_storm(senders: int = 100) -> Callable[[FakeFastmail], None]:
+    """Senders whose emails carry two different triage labels at once."""
+
+    def populate(fake: FakeFastmail) -> None:
+        for i in range(senders):
+            sender = f"conflicted{i}@example.com"
+            fake.add_email(sender, ["Screener", "@ToFeed"])
+            fake.add_email(sender, ["Screener", "@ToJail"])
+
+    return populate
+
+
+def steady_state(fake: FakeFastmail) -> None:
+    """A realistic account with nothing to triage."""
+    fake.add_filler_emails(500)
+    fake.add_filler_contacts(300)
+
+
+SCENARIOS: dict[str, Scenario] = {
+    s.name: s
+    for s in [
+        Scenario("senders_1", "1 new triaged sender", triaged_senders(1)),
+        Scenario("senders_10", "10 new triaged senders", triaged_senders(10)),
+        Scenario("senders_100", "100 new triaged senders", triaged_senders(100)),
+        Scenario("senders_1000", "1000 new triaged senders", triaged_senders(1000)),
+        Scenario(
+            "retriage_deep_history",
+            "10 grouped senders with 300-email histories re-triaged",
+            retriage_deep_history(),
+        ),
+        Scenario("conflict_storm", "100 senders with conflicting labels", conflict_storm()),
+        Scenario(
+            "cold_start", "startup with no cached session + empty poll", steady_state, "cold_start"
+        ),
+        Scenario(
+            "warm_start", "startup with a cached session + empty poll", steady_state, "warm_start"
+        ),
+    ]
+}
@@ -5,8 +5,13 @@ EventSource (SSE) and interval-based safety net:
 - push: SSE state events trigger poll within debounce_seconds
 - scheduled: regular interval poll while SSE is connected but idle
 - fallback: safety-net poll when SSE is disconnected
-- Graceful shutdown on SIGTERM/SIGINT (finish current cycle, then exit)
-- HTTP health endpoint on /healthz with EventSource status (daemon thread)
+- backlog: immediate follow-up poll when the last one deferred senders
+  because it ran out of its per-poll budget (or the previous process
+  left senders in the saved queue)
+- Graceful shutdown on SIGTERM/SIGINT: the current poll stops at the next
+  sender boundary (within polling.drain_seconds), then the process exits
+- HTTP health endpoint on /healthz with EventSource status (daemon thread),
+  plus opt-in /debug/profile and /debug/poll-trace
 - Tiered error handling: startup crash, transient skip, persistent crash
 """
 
@@ -17,6 +22,7 @@ import sys
 import threading
 import time
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
 
 import structlog
 
@@ -24,7 +30,9 @@ from pydantic import ValidationError
 
 from mailroom.clients.carddav import CardDAVClient
 from mailroom.clients.jmap import JMAPClient
-from mailroom.core.config import MailroomSettings
+from mailroom.clients.session_cache import session_cache_from_settings
+from mailroom.core import metrics, profiling, tracing
+from mailroom.core.config import DebugSettings, MailroomSettings
 from mailroom.core.logging import configure_logging
 from mailroom.eventsource import drain_queue, sse_listener
 from mailroom.workflows.screener import ScreenerWorkflow
@@ -38,11 +46,17 @@ class HealthHandler(BaseHTTPRequestHandler):
 
     Class-level attributes are shared with the polling loop via direct
     assignment (HealthHandler.last_successful_poll = time.time()).
+
+    With ``debug.enabled`` it also serves /debug/profile?seconds=N
+    (&format=collapsed|pstats) and /debug/poll-trace?limit=N.
     """
 
     last_successful_poll: float = 0.0
     last_poll_trigger: str | None = None
     poll_interval: int = 300
+    debug: DebugSettings = DebugSettings()
+    # Multi-account mode: per-account health (set by mailroom.accounts.runner)
+    accounts: dict | None = None
     # EventSource status (written by SSE thread, read by health endpoint)
     sse_status: str = "not_started"
     sse_connected_since: float | None = None
@@ -51,46 +65,119 @@ class HealthHandler(BaseHTTPRequestHandler):
     sse_last_error: str | None = None
 
     def do_GET(self) -> None:
-        if self.path == "/healthz":
-            age = time.time() - self.last_successful_poll
-            # Treat just-started (no poll yet) as healthy
-            healthy = self.last_successful_poll == 0.0 or age < (self.poll_interval * 2)
-            status = 200 if healthy else 503
-            body = json.dumps({
-                "status": "ok" if healthy else "unhealthy",
-                "last_poll_age_seconds": round(age, 1),
-                "last_poll_trigger": self.last_poll_trigger,
-                "eventsource": {
-                    "status": self.sse_status,
-                    "connected_since": self.sse_connected_since,
-                    "last_event_at": self.sse_last_event_at,
-                    "reconnect_count": self.sse_reconnect_count,
-                    "last_error": self.sse_last_error,
-                },
-            })
-            self.send_response(status)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(body.encode())
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        if url.path == "/healthz":
+            self._healthz()
+        elif url.path == "/debug/profile" and self.debug.enabled:
+            self._profile(params)
+        elif url.path == "/debug/poll-trace" and self.debug.enabled:
+            self._poll_trace(params)
         else:
             self.send_response(404)
             self.end_headers()
 
+    def _healthz(self) -> None:
+        if self.accounts is not None:
+            self._healthz_accounts()
+            return
+        age = time.time() - self.last_successful_poll
+        # Treat just-started (no poll yet) as healthy
+        healthy = self.last_successful_poll == 0.0 or age < (self.poll_interval * 2)
+        status = 200 if healthy else 503
+        self._send_json(status, {
+            "status": "ok" if healthy else "unhealthy",
+            "last_poll_age_seconds": round(age, 1),
+            "last_poll_trigger": self.last_poll_trigger,
+            "eventsource": {
+                "status": self.sse_status,
+                "connected_since": self.sse_connected_since,
+                "last_event_at": self.sse_last_event_at,
+                "reconnect_count": self.sse_reconnect_count,
+                "last_error": self.sse_last_error,
+            },
+            "metrics": metrics.snapshot(),
+        })
+
+    def _healthz_accounts(self) -> None:
+        """Multi-account mode: per-account status; 503 only if no account is healthy."""
+        accounts = {name: health.to_dict() for name, health in self.accounts.items()}
+        healthy = sum(1 for a in accounts.values() if a["healthy"])
+        if healthy == len(accounts):
+            status = "ok"
+        elif healthy:
+            status = "degraded"
+        else:
+            status = "unhealthy"
+        self._send_json(200 if healthy else 503, {
+            "status": status,
+            "accounts": accounts,
+            "metrics": metrics.snapshot(),
+        })
+
+    def _profile(self, params: dict[str, list[str]]) -> None:
+        """Sample all threads for ``seconds`` and return the profile."""
+        fmt = params.get("format", ["collapsed"])[0]
+        try:
+            seconds = float(params.get("seconds", ["10"])[0])
+        except ValueError:
+            seconds = -1.0
+        if not 0 < seconds <= self.debug.max_profile_seconds or fmt not in ("collapsed", "pstats"):
+            self._send_json(400, {
+                "error": f"seconds must be in (0, {self.debug.max_profile_seconds}]"
+                " and format one of collapsed, pstats",
+            })
+            return
+        try:
+            samples = profiling.sample(seconds, hz=self.debug.profile_hz)
+        except profiling.ProfileBusy as exc:
+            self._send_json(409, {"error": str(exc)})
+            return
+        if fmt == "pstats":
+            self._send(200, "application/octet-stream", profiling.pstats_bytes(samples))
+        else:
+            self._send(200, "text/plain; charset=utf-8", profiling.collapsed(samples).encode())
+
+    def _poll_trace(self, params: dict[str, list[str]]) -> None:
+        """Return the most recent poll timelines, newest first."""
+        try:
+            limit = int(params["limit"][0]) if "limit" in params else None
+        except ValueError:
+            self._send_json(400, {"error": "limit must be an integer"})
+            return
+        self._send_json(200, {"polls": tracing.recent(limit)})
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        self._send(status, "application/json", json.dumps(payload).encode())
+
+    def _send(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def log_message(self, format: str, *args: object) -> None:
         """Suppress default access logs."""
 
 
-def _start_health_server(port: int, poll_interval: int) -> ThreadingHTTPServer:
+def _start_health_server(
+    port: int, poll_interval: int, debug: DebugSettings | None = None
+) -> ThreadingHTTPServer:
     """Start the health HTTP server on a daemon thread.
 
     Args:
         port: TCP port to listen on.
         poll_interval: Polling interval in seconds (for staleness check).
+        debug: Settings for the opt-in /debug/* endpoints.
 
     Returns:
         The running server instance.
     """
     HealthHandler.poll_interval = poll_interval
+    if debug is not None:
+        HealthHandler.debug = debug
+        tracing.set_capacity(debug.poll_traces)
     server = ThreadingHTTPServer(("0.0.0.0", port), HealthHandler)
     thread = threading.Thread(target=server.serve_forever, daemon=True)
     thread.start()
@@ -111,13 +198,18 @@ def main() -> None:
     log = structlog.get_logger(component="main")
 
     # 2. Connect JMAP client
-    jmap = JMAPClient(token=settings.jmap_token)
+    jmap = JMAPClient(
+        token=settings.jmap_token,
+        http=settings.http,
+        session_cache=session_cache_from_settings(settings.state),
+    )
     jmap.connect()
 
     # 3. Connect CardDAV client
     carddav = CardDAVClient(
         username=settings.carddav_username,
         password=settings.carddav_password,
+        http=settings.http,
     )
     carddav.connect()
 
@@ -134,7 +226,7 @@ def main() -> None:
     workflow = ScreenerWorkflow(jmap, carddav, settings, mailbox_ids)
 
     # 7. Start health server on daemon thread
-    _start_health_server(HEALTH_PORT, settings.polling.interval)
+    _start_health_server(HEALTH_PORT, settings.polling.interval, settings.debug)
 
     # --- Graceful shutdown ---
 
@@ -145,6 +237,8 @@ def main() -> None:
         log.info("shutdown_signal_received", signal=signum)
         shutdown_event.set()
         event_queue.put(None)  # unblock queue.get() immediately
+        # A poll in progress stops at the next sender; the rest is saved for the next pod
+        workflow.request_stop()
 
     signal.signal(signal.SIGTERM, _handle_signal)
     signal.signal(signal.SIGINT, _handle_signal)
@@ -163,7 +257,9 @@ def main() -> None:
             kwargs={
                 "log": structlog.get_logger(component="eventsource"),
                 "health_cls": HealthHandler,
+                "http": settings.http,
             },
+            name="eventsource",
             daemon=True,
         )
         sse_thread.start()
@@ -184,33 +280,40 @@ def main() -> None:
 
     while not shutdown_event.is_set():
         trigger = "scheduled"
-        try:
-            event_queue.get(timeout=settings.polling.interval)
-            if shutdown_event.is_set():
-                break  # sentinel from signal handler -- exit immediately
-            # Got SSE event -- drain queue and debounce
-            pre_drain = drain_queue(event_queue)
-            shutdown_event.wait(settings.polling.debounce_seconds)
-            post_drain = drain_queue(event_queue)
-            trigger = "push"
-            log.debug(
-                "debounce_collapsed",
-                events_collapsed=1 + pre_drain + post_drain,
-            )
-        except queue.Empty:
-            # SSE connected but idle → scheduled check; SSE down → fallback
-            if HealthHandler.sse_status != "connected":
-                trigger = "fallback"
+        if workflow.backlog:
+            # Last poll ran out of budget -- continue right away. Any pending
+            # SSE events are covered by this poll's fresh label scan.
+            drain_queue(event_queue)
+            trigger = "backlog"
+        else:
+            try:
+                event_queue.get(timeout=settings.polling.interval)
+                if shutdown_event.is_set():
+                    break  # sentinel from signal handler -- exit immediately
+                # Got SSE event -- drain queue and debounce
+                pre_drain = drain_queue(event_queue)
+                shutdown_event.wait(settings.polling.debounce_seconds)
+                post_drain = drain_queue(event_queue)
+                trigger = "push"
+                log.debug(
+                    "debounce_collapsed",
+                    events_collapsed=1 + pre_drain + post_drain,
+                )
+            except queue.Empty:
+                # SSE connected but idle → scheduled check; SSE down → fallback
+                if HealthHandler.sse_status != "connected":
+                    trigger = "fallback"
 
         if shutdown_event.is_set():
             break
 
         try:
-            workflow.poll()
+            with tracing.poll_trace(trigger):
+                workflow.poll()
             consecutive_failures = 0
             HealthHandler.last_successful_poll = time.time()
             HealthHandler.last_poll_trigger = trigger
-            if trigger == "push":
+            if trigger in ("push", "backlog"):
                 log.info("poll_completed", trigger=trigger)
             else:
                 log.debug("poll_completed", trigger=trigger)
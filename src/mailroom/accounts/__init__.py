@@ -0,0 +1 @@
+"""Multi-account hosting: many mailboxes served by one Mailroom process."""
@@ -0,0 +1,159 @@
+"""Which replica serves which account: leader election or account sharding.
+
+Several replicas of a multi-account process can run against the same lease
+backend (see ``accounts.leases``). Only the replica holding an account's
+lease polls that account, so two replicas never triage the same labels.
+
+- ``leader`` mode: one lease for the whole manifest. The replica that holds
+  it serves every account; the others stand by and take over when it
+  expires. This is a hot standby for rollouts and node failures.
+- ``shard`` mode: one lease per account. Each replica also keeps a
+  membership lease alive. Accounts are split across the live members by
+  rendezvous hashing, so when a member joins or leaves, only its own share
+  of accounts moves. A replica gives up an account it no longer prefers
+  only while no poll for it is running. The new owner picks it up on its
+  next refresh.
+
+Failover takes at most ``lease_seconds + renew_seconds``. A clean shutdown
+releases its leases, so the next owner takes over within ``renew_seconds``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import socket
+import time
+from collections.abc import Callable, Iterable
+
+import structlog
+
+from mailroom.accounts.leases import LeaseBackend
+
+
+def default_holder() -> str:
+    """This replica's identity: $POD_NAME in Kubernetes, else hostname and PID."""
+    return os.environ.get("POD_NAME") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _rendezvous(member: str, account: str) -> bytes:
+    return hashlib.sha256(f"{member}\0{account}".encode()).digest()
+
+
+class Coordinator:
+    """Keep this replica's leases renewed and report which accounts it owns.
+
+    Args:
+        backend: Shared lease storage.
+        accounts: Names of every account in the manifest.
+        mode: "leader" or "shard".
+        holder: This replica's identity (unique among replicas).
+        prefix: Prefix of every lease name (one prefix per deployment).
+        lease_seconds: How long a lease lives without renewal.
+        renew_seconds: How often leases are renewed (and ownership re-checked).
+        clock: Monotonic clock for renewal timing.
+    """
+
+    def __init__(
+        self,
+        backend: LeaseBackend,
+        accounts: Iterable[str],
+        mode: str = "shard",
+        holder: str | None = None,
+        prefix: str = "mailroom",
+        lease_seconds: float = 15.0,
+        renew_seconds: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._backend = backend
+        self._accounts = sorted(accounts)
+        self.mode = mode
+        self.holder = holder or default_holder()
+        self._prefix = prefix
+        self._lease_seconds = lease_seconds
+        self._renew_seconds = renew_seconds
+        self._clock = clock
+        self._valid_until: dict[str, float] = {}  # lease name -> monotonic deadline
+        self.next_refresh = 0.0  # monotonic
+        self._log = structlog.get_logger(component="coordination", holder=self.holder)
+
+    def _account_lease(self, account: str) -> str:
+        return f"{self._prefix}-account-{account}"
+
+    @property
+    def _member_prefix(self) -> str:
+        return f"{self._prefix}-member-"
+
+    @property
+    def _leader_lease(self) -> str:
+        return f"{self._prefix}-leader"
+
+    def owned(self, now: float | None = None) -> set[str]:
+        """Accounts this replica may serve right now."""
+        now = self._clock() if now is None else now
+        if self.mode == "leader":
+            return set(self._accounts) if self._valid(self._leader_lease, now) else set()
+        return {a for a in self._accounts if self._valid(self._account_lease(a), now)}
+
+    def _valid(self, lease: str, now: float) -> bool:
+        return self._valid_until.get(lease, 0.0) > now
+
+    def refresh(self, busy: Iterable[str] = ()) -> set[str]:
+        """Renew and (re)balance leases if a refresh is due; return the owned accounts.
+
+        ``busy`` names accounts with a poll in flight: they are never handed
+        off mid-poll.
+        """
+        now = self._clock()
+        if now < self.next_refresh:
+            return self.owned(now)
+        self.next_refresh = now + self._renew_seconds
+        before = self.owned(now)
+        try:
+            if self.mode == "leader":
+                self._acquire(self._leader_lease, now)
+            else:
+                self._rebalance(now, set(busy))
+        except Exception as exc:
+            # Keep what we hold until it would expire; others cannot take it sooner
+            self._log.warning("lease_backend_error", error=str(exc))
+        after = self.owned(now)
+        if after != before:
+            self._log.info(
+                "leases_changed",
+                gained=sorted(after - before),
+                lost=sorted(before - after),
+                owned=len(after),
+            )
+        return after
+
+    def _acquire(self, lease: str, started: float) -> bool:
+        if self._backend.acquire(lease, self.holder, self._lease_seconds):
+            # Stop trusting the lease one renewal before it could expire elsewhere
+            self._valid_until[lease] = started + self._lease_seconds - self._renew_seconds
+            return True
+        self._valid_until.pop(lease, None)
+        return False
+
+    def _release(self, lease: str) -> None:
+        self._valid_until.pop(lease, None)
+        self._backend.release(lease, self.holder)
+
+    def _rebalance(self, now: float, busy: set[str]) -> None:
+        self._acquire(self._member_prefix + self.holder, now)
+        members = set(self._backend.holders(self._member_prefix).values()) | {self.holder}
+        for account in self._accounts:
+            lease = self._account_lease(account)
+            preferred = max(members, key=lambda m: _rendezvous(m, account))
+            if preferred == self.holder or (account in busy and self._valid(lease, now)):
+                self._acquire(lease, now)
+            elif lease in self._valid_until:
+                self._release(lease)  # hand off to the preferred member
+
+    def release_all(self) -> None:
+        """Give up every lease (clean shutdown) so other replicas take over at once."""
+        for lease in list(self._valid_until):
+            try:
+                self._release(lease)
+            except Exception as exc:
+                self._log.warning("lease_release_failed", lease=lease, error=str(exc))
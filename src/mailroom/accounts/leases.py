@@ -0,0 +1,371 @@
+"""Lease backends: time-limited locks shared by Mailroom replicas.
+
+A lease has a name and a holder. ``acquire`` takes a free or expired lease,
+or renews one the caller already holds, for ``ttl`` seconds. If another
+holder has a live lease, ``acquire`` returns False. Replicas use leases to
+agree on which of them serves an account (see ``accounts.coordination``).
+A replica that dies simply stops renewing, and its leases expire.
+
+Backends:
+
+- ``MemoryLeaseBackend``: one process only (tests, local runs).
+- ``FileLeaseBackend``: JSON files in a directory, guarded by ``flock``.
+  Works across processes on one host, or on a shared volume whose
+  filesystem honors ``flock``.
+- ``SQLiteLeaseBackend``: one row per lease in a SQLite database.
+- ``KubernetesLeaseBackend``: ``coordination.k8s.io/v1`` Lease objects, using
+  the pod's service account. This is the backend for replicas in a cluster.
+
+Expiry is wall-clock based (``clock``, ``time.time`` by default), so hosts
+sharing a backend need synchronized clocks. ``lease_seconds`` should
+comfortably exceed any expected skew.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import ssl
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Protocol
+
+import httpx
+
+if TYPE_CHECKING:
+    from mailroom.accounts.manifest import CoordinationSettings
+
+Clock = Callable[[], float]
+
+
+class LeaseBackend(Protocol):
+    """Storage for named leases. Every method is safe to call from several replicas."""
+
+    def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        """Take or renew ``name`` for ``holder`` for ``ttl`` seconds; False if held by another."""
+        ...
+
+    def release(self, name: str, holder: str) -> None:
+        """Give up ``name`` if ``holder`` holds it (no-op otherwise)."""
+        ...
+
+    def holders(self, prefix: str) -> dict[str, str]:
+        """Live (unexpired) leases whose name starts with ``prefix``: name -> holder."""
+        ...
+
+
+class MemoryLeaseBackend:
+    """Leases in a dict: shared by the threads of one process only."""
+
+    def __init__(self, clock: Clock = time.time) -> None:
+        self._clock = clock
+        self._leases: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        now = self._clock()
+        with self._lock:
+            current = self._leases.get(name)
+            if current is not None and current[0] != holder and current[1] > now:
+                return False
+            self._leases[name] = (holder, now + ttl)
+            return True
+
+    def release(self, name: str, holder: str) -> None:
+        with self._lock:
+            current = self._leases.get(name)
+            if current is not None and current[0] == holder:
+                del self._leases[name]
+
+    def holders(self, prefix: str) -> dict[str, str]:
+        now = self._clock()
+        with self._lock:
+            return {
+                name: holder
+                for name, (holder, expires_at) in self._leases.items()
+                if name.startswith(prefix) and expires_at > now
+            }
+
+
+class FileLeaseBackend:
+    """One ``<name>.lease`` JSON file per lease, read-modify-write under ``flock``.
+
+    Args:
+        directory: Where lease files live (created if missing).
+        clock: Wall clock used for expiry.
+    """
+
+    def __init__(self, directory: str | Path, clock: Clock = time.time) -> None:
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._lock_path = self._directory / ".lock"
+        self._clock = clock
+
+    def _path(self, name: str) -> Path:
+        return self._directory / f"{name}.lease"
+
+    def _locked(self):
+        return _Flock(self._lock_path)
+
+    def _read(self, path: Path) -> tuple[str, float] | None:
+        try:
+            data = json.loads(path.read_text())
+            return data["holder"], float(data["expires_at"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None  # missing or corrupt: treat as free
+
+    def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        path = self._path(name)
+        with self._locked():
+            now = self._clock()
+            current = self._read(path)
+            if current is not None and current[0] != holder and current[1] > now:
+                return False
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"holder": holder, "expires_at": now + ttl}))
+            os.replace(tmp, path)
+            return True
+
+    def release(self, name: str, holder: str) -> None:
+        path = self._path(name)
+        with self._locked():
+            current = self._read(path)
+            if current is not None and current[0] == holder:
+                path.unlink(missing_ok=True)
+
+    def holders(self, prefix: str) -> dict[str, str]:
+        with self._locked():
+            now = self._clock()
+            live = {}
+            for path in self._directory.glob(f"{prefix}*.lease"):
+                current = self._read(path)
+                if current is not None and current[1] > now:
+                    live[path.name.removesuffix(".lease")] = current[0]
+            return live
+
+
+class _Flock:
+    """Exclusive ``flock`` on a file for the duration of a ``with`` block."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._fd: int | None = None
+
+    def __enter__(self) -> None:
+        self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc: object) -> None:
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+class SQLiteLeaseBackend:
+    """Leases as rows of a SQLite table; takeover is one conditional upsert.
+
+    Args:
+        path: Database file (created if missing).
+        clock: Wall clock used for expiry.
+    """
+
+    def __init__(self, path: str | Path, clock: Clock = time.time) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._path = str(path)
+        self._clock = clock
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                " name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One short transaction (BEGIN IMMEDIATE), committed and closed on exit."""
+        db = sqlite3.connect(self._path, timeout=10.0, isolation_level="IMMEDIATE")
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        now = self._clock()
+        with self._connect() as db:
+            cursor = db.execute(
+                "INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)"
+                " ON CONFLICT (name) DO UPDATE"
+                " SET holder = excluded.holder, expires_at = excluded.expires_at"
+                " WHERE leases.holder = excluded.holder OR leases.expires_at <= ?",
+                (name, holder, now + ttl, now),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, name: str, holder: str) -> None:
+        with self._connect() as db:
+            db.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+
+    def holders(self, prefix: str) -> dict[str, str]:
+        now = self._clock()
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT name, holder FROM leases WHERE substr(name, 1, ?) = ? AND expires_at > ?",
+                (len(prefix), prefix, now),
+            ).fetchall()
+        return dict(rows)
+
+
+SERVICE_ACCOUNT_DIR = Path("/var/run/secrets/kubernetes.io/serviceaccount")
+MANAGED_BY = "app.kubernetes.io/managed-by"
+LEASE_NAME = "mailroom.dev/lease-name"  # original name, before resource_name()
+_K8S_NAME = re.compile(r"[a-z0-9]([-a-z0-9.]*[a-z0-9])?")
+
+
+class KubernetesLeaseBackend:
+    """``coordination.k8s.io/v1`` Leases, updated with optimistic concurrency.
+
+    Every write carries the Lease's ``resourceVersion``, so when two replicas
+    race for the same expired lease, the API server accepts one write and
+    rejects the other with 409.
+
+    Args:
+        namespace: Namespace holding the Leases (default: the pod's own).
+        api_url: API server URL (default: in-cluster service address).
+        token: Bearer token (default: the mounted service account token).
+        transport: Optional httpx transport replacing the network (tests).
+        clock: Wall clock used for expiry.
+    """
+
+    def __init__(
+        self,
+        namespace: str | None = None,
+        api_url: str | None = None,
+        token: str | None = None,
+        transport: httpx.BaseTransport | None = None,
+        clock: Clock = time.time,
+    ) -> None:
+        if namespace is None:
+            namespace = (SERVICE_ACCOUNT_DIR / "namespace").read_text().strip()
+        if api_url is None:
+            host = os.environ["KUBERNETES_SERVICE_HOST"]
+            port = os.environ.get("KUBERNETES_SERVICE_PORT", "443")
+            api_url = f"https://{host}:{port}"
+        if token is None and transport is None:
+            token = (SERVICE_ACCOUNT_DIR / "token").read_text().strip()
+        verify: ssl.SSLContext | bool = True
+        if transport is None and (SERVICE_ACCOUNT_DIR / "ca.crt").exists():
+            verify = ssl.create_default_context(cafile=str(SERVICE_ACCOUNT_DIR / "ca.crt"))
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self._client = httpx.Client(
+            base_url=f"{api_url}/apis/coordination.k8s.io/v1/namespaces/{namespace}/leases",
+            headers=headers,
+            verify=verify,
+            transport=transport,
+            timeout=10.0,
+        )
+        self._clock = clock
+
+    @staticmethod
+    def resource_name(name: str) -> str:
+        """Map a lease name to a valid object name (DNS subdomain), keeping it unique."""
+        if _K8S_NAME.fullmatch(name) and len(name) <= 253:
+            return name
+        digest = hashlib.sha256(name.encode()).hexdigest()[:8]
+        cleaned = re.sub(r"[^a-z0-9.-]+", "-", name.lower()).strip("-.")
+        return f"{cleaned[:240]}-{digest}"
+
+    def _timestamp(self, ts: float) -> str:
+        return datetime.fromtimestamp(ts, UTC).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+    def _expires_at(self, spec: dict) -> float:
+        renewed = spec.get("renewTime") or spec.get("acquireTime")
+        if not renewed or not spec.get("holderIdentity"):
+            return 0.0
+        renewed_at = datetime.strptime(renewed, "%Y-%m-%dT%H:%M:%S.%fZ").replace(tzinfo=UTC)
+        return renewed_at.timestamp() + spec.get("leaseDurationSeconds", 0)
+
+    def acquire(self, name: str, holder: str, ttl: float) -> bool:
+        object_name = self.resource_name(name)
+        now = self._clock()
+        spec = {
+            "holderIdentity": holder,
+            "leaseDurationSeconds": max(1, round(ttl)),
+            "renewTime": self._timestamp(now),
+        }
+        response = self._client.get(f"/{object_name}")
+        if response.status_code == 404:
+            spec["acquireTime"] = spec["renewTime"]
+            created = self._client.post(
+                "",
+                json={
+                    "apiVersion": "coordination.k8s.io/v1",
+                    "kind": "Lease",
+                    "metadata": {
+                        "name": object_name,
+                        "labels": {MANAGED_BY: "mailroom"},
+                        "annotations": {LEASE_NAME: name},
+                    },
+                    "spec": spec,
+                },
+            )
+            if created.status_code == 409:
+                return False  # another replica created it first
+            created.raise_for_status()
+            return True
+        response.raise_for_status()
+        lease = response.json()
+        current = lease.get("spec", {})
+        if current.get("holderIdentity") not in (None, holder) and self._expires_at(current) > now:
+            return False
+        if current.get("holderIdentity") != holder:
+            spec["acquireTime"] = spec["renewTime"]
+            spec["leaseTransitions"] = current.get("leaseTransitions", 0) + 1
+        lease["spec"] = {**current, **spec}
+        updated = self._client.put(f"/{object_name}", json=lease)
+        if updated.status_code == 409:
+            return False  # lost the race: resourceVersion moved on
+        updated.raise_for_status()
+        return True
+
+    def release(self, name: str, holder: str) -> None:
+        object_name = self.resource_name(name)
+        response = self._client.get(f"/{object_name}")
+        if response.status_code == 404:
+            return
+        response.raise_for_status()
+        lease = response.json()
+        if lease.get("spec", {}).get("holderIdentity") != holder:
+            return
+        lease["spec"]["holderIdentity"] = None
+        updated = self._client.put(f"/{object_name}", json=lease)
+        if updated.status_code != 409:  # 409: someone else already changed it
+            updated.raise_for_status()
+
+    def holders(self, prefix: str) -> dict[str, str]:
+        response = self._client.get("", params={"labelSelector": f"{MANAGED_BY}=mailroom"})
+        response.raise_for_status()
+        now = self._clock()
+        live = {}
+        for lease in response.json().get("items", []):
+            name = lease["metadata"].get("annotations", {}).get(LEASE_NAME, "")
+            spec = lease.get("spec", {})
+            if name.startswith(prefix) and self._expires_at(spec) > now:
+                live[name] = spec["holderIdentity"]
+        return live
+
+
+def build_lease_backend(settings: CoordinationSettings) -> LeaseBackend:
+    """Create the backend named by the manifest's ``coordination`` section."""
+    if settings.backend == "kubernetes":
+        return KubernetesLeaseBackend(namespace=settings.namespace)
+    if settings.backend == "sqlite":
+        return SQLiteLeaseBackend(settings.path)
+    return FileLeaseBackend(settings.path)
@@ -0,0 +1,116 @@
+"""Accounts manifest: which mailboxes one Mailroom process serves.
+
+Each account keeps its own config.yaml (categories, polling, http, ...) and
+its own credentials, read from environment variables under the account's
+prefix. The manifest only holds process-wide settings.
+
+Example (accounts.yaml):
+
+    workers: 4
+    accounts:
+      - name: alice
+        config: alice.yaml        # relative to this file
+      - name: bob
+        config: /etc/mailroom/bob.yaml
+        env_prefix: MAILROOM_BOB_ # default: MAILROOM_<NAME>_
+
+Credentials for alice then come from MAILROOM_ALICE_JMAP_TOKEN,
+MAILROOM_ALICE_CARDDAV_USERNAME and MAILROOM_ALICE_CARDDAV_PASSWORD.
+
+With a ``coordination`` section, several replicas can run the same manifest
+and split the accounts between them (see ``accounts.coordination``).
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Literal
+
+import yaml
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from mailroom.core.config import DebugSettings, LoggingSettings, MailroomSettings, load_settings
+
+
+class AccountSpec(BaseModel):
+    """One hosted account: a name, its config file and its credential prefix."""
+
+    name: str
+    config: str
+    env_prefix: str | None = None
+
+    @field_validator("name")
+    @classmethod
+    def validate_name(cls, v: str) -> str:
+        if not re.fullmatch(r"[A-Za-z0-9_-]+", v):
+            raise ValueError(f"account name {v!r} may only contain letters, digits, '-' and '_'")
+        return v
+
+    @property
+    def credential_prefix(self) -> str:
+        """Environment variable prefix for this account's credentials."""
+        if self.env_prefix is not None:
+            return self.env_prefix
+        return f"MAILROOM_{self.name.upper().replace('-', '_')}_"
+
+    def load_settings(self) -> MailroomSettings:
+        """Load this account's settings (config file + prefixed env credentials)."""
+        return load_settings(self.config, env_prefix=self.credential_prefix)
+
+
+class CoordinationSettings(BaseModel):
+    """How replicas running the same manifest share its accounts."""
+
+    mode: Literal["none", "leader", "shard"] = "none"  # none = this process serves every account
+    backend: Literal["file", "sqlite", "kubernetes"] = "file"
+    path: str | None = None  # file: lease directory; sqlite: database file
+    namespace: str | None = None  # kubernetes: defaults to the pod's namespace
+    lease_prefix: str = "mailroom"  # distinct per deployment sharing a backend
+    holder: str | None = None  # replica identity; default $POD_NAME or hostname-pid
+    lease_seconds: float = Field(default=15.0, gt=0)  # failover time after a crash
+    renew_seconds: float = Field(default=5.0, gt=0)
+
+    @model_validator(mode="after")
+    def validate_coordination(self) -> CoordinationSettings:
+        if self.renew_seconds * 2 > self.lease_seconds:
+            raise ValueError("coordination.renew_seconds must be at most half of lease_seconds")
+        if self.mode != "none" and self.backend in ("file", "sqlite") and not self.path:
+            raise ValueError(f"coordination.path is required for the {self.backend} backend")
+        return self
+
+
+class AccountsManifest(BaseModel):
+    """Process-wide settings plus the list of hosted accounts."""
+
+    workers: int = Field(default=4, ge=1)  # threads shared by all accounts' polls
+    logging: LoggingSettings = LoggingSettings()
+    debug: DebugSettings = DebugSettings()
+    coordination: CoordinationSettings = CoordinationSettings()
+    accounts: list[AccountSpec]
+
+    @model_validator(mode="after")
+    def validate_accounts(self) -> AccountsManifest:
+        if not self.accounts:
+            raise ValueError("accounts manifest lists no accounts")
+        names = [a.name for a in self.accounts]
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        if duplicates:
+            raise ValueError(f"duplicate account names: {', '.join(duplicates)}")
+        return self
+
+
+def load_manifest(path: str | Path) -> AccountsManifest:
+    """Read an accounts manifest; account config paths resolve relative to it."""
+    path = Path(path)
+    data = yaml.safe_load(path.read_text()) or {}
+    manifest = AccountsManifest.model_validate(data)
+    for account in manifest.accounts:
+        config = Path(account.config).expanduser()
+        if not config.is_absolute():
+            account.config = str(path.parent / config)
+    if manifest.coordination.path is not None:
+        lease_path = Path(manifest.coordination.path).expanduser()
+        if not lease_path.is_absolute():
+            manifest.coordination.path = str(path.parent / lease_path)
+    return manifest
@@ -0,0 +1,451 @@
+"""Multi-account runner: N mailboxes in one process.
+
+One scheduler thread (the main thread) decides when each account polls, and a
+shared thread pool runs the polls. Scheduling per account is the same as
+the single-account service: push (after debounce), backlog, scheduled and
+fallback. Each account also has its own failure counter and health status.
+An account that fails to start, or fails MAX_CONSECUTIVE_FAILURES polls in
+a row, is taken out of rotation instead of stopping the process. Startup
+is retried every polling interval. A "failed" account is not a dead end:
+it restarts from scratch after an exponential backoff capped at
+MAX_BACKOFF_INTERVALS polling intervals, the way the single-account
+service recovers when Kubernetes restarts it.
+
+Every account's EventSource stream is held by one SSEMultiplexer (one
+thread, one event loop), whose signals feed the same scheduler. Per-account
+cost is the clients, workflow state and one idle stream: the interpreter,
+imported modules, TLS context and threads are shared.
+
+With a Coordinator, the process is one of several replicas: only accounts
+whose lease this replica holds are scheduled. The rest stand by (status
+"standby") until their lease moves here.
+"""
+
+from __future__ import annotations
+
+import queue
+import signal
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import structlog
+from pydantic import ValidationError
+
+from mailroom.accounts.coordination import Coordinator
+from mailroom.accounts.leases import build_lease_backend
+from mailroom.accounts.manifest import AccountsManifest, AccountSpec, CoordinationSettings
+from mailroom.clients.carddav import CardDAVClient
+from mailroom.clients.jmap import JMAPClient
+from mailroom.clients.session_cache import session_cache_from_settings
+from mailroom.core import tracing
+from mailroom.core.config import MailroomSettings
+from mailroom.eventsource import drain_queue
+from mailroom.eventsource_mux import SSEMultiplexer, Subscription
+from mailroom.workflows.screener import ScreenerWorkflow
+
+MAX_CONSECUTIVE_FAILURES = 10
+MAX_BACKOFF_INTERVALS = 4  # cap on a failed account's restart delay, in polling intervals
+
+
+class AccountHealth:
+    """Health of one account, shaped like HealthHandler's status attributes.
+
+    The EventSource listener writes to it directly as its ``health_cls``.
+    """
+
+    def __init__(self, poll_interval: int) -> None:
+        self.poll_interval = poll_interval
+        self.status = "starting"  # starting | running | failed | standby
+        self.last_error: str | None = None
+        self.last_successful_poll = 0.0
+        self.last_poll_trigger: str | None = None
+        self.consecutive_failures = 0
+        self.sse_status = "not_started"
+        self.sse_connected_since: float | None = None
+        self.sse_last_event_at: float | None = None
+        self.sse_reconnect_count = 0
+        self.sse_last_error: str | None = None
+
+    @property
+    def healthy(self) -> bool:
+        """Starting, standing by, or running and polled recently (as /healthz)."""
+        if self.status == "standby":
+            return True  # another replica serves this account
+        if self.status == "starting":
+            return self.last_error is None
+        if self.status != "running":
+            return False
+        age = time.time() - self.last_successful_poll
+        return self.last_successful_poll == 0.0 or age < self.poll_interval * 2
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "healthy": self.healthy,
+            "last_error": self.last_error,
+            "last_successful_poll": self.last_successful_poll or None,
+            "last_poll_trigger": self.last_poll_trigger,
+            "consecutive_failures": self.consecutive_failures,
+            "eventsource": {
+                "status": self.sse_status,
+                "connected_since": self.sse_connected_since,
+                "last_event_at": self.sse_last_event_at,
+                "reconnect_count": self.sse_reconnect_count,
+                "last_error": self.sse_last_error,
+            },
+        }
+
+
+class _WakeQueue(queue.Queue):
+    """Event queue that also wakes the scheduler when an SSE signal arrives."""
+
+    def __init__(self, wake: threading.Event) -> None:
+        super().__init__()
+        self._wake = wake
+
+    def put(self, item, block=True, timeout=None) -> None:
+        super().put(item, block, timeout)
+        self._wake.set()
+
+
+def connect_account(
+    settings: MailroomSettings, transport: httpx.BaseTransport | None = None
+) -> tuple[ScreenerWorkflow, JMAPClient]:
+    """Startup steps 2-6 of ``mailroom.__main__.main`` for one account."""
+    jmap = JMAPClient(
+        token=settings.jmap_token,
+        http=settings.http,
+        transport=transport,
+        session_cache=session_cache_from_settings(settings.state),
+    )
+    jmap.connect()
+    carddav = CardDAVClient(
+        username=settings.carddav_username,
+        password=settings.carddav_password,
+        http=settings.http,
+        transport=transport,
+    )
+    carddav.connect()
+    mailbox_ids = jmap.resolve_mailboxes(settings.required_mailboxes)
+    carddav.validate_groups(
+        settings.contact_groups + [settings.mailroom.provenance_group],
+        infrastructure_groups=[settings.mailroom.provenance_group],
+    )
+    return ScreenerWorkflow(jmap, carddav, settings, mailbox_ids), jmap
+
+
+class Account:
+    """Scheduling state for one hosted account (owned by the scheduler thread)."""
+
+    def __init__(self, name: str, settings: MailroomSettings, wake: threading.Event) -> None:
+        self.name = name
+        self.settings = settings
+        self.health = AccountHealth(settings.polling.interval)
+        self.events: queue.Queue = _WakeQueue(wake)
+        self.workflow: ScreenerWorkflow | None = None
+        self.event_source_url: str | None = None
+        self.in_flight = False
+        self.active = True  # False while another replica holds this account's lease
+        self.next_poll_at = 0.0  # monotonic; also the next startup attempt
+        self.push_due: float | None = None
+
+    def due(self, now: float) -> str | None:
+        """Return the trigger for work due now ("startup", "push", ...), or None."""
+        if not self.active or self.in_flight:
+            return None
+        if self.workflow is None:
+            return "startup" if now >= self.next_poll_at else None
+        if drain_queue(self.events) and self.push_due is None:
+            self.push_due = now + self.settings.polling.debounce_seconds
+        if self.workflow.backlog:
+            return "backlog"
+        if self.push_due is not None and now >= self.push_due:
+            return "push"
+        if now >= self.next_poll_at:
+            return "scheduled" if self.health.sse_status == "connected" else "fallback"
+        return None
+
+    def backoff(self) -> float:
+        """Seconds until a failed account is restarted (doubles per further failure)."""
+        interval = self.settings.polling.interval
+        extra = max(0, self.health.consecutive_failures - MAX_CONSECUTIVE_FAILURES)
+        return interval * min(2**extra, MAX_BACKOFF_INTERVALS)
+
+    def next_wakeup(self) -> float | None:
+        """Monotonic time at which this account next needs the scheduler."""
+        if not self.active or self.in_flight:
+            return None
+        if self.push_due is not None:
+            return min(self.push_due, self.next_poll_at)
+        return self.next_poll_at
+
+
+def fit_polling_to_lease(
+    name: str, settings: MailroomSettings, coordination: CoordinationSettings
+) -> None:
+    """Clamp an account's poll deadline to the time its lease is trusted.
+
+    A lease is trusted for ``lease_seconds - renew_seconds`` after its last
+    renewal. If renewals start failing mid-poll, the poll must be over by
+    then, or it overlaps with the replica that takes the account over. The
+    poll budget is clamped to half of that, so polls defer leftover senders
+    instead of running into the deadline.
+    """
+    polling = settings.polling
+    bound = max(1, int(coordination.lease_seconds - coordination.renew_seconds))
+    if polling.poll_timeout_seconds <= bound:
+        return
+    structlog.get_logger(component="accounts").warning(
+        "poll_timeout_clamped",
+        account=name,
+        poll_timeout_seconds=polling.poll_timeout_seconds,
+        clamped_to=bound,
+    )
+    polling.poll_timeout_seconds = bound
+    polling.budget_seconds = min(polling.budget_seconds, max(1, bound // 2))
+
+
+class MultiAccountRunner:
+    """Run many accounts' poll loops on one shared thread pool.
+
+    Args:
+        accounts: (name, settings) per hosted account.
+        workers: Size of the shared poll thread pool.
+        transports: Inner transport per account name, replacing the network (tests).
+        start_eventsource: Subscribe each account's EventSource stream.
+        eventsource: Multiplexer holding every account's stream (one is
+            created if None, using the first account's ``http:`` settings).
+        coordinator: Lease coordinator when running as one of several
+            replicas; None serves every account.
+    """
+
+    def __init__(
+        self,
+        accounts: list[tuple[str, MailroomSettings]],
+        workers: int = 4,
+        transports: Mapping[str, httpx.BaseTransport] | None = None,
+        start_eventsource: bool = True,
+        eventsource: SSEMultiplexer | None = None,
+        coordinator: Coordinator | None = None,
+    ) -> None:
+        self._wake = threading.Event()
+        self.shutdown_event = threading.Event()
+        self.accounts = {
+            name: Account(name, settings, self._wake) for name, settings in accounts
+        }
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="poll")
+        self._transports = transports or {}
+        self._start_eventsource = start_eventsource
+        self._mux = eventsource or SSEMultiplexer(
+            http=accounts[0][1].http if accounts else None
+        )
+        self._coordinator = coordinator
+        if coordinator is not None:
+            for account in self.accounts.values():
+                account.active = False
+                account.health.status = "standby"
+        self._log = structlog.get_logger(component="accounts")
+
+    @property
+    def health(self) -> dict[str, AccountHealth]:
+        return {name: account.health for name, account in self.accounts.items()}
+
+    def run(self) -> None:
+        """Schedule polls until shutdown, then wait for in-flight polls."""
+        self._log.info("multi_account_started", accounts=sorted(self.accounts))
+        try:
+            while not self.shutdown_event.is_set():
+                if self._coordinator is not None:
+                    self.coordinate()
+                self.tick()
+                self._wake.wait(timeout=self._sleep_for())
+                self._wake.clear()
+        finally:
+            self._pool.shutdown(wait=True)
+            self._mux.close()
+            if self._coordinator is not None:
+                self._coordinator.release_all()
+            self._log.info("service_stopped", reason="shutdown_signal")
+
+    def stop(self) -> None:
+        """Stop scheduling; polls in flight stop at their next sender boundary."""
+        self.shutdown_event.set()
+        for account in self.accounts.values():
+            if account.workflow is not None:
+                account.workflow.request_stop()
+        self._wake.set()
+
+    def tick(self) -> None:
+        """Submit every account's due work to the pool (one job per account at a time)."""
+        now = time.monotonic()
+        for account in self.accounts.values():
+            trigger = account.due(now)
+            if trigger is None:
+                continue
+            account.in_flight = True
+            if trigger != "startup":
+                account.push_due = None  # this poll's label scan covers pending events
+            self._pool.submit(self._job, account, trigger)
+
+    def coordinate(self) -> None:
+        """Start serving accounts whose lease we gained, stand by on the ones we lost."""
+        busy = [name for name, account in self.accounts.items() if account.in_flight]
+        owned = self._coordinator.refresh(busy)
+        for name, account in self.accounts.items():
+            if name in owned and not account.active:
+                account.active = True
+                account.next_poll_at = 0.0  # catch up on whatever arrived meanwhile
+                if account.health.status == "standby":
+                    account.health.status = "starting" if account.workflow is None else "running"
+                if account.workflow is not None:
+                    account.workflow.resume()
+                    self._subscribe(account)
+            elif name not in owned and account.active:
+                account.active = False
+                account.push_due = None
+                if account.in_flight and account.workflow is not None:
+                    # The lease is no longer trusted: another replica may take it
+                    # within renew_seconds, so abandon the sender in progress now
+                    # (its labels stay in place) instead of racing the new owner
+                    account.workflow.request_stop(drain_seconds=0)
+                    self._log.warning("poll_stopped_lease_lost", account=name)
+                if account.health.status != "failed":
+                    account.health.status = "standby"
+                self._mux.unsubscribe(name)
+
+    def _sleep_for(self) -> float:
+        wakeups = [w for a in self.accounts.values() if (w := a.next_wakeup()) is not None]
+        if self._coordinator is not None:
+            wakeups.append(self._coordinator.next_refresh)
+        if not wakeups:
+            return 60.0  # only in-flight or standby accounts: woken by job completion
+        return min(60.0, max(0.0, min(wakeups) - time.monotonic()))
+
+    def _job(self, account: Account, trigger: str) -> None:
+        with structlog.contextvars.bound_contextvars(account=account.name):
+            try:
+                if trigger == "startup":
+                    self._startup(account)
+                else:
+                    self._poll(account, trigger)
+            finally:
+                account.in_flight = False
+                self._wake.set()
+
+    def _startup(self, account: Account) -> None:
+        transport = self._transports.get(account.name)
+        try:
+            workflow, jmap = connect_account(account.settings, transport=transport)
+        except Exception as exc:
+            account.health.last_error = f"startup failed: {exc}"
+            delay = account.settings.polling.interval
+            if account.health.status == "failed":
+                account.health.consecutive_failures += 1
+                delay = account.backoff()
+            account.next_poll_at = time.monotonic() + delay
+            self._log.error("account_startup_failed", exc_info=True)
+            return
+        account.workflow = workflow
+        account.event_source_url = jmap.event_source_url
+        account.health.status = "running" if account.active else "standby"
+        account.health.last_error = None
+        account.next_poll_at = 0.0  # first poll right away, like the single-account service
+        if account.active:
+            self._subscribe(account)
+        self._log.info("account_started", push_enabled=jmap.event_source_url is not None)
+
+    def _subscribe(self, account: Account) -> None:
+        if not self._start_eventsource or not account.event_source_url:
+            return
+        self._mux.subscribe(
+            Subscription(
+                key=account.name,
+                token=account.settings.jmap_token,
+                event_source_url=account.event_source_url,
+                event_queue=account.events,
+                health=account.health,
+                log=structlog.get_logger(component="eventsource", account=account.name),
+            )
+        )
+
+    def _poll(self, account: Account, trigger: str) -> None:
+        health = account.health
+        try:
+            with tracing.poll_trace(trigger, account=account.name):
+                account.workflow.poll()
+            health.consecutive_failures = 0
+            health.last_successful_poll = time.time()
+            health.last_poll_trigger = trigger
+        except Exception as exc:
+            health.consecutive_failures += 1
+            health.last_error = str(exc)
+            self._log.error(
+                "poll_failed",
+                consecutive_failures=health.consecutive_failures,
+                trigger=trigger,
+                exc_info=True,
+            )
+            if health.consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                # Restart from scratch (fresh clients and mailbox IDs) after a backoff
+                health.status = "failed"
+                account.workflow = None
+                account.next_poll_at = time.monotonic() + account.backoff()
+                self._mux.unsubscribe(account.name)
+                self._log.critical(
+                    "account_disabled",
+                    threshold=MAX_CONSECUTIVE_FAILURES,
+                    retry_in_seconds=account.backoff(),
+                )
+        finally:
+            if account.workflow is not None:
+                account.next_poll_at = time.monotonic() + account.settings.polling.interval
+
+
+def run_accounts(manifest: AccountsManifest) -> None:
+    """Run every account in ``manifest`` in this process (``mailroom run --accounts``)."""
+    from mailroom.__main__ import HEALTH_PORT, HealthHandler, _start_health_server
+    from mailroom.core.logging import configure_logging
+
+    configure_logging(manifest.logging.level)
+    log = structlog.get_logger(component="accounts")
+
+    # Config errors are fatal for the whole process: they never fix themselves
+    accounts = [(spec.name, _load(spec)) for spec in manifest.accounts]
+    coordinator = None
+    coordination = manifest.coordination
+    if coordination.mode != "none":
+        for name, settings in accounts:
+            fit_polling_to_lease(name, settings, coordination)
+        coordinator = Coordinator(
+            build_lease_backend(coordination),
+            [name for name, _ in accounts],
+            mode=coordination.mode,
+            holder=coordination.holder,
+            prefix=coordination.lease_prefix,
+            lease_seconds=coordination.lease_seconds,
+            renew_seconds=coordination.renew_seconds,
+        )
+        log.info("coordination_enabled", mode=coordination.mode, holder=coordinator.holder)
+    runner = MultiAccountRunner(accounts, workers=manifest.workers, coordinator=coordinator)
+
+    HealthHandler.accounts = runner.health
+    poll_interval = min(settings.polling.interval for _, settings in accounts)
+    _start_health_server(HEALTH_PORT, poll_interval, manifest.debug)
+
+    def _handle_signal(signum: int, frame: object) -> None:
+        log.info("shutdown_signal_received", signal=signum)
+        runner.stop()
+
+    signal.signal(signal.SIGTERM, _handle_signal)
+    signal.signal(signal.SIGINT, _handle_signal)
+    runner.run()
+
+
+def _load(spec: AccountSpec) -> MailroomSettings:
+    try:
+        return spec.load_settings()
+    except ValidationError as exc:
+        raise SystemExit(f"Configuration error for account {spec.name!r}: {exc}") from exc
@@ -19,8 +19,22 @@ def cli(ctx: click.Context) -> None:
 
 
 @cli.command()
-def run() -> None:
+@click.option(
+    "--accounts",
+    "accounts_file",
+    type=click.Path(exists=True, dir_okay=False),
+    envvar="MAILROOM_ACCOUNTS",
+    help="Accounts manifest: serve several mailboxes from this process",
+)
+def run(accounts_file: str | None = None) -> None:
     """Run the Mailroom polling service."""
+    if accounts_file:
+        from mailroom.accounts.manifest import load_manifest
+        from mailroom.accounts.runner import run_accounts
+
+        run_accounts(load_manifest(accounts_file))
+        return
+
     from mailroom.__main__ import main
 
     main()
@@ -38,9 +52,15 @@ def setup(apply: bool) -> None:
 
 @cli.command()
 @click.option("--apply", is_flag=True, default=False, help="Apply changes (default is dry-run)")
-def reset(apply: bool) -> None:
+@click.option(
+    "--restart",
+    is_flag=True,
+    default=False,
+    help="Discard an interrupted reset's checkpoint and plan from scratch",
+)
+def reset(apply: bool, restart: bool) -> None:
     """Reset all Mailroom changes: clean contacts, un-label emails, empty groups."""
     from mailroom.reset.resetter import run_reset
 
-    exit_code = run_reset(apply=apply)
+    exit_code = run_reset(apply=apply, restart=restart)
     sys.exit(exit_code)
@@ -4,12 +4,16 @@ from __future__ import annotations
 
 import uuid
 import xml.etree.ElementTree as ET
+from collections.abc import Callable, Iterable, Iterator
 from datetime import date
 
 import httpx
 import vobject
 from nameparser import HumanName
 
+from mailroom.clients.transport import create_http_client
+from mailroom.core.config import HttpSettings
+
 # XML namespace constants (Clark notation for ElementTree)
 DAV = "{DAV:}"
 CARDDAV = "{urn:ietf:params:xml:ns:carddav}"
@@ -47,6 +51,96 @@ REPORT_ALL_VCARDS = b"""<?xml version="1.0" encoding="UTF-8"?>
 </C:addressbook-query>"""
 
 
+def _iter_multistatus(chunks: Iterable[bytes]) -> Iterator[dict]:
+    """Incrementally parse a 207 Multi-Status body into resource dicts.
+
+    Each DAV:response is yielded as soon as it is complete and then
+    dropped from the tree, so memory stays flat however large the body.
+    Responses without a 200 propstat are skipped.
+
+    Yields:
+        Dicts with 'href', 'etag', and 'vcard_data' keys.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = element
+                continue
+            if element.tag != f"{DAV}response" or element is root:
+                continue
+            item = _multistatus_item(element)
+            root.remove(element)
+            if item is not None:
+                yield item
+    parser.close()
+
+
+def _multistatus_item(response_el: ET.Element) -> dict | None:
+    """Extract href, etag and address data from one DAV:response (or None)."""
+    href = response_el.findtext(f"{DAV}href", "")
+    propstat = response_el.find(f"{DAV}propstat")
+    if propstat is None:
+        return None
+
+    status = propstat.findtext(f"{DAV}status", "")
+    if "200" not in status:
+        return None
+
+    prop = propstat.find(f"{DAV}prop")
+    if prop is None:
+        return None
+
+    return {
+        "href": href,
+        "etag": prop.findtext(f"{DAV}getetag", ""),
+        "vcard_data": prop.findtext(f"{CARDDAV}address-data", ""),
+    }
+
+
+def _contact_from_item(item: dict) -> dict | None:
+    """Build a contact dict from a multistatus item (None for groups/empty)."""
+    vcard_data = item.get("vcard_data", "")
+    if not vcard_data:
+        return None
+    card = vobject.readOne(vcard_data)
+    # Skip group vCards
+    kind_list = card.contents.get("x-addressbookserver-kind", [])
+    if kind_list and kind_list[0].value.lower() == "group":
+        return None
+
+    fn = card.fn.value if hasattr(card, "fn") else ""
+    uid = card.uid.value if hasattr(card, "uid") else ""
+    emails = [
+        e.value.lower()
+        for e in card.contents.get("email", [])
+    ]
+    note_entries = card.contents.get("note", [])
+    note = note_entries[0].value if note_entries else ""
+
+    return {
+        "href": item["href"],
+        "etag": item["etag"],
+        "uid": uid,
+        "fn": fn,
+        "emails": emails,
+        "note": note,
+        "vcard_data": vcard_data,
+    }
+
+
+def _without(remove_urns: set[str]) -> Callable[[list[str]], list[str]]:
+    """Member-list rewrite that drops ``remove_urns`` and keeps the rest in order."""
+
+    def rewrite(urns: list[str]) -> list[str]:
+        return [urn for urn in urns if urn not in remove_urns]
+
+    return rewrite
+
+
 class CardDAVClient:
     """Thin CardDAV client over httpx for Fastmail contact operations.
 
@@ -61,9 +155,13 @@ class CardDAVClient:
         username: str,
         password: str,
         hostname: str = "carddav.fastmail.com",
+        http: HttpSettings | None = None,
+        transport: httpx.BaseTransport | None = None,
     ) -> None:
         self._hostname = hostname
-        self._http = httpx.Client(
+        self._http = create_http_client(
+            http,
+            transport=transport,
             auth=httpx.BasicAuth(username, password),
             headers={"Content-Type": "application/xml; charset=utf-8"},
             follow_redirects=True,
@@ -157,33 +255,7 @@ class CardDAVClient:
         Returns:
             List of dicts with 'href', 'etag', and 'vcard_data' keys.
         """
-        root = ET.fromstring(xml_bytes)
-        results = []
-
-        for response_el in root.findall(f"{DAV}response"):
-            href = response_el.findtext(f"{DAV}href", "")
-            propstat = response_el.find(f"{DAV}propstat")
-            if propstat is None:
-                continue
-
-            status = propstat.findtext(f"{DAV}status", "")
-            if "200" not in status:
-                continue
-
-            prop = propstat.find(f"{DAV}prop")
-            if prop is None:
-                continue
-
-            etag = prop.findtext(f"{DAV}getetag", "")
-            address_data = prop.findtext(f"{CARDDAV}address-data", "")
-
-            results.append({
-                "href": href,
-                "etag": etag,
-                "vcard_data": address_data,
-            })
-
-        return results
+        return list(_iter_multistatus([xml_bytes]))
 
     def list_groups(self) -> dict[str, dict]:
         """Fetch all contact groups from the addressbook.
@@ -473,25 +545,23 @@ class CardDAVClient:
             "uid": contact_uid,
         }
 
-    def add_to_group(
+    def _rewrite_members(
         self,
         group_name: str,
-        contact_uid: str,
-        max_retries: int = 3,
+        rewrite: Callable[[list[str]], list[str]],
+        max_retries: int,
+        action: str,
     ) -> str:
-        """Add a contact to a group by modifying the group's vCard.
+        """Apply ``rewrite`` to a group's member URNs in one GET + If-Match PUT.
 
-        Fetches the group vCard, appends an X-ADDRESSBOOKSERVER-MEMBER
-        entry, and PUTs it back with If-Match for concurrency safety.
-        Retries on 412 Precondition Failed (ETag conflict).
-
-        Args:
-            group_name: Name of the group (must exist in self._groups).
-            contact_uid: UID of the contact to add.
-            max_retries: Maximum number of retry attempts on 412.
+        ``rewrite`` receives the current member URNs and returns the final
+        list. If the list is unchanged no PUT is sent. On 412 Precondition
+        Failed (someone else changed the group) the group is re-fetched and
+        ``rewrite`` applied again, so concurrent edits are never lost.
 
         Returns:
-            The new ETag of the group vCard after successful PUT.
+            The ETag of the group vCard (new ETag after PUT, or current
+            ETag if nothing changed).
 
         Raises:
             RuntimeError: After exhausting retries on 412 conflicts.
@@ -501,8 +571,6 @@ class CardDAVClient:
         href = group_info["href"]
         group_url = f"https://{self._hostname}{href}"
 
-        member_urn = f"urn:uuid:{contact_uid}"
-
         for attempt in range(max_retries):
             # GET current group vCard
             resp = self._http.get(group_url)
@@ -511,16 +579,18 @@ class CardDAVClient:
 
             card = vobject.readOne(resp.text)
 
-            # Check if already a member
-            existing_members = card.contents.get(
-                "x-addressbookserver-member", []
-            )
-            existing_urns = [m.value for m in existing_members]
-            if member_urn in existing_urns:
+            existing_urns = [
+                m.value for m in card.contents.get("x-addressbookserver-member", [])
+            ]
+            final_urns = rewrite(existing_urns)
+            if final_urns == existing_urns:
                 return current_etag
 
-            # Add new member
-            card.add("x-addressbookserver-member").value = member_urn
+            # Rebuild the member list; with no members the key is dropped
+            # entirely to avoid vobject serialization issues with empty lists
+            card.contents.pop("x-addressbookserver-member", None)
+            for urn in final_urns:
+                card.add("x-addressbookserver-member").value = urn
 
             # PUT with If-Match
             put_resp = self._http.put(
@@ -543,10 +613,40 @@ class CardDAVClient:
             return new_etag
 
         raise RuntimeError(
-            f"Failed to add member to group {group_name} "
+            f"Failed to {action} group {group_name} "
             f"after {max_retries} retries (ETag conflict)"
         )
 
+    def add_to_group(
+        self,
+        group_name: str,
+        contact_uid: str,
+        max_retries: int = 3,
+    ) -> str:
+        """Add a contact to a group by modifying the group's vCard.
+
+        Fetches the group vCard, appends an X-ADDRESSBOOKSERVER-MEMBER
+        entry, and PUTs it back with If-Match for concurrency safety.
+        Retries on 412 Precondition Failed (ETag conflict).
+
+        Args:
+            group_name: Name of the group (must exist in self._groups).
+            contact_uid: UID of the contact to add.
+            max_retries: Maximum number of retry attempts on 412.
+
+        Returns:
+            The new ETag of the group vCard after successful PUT.
+
+        Raises:
+            RuntimeError: After exhausting retries on 412 conflicts.
+        """
+        member_urn = f"urn:uuid:{contact_uid}"
+
+        def append(urns: list[str]) -> list[str]:
+            return urns if member_urn in urns else [*urns, member_urn]
+
+        return self._rewrite_members(group_name, append, max_retries, "add member to")
+
     def remove_from_group(
         self,
         group_name: str,
@@ -574,64 +674,84 @@ class CardDAVClient:
         Raises:
             RuntimeError: After exhausting retries on 412 conflicts.
         """
-        self._require_connection()
-        group_info = self._groups[group_name]
-        href = group_info["href"]
-        group_url = f"https://{self._hostname}{href}"
+        return self._rewrite_members(
+            group_name,
+            _without({f"urn:uuid:{contact_uid}"}),
+            max_retries,
+            "remove member from",
+        )
 
-        member_urn = f"urn:uuid:{contact_uid}"
+    def remove_members(
+        self,
+        group_name: str,
+        contact_uids: list[str],
+        max_retries: int = 3,
+    ) -> str:
+        """Remove many contacts from a group with a single vCard rewrite.
 
-        for attempt in range(max_retries):
-            # GET current group vCard
-            resp = self._http.get(group_url)
-            resp.raise_for_status()
-            current_etag = resp.headers.get("etag", "")
+        Same GET + If-Match PUT cycle as remove_from_group(), but all
+        members are filtered out at once: one round-trip pair per group
+        instead of one per member. Retries on 412 Precondition Failed.
 
-            card = vobject.readOne(resp.text)
+        Idempotent: UIDs that are not members are ignored, and no PUT is
+        sent if none of them are.
 
-            # Check if member is present
-            existing_members = card.contents.get(
-                "x-addressbookserver-member", []
-            )
-            existing_urns = [m.value for m in existing_members]
-            if member_urn not in existing_urns:
-                return current_etag
+        Args:
+            group_name: Name of the group (must exist in self._groups).
+            contact_uids: UIDs of the contacts to remove.
+            max_retries: Maximum number of retry attempts on 412.
 
-            # Filter out the member
-            filtered = [
-                m for m in existing_members if m.value != member_urn
-            ]
-            if filtered:
-                card.contents["x-addressbookserver-member"] = filtered
-            else:
-                # Last member removed -- delete the key to avoid
-                # vobject serialization issues with empty lists
-                del card.contents["x-addressbookserver-member"]
+        Returns:
+            The ETag of the group vCard (new ETag after PUT, or current
+            ETag if nothing had to be removed).
 
-            # PUT with If-Match
-            put_resp = self._http.put(
-                group_url,
-                content=card.serialize().encode("utf-8"),
-                headers={
-                    "Content-Type": "text/vcard; charset=utf-8",
-                    "If-Match": current_etag,
-                },
-            )
+        Raises:
+            RuntimeError: After exhausting retries on 412 conflicts.
+        """
+        return self._rewrite_members(
+            group_name,
+            _without({f"urn:uuid:{uid}" for uid in contact_uids}),
+            max_retries,
+            "remove members from",
+        )
 
-            if put_resp.status_code == 412:
-                continue
+    def set_group_members(
+        self,
+        group_name: str,
+        contact_uids: list[str],
+        max_retries: int = 3,
+    ) -> str:
+        """Replace a group's members with exactly ``contact_uids``.
 
-            put_resp.raise_for_status()
+        Writes the final member list in a single If-Match PUT, however
+        many members are added or dropped: the bulk counterpart of
+        add_to_group()/remove_from_group() for flows that know the
+        complete target membership (emptying a group on reset, bulk
+        re-triage). Duplicate UIDs are collapsed; the order is kept.
+        Retries on 412 Precondition Failed (ETag conflict).
 
-            # Update stored ETag
-            new_etag = put_resp.headers.get("etag", "")
-            self._groups[group_name]["etag"] = new_etag
-            return new_etag
+        Idempotent: if the group already has exactly these members, returns
+        the current ETag without a PUT.
 
-        raise RuntimeError(
-            f"Failed to remove member from group {group_name} "
-            f"after {max_retries} retries (ETag conflict)"
-        )
+        Args:
+            group_name: Name of the group (must exist in self._groups).
+            contact_uids: UIDs the group should contain (empty to clear it).
+            max_retries: Maximum number of retry attempts on 412.
+
+        Returns:
+            The ETag of the group vCard (new ETag after PUT, or current
+            ETag if the members already matched).
+
+        Raises:
+            RuntimeError: After exhausting retries on 412 conflicts.
+        """
+        target = list(dict.fromkeys(f"urn:uuid:{uid}" for uid in contact_uids))
+
+        def replace(urns: list[str]) -> list[str]:
+            # Same set in a different order is not worth a PUT
+            return urns if sorted(urns) == sorted(target) else target
+
+        return self._rewrite_members(group_name, replace, max_retries, "set members of")
 
     def list_all_contacts(self) -> list[dict]:
         """Fetch all non-group contacts from the addressbook.
@@ -642,50 +762,83 @@ class CardDAVClient:
         Returns:
             List of contact dicts.
 
+        Raises:
+            RuntimeError: If connect() has not been called.
+        """
+        return list(self.iter_contacts())
+
+    def iter_contacts(self) -> Iterator[dict]:
+        """Stream all non-group contacts from the addressbook.
+
+        Same dicts as list_all_contacts(), but the REPORT response is
+        parsed incrementally as it downloads: only one contact is held at
+        a time, so callers that keep a small summary per contact (reset
+        planning) use memory proportional to what they keep, not to the
+        size of the addressbook.
+
+        Yields:
+            Contact dicts (href, etag, uid, fn, emails, note, vcard_data).
+
         Raises:
             RuntimeError: If connect() has not been called.
         """
         addressbook_url = self._require_connection()
-        resp = self._http.request(
+        with self._http.stream(
             "REPORT",
             addressbook_url,
             content=REPORT_ALL_VCARDS,
             headers={"Depth": "1"},
+        ) as resp:
+            resp.raise_for_status()
+            for item in _iter_multistatus(resp.iter_bytes()):
+                contact = _contact_from_item(item)
+                if contact is not None:
+                    yield contact
+
+    def get_contacts(self, hrefs: list[str]) -> list[dict]:
+        """Fetch specific contacts with one addressbook-multiget REPORT.
+
+        Args:
+            hrefs: vCard resource hrefs (paths) to fetch.
+
+        Returns:
+            Dicts with 'href', 'etag' and 'vcard_data' for the hrefs that
+            still exist (deleted ones are simply missing).
+
+        Raises:
+            RuntimeError: If connect() has not been called.
+        """
+        addressbook_url = self._require_connection()
+        if not hrefs:
+            return []
+
+        multiget = ET.Element(
+            f"{CARDDAV}addressbook-multiget",
+            {
+                "xmlns:D": "DAV:",
+                "xmlns:C": "urn:ietf:params:xml:ns:carddav",
+            },
         )
-        resp.raise_for_status()
-        all_items = self._parse_multistatus(resp.content)
+        prop = ET.SubElement(multiget, f"{DAV}prop")
+        ET.SubElement(prop, f"{DAV}getetag")
+        ET.SubElement(prop, f"{CARDDAV}address-data")
+        for href in hrefs:
+            ET.SubElement(multiget, f"{DAV}href").text = href
 
-        contacts: list[dict] = []
-        for item in all_items:
-            vcard_data = item.get("vcard_data", "")
-            if not vcard_data:
-                continue
-            card = vobject.readOne(vcard_data)
-            # Skip group vCards
-            kind_list = card.contents.get("x-addressbookserver-kind", [])
-            if kind_list and kind_list[0].value.lower() == "group":
-                continue
+        xml_body = ET.tostring(multiget, encoding="unicode", xml_declaration=True)
 
-            fn = card.fn.value if hasattr(card, "fn") else ""
-            uid = card.uid.value if hasattr(card, "uid") else ""
-            emails = [
-                e.value.lower()
-                for e in card.contents.get("email", [])
-            ]
-            note_entries = card.contents.get("note", [])
-            note = note_entries[0].value if note_entries else ""
+        resp = self._http.request(
+            "REPORT",
+            addressbook_url,
+            content=xml_body.encode("utf-8"),
+            headers={
+                "Content-Type": "application/xml; charset=utf-8",
+                "Depth": "1",
+            },
+        )
+        resp.raise_for_status()
 
-            contacts.append({
-                "href": item["href"],
-                "etag": item["etag"],
-                "uid": uid,
-                "fn": fn,
-                "emails": emails,
-                "note": note,
-                "vcard_data": vcard_data,
-            })
-
-        return contacts
+        return [item for item in self._parse_multistatus(resp.content) if item["vcard_data"]]
 
     def delete_contact(self, href: str, etag: str) -> None:
         """Delete a contact vCard from the addressbook.
@@ -2,9 +2,26 @@
 
 from __future__ import annotations
 
+from collections.abc import Sequence
+
 import httpx
 
+from mailroom.clients.models import Email, Mailbox, MethodResponse
+from mailroom.clients.session_cache import SessionCache
+from mailroom.clients.transport import IDEMPOTENT_EXTENSION, create_http_client
+from mailroom.core import jsoncodec
+from mailroom.core.config import HttpSettings
+
 BATCH_SIZE = 100  # Max emails per Email/set call (conservative under Fastmail's 500 minimum)
+QUERIES_PER_REQUEST = 16  # Email/query calls per request (well under Fastmail's maxCallsInRequest)
+
+# Method suffixes that never modify server state (safe to retry on 5xx)
+READ_ONLY_SUFFIXES = ("/get", "/query", "/changes", "/queryChanges")
+
+# A cached session that answers with these is stale (moved apiUrl, new token)
+STALE_SESSION_STATUS = frozenset({401, 403, 404})
+
+JSON_HEADERS = {"Content-Type": "application/json"}
 
 
 class JMAPClient:
@@ -16,10 +33,20 @@ class JMAPClient:
         mailboxes = client.resolve_mailboxes(["Inbox", "Screener", "@ToImbox"])
     """
 
-    def __init__(self, token: str, hostname: str = "api.fastmail.com") -> None:
+    def __init__(
+        self,
+        token: str,
+        hostname: str = "api.fastmail.com",
+        http: HttpSettings | None = None,
+        transport: httpx.BaseTransport | None = None,
+        session_cache: SessionCache | None = None,
+    ) -> None:
         self._token = token
         self._hostname = hostname
-        self._http = httpx.Client(
+        self._session_cache = session_cache
+        self._http = create_http_client(
+            http,
+            transport=transport,
             headers={
                 "Content-Type": "application/json",
                 "Authorization": f"Bearer {token}",
@@ -29,6 +56,8 @@ class JMAPClient:
         self._account_id: str | None = None
         self._download_url: str | None = None
         self._event_source_url: str | None = None
+        self._session_state: str | None = None
+        self._session_from_cache = False
 
     @property
     def account_id(self) -> str:
@@ -42,20 +71,37 @@ class JMAPClient:
         """Return the EventSource URL from the JMAP session, or None."""
         return self._event_source_url
 
-    def connect(self) -> None:
+    def connect(self, refresh: bool = False) -> None:
         """Discover JMAP session: fetch account ID and API URL from Fastmail.
 
+        With a session cache, a cached session document is used instead of
+        fetching one (unless ``refresh`` is True). It is revalidated whenever
+        an API response reports a different ``sessionState``.
+
         Raises:
             httpx.HTTPStatusError: On 401 (bad token) or other HTTP errors.
             httpx.ConnectError: On network failure.
         """
+        if self._session_cache is not None and not refresh:
+            cached = self._session_cache.load(self._token)
+            if cached is not None:
+                self._apply_session(cached)
+                self._session_from_cache = True
+                return
         resp = self._http.get(f"https://{self._hostname}/jmap/session")
         resp.raise_for_status()
-        data = resp.json()
+        data = jsoncodec.loads(resp.content)
+        self._apply_session(data)
+        self._session_from_cache = False
+        if self._session_cache is not None:
+            self._session_cache.store(self._token, data)
+
+    def _apply_session(self, data: dict) -> None:
         self._account_id = data["primaryAccounts"]["urn:ietf:params:jmap:mail"]
         self._api_url = data["apiUrl"]
         self._download_url = data.get("downloadUrl")
         self._event_source_url = data.get("eventSourceUrl")
+        self._session_state = data.get("state")
 
     def call(self, method_calls: list) -> list:
         """Execute JMAP method calls against the API endpoint.
@@ -68,7 +114,8 @@ class JMAPClient:
 
         Raises:
             RuntimeError: If connect() has not been called.
-            httpx.HTTPStatusError: On HTTP errors from the API.
+            httpx.HTTPStatusError: On HTTP errors from the API (after the
+                transport's 429/5xx retries are exhausted).
         """
         if self._api_url is None:
             raise RuntimeError("JMAPClient is not connected. Call connect() first.")
@@ -80,9 +127,88 @@ class JMAPClient:
             ],
             "methodCalls": method_calls,
         }
-        resp = self._http.post(self._api_url, json=payload)
+        # Encoded once, straight to bytes (the stale-session retry reuses it)
+        body = jsoncodec.dumps(payload)
+        read_only = all(mc[0].endswith(READ_ONLY_SUFFIXES) for mc in method_calls)
+        resp = self._http.post(
+            self._api_url,
+            content=body,
+            headers=JSON_HEADERS,
+            extensions={IDEMPOTENT_EXTENSION: read_only},
+        )
+        if self._session_from_cache and resp.status_code in STALE_SESSION_STATUS:
+            # The cached session may point at a moved apiUrl: refetch, retry once
+            self.connect(refresh=True)
+            resp = self._http.post(
+                self._api_url,
+                content=body,
+                headers=JSON_HEADERS,
+                extensions={IDEMPOTENT_EXTENSION: read_only},
+            )
         resp.raise_for_status()
-        return resp.json()["methodResponses"]
+        data = jsoncodec.loads(resp.content)
+        session_state = data.get("sessionState")
+        if (
+            session_state is not None
+            and self._session_state is not None
+            and session_state != self._session_state
+        ):
+            self.connect(refresh=True)  # apiUrl/capabilities may have changed
+        return data["methodResponses"]
+
+    def get_mailboxes(self) -> list[Mailbox]:
+        """Fetch every mailbox in the account with one Mailbox/get.
+
+        Returns:
+            List of Mailbox records.
+
+        Raises:
+            RuntimeError: If Mailbox/get returns a method-level error.
+        """
+        response = MethodResponse.from_json(
+            self.call([["Mailbox/get", {"accountId": self.account_id, "ids": None}, "m0"]])[0]
+        )
+        if response.error:
+            raise RuntimeError(f"Mailbox/get failed: {response.error}")
+        return [Mailbox.from_json(mb) for mb in response.args["list"]]
+
+    def get_emails(self, email_ids: list[str], properties: list[str]) -> list[Email]:
+        """Fetch emails as Email records, in BATCH_SIZE chunks.
+
+        Args:
+            email_ids: Email IDs to fetch (unknown IDs are skipped).
+            properties: JMAP properties to request; "id" is always included.
+                Only "from" and "mailboxIds" are kept on the records.
+
+        Returns:
+            List of Email records, one per email found.
+
+        Raises:
+            RuntimeError: If Email/get returns a method-level error.
+        """
+        properties = list(dict.fromkeys(["id", *properties]))
+        emails: list[Email] = []
+        for chunk_start in range(0, len(email_ids), BATCH_SIZE):
+            chunk = email_ids[chunk_start : chunk_start + BATCH_SIZE]
+            response = MethodResponse.from_json(
+                self.call(
+                    [
+                        [
+                            "Email/get",
+                            {
+                                "accountId": self.account_id,
+                                "ids": chunk,
+                                "properties": properties,
+                            },
+                            "g0",
+                        ]
+                    ]
+                )[0]
+            )
+            if response.error:
+                raise RuntimeError(f"Email/get failed: {response.error}")
+            emails.extend(Email.from_json(e) for e in response.args["list"])
+        return emails
 
     def resolve_mailboxes(self, required_names: list[str]) -> dict[str, str]:
         """Resolve mailbox names to Fastmail mailbox IDs.
@@ -104,30 +230,22 @@ class JMAPClient:
             ValueError: If any required mailbox names are not found,
                 listing all missing names.
         """
-        responses = self.call(
-            [["Mailbox/get", {"accountId": self.account_id, "ids": None}, "m0"]]
-        )
-        mailbox_list = responses[0][1]["list"]
-
         # Build lookup structures
         name_to_id: dict[str, str] = {}
         inbox_id: str | None = None
 
-        for mb in mailbox_list:
+        for mb in self.get_mailboxes():
             # Track the role-based Inbox
-            if mb.get("role") == "inbox":
-                inbox_id = mb["id"]
-
-            name = mb["name"]
-            parent_id = mb.get("parentId")
+            if mb.role == "inbox":
+                inbox_id = mb.id
 
             # For custom mailboxes: prefer top-level (parentId=None)
-            if name not in name_to_id:
+            if mb.name not in name_to_id:
                 # First occurrence -- always record it
-                name_to_id[name] = mb["id"]
-            elif parent_id is None:
+                name_to_id[mb.name] = mb.id
+            elif mb.parent_id is None:
                 # This is a top-level duplicate -- prefer it over a child
-                name_to_id[name] = mb["id"]
+                name_to_id[mb.name] = mb.id
 
         # Build result map with special Inbox handling
         result: dict[str, str] = {}
@@ -164,29 +282,73 @@ class JMAPClient:
         Raises:
             RuntimeError: If Mailbox/set reports creation failed, with error type and description.
         """
-        create_args: dict = {
-            "name": name,
-            "isSubscribed": True,
-        }
-        if parent_id is not None:
-            create_args["parentId"] = parent_id
+        created, failed = self.create_mailboxes([(name, parent_id)])
+        if name in failed:
+            raise RuntimeError(failed[name])
+        return created[name]
+
+    def create_mailboxes(
+        self, mailboxes: list[tuple[str, str | None]]
+    ) -> tuple[dict[str, str], dict[str, str]]:
+        """Create several mailboxes with a single Mailbox/set request.
+
+        Each entry is ``(name, parent)``. A parent that names another
+        mailbox earlier in the same list is sent as a creation-ID
+        back-reference (``"#mb0"``), so a parent and its children are
+        created in one round-trip; any other parent is used as an
+        existing mailbox ID. If a parent fails, the server rejects its
+        children too.
+
+        Args:
+            mailboxes: (name, parent) pairs, parents before their children.
+
+        Returns:
+            Tuple of (created, failed): server-assigned IDs by name, and
+            error messages by name for each entry reported in notCreated.
+
+        Raises:
+            RuntimeError: If the Mailbox/set call as a whole fails.
+        """
+        creation_ids: dict[str, str] = {}
+        create: dict[str, dict] = {}
+        for i, (name, parent) in enumerate(mailboxes):
+            create_args: dict = {
+                "name": name,
+                "isSubscribed": True,
+            }
+            if parent is not None:
+                create_args["parentId"] = (
+                    f"#{creation_ids[parent]}" if parent in creation_ids else parent
+                )
+            creation_ids[name] = f"mb{i}"
+            create[f"mb{i}"] = create_args
 
         responses = self.call(
             [["Mailbox/set", {
                 "accountId": self.account_id,
-                "create": {"mb0": create_args},
+                "create": create,
             }, "c0"]]
         )
+        if responses[0][0] == "error":
+            raise RuntimeError(
+                f"Mailbox/set failed: {responses[0][1].get('type', 'unknown error')}"
+            )
         data = responses[0][1]
-        created = data.get("created", {})
-        if "mb0" in created:
-            return created["mb0"]["id"]
-        not_created = data.get("notCreated", {})
-        error = not_created.get("mb0", {})
-        raise RuntimeError(
-            f"Failed to create mailbox '{name}': "
-            f"{error.get('type', 'unknown')} - {error.get('description', '')}"
-        )
+        created_data = data.get("created") or {}  # RFC 8620 allows null
+        not_created = data.get("notCreated") or {}
+
+        created: dict[str, str] = {}
+        failed: dict[str, str] = {}
+        for name, cid in creation_ids.items():
+            if cid in created_data:
+                created[name] = created_data[cid]["id"]
+                continue
+            error = not_created.get(cid, {})
+            failed[name] = (
+                f"Failed to create mailbox '{name}': "
+                f"{error.get('type', 'unknown')} - {error.get('description', '')}"
+            )
+        return created, failed
 
     def query_emails(
         self,
@@ -238,6 +400,81 @@ class JMAPClient:
 
         return all_ids
 
+    def count_emails(self, mailbox_ids: list[str]) -> dict[str, int]:
+        """Count the emails in each mailbox without fetching their IDs.
+
+        Sends one Email/query per mailbox with ``limit: 0`` and
+        ``calculateTotal``, all in a single JMAP request.
+
+        Args:
+            mailbox_ids: JMAP mailbox IDs to count.
+
+        Returns:
+            Dict mapping mailbox ID to its email count.
+        """
+        if not mailbox_ids:
+            return {}
+        responses = self.call(
+            [
+                [
+                    "Email/query",
+                    {
+                        "accountId": self.account_id,
+                        "filter": {"inMailbox": mailbox_id},
+                        "limit": 0,
+                        "calculateTotal": True,  # total is only returned on request
+                    },
+                    f"q{i}",
+                ]
+                for i, mailbox_id in enumerate(mailbox_ids)
+            ]
+        )
+        counts: dict[str, int] = {}
+        for mailbox_id, response in zip(mailbox_ids, responses):
+            if response[0] == "error":
+                raise RuntimeError(
+                    f"Email/query failed for mailbox {mailbox_id}: "
+                    f"{response[1].get('type', 'unknown error')}"
+                )
+            counts[mailbox_id] = response[1]["total"]
+        return counts
+
+    def query_email_page(
+        self,
+        mailbox_id: str,
+        limit: int = BATCH_SIZE,
+        position: int = 0,
+    ) -> list[str]:
+        """Return one page of email IDs in a mailbox (no pagination).
+
+        For callers that move emails out of the mailbox as they go: they
+        re-read position 0 until the page comes back empty, holding at most
+        one page of IDs at a time.
+
+        Args:
+            mailbox_id: The JMAP mailbox ID to query.
+            limit: Page size.
+            position: Index of the first email to return.
+
+        Returns:
+            List of up to ``limit`` email ID strings.
+        """
+        responses = self.call(
+            [
+                [
+                    "Email/query",
+                    {
+                        "accountId": self.account_id,
+                        "filter": {"inMailbox": mailbox_id},
+                        "limit": limit,
+                        "position": position,
+                    },
+                    "q0",
+                ]
+            ]
+        )
+        return responses[0][1]["ids"]
+
     def query_emails_by_sender(
         self,
         sender: str,
@@ -286,6 +523,62 @@ class JMAPClient:
 
         return all_ids
 
+    def query_emails_by_senders(
+        self,
+        senders: list[str],
+        limit: int = 100,
+    ) -> dict[str, list[str]]:
+        """Query email IDs from many senders across all mailboxes, batched.
+
+        The multi-sender form of query_emails_by_sender(): one Email/query
+        per sender, QUERIES_PER_REQUEST of them per JMAP request. Senders
+        whose page came back full are queried again at the next position
+        in a later request, so round-trips scale with the number of
+        emails, not with senders times latency.
+
+        Args:
+            senders: Sender email addresses (duplicates are queried once).
+            limit: Maximum emails per page, per sender.
+
+        Returns:
+            Dict mapping each sender to its list of email IDs.
+
+        Raises:
+            RuntimeError: If any Email/query in a request returns an error.
+        """
+        results: dict[str, list[str]] = {sender: [] for sender in senders}
+        pending = list(results)  # senders with (possibly) more pages
+
+        while pending:
+            batch, pending = pending[:QUERIES_PER_REQUEST], pending[QUERIES_PER_REQUEST:]
+            responses = self.call(
+                [
+                    [
+                        "Email/query",
+                        {
+                            "accountId": self.account_id,
+                            "filter": {"from": sender},
+                            "limit": limit,
+                            "position": len(results[sender]),
+                        },
+                        f"q{i}",
+                    ]
+                    for i, sender in enumerate(batch)
+                ]
+            )
+            for sender, response in zip(batch, responses):
+                if response[0] == "error":
+                    raise RuntimeError(
+                        f"Email/query failed for sender {sender}: "
+                        f"{response[1].get('type', 'unknown error')}"
+                    )
+                ids = response[1]["ids"]
+                results[sender].extend(ids)
+                if len(ids) == limit:
+                    pending.append(sender)
+
+        return results
+
     def get_email_senders(
         self, email_ids: list[str]
     ) -> dict[str, tuple[str, str | None]]:
@@ -302,36 +595,15 @@ class JMAPClient:
             display_name is None when the From header has no name,
             an empty name, or a whitespace-only name.
         """
-        responses = self.call(
-            [
-                [
-                    "Email/get",
-                    {
-                        "accountId": self.account_id,
-                        "ids": email_ids,
-                        "properties": ["id", "from"],
-                    },
-                    "g0",
-                ]
-            ]
-        )
-        email_list = responses[0][1]["list"]
-
-        result: dict[str, tuple[str, str | None]] = {}
-        for email in email_list:
-            from_list = email.get("from", [])
-            if from_list:
-                sender_email = from_list[0]["email"]
-                name = from_list[0].get("name") or None
-                if name and not name.strip():
-                    name = None
-                result[email["id"]] = (sender_email, name)
-
-        return result
+        return {
+            email.id: (email.sender, email.sender_name)
+            for email in self.get_emails(email_ids, ["from"])
+            if email.sender is not None
+        }
 
     def get_email_mailbox_ids(
         self, email_ids: list[str]
-    ) -> dict[str, set[str]]:
+    ) -> dict[str, frozenset[str]]:
         """Get mailbox membership for each email ID.
 
         Uses Email/get with properties=["id", "mailboxIds"] to determine
@@ -342,33 +614,12 @@ class JMAPClient:
             email_ids: List of email IDs to look up.
 
         Returns:
-            Dict mapping email_id to a set of mailbox ID strings.
+            Dict mapping email_id to a frozenset of mailbox ID strings.
         """
-        result: dict[str, set[str]] = {}
-
-        for chunk_start in range(0, len(email_ids), BATCH_SIZE):
-            chunk = email_ids[chunk_start : chunk_start + BATCH_SIZE]
-
-            responses = self.call(
-                [
-                    [
-                        "Email/get",
-                        {
-                            "accountId": self.account_id,
-                            "ids": chunk,
-                            "properties": ["id", "mailboxIds"],
-                        },
-                        "g0",
-                    ]
-                ]
-            )
-            email_list = responses[0][1]["list"]
-
-            for email in email_list:
-                mailbox_ids_map = email.get("mailboxIds", {})
-                result[email["id"]] = set(mailbox_ids_map.keys())
-
-        return result
+        return {
+            email.id: email.mailbox_ids
+            for email in self.get_emails(email_ids, ["mailboxIds"])
+        }
 
     def batch_add_labels(
         self,
@@ -387,36 +638,7 @@ class JMAPClient:
         Raises:
             RuntimeError: If any emails fail to update.
         """
-        for chunk_start in range(0, len(email_ids), BATCH_SIZE):
-            chunk = email_ids[chunk_start : chunk_start + BATCH_SIZE]
-
-            update: dict = {}
-            for email_id in chunk:
-                patch = {f"mailboxIds/{mb_id}": True for mb_id in mailbox_ids}
-                update[email_id] = patch
-
-            responses = self.call(
-                [
-                    [
-                        "Email/set",
-                        {
-                            "accountId": self.account_id,
-                            "update": update,
-                        },
-                        "s0",
-                    ]
-                ]
-            )
-            data = responses[0][1]
-            not_updated = data.get("notUpdated")
-            if not_updated:
-                errors = [
-                    f"{eid}: {err.get('description', 'unknown error')}"
-                    for eid, err in not_updated.items()
-                ]
-                raise RuntimeError(
-                    f"Failed to add labels to emails: {', '.join(errors)}"
-                )
+        self.batch_update_labels(email_ids, add=mailbox_ids)
 
     def batch_remove_labels(
         self,
@@ -435,13 +657,43 @@ class JMAPClient:
         Raises:
             RuntimeError: If any emails fail to update.
         """
+        self.batch_update_labels(email_ids, remove=mailbox_ids)
+
+    def batch_update_labels(
+        self,
+        email_ids: list[str],
+        add: Sequence[str] = (),
+        remove: Sequence[str] = (),
+    ) -> None:
+        """Add and remove mailbox labels on emails with one Email/set per chunk.
+
+        Both changes go into the same patch, which the server applies
+        atomically per email: moving emails between labels this way never
+        leaves one with zero mailboxes (RFC 8621 requires at least one).
+        Processes in BATCH_SIZE chunks.
+
+        Args:
+            email_ids: List of email IDs to modify.
+            add: Mailbox label IDs to add to each email.
+            remove: Mailbox label IDs to remove from each email.
+
+        Raises:
+            RuntimeError: If any emails fail to update.
+        """
+        patch: dict = {f"mailboxIds/{mb_id}": True for mb_id in add}
+        patch.update({f"mailboxIds/{mb_id}": None for mb_id in remove})
+        if not add:
+            action = "remove labels from"
+        elif not remove:
+            action = "add labels to"
+        else:
+            action = "update labels on"
+
         for chunk_start in range(0, len(email_ids), BATCH_SIZE):
             chunk = email_ids[chunk_start : chunk_start + BATCH_SIZE]
 
-            update: dict = {}
-            for email_id in chunk:
-                patch = {f"mailboxIds/{mb_id}": None for mb_id in mailbox_ids}
-                update[email_id] = patch
+            # Every email gets the same patch: share one dict, it is only serialized
+            update: dict = dict.fromkeys(chunk, patch)
 
             responses = self.call(
                 [
@@ -463,7 +715,7 @@ class JMAPClient:
                     for eid, err in not_updated.items()
                 ]
                 raise RuntimeError(
-                    f"Failed to remove labels from emails: {', '.join(errors)}"
+                    f"Failed to {action} emails: {', '.join(errors)}"
                 )
 
     def remove_label(self, email_id: str, mailbox_id: str) -> None:
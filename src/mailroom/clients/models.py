@@ -0,0 +1,83 @@
+"""Typed, slotted records for the JMAP objects Mailroom reads.
+
+JMAP responses decode to nested dicts and lists. Large scans (reconcile,
+reset) hold thousands of Email objects at once, and every consumer used
+to re-index them (``email.get("from", [])[0]["email"]``). These records
+are built once per object, right after decoding. They keep only the
+properties Mailroom uses, in ``__slots__`` instances without a per-object
+``__dict__``, and give every consumer plain attribute access.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class MethodResponse:
+    """One ``[name, arguments, callId]`` entry of methodResponses."""
+
+    name: str
+    args: dict
+    call_id: str
+
+    @classmethod
+    def from_json(cls, data: list) -> MethodResponse:
+        name, args, call_id = data
+        return cls(name, args, call_id)
+
+    @property
+    def error(self) -> str | None:
+        """The method-level error type, or None if the call succeeded."""
+        if self.name != "error":
+            return None
+        return self.args.get("type", "unknown error")
+
+
+@dataclass(frozen=True, slots=True)
+class Mailbox:
+    """A JMAP Mailbox (only the properties Mailroom uses)."""
+
+    id: str
+    name: str
+    role: str | None = None
+    parent_id: str | None = None
+
+    @classmethod
+    def from_json(cls, data: dict) -> Mailbox:
+        return cls(
+            id=data["id"],
+            name=data["name"],
+            role=data.get("role"),
+            parent_id=data.get("parentId"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Email:
+    """A JMAP Email reduced to its ID, first From address and mailboxes.
+
+    ``sender_name`` is None when the From header has no name, an empty
+    name, or a whitespace-only name. ``mailbox_ids`` is empty unless the
+    mailboxIds property was fetched.
+    """
+
+    id: str
+    sender: str | None = None
+    sender_name: str | None = None
+    mailbox_ids: frozenset[str] = frozenset()
+
+    @classmethod
+    def from_json(cls, data: dict) -> Email:
+        sender = sender_name = None
+        from_list = data.get("from")
+        if from_list:
+            sender = from_list[0]["email"]
+            name = from_list[0].get("name")
+            sender_name = name if name and name.strip() else None
+        return cls(
+            id=data["id"],
+            sender=sender,
+            sender_name=sender_name,
+            mailbox_ids=frozenset(data.get("mailboxIds") or ()),
+        )
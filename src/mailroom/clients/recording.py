@@ -0,0 +1,275 @@
+"""Record-and-replay transports for profiling real poll cycles offline.
+
+RecordingTransport (opt-in via ``http.record_file``) appends every JMAP and
+CardDAV request/response pair, with its timing, to a JSONL file. Before
+anything is written the pair is sanitized:
+- Credentials are never recorded: Authorization and Cookie headers are dropped.
+- Email addresses are replaced with stable pseudonyms (``user17@example.invalid``).
+  The same address always maps to the same pseudonym, so data shapes and
+  sender grouping survive.
+- Display names (JMAP ``name`` fields, vCard FN/N/ORG/NICKNAME) become ``Name 17``.
+- Free text (subjects, previews, vCard NOTE/TEL/ADR) is redacted.
+
+ReplayTransport serves a recording back in order, optionally with the
+recorded latency, so ScreenerWorkflow can be run and profiled on real data
+shapes with no live account. EventSource streams are never recorded.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable
+from pathlib import Path
+from typing import Literal
+
+import httpx
+
+SENSITIVE_HEADERS = frozenset({"authorization", "cookie", "set-cookie"})
+
+_EMAIL = re.compile(r"[A-Za-z0-9._%+'-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+_UUID = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+_VCARD = re.compile(r"BEGIN:VCARD.*?END:VCARD", re.DOTALL)
+_VCARD_GROUP = re.compile(r"^X-ADDRESSBOOKSERVER-KIND:group", re.MULTILINE | re.IGNORECASE)
+_VCARD_NAME_LINE = re.compile(r"^((?:FN|N|ORG|NICKNAME)(?:;[^:\r\n]*)?):(.*)$", re.MULTILINE)
+_VCARD_TEXT_LINE = re.compile(r"^((?:NOTE|TEL|ADR)(?:;[^:\r\n]*)?):(.*)$", re.MULTILINE)
+_REDACTED_JSON_KEYS = frozenset({"subject", "preview", "textBody", "htmlBody", "bodyValues"})
+
+
+class Sanitizer:
+    """Consistent pseudonymization of addresses and names within one recording."""
+
+    def __init__(self) -> None:
+        self._emails: dict[str, str] = {}
+        self._names: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def email(self, match: re.Match) -> str:
+        address = match.group(0).lower()
+        if address.endswith("@example.invalid"):
+            return address
+        with self._lock:
+            alias = self._emails.get(address)
+            if alias is None:
+                alias = f"user{len(self._emails) + 1}@example.invalid"
+                self._emails[address] = alias
+            return alias
+
+    def name(self, value: str) -> str:
+        if not value.strip():
+            return value
+        with self._lock:
+            alias = self._names.get(value)
+            if alias is None:
+                alias = f"Name {len(self._names) + 1}"
+                self._names[value] = alias
+            return alias
+
+    def text(self, value: str) -> str:
+        """Sanitize free text: vCards first, then any remaining addresses."""
+        value = _VCARD.sub(lambda m: self._vcard(m.group(0)), value)
+        return _EMAIL.sub(self.email, value)
+
+    def _vcard(self, card: str) -> str:
+        # Group names are configuration (contact_groups), not personal data --
+        # keep them so a replay validates the same groups.
+        if not _VCARD_GROUP.search(card):
+            card = _VCARD_NAME_LINE.sub(
+                lambda m: f"{m.group(1)}:{self._vcard_name(m.group(1), m.group(2))}", card
+            )
+        return _VCARD_TEXT_LINE.sub(lambda m: f"{m.group(1)}:redacted", card)
+
+    def _vcard_name(self, prop: str, value: str) -> str:
+        if prop.upper().startswith("N") and not prop.upper().startswith("NICKNAME"):
+            return ";".join(self.name(part) if part else part for part in value.split(";"))
+        return self.name(value)
+
+    def json(self, value):
+        """Sanitize a decoded JSON document (JMAP request or response)."""
+        if isinstance(value, dict):
+            out = {}
+            for key, item in value.items():
+                if key in _REDACTED_JSON_KEYS:
+                    out[key] = "redacted"
+                elif key == "name" and isinstance(item, str) and "email" in value:
+                    out[key] = self.name(item)  # EmailAddress objects only
+                else:
+                    out[key] = self.json(item)
+            return out
+        if isinstance(value, list):
+            return [self.json(item) for item in value]
+        if isinstance(value, str):
+            return _EMAIL.sub(self.email, value)
+        return value
+
+    def body(self, content: bytes, content_type: str) -> str:
+        """Sanitize a request/response body into text for the recording."""
+        if not content:
+            return ""
+        if "json" in content_type:
+            try:
+                return json.dumps(self.json(json.loads(content)))
+            except ValueError:
+                pass
+        try:
+            return self.text(content.decode("utf-8"))
+        except UnicodeDecodeError:
+            return "base64:" + base64.b64encode(content).decode()
+
+    def url(self, url: httpx.URL) -> str:
+        return _EMAIL.sub(self.email, str(url))
+
+    @staticmethod
+    def headers(headers: httpx.Headers) -> dict[str, str]:
+        return {k: v for k, v in headers.items() if k.lower() not in SENSITIVE_HEADERS}
+
+
+def request_key(method: str, url: str) -> str:
+    """Replay lookup key: method + URL with UUIDs and addresses wildcarded.
+
+    New contacts get fresh UIDs on every run, and CardDAV URLs embed the
+    (pseudonymized) account name, so neither can be matched literally.
+    """
+    return f"{method} {_EMAIL.sub('{email}', _UUID.sub('{uuid}', url))}"
+
+
+# Headers describing the encoded wire body, invalid once the body is decoded
+_BODY_HEADERS = ("content-length", "content-encoding", "transfer-encoding")
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """Transport wrapper that appends sanitized request/response pairs to a JSONL file.
+
+    Args:
+        inner: The transport that actually performs requests.
+        path: JSONL file to append to (created with its parent directory).
+        sanitizer: Pseudonymizer (shared if several clients record to one file).
+    """
+
+    def __init__(
+        self,
+        inner: httpx.BaseTransport,
+        path: str | Path,
+        sanitizer: Sanitizer | None = None,
+    ) -> None:
+        self._inner = inner
+        self._path = Path(path).expanduser()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._sanitizer = sanitizer or _shared_sanitizer(self._path)
+        self._lock = _file_lock(self._path)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.monotonic()
+        response = self._inner.handle_request(request)
+        if response.headers.get("content-type", "").startswith("text/event-stream"):
+            return response  # never buffer a push stream
+        content = response.read()
+        elapsed = time.monotonic() - started
+
+        s = self._sanitizer
+        entry = {
+            "method": request.method,
+            "url": s.url(request.url),
+            "request_headers": s.headers(request.headers),
+            "request_body": s.body(request.content, request.headers.get("content-type", "")),
+            "status": response.status_code,
+            "response_headers": s.headers(response.headers),
+            "response_body": s.body(content, response.headers.get("content-type", "")),
+            "elapsed": round(elapsed, 6),
+        }
+        line = json.dumps(entry) + "\n"
+        with self._lock, self._path.open("a") as f:
+            f.write(line)
+
+        # read() decoded the body, so its encoding and length headers no longer apply
+        headers = [
+            (k, v) for k, v in response.headers.multi_items() if k.lower() not in _BODY_HEADERS
+        ]
+        return httpx.Response(
+            response.status_code,
+            headers=headers,
+            content=content,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+# One sanitizer + lock per recording file, so the JMAP and CardDAV clients
+# (separate transports) agree on pseudonyms and never interleave lines.
+_registry_lock = threading.Lock()
+_sanitizers: dict[Path, Sanitizer] = {}
+_file_locks: dict[Path, threading.Lock] = {}
+
+
+def _shared_sanitizer(path: Path) -> Sanitizer:
+    with _registry_lock:
+        return _sanitizers.setdefault(path.resolve(), Sanitizer())
+
+
+def _file_lock(path: Path) -> threading.Lock:
+    with _registry_lock:
+        return _file_locks.setdefault(path.resolve(), threading.Lock())
+
+
+class ReplayMismatch(Exception):
+    """Raised when a replayed run makes a request the recording does not contain."""
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """Serve a recording back, matching requests by method and URL in recorded order.
+
+    Args:
+        path: JSONL recording written by RecordingTransport.
+        latency: "recorded" sleeps for each entry's recorded time; "none" replies
+            immediately (CPU-only profiling).
+        sleep: Sleep function (injectable for tests).
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        latency: Literal["recorded", "none"] = "none",
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._latency = latency
+        self._sleep = sleep
+        self._entries: dict[str, deque[dict]] = defaultdict(deque)
+        self._lock = threading.Lock()
+        with Path(path).expanduser().open() as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[request_key(entry["method"], entry["url"])].append(entry)
+
+    @property
+    def remaining(self) -> int:
+        """Recorded responses not served yet."""
+        with self._lock:
+            return sum(len(q) for q in self._entries.values())
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(request.method, str(request.url))
+        with self._lock:
+            pending = self._entries.get(key)
+            if not pending:
+                raise ReplayMismatch(f"no recorded response left for {key}")
+            entry = pending.popleft()
+        if self._latency == "recorded":
+            self._sleep(entry["elapsed"])
+        body = entry["response_body"]
+        content = (
+            base64.b64decode(body[7:]) if body.startswith("base64:") else body.encode("utf-8")
+        )
+        headers = {
+            k: v
+            for k, v in entry["response_headers"].items()
+            if k.lower() not in _BODY_HEADERS
+        }
+        return httpx.Response(entry["status"], headers=headers, content=content, request=request)
@@ -0,0 +1,122 @@
+"""JMAP session document cache (in memory + on disk), keyed by token hash.
+
+The session document (apiUrl, accountId, capabilities, eventSourceUrl) rarely
+changes, yet every CLI invocation used to fetch it cold. JMAPClient loads it
+from here instead and refreshes it when an API response reports a new
+``sessionState``.
+
+The cache is disposable: any read or write failure (missing directory,
+read-only filesystem, corrupt file) is treated as a cache miss. The token
+itself is never written -- only its SHA-256 digest, as the file name.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import structlog
+
+from mailroom.core.config import StateSettings
+
+log = structlog.get_logger(component="session_cache")
+
+# Shared across clients in one process (e.g. setup's plan + apply phases)
+_memory: dict[str, dict] = {}
+_memory_lock = threading.Lock()
+
+
+def token_key(token: str) -> str:
+    """Return the cache key for ``token`` (hex SHA-256, never the token itself)."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class SessionCache:
+    """Two-level session cache: process memory first, then ``directory``.
+
+    Args:
+        directory: Where session files are stored. None keeps the cache in
+            memory only.
+    """
+
+    def __init__(self, directory: str | Path | None = None) -> None:
+        self._directory = Path(directory) if directory is not None else None
+
+    def _path(self, key: str) -> Path | None:
+        if self._directory is None:
+            return None
+        return self._directory / f"jmap-session-{key[:32]}.json"
+
+    def load(self, token: str) -> dict | None:
+        """Return the cached session for ``token``, or None on a miss."""
+        key = token_key(token)
+        with _memory_lock:
+            session = _memory.get(key)
+        if session is not None:
+            return session
+        path = self._path(key)
+        if path is None:
+            return None
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("key") != key:
+            return None  # truncated key collision or foreign file
+        session = data.get("session")
+        if not isinstance(session, dict):
+            return None
+        with _memory_lock:
+            _memory[key] = session
+        return session
+
+    def store(self, token: str, session: dict) -> None:
+        """Cache ``session`` for ``token`` (disk write failures are ignored)."""
+        key = token_key(token)
+        with _memory_lock:
+            _memory[key] = session
+        path = self._path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".session-")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump({"key": key, "session": session}, f)
+                os.replace(tmp, path)  # atomic: readers never see a partial file
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError as exc:
+            log.debug("session_cache_write_failed", path=str(path), error=str(exc))
+
+    def invalidate(self, token: str) -> None:
+        """Forget the cached session for ``token`` in memory and on disk."""
+        key = token_key(token)
+        with _memory_lock:
+            _memory.pop(key, None)
+        path = self._path(key)
+        if path is None:
+            return
+        try:
+            path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+def session_cache_from_settings(state: StateSettings) -> SessionCache | None:
+    """Build the session cache for ``state:`` config (None when disabled)."""
+    if not state.session_cache:
+        return None
+    return SessionCache(Path(state.directory).expanduser())
+
+
+def clear_memory() -> None:
+    """Drop every in-memory session (used by tests)."""
+    with _memory_lock:
+        _memory.clear()
@@ -0,0 +1,320 @@
+"""Shared HTTP transport layer for the JMAP and CardDAV clients.
+
+ThrottledTransport wraps a real httpx transport and adds:
+- A token-bucket request budget per host, so bursts are smoothed out locally
+  instead of being rejected by Fastmail.
+- Retry-After-aware retries: 429 responses are retried for every request
+  (the server refused the request before processing it); 502/503/504 are
+  retried only for reads (GET, HEAD, OPTIONS, PROPFIND, REPORT and JMAP
+  requests marked read-only). Writes are never retried on 5xx: a gateway
+  error can hide a write that succeeded, and Mailroom's CardDAV writes are
+  conditional (If-Match / If-None-Match), so the retry would fail with
+  412 or 404 for work that was done. Without a Retry-After header the
+  delay is exponential backoff with full jitter.
+- Throttling counters in ``mailroom.core.metrics``.
+
+Waits never run past the active deadline (see ``mailroom.core.deadline``).
+
+``create_http_client`` is the one place httpx clients are built: it applies the
+``http:`` pool, keep-alive, HTTP/2 and timeout settings, so connections (and
+their TLS handshakes) are reused across polls and SSE reconnects.
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib.util
+import random
+import ssl
+import threading
+import time
+from collections.abc import Callable
+from datetime import UTC
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import httpx
+
+from mailroom.core import metrics, tracing
+from mailroom.core.config import HttpSettings
+from mailroom.core.deadline import DeadlineExceeded, current_deadline, enforce_deadline
+
+# Request extension a client sets to mark a POST as safe to retry (e.g. a
+# JMAP request made only of /get and /query calls).
+IDEMPOTENT_EXTENSION = "mailroom_idempotent"
+
+# Safe read methods: retried on 502/503/504
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PROPFIND", "REPORT"})
+RETRY_ANY_STATUS = frozenset({429})
+RETRY_IDEMPOTENT_STATUS = frozenset({502, 503, 504})
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, up to ``capacity``."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self._rate
+        if wait > 0:
+            active = current_deadline()
+            if active is not None and wait > active.remaining():
+                raise DeadlineExceeded(
+                    f"{active.name} of {active.seconds}s exceeded (request budget)"
+                )
+            self._sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Empty the bucket so nobody sends for ``seconds`` (server pushback)."""
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens = min(self._tokens, -seconds * self._rate)
+
+
+def parse_retry_after(value: str | None, now: Callable[[], float] = time.time) -> float | None:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=UTC)
+    return max(0.0, when.timestamp() - now())
+
+
+def _is_idempotent(request: httpx.Request) -> bool:
+    if request.extensions.get(IDEMPOTENT_EXTENSION):
+        return True
+    return request.method in IDEMPOTENT_METHODS
+
+
+class ThrottledTransport(httpx.BaseTransport):
+    """httpx transport wrapper adding request budgeting and throttling retries.
+
+    Args:
+        inner: The transport that actually performs requests.
+        requests_per_second: Sustained request rate allowed per host.
+        burst: Requests that may be sent back-to-back before throttling.
+        max_retries: Retries after a 429/5xx before giving up.
+        max_retry_after: Longest server-requested delay we are willing to
+            honor; a longer Retry-After returns the response to the caller.
+        backoff_base: First backoff ceiling in seconds (doubles per attempt).
+    """
+
+    def __init__(
+        self,
+        inner: httpx.BaseTransport,
+        *,
+        requests_per_second: float = 10.0,
+        burst: int = 20,
+        max_retries: int = 3,
+        max_retry_after: float = 60.0,
+        backoff_base: float = 0.5,
+        sleep: Callable[[float], None] = time.sleep,
+        jitter: Callable[[float, float], float] = random.uniform,
+    ) -> None:
+        self._inner = inner
+        self._rate = requests_per_second
+        self._burst = burst
+        self._max_retries = max_retries
+        self._max_retry_after = max_retry_after
+        self._backoff_base = backoff_base
+        self._sleep = sleep
+        self._jitter = jitter
+        self._buckets: dict[str, TokenBucket] = {}
+        self._buckets_lock = threading.Lock()
+
+    def _bucket(self, host: str) -> TokenBucket:
+        with self._buckets_lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self._rate, self._burst, sleep=self._sleep)
+                self._buckets[host] = bucket
+            return bucket
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float | None:
+        """Delay before retrying ``response``, or None if it should not be retried."""
+        retry_after = parse_retry_after(response.headers.get("retry-after"))
+        if retry_after is not None:
+            return retry_after if retry_after <= self._max_retry_after else None
+        return self._jitter(0.0, self._backoff_base * (2**attempt))
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        bucket = self._bucket(request.url.host)
+        attempt = 0
+        while True:
+            waited = bucket.acquire()
+            if waited > 0:
+                metrics.incr("http_budget_waits")
+            with tracing.span(
+                "http", method=request.method, host=request.url.host, path=request.url.path
+            ) as span:
+                response = self._inner.handle_request(request)
+                span["status"] = response.status_code
+                if waited > 0:
+                    span["budget_wait_ms"] = round(waited * 1000, 2)
+
+            status = response.status_code
+            retryable = status in RETRY_ANY_STATUS or (
+                status in RETRY_IDEMPOTENT_STATUS and _is_idempotent(request)
+            )
+            if status == 429:
+                metrics.incr("http_throttled")
+            elif status in RETRY_IDEMPOTENT_STATUS:
+                metrics.incr("http_unavailable")
+            if not retryable or attempt >= self._max_retries:
+                return response
+
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                return response
+            active = current_deadline()
+            if active is not None and delay > active.remaining():
+                return response  # caller sees the error status instead of a stall
+
+            # Pausing the shared bucket makes every request to this host (not
+            # just this retry) wait out the server's pushback.
+            response.close()
+            bucket.pause(delay)
+            metrics.incr("http_retries")
+            attempt += 1
+
+    def close(self) -> None:
+        self._inner.close()
+
+
+def http2_available() -> bool:
+    """True if the optional ``h2`` package (``mailroom[http2]``) is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+@functools.cache
+def _shared_ssl_context() -> ssl.SSLContext:
+    """One SSL context for every client, so the CA bundle is loaded only once."""
+    return httpx.create_ssl_context()
+
+
+def build_transport(
+    http: HttpSettings | None = None,
+    inner: httpx.BaseTransport | None = None,
+) -> ThrottledTransport:
+    """Build the standard throttled transport from ``http:`` config.
+
+    ``inner`` replaces the real network transport (e.g. a fake server in tests).
+    With ``http.record_file`` set, traffic below the throttle is recorded
+    (see mailroom.clients.recording), so retries appear as separate pairs.
+    """
+    http = http or HttpSettings()
+    if inner is None:
+        inner = httpx.HTTPTransport(
+            verify=_shared_ssl_context() if http.reuse_tls_context else True,
+            http2=http.http2 and http2_available(),
+            limits=httpx.Limits(
+                max_connections=http.max_connections,
+                max_keepalive_connections=http.max_keepalive_connections,
+                keepalive_expiry=http.keepalive_expiry_seconds,
+            ),
+        )
+    if http.record_file:
+        from mailroom.clients.recording import RecordingTransport
+
+        inner = RecordingTransport(inner, http.record_file)
+    return ThrottledTransport(
+        inner,
+        requests_per_second=http.requests_per_second,
+        burst=http.burst,
+        max_retries=http.max_retries,
+        max_retry_after=http.max_retry_after_seconds,
+    )
+
+
+def create_http_client(
+    http: HttpSettings | None = None,
+    *,
+    transport: httpx.BaseTransport | None = None,
+    timeout: httpx.Timeout | None = None,
+    **kwargs: Any,
+) -> httpx.Client:
+    """Create an httpx.Client with Mailroom's pooling, timeouts and deadline hook.
+
+    Args:
+        http: ``http:`` settings (defaults if None).
+        transport: Optional inner transport replacing the network.
+        timeout: Overrides the configured connect/read timeouts (the SSE
+            listener needs a much longer read timeout).
+        **kwargs: Passed through to httpx.Client (headers, auth, ...).
+    """
+    http = http or HttpSettings()
+    if timeout is None:
+        timeout = httpx.Timeout(
+            http.read_timeout_seconds,
+            connect=http.connect_timeout_seconds,
+        )
+    return httpx.Client(
+        transport=build_transport(http, inner=transport),
+        timeout=timeout,
+        event_hooks={"request": [enforce_deadline]},
+        **kwargs,
+    )
+
+
+def create_async_http_client(
+    http: HttpSettings | None = None,
+    *,
+    transport: httpx.AsyncBaseTransport | None = None,
+    timeout: httpx.Timeout | None = None,
+    **kwargs: Any,
+) -> httpx.AsyncClient:
+    """Create an httpx.AsyncClient for long-lived streams (the SSE multiplexer).
+
+    Shares the TLS context and keep-alive settings with the sync clients. The
+    pool has no connection cap, since every open stream holds one connection.
+    There is no request budget or deadline hook: streams connect rarely, and
+    no sender or poll deadline applies to them.
+    """
+    http = http or HttpSettings()
+    if transport is None:
+        transport = httpx.AsyncHTTPTransport(
+            verify=_shared_ssl_context() if http.reuse_tls_context else True,
+            http2=http.http2 and http2_available(),
+            limits=httpx.Limits(
+                max_connections=None,
+                max_keepalive_connections=http.max_keepalive_connections,
+                keepalive_expiry=http.keepalive_expiry_seconds,
+            ),
+        )
+    if timeout is None:
+        timeout = httpx.Timeout(
+            http.read_timeout_seconds,
+            connect=http.connect_timeout_seconds,
+        )
+    return httpx.AsyncClient(transport=transport, timeout=timeout, **kwargs)
@@ -5,8 +5,11 @@ from __future__ import annotations
 import json
 import os
 import sys
+from contextvars import ContextVar
+from collections.abc import Mapping
 from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
 from typing import Literal, Self
 
 from pydantic import BaseModel, Field, field_validator, model_validator
@@ -56,6 +59,20 @@ class ResolvedCategory:
     add_to_inbox: bool
 
 
+@dataclass(frozen=True)
+class CategoryRoute:
+    """Precomputed routing for one category: its parent chain and what it implies.
+
+    Built once when settings load (see ``MailroomSettings.routes``), so
+    triage does lookups instead of re-walking the chain per sender.
+    """
+
+    category: ResolvedCategory
+    chain: tuple[ResolvedCategory, ...]  # [self, parent, grandparent, ...]
+    groups: frozenset[str]  # contact groups along the chain
+    destinations: tuple[str, ...]  # destination mailboxes along the chain
+
+
 # -- Derivation helpers -----------------------------------------------------
 
 
@@ -273,6 +290,11 @@ class PollingSettings(BaseModel):
 
     interval: int = 60
     debounce_seconds: int = 1  # enough to coalesce multi-event SSE bursts
+    budget_seconds: int = 30  # per-poll time budget before deferring senders
+    budget_senders: int | None = None  # per-poll sender cap (None = unlimited)
+    sender_timeout_seconds: int = 60  # hard deadline for one sender's processing
+    poll_timeout_seconds: int = 90  # hard deadline for a whole poll cycle
+    drain_seconds: int = 20  # on shutdown, how long an in-flight poll may keep running
 
 
 class TriageSettings(BaseModel):
@@ -297,6 +319,49 @@ class MailroomSectionSettings(BaseModel):
     provenance_group: str = "Mailroom"
 
 
+class HttpSettings(BaseModel):
+    """HTTP connection pooling, timeouts, request budgeting and throttling retries."""
+
+    requests_per_second: float = 10.0  # sustained request budget per host
+    burst: int = 20  # requests allowed back-to-back before budgeting kicks in
+    reset_requests_per_second: float = 50.0  # budget for `reset --apply`'s concurrent writes
+    max_retries: int = 3  # retries on 429 (any request) and 502/503/504 (idempotent)
+    max_retry_after_seconds: int = 60  # longer Retry-After values are not waited out
+    max_connections: int = 10  # per client
+    max_keepalive_connections: int = 5  # idle connections kept warm per client
+    keepalive_expiry_seconds: float = 120.0  # > polling.interval so polls reuse connections
+    http2: bool = True  # used only if the optional h2 package is installed
+    connect_timeout_seconds: float = 10.0
+    read_timeout_seconds: float = 30.0
+    reuse_tls_context: bool = True  # one SSL context (CA bundle) shared by all clients
+    record_file: str | None = None  # append sanitized request/response pairs here (profiling)
+
+
+def _default_state_directory() -> str:
+    """XDG state directory: $XDG_STATE_HOME/mailroom or ~/.local/state/mailroom."""
+    base = os.environ.get("XDG_STATE_HOME") or str(Path.home() / ".local" / "state")
+    return str(Path(base) / "mailroom")
+
+
+class StateSettings(BaseModel):
+    """Local, disposable state (caches). Losing it only costs a cold start."""
+
+    directory: str = Field(default_factory=_default_state_directory)
+    session_cache: bool = True  # cache the JMAP session document between runs
+    sender_queue: bool = True  # keep the sender queue (order, unfinished work) between runs
+    sender_journal: bool = True  # keep per-sender step progress so retries resume
+    reset_checkpoint: bool = True  # let an interrupted `reset --apply` resume
+
+
+class DebugSettings(BaseModel):
+    """Opt-in diagnostics endpoints on the health server (/debug/*)."""
+
+    enabled: bool = False  # serve /debug/profile and /debug/poll-trace
+    max_profile_seconds: int = 60  # longest /debug/profile?seconds=N accepted
+    profile_hz: int = 100  # stack samples per second while profiling
+    poll_traces: int = 20  # poll timelines kept for /debug/poll-trace (0 = off)
+
+
 class LoggingSettings(BaseModel):
     """Logging configuration."""
 
@@ -308,12 +373,16 @@ class LoggingSettings(BaseModel):
 # ---------------------------------------------------------------------------
 
 
+# Set by load_settings() to read a specific account's config file
+_config_override: ContextVar[str | None] = ContextVar("mailroom_config_path", default=None)
+
+
 def _resolve_config_path() -> str:
-    """Resolve config.yaml path: MAILROOM_CONFIG env var or cwd default.
+    """Resolve config.yaml path: load_settings() override, MAILROOM_CONFIG env var or cwd default.
 
     Raises SystemExit with a helpful message if the config file is missing.
     """
-    config_path = os.environ.get("MAILROOM_CONFIG", "config.yaml")
+    config_path = _config_override.get() or os.environ.get("MAILROOM_CONFIG", "config.yaml")
     path = Path(config_path)
     if not path.exists():
         print(
@@ -329,7 +398,8 @@ def _resolve_config_path() -> str:
 class MailroomSettings(BaseSettings):
     """Application settings loaded from config.yaml + auth env vars.
 
-    Non-secret configuration lives in config.yaml (polling, triage, mailroom, logging).
+    Non-secret configuration lives in config.yaml (polling, triage, mailroom, http,
+    state, debug, logging).
     Auth credentials come from MAILROOM_-prefixed environment variables.
     """
 
@@ -350,6 +420,9 @@ class MailroomSettings(BaseSettings):
     polling: PollingSettings = PollingSettings()
     triage: TriageSettings = TriageSettings()
     mailroom: MailroomSectionSettings = MailroomSectionSettings()
+    http: HttpSettings = HttpSettings()
+    state: StateSettings = Field(default_factory=StateSettings)
+    debug: DebugSettings = DebugSettings()
     logging: LoggingSettings = LoggingSettings()
 
     @model_validator(mode="before")
@@ -359,7 +432,7 @@ class MailroomSettings(BaseSettings):
         if isinstance(data, dict) and "labels" in data:
             raise ValueError(
                 "Unknown configuration key 'labels'. "
-                "Valid top-level keys: triage, mailroom, logging, polling."
+                "Valid top-level keys: triage, mailroom, logging, polling, http, state, debug."
             )
         return data
 
@@ -388,6 +461,24 @@ class MailroomSettings(BaseSettings):
         object.__setattr__(
             self, "_label_to_category", {r.label: r for r in resolved}
         )
+        resolved_map = {r.name: r for r in resolved}
+        routes: dict[str, CategoryRoute] = {}
+        group_routes: dict[str, CategoryRoute] = {}
+        for r in resolved:
+            chain = tuple(get_parent_chain(r.name, resolved_map))
+            route = CategoryRoute(
+                category=r,
+                chain=chain,
+                groups=frozenset(c.contact_group for c in chain),
+                destinations=tuple(c.destination_mailbox for c in chain),
+            )
+            routes[r.label] = route
+            group_routes.setdefault(r.contact_group, route)  # first category wins
+        object.__setattr__(self, "_routes", MappingProxyType(routes))
+        object.__setattr__(self, "_group_routes", MappingProxyType(group_routes))
+        object.__setattr__(
+            self, "_managed_mailboxes", frozenset(r.destination_mailbox for r in resolved)
+        )
         return self
 
     @property
@@ -400,6 +491,21 @@ class MailroomSettings(BaseSettings):
         """Return a mapping from triage label to its resolved category."""
         return dict(self._label_to_category)
 
+    @property
+    def routes(self) -> Mapping[str, CategoryRoute]:
+        """Return the read-only triage label -> CategoryRoute table (no copy)."""
+        return self._routes
+
+    @property
+    def group_routes(self) -> Mapping[str, CategoryRoute]:
+        """Return the read-only contact group -> CategoryRoute table (no copy)."""
+        return self._group_routes
+
+    @property
+    def managed_mailboxes(self) -> frozenset[str]:
+        """Return the destination mailboxes of every category."""
+        return self._managed_mailboxes
+
     @property
     def required_mailboxes(self) -> list[str]:
         """Return all mailbox names that must exist at startup."""
@@ -424,3 +530,21 @@ class MailroomSettings(BaseSettings):
     def resolved_categories(self) -> list[ResolvedCategory]:
         """Return all resolved triage categories."""
         return list(self._resolved_categories)
+
+    @property
+    def state_dir(self) -> Path:
+        """Return the local state directory (may not exist yet)."""
+        return Path(self.state.directory).expanduser()
+
+
+def load_settings(config_path: str | Path, env_prefix: str = "MAILROOM_") -> MailroomSettings:
+    """Load settings from a given config file, with credentials under ``env_prefix``.
+
+    Used by the multi-account runner: each account has its own config.yaml and
+    its own credential variables (e.g. MAILROOM_ALICE_JMAP_TOKEN).
+    """
+    token = _config_override.set(str(config_path))
+    try:
+        return MailroomSettings(_env_prefix=env_prefix)
+    finally:
+        _config_override.reset(token)
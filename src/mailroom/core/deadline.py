@@ -0,0 +1,104 @@
+"""Cooperative deadlines enforced on every outgoing JMAP and CardDAV request.
+
+A deadline is opened with the ``deadline()`` context manager and stored in a
+context variable, so nothing has to be threaded through client method
+signatures. Both HTTP clients register ``enforce_deadline`` as an httpx
+request hook: it refuses to start a request once the deadline has passed and
+clamps each request's timeouts to the time remaining, so a slow GET or a 412
+retry storm cannot run past it.
+
+Nested deadlines never extend an outer one (per-sender inside per-poll).
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import httpx
+
+
+class DeadlineExceeded(Exception):
+    """Raised when work runs past its deadline."""
+
+
+class Deadline:
+    """An absolute point on the monotonic clock by which work must finish."""
+
+    def __init__(self, seconds: float, name: str = "deadline") -> None:
+        self.seconds = seconds
+        self.name = name
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left before expiry (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def shorten(self, seconds: float, name: str | None = None) -> None:
+        """Bring expiry forward to ``seconds`` from now (never extends it).
+
+        Safe to call from another thread or a signal handler: requests
+        already in flight keep their clamped timeouts, the next one sees
+        the new expiry.
+        """
+        expires_at = time.monotonic() + seconds
+        if expires_at < self.expires_at:
+            self.expires_at = expires_at
+            self.seconds = seconds
+            if name is not None:
+                self.name = name
+
+    def check(self) -> None:
+        """Raise DeadlineExceeded if the deadline has passed."""
+        if self.expired:
+            raise DeadlineExceeded(f"{self.name} of {self.seconds}s exceeded")
+
+
+_current: ContextVar[Deadline | None] = ContextVar("mailroom_deadline", default=None)
+
+
+def current_deadline() -> Deadline | None:
+    """Return the innermost active deadline, or None."""
+    return _current.get()
+
+
+@contextmanager
+def deadline(seconds: float, name: str = "deadline") -> Iterator[Deadline]:
+    """Run the enclosed block under a deadline.
+
+    If an enclosing deadline expires sooner, it stays in effect. A request
+    timeout raised after the deadline expired is re-raised as
+    DeadlineExceeded, so callers only need to handle one exception type.
+    """
+    outer = _current.get()
+    new = Deadline(seconds, name)
+    active = outer if outer is not None and outer.expires_at <= new.expires_at else new
+    token = _current.set(active)
+    try:
+        yield active
+    except httpx.TimeoutException as exc:
+        if active.expired:
+            raise DeadlineExceeded(f"{active.name} of {active.seconds}s exceeded") from exc
+        raise
+    finally:
+        _current.reset(token)
+
+
+def enforce_deadline(request: httpx.Request) -> None:
+    """httpx request hook: fail fast past the deadline, clamp timeouts to it."""
+    active = _current.get()
+    if active is None:
+        return
+    active.check()
+    remaining = active.remaining()
+    timeouts = dict(request.extensions.get("timeout", {}))
+    for key in ("connect", "read", "write", "pool"):
+        current = timeouts.get(key)
+        timeouts[key] = remaining if current is None else min(current, remaining)
+    request.extensions["timeout"] = timeouts
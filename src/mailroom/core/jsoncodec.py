@@ -0,0 +1,70 @@
+"""JSON codec for JMAP payloads and structured log output.
+
+Uses the fastest installed backend: orjson (``mailroom[fast-json]``), then
+msgspec, then the stdlib ``json`` module. Large Email/get and Email/set
+payloads during reconcile and reset spend measurable CPU in JSON, and
+both fast backends encode to and decode from bytes directly, skipping
+the str round-trip httpx's ``json=`` / ``resp.json()`` make.
+
+All backends produce equivalent JSON for the plain dict/list/str/number
+data JMAP uses; only whitespace and non-ASCII escaping differ.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional: mailroom[fast-json]
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional
+    msgspec = None
+
+
+def _stdlib_dumps(obj: Any, default: Callable[[Any], Any] | None = None) -> bytes:
+    return json.dumps(obj, default=default, separators=(",", ":")).encode("utf-8")
+
+
+def _stdlib_loads(data: bytes | str) -> Any:
+    return json.loads(data)
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+
+    def dumps(obj: Any, default: Callable[[Any], Any] | None = None) -> bytes:
+        """Encode ``obj`` as compact JSON bytes."""
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+
+    loads = orjson.loads
+elif msgspec is not None:
+    BACKEND = "msgspec"
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any, default: Callable[[Any], Any] | None = None) -> bytes:
+        """Encode ``obj`` as compact JSON bytes."""
+        if default is None:
+            return _encoder.encode(obj)
+        return msgspec.json.encode(obj, enc_hook=default)
+
+    loads = _decoder.decode
+else:
+    BACKEND = "json"
+    dumps = _stdlib_dumps
+    loads = _stdlib_loads
+
+
+def dumps_str(obj: Any, default: Callable[[Any], Any] | None = None, **_: Any) -> str:
+    """Encode ``obj`` as a JSON str (serializer for structlog's JSONRenderer).
+
+    structlog passes ``default=`` for values JSON cannot represent; other
+    stdlib-only keyword arguments are ignored.
+    """
+    return dumps(obj, default=default).decode("utf-8")
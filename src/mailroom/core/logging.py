@@ -1,6 +1,7 @@
 """Structured logging configuration for mailroom.
 
-Production (non-TTY stderr): structured JSON with ISO timestamps.
+Production (non-TTY stderr): structured JSON with ISO timestamps, encoded
+with the same codec as JMAP payloads (see mailroom.core.jsoncodec).
 Development (TTY stderr): colored console output for readability.
 """
 
@@ -9,8 +10,10 @@ import sys
 
 import structlog
 
+from mailroom.core import jsoncodec
 
-_PRIORITY_KEYS = ("timestamp", "level", "component", "event")
+
+_PRIORITY_KEYS = ("timestamp", "level", "account", "component", "event")
 
 
 def reorder_keys(
@@ -37,6 +40,7 @@ def configure_logging(log_level: str = "info") -> None:
     level = getattr(logging, log_level.upper(), logging.INFO)
 
     shared_processors: list[structlog.types.Processor] = [
+        structlog.contextvars.merge_contextvars,  # e.g. account= in multi-account mode
         structlog.processors.add_log_level,
         structlog.processors.TimeStamper(fmt="iso", utc=True),
         structlog.processors.format_exc_info,
@@ -49,7 +53,7 @@ def configure_logging(log_level: str = "info") -> None:
         # Prod (Docker/k8s): structured JSON
         shared_processors.append(structlog.processors.dict_tracebacks)
         shared_processors.append(reorder_keys)
-        renderer = structlog.processors.JSONRenderer()
+        renderer = structlog.processors.JSONRenderer(serializer=jsoncodec.dumps_str)
 
     structlog.configure(
         processors=[*shared_processors, renderer],
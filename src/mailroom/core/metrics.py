@@ -0,0 +1,30 @@
+"""Process-wide event counters, exposed on the health endpoint.
+
+Deliberately tiny: named monotonically increasing integers, safe to bump from
+any thread (poll loop, SSE listener, health server).
+"""
+
+from __future__ import annotations
+
+import threading
+
+_lock = threading.Lock()
+_counters: dict[str, int] = {}
+
+
+def incr(name: str, amount: int = 1) -> None:
+    """Increase counter ``name`` by ``amount`` (created at zero on first use)."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def snapshot() -> dict[str, int]:
+    """Return a point-in-time copy of all counters, sorted by name."""
+    with _lock:
+        return dict(sorted(_counters.items()))
+
+
+def reset() -> None:
+    """Clear all counters (used by tests)."""
+    with _lock:
+        _counters.clear()
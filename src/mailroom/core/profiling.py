@@ -0,0 +1,131 @@
+"""Sampling CPU profiler for the running service (/debug/profile).
+
+cProfile only sees the thread that enabled it, and the interesting work is
+split between the polling loop (main thread) and the EventSource listener.
+Instead, a sampler reads every thread's stack with ``sys._current_frames()``
+at a fixed rate. The samples are rendered as collapsed stacks (one
+``thread;frame;frame count`` line per stack, the input format of
+flamegraph.pl and speedscope) or as a pstats file for ``python -m pstats``.
+
+Overhead is one stack walk per thread per sample, only while a profile runs.
+"""
+
+from __future__ import annotations
+
+import marshal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+# (filename, first line, function name) -- the pstats function key
+Frame = tuple[str, int, str]
+# (thread name, frames root -> leaf)
+Stack = tuple[str, tuple[Frame, ...]]
+
+
+class Samples:
+    """Stacks seen while profiling, and how many sampling rounds took how long."""
+
+    def __init__(self, stacks: Counter[Stack], rounds: int, seconds: float) -> None:
+        self.stacks = stacks
+        self.rounds = rounds
+        self.seconds = seconds
+
+    @property
+    def interval(self) -> float:
+        """Measured seconds per sampling round (slower than 1/hz under load)."""
+        return self.seconds / self.rounds if self.rounds else 0.0
+
+
+class ProfileBusy(Exception):
+    """Raised when a profile is requested while another is running."""
+
+
+_busy = threading.Lock()
+
+
+def sample(seconds: float, hz: int = 100) -> Samples:
+    """Sample every other thread's stack ``hz`` times a second for ``seconds``.
+
+    Only one profile runs at a time; a concurrent request raises ProfileBusy.
+    """
+    if not _busy.acquire(blocking=False):
+        raise ProfileBusy("a profile is already running")
+    try:
+        return _sample(seconds, 1.0 / hz)
+    finally:
+        _busy.release()
+
+
+def _sample(seconds: float, interval: float) -> Samples:
+    own = threading.get_ident()
+    stacks: Counter[Stack] = Counter()
+    rounds = 0
+    started = time.monotonic()
+    ends = started + seconds
+    while time.monotonic() < ends:
+        rounds += 1
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            frames: list[Frame] = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append((code.co_filename, code.co_firstlineno, code.co_qualname))
+                frame = frame.f_back
+            frames.reverse()
+            stacks[(names.get(ident, f"thread-{ident}"), tuple(frames))] += 1
+        time.sleep(interval)
+    return Samples(stacks, rounds, time.monotonic() - started)
+
+
+def _label(frame: Frame) -> str:
+    filename, line, name = frame
+    return f"{name} ({Path(filename).name}:{line})"
+
+
+def collapsed(samples: Samples) -> str:
+    """Render samples as collapsed stacks, hottest first."""
+    lines = [
+        ";".join([thread, *(_label(f) for f in frames)]) + f" {count}"
+        for (thread, frames), count in samples.stacks.most_common()
+    ]
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def pstats_bytes(samples: Samples) -> bytes:
+    """Render samples as a marshalled pstats file (load with ``pstats.Stats``).
+
+    Call counts are sample counts and times are samples x measured interval,
+    so cumulative and total times are estimates; callers/callees are exact
+    for what was sampled.
+    """
+    interval = samples.interval
+    on_stack: Counter[Frame] = Counter()  # cumulative
+    own: Counter[Frame] = Counter()  # total (leaf frame)
+    callers: dict[Frame, Counter[Frame]] = {}
+    for (_, frames), count in samples.stacks.items():
+        if not frames:
+            continue
+        own[frames[-1]] += count
+        for frame in set(frames):
+            on_stack[frame] += count
+        for caller, callee in zip(frames, frames[1:]):
+            callers.setdefault(callee, Counter())[caller] += count
+
+    stats = {}
+    for frame, count in on_stack.items():
+        stats[frame] = (
+            count,
+            count,
+            own[frame] * interval,
+            count * interval,
+            {
+                caller: (n, n, 0.0, n * interval)
+                for caller, n in callers.get(frame, Counter()).items()
+            },
+        )
+    return marshal.dumps(stats)
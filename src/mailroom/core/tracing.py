@@ -0,0 +1,132 @@
+"""Per-poll timelines, kept in a small ring buffer for /debug/poll-trace.
+
+The polling loop opens a trace around each ``workflow.poll()`` with
+``poll_trace()``. The active trace lives in a context variable (like the
+deadline), so the workflow and the HTTP transport add spans with ``span()``
+without any extra arguments. With no active trace -- tests, the setup and
+reset commands, the SSE thread -- ``span()`` does nothing.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+# Spans kept per poll; a poll draining a huge backlog keeps its first spans
+MAX_SPANS = 2000
+
+
+class PollTrace:
+    """Timeline of one poll cycle: trigger, outcome and timed spans."""
+
+    def __init__(self, trigger: str, account: str | None = None) -> None:
+        self.trigger = trigger
+        self.account = account
+        self.started_at = time.time()
+        self._t0 = time.monotonic()
+        self.duration: float | None = None
+        self.outcome = "running"
+        self.spans: list[dict[str, Any]] = []
+        self.dropped_spans = 0
+
+    def add_span(self, name: str, start: float, end: float, **attrs: Any) -> None:
+        """Record a span from monotonic ``start`` to ``end``."""
+        if len(self.spans) >= MAX_SPANS:
+            self.dropped_spans += 1
+            return
+        self.spans.append({
+            "name": name,
+            "start_ms": round((start - self._t0) * 1000, 2),
+            "duration_ms": round((end - start) * 1000, 2),
+            **attrs,
+        })
+
+    def finish(self, outcome: str) -> None:
+        self.duration = time.monotonic() - self._t0
+        self.outcome = outcome
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "account": self.account,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": None if self.duration is None else round(self.duration * 1000, 2),
+            "outcome": self.outcome,
+            "spans": list(self.spans),
+            "dropped_spans": self.dropped_spans,
+        }
+
+
+_current: ContextVar[PollTrace | None] = ContextVar("mailroom_poll_trace", default=None)
+_lock = threading.Lock()
+_recent: deque[PollTrace] = deque(maxlen=20)
+
+
+def set_capacity(polls: int) -> None:
+    """Keep the last ``polls`` timelines (0 disables tracing)."""
+    global _recent
+    with _lock:
+        _recent = deque(_recent, maxlen=polls)
+
+
+@contextmanager
+def poll_trace(trigger: str, account: str | None = None) -> Iterator[PollTrace | None]:
+    """Trace the enclosed poll and keep it in the ring buffer."""
+    if _recent.maxlen == 0:
+        yield None
+        return
+    trace = PollTrace(trigger, account)
+    with _lock:
+        _recent.append(trace)
+    token = _current.set(trace)
+    try:
+        yield trace
+    except BaseException:
+        trace.finish("error")
+        raise
+    else:
+        trace.finish("ok")
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[dict[str, Any]]:
+    """Time the enclosed block as a span of the active poll trace.
+
+    Yields a dict; keys added to it inside the block are recorded with the
+    span (e.g. an HTTP status). Exceptions mark the span ``error``.
+    """
+    trace = _current.get()
+    if trace is None:
+        yield attrs
+        return
+    start = time.monotonic()
+    try:
+        yield attrs
+    except BaseException as exc:
+        attrs.setdefault("error", type(exc).__name__)
+        raise
+    finally:
+        trace.add_span(name, start, time.monotonic(), **attrs)
+
+
+def recent(limit: int | None = None) -> list[dict[str, Any]]:
+    """Return the most recent poll timelines, newest first."""
+    with _lock:
+        traces = list(_recent)
+    traces.reverse()
+    if limit is not None:
+        traces = traces[:limit]
+    return [t.to_dict() for t in traces]
+
+
+def reset() -> None:
+    """Forget all timelines (used by tests)."""
+    with _lock:
+        _recent.clear()
@@ -16,6 +16,12 @@ from collections.abc import Callable
 import httpx
 import structlog
 
+from mailroom.clients.transport import create_http_client
+from mailroom.core.config import HttpSettings
+
+# Long read timeout doubles as the dead-connection detector (server pings every 30s)
+SSE_TIMEOUT = httpx.Timeout(connect=30.0, read=1800.0, write=30.0, pool=30.0)
+
 
 def drain_queue(q: queue.Queue) -> int:
     """Drain all pending items from queue. Returns count drained."""
@@ -36,6 +42,8 @@ def sse_listener(
     log: structlog.BoundLogger | None = None,
     health_cls: type | None = None,
     sleep_fn: Callable[[float], None] | None = None,
+    http: HttpSettings | None = None,
+    transport: httpx.BaseTransport | None = None,
 ) -> None:
     """Listen for JMAP EventSource events, push signals to queue.
 
@@ -48,6 +56,10 @@ def sse_listener(
     httpx read timeout (30min) as dead-connection detector. First reconnect
     is logged at DEBUG (expected); subsequent failures at WARNING.
 
+    One pooled HTTP client is kept for the listener's lifetime, so a
+    reconnect reuses a live keep-alive connection (no new TLS handshake)
+    whenever the server closed only the stream.
+
     Args:
         token: Fastmail API token for Bearer auth.
         event_source_url: Base EventSource URL from JMAP session.
@@ -55,6 +67,8 @@ def sse_listener(
         shutdown_event: Event to signal graceful shutdown.
         log: Structured logger instance.
         health_cls: Class with SSE health attributes (written for health endpoint).
+        http: ``http:`` settings for the pooled client (defaults if None).
+        transport: Optional inner transport replacing the network (tests).
     """
     if log is None:
         log = structlog.get_logger(component="eventsource")
@@ -65,12 +79,10 @@ def sse_listener(
     attempt = 0
     server_retry_ms: int | None = None  # from retry: field
 
-    while not shutdown_event.is_set():
-        try:
-            with httpx.Client(
-                timeout=httpx.Timeout(connect=30.0, read=1800.0, write=30.0, pool=30.0)
-            ) as http:
-                with http.stream(
+    with create_http_client(http, transport=transport, timeout=SSE_TIMEOUT) as client:
+        while not shutdown_event.is_set():
+            try:
+                with client.stream(
                     "GET",
                     url,
                     headers={
@@ -100,26 +112,26 @@ def sse_listener(
                             except (ValueError, IndexError):
                                 pass  # ignore malformed retry field
 
-        except Exception as exc:
-            if shutdown_event.is_set():
-                return
-            attempt += 1
-            if health_cls is not None:
-                health_cls.sse_status = "disconnected"
-                health_cls.sse_reconnect_count += 1
-                health_cls.sse_last_error = str(exc)
-            # Use server retry if available, otherwise exponential backoff
-            if server_retry_ms is not None:
-                delay = server_retry_ms / 1000.0
-            else:
-                delay = min(2 ** attempt, 60)
-            log_fn = log.debug if attempt <= 1 else log.warning
-            log_fn(
-                "eventsource_disconnected",
-                retry_in=delay,
-                attempt=attempt,
-                error=str(exc),
-            )
-            sleep_fn(delay)
+            except Exception as exc:
+                if shutdown_event.is_set():
+                    return
+                attempt += 1
+                if health_cls is not None:
+                    health_cls.sse_status = "disconnected"
+                    health_cls.sse_reconnect_count += 1
+                    health_cls.sse_last_error = str(exc)
+                # Use server retry if available, otherwise exponential backoff
+                if server_retry_ms is not None:
+                    delay = server_retry_ms / 1000.0
+                else:
+                    delay = min(2 ** attempt, 60)
+                log_fn = log.debug if attempt <= 1 else log.warning
+                log_fn(
+                    "eventsource_disconnected",
+                    retry_in=delay,
+                    attempt=attempt,
+                    error=str(exc),
+                )
+                sleep_fn(delay)
 
     log.info("eventsource_stopped")
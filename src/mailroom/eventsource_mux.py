@@ -0,0 +1,241 @@
+"""Many JMAP EventSource (SSE) streams on one asyncio loop.
+
+``sse_listener`` (eventsource.py) gives one stream a dedicated OS thread and
+blocking client. That is right for the single-account service. In a
+multi-account process, though, most of those threads would just sit on idle
+sockets. The multiplexer holds every stream as a task on one event loop,
+in one daemon thread, over one shared async client.
+
+Per stream it keeps the listener's behavior: exponential backoff
+(1s->2s->...->60s cap), honoring the server's ``retry:`` field, and health
+fields written to the stream's health object. Dead connections are caught by
+a ping timeout instead of a 30-minute read timeout. The server is asked to
+ping every ``ping_interval`` seconds, and a stream that is silent for two
+intervals is reconnected. Each ``state`` event is routed to the stream's own
+queue (its account's scheduler) as a "state_changed" signal, exactly as
+``sse_listener`` does. Consumers cannot tell the two apart.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+
+import httpx
+import structlog
+
+from mailroom.clients.transport import create_async_http_client
+from mailroom.core.config import HttpSettings
+
+PING_INTERVAL = 30  # seconds between server pings (EventSource ?ping=)
+MAX_BACKOFF = 60.0
+CONNECT_TIMEOUT = httpx.Timeout(connect=30.0, read=None, write=30.0, pool=30.0)
+
+
+class StreamClosed(Exception):
+    """The server ended an EventSource stream that should stay open."""
+
+
+class PingTimeout(Exception):
+    """No data (not even a ping) arrived within the ping timeout."""
+
+
+@dataclass
+class Subscription:
+    """One EventSource stream and where its signals go."""
+
+    key: str
+    token: str
+    event_source_url: str
+    event_queue: queue.Queue
+    health: object | None = None
+    log: structlog.BoundLogger = field(
+        default_factory=lambda: structlog.get_logger(component="eventsource")
+    )
+
+
+class SSEMultiplexer:
+    """Hold many EventSource streams on one event loop in one daemon thread.
+
+    Args:
+        http: ``http:`` settings for the shared async client (defaults if None).
+        transport: Optional async transport replacing the network (tests).
+        ping_interval: Server ping interval requested; silence for twice this
+            long counts as a dead connection.
+        max_backoff: Cap on the exponential reconnect delay.
+    """
+
+    def __init__(
+        self,
+        http: HttpSettings | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        ping_interval: float = PING_INTERVAL,
+        max_backoff: float = MAX_BACKOFF,
+    ) -> None:
+        self._http = http
+        self._transport = transport
+        self._ping_interval = ping_interval
+        self._max_backoff = max_backoff
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._client: httpx.AsyncClient | None = None
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._ready = threading.Event()
+        self._start_lock = threading.Lock()
+        self._stopped: asyncio.Event | None = None
+        self._thread: threading.Thread | None = None
+        self._log = structlog.get_logger(component="eventsource")
+
+    # ------------------------------------------------------------------
+    # Thread-safe API
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the loop thread (idempotent; safe from several threads)."""
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="eventsource-mux", daemon=True
+            )
+            self._thread.start()
+            self._ready.wait()
+
+    def subscribe(self, subscription: Subscription) -> None:
+        """Start (or replace) the stream for ``subscription.key``."""
+        self.start()
+        self._call(self._subscribe, subscription)
+
+    def unsubscribe(self, key: str) -> None:
+        """Stop the stream for ``key`` (no-op if unknown)."""
+        if self._loop is not None:
+            self._call(self._unsubscribe, key)
+
+    @property
+    def streams(self) -> list[str]:
+        """Keys of the streams currently held."""
+        return sorted(self._tasks)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Cancel every stream, close the client and stop the loop thread."""
+        with self._start_lock:
+            if self._thread is None or self._loop is None:
+                return
+            self._loop.call_soon_threadsafe(self._stopped.set)
+            self._thread.join(timeout)
+            self._thread = None
+            self._loop = None
+            self._ready.clear()
+
+    def _call(self, fn, *args) -> None:
+        asyncio.run_coroutine_threadsafe(fn(*args), self._loop).result()
+
+    # ------------------------------------------------------------------
+    # Loop thread
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        asyncio.run(self._main())
+
+    async def _main(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        async with create_async_http_client(
+            self._http, transport=self._transport, timeout=CONNECT_TIMEOUT
+        ) as client:
+            self._client = client
+            self._ready.set()
+            await self._stopped.wait()
+            tasks = list(self._tasks.values())
+            self._tasks.clear()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._log.info("eventsource_mux_stopped")
+
+    async def _subscribe(self, subscription: Subscription) -> None:
+        await self._unsubscribe(subscription.key)
+        self._tasks[subscription.key] = asyncio.create_task(
+            self._listen(subscription), name=f"eventsource-{subscription.key}"
+        )
+
+    async def _unsubscribe(self, key: str) -> None:
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _listen(self, sub: Subscription) -> None:
+        """One stream: connect, route events, reconnect with backoff until cancelled."""
+        url = (
+            f"{sub.event_source_url}?types=Email,Mailbox&closeafter=no"
+            f"&ping={int(self._ping_interval)}"
+        )
+        ping_timeout = self._ping_interval * 2
+        health = sub.health
+        attempt = 0
+        server_retry_ms: int | None = None  # from retry: field
+
+        while True:
+            try:
+                async with self._client.stream(
+                    "GET",
+                    url,
+                    headers={
+                        "Authorization": f"Bearer {sub.token}",
+                        "Accept": "text/event-stream",
+                    },
+                ) as response:
+                    response.raise_for_status()
+                    attempt = 0  # reset on successful connect
+                    server_retry_ms = None
+                    if health is not None:
+                        health.sse_status = "connected"
+                        health.sse_connected_since = time.time()
+                    sub.log.info("eventsource_connected")
+
+                    lines = response.aiter_lines()
+                    while True:
+                        try:
+                            async with asyncio.timeout(ping_timeout):
+                                line = await anext(lines)
+                        except StopAsyncIteration:
+                            raise StreamClosed("server closed the stream") from None
+                        except TimeoutError:
+                            raise PingTimeout(f"no data for {ping_timeout:g}s") from None
+                        if line.startswith("event: state"):
+                            sub.event_queue.put("state_changed")
+                            if health is not None:
+                                health.sse_last_event_at = time.time()
+                        elif line.startswith("retry:"):
+                            # Honor server-suggested reconnection delay (milliseconds)
+                            try:
+                                server_retry_ms = int(line.split(":", 1)[1].strip())
+                            except (ValueError, IndexError):
+                                pass  # ignore malformed retry field
+
+            except asyncio.CancelledError:
+                if health is not None:
+                    health.sse_status = "stopped"
+                raise
+            except Exception as exc:
+                attempt += 1
+                if health is not None:
+                    health.sse_status = "disconnected"
+                    health.sse_reconnect_count += 1
+                    health.sse_last_error = str(exc)
+                # Use server retry if available, otherwise exponential backoff
+                if server_retry_ms is not None:
+                    delay = server_retry_ms / 1000.0
+                else:
+                    delay = min(2 ** attempt, self._max_backoff)
+                log_fn = sub.log.debug if attempt <= 1 else sub.log.warning
+                log_fn(
+                    "eventsource_disconnected",
+                    retry_in=delay,
+                    attempt=attempt,
+                    error=str(exc),
+                )
+                await asyncio.sleep(delay)
@@ -0,0 +1,131 @@
+"""ResetCheckpoint: progress of an applied reset, so an interrupted one resumes.
+
+The reset steps are not independently re-runnable: step 2 strips every
+@MailroomWarning label, and after step 5 the warned contacts are no longer
+in the provenance group, so a fresh plan + full re-run after a crash in
+step 6 would silently undo the warnings. The checkpoint therefore stores
+the plan itself alongside which steps and items already completed, and a
+resumed reset executes that plan instead of re-planning.
+
+The file is JSON Lines: a header with the plan, then one line appended per
+completed item or step. Appending keeps checkpointing O(1) per item even
+for plans with thousands of contacts; a torn last line (crash mid-write)
+is ignored on load.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import asdict
+from pathlib import Path
+
+import structlog
+
+from mailroom.reset.resetter import ContactCleanup, ResetPlan
+
+CHECKPOINT_VERSION = 2  # 2: compact contacts, email counts
+
+log = structlog.get_logger(component="reset")
+
+
+def encode_plan(plan: ResetPlan) -> dict:
+    """Serialize a ResetPlan to JSON-compatible data."""
+    return asdict(plan)
+
+
+def decode_plan(data: dict) -> ResetPlan:
+    """Rebuild a ResetPlan from encode_plan() output."""
+    return ResetPlan(
+        email_counts=data["email_counts"],
+        group_members=data["group_members"],
+        contacts_to_delete=[ContactCleanup(**c) for c in data["contacts_to_delete"]],
+        contacts_to_warn=[ContactCleanup(**c) for c in data["contacts_to_warn"]],
+        contacts_to_strip=[ContactCleanup(**c) for c in data["contacts_to_strip"]],
+    )
+
+
+class ResetCheckpoint:
+    """Completed steps and items of one reset plan, optionally on disk.
+
+    Args:
+        plan: The plan being executed.
+        path: JSON Lines file progress is appended to (None: memory only).
+    """
+
+    def __init__(self, plan: ResetPlan, path: Path | None = None) -> None:
+        self.plan = plan
+        self._path = path
+        self._steps: set[int] = set()
+        self._items: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, plan: ResetPlan, path: Path | None = None) -> ResetCheckpoint:
+        """Start a checkpoint for ``plan``, replacing any file at ``path``."""
+        checkpoint = cls(plan, path)
+        checkpoint._write({"version": CHECKPOINT_VERSION, "plan": encode_plan(plan)}, mode="w")
+        return checkpoint
+
+    @classmethod
+    def load(cls, path: Path) -> ResetCheckpoint | None:
+        """Load the checkpoint at ``path`` (None if missing or unreadable)."""
+        try:
+            lines = path.read_text().splitlines()
+            header = json.loads(lines[0])
+            if header["version"] != CHECKPOINT_VERSION:
+                return None
+            checkpoint = cls(decode_plan(header["plan"]), path)
+        except (OSError, ValueError, IndexError, KeyError, TypeError):
+            return None
+        for line in lines[1:]:
+            try:
+                record = json.loads(line)
+                step = int(record["step"])
+            except (ValueError, KeyError, TypeError):
+                continue  # torn write from a crash: the item just runs again
+            if "item" in record:
+                checkpoint._items.setdefault(step, set()).add(str(record["item"]))
+            else:
+                checkpoint._steps.add(step)
+        return checkpoint
+
+    @property
+    def completed_steps(self) -> set[int]:
+        return set(self._steps)
+
+    def step_done(self, step: int) -> bool:
+        return step in self._steps
+
+    def started(self, step: int) -> bool:
+        """True if any item of ``step`` completed (or the whole step did)."""
+        return step in self._steps or bool(self._items.get(step))
+
+    def item_done(self, step: int, item: str) -> bool:
+        return item in self._items.get(step, ())
+
+    def mark_item(self, step: int, item: str) -> None:
+        with self._lock:
+            self._items.setdefault(step, set()).add(item)
+            self._write({"step": step, "item": item})
+
+    def mark_step(self, step: int) -> None:
+        with self._lock:
+            self._steps.add(step)
+            self._write({"step": step})
+
+    def discard(self) -> None:
+        """Delete the checkpoint file (the reset finished)."""
+        if self._path is not None:
+            self._path.unlink(missing_ok=True)
+
+    def _write(self, record: dict, mode: str = "a") -> None:
+        if self._path is None:
+            return
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with self._path.open(mode) as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as exc:
+            # The reset itself carries on; only resuming after a crash is lost
+            log.warning("reset_checkpoint_write_failed", error=str(exc))
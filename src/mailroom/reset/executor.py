@@ -0,0 +1,292 @@
+"""ResetExecutor: applies a ResetPlan with batching, concurrency and checkpoints.
+
+The seven steps still run strictly in order (see apply_reset), but the
+work inside each step is batched or parallelized:
+
+- Steps 1 and 2 page through each mailbox: fetch a page of IDs, move or
+  unlabel it with one Email/set, repeat until the mailbox is empty. At
+  most one page of IDs is held at a time.
+- Step 3 empties each category group with one set_group_members PUT, and
+  step 5 drops all warned contacts from the provenance group in one
+  rewrite; different groups are rewritten concurrently.
+- Step 4 queries all warned senders with batched multi-sender Email/query
+  requests and applies @MailroomWarning to all their emails in one
+  coalesced batch.
+- Step 6 re-fetches the vCards it edits in addressbook-multiget chunks
+  (the plan keeps no raw vCards), and steps 6 and 7 PUT and DELETE
+  contacts concurrently.
+
+Concurrency is capped at the HTTP pool size (``http.max_connections``):
+more workers would only queue for a connection. run_reset budgets its
+clients at ``http.reset_requests_per_second`` (see reset_http_settings),
+so the workers are not held to the service's sequential-speed budget.
+Every completed item is recorded in the ResetCheckpoint, so a resumed
+reset skips it.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+import vobject
+
+from mailroom.clients.carddav import CardDAVClient
+from mailroom.clients.jmap import BATCH_SIZE, JMAPClient
+from mailroom.core.config import MailroomSettings
+from mailroom.reset.checkpoint import ResetCheckpoint
+from mailroom.reset.resetter import (
+    MAILROOM_HEADER,
+    ContactCleanup,
+    ResetPlan,
+    ResetResult,
+    _strip_mailroom_note,
+)
+
+T = TypeVar("T")
+
+MULTIGET_SIZE = 50  # vCards fetched per addressbook-multiget in step 6
+
+
+class ResetExecutor:
+    """Execute a reset plan step by step, recording progress in a checkpoint.
+
+    Args:
+        jmap: Connected JMAP client.
+        carddav: Connected CardDAV client.
+        settings: Mailroom configuration.
+        concurrency: Maximum concurrent CardDAV/JMAP requests (default:
+            ``settings.http.max_connections``).
+    """
+
+    def __init__(
+        self,
+        jmap: JMAPClient,
+        carddav: CardDAVClient,
+        settings: MailroomSettings,
+        concurrency: int | None = None,
+    ) -> None:
+        self._jmap = jmap
+        self._carddav = carddav
+        self._settings = settings
+        self._concurrency = max(1, concurrency or settings.http.max_connections)
+        self._pool: ThreadPoolExecutor | None = None
+
+    def run(self, checkpoint: ResetCheckpoint) -> ResetResult:
+        """Apply ``checkpoint.plan``, skipping whatever the checkpoint marks done."""
+        plan = checkpoint.plan
+        result = ResetResult()
+        mailbox_ids = self._resolve_mailboxes(plan)
+        steps = [
+            self._move_to_screener,
+            self._clear_system_labels,
+            self._empty_groups,
+            self._apply_warnings,
+            self._remove_provenance,
+            self._strip_notes,
+            self._delete_contacts,
+        ]
+        with ThreadPoolExecutor(
+            max_workers=self._concurrency, thread_name_prefix="mailroom-reset"
+        ) as self._pool:
+            for number, step in enumerate(steps, start=1):
+                errors_before = len(result.errors)
+                step(plan, checkpoint, result, mailbox_ids)
+                if len(result.errors) == errors_before and not checkpoint.step_done(number):
+                    checkpoint.mark_step(number)
+        self._pool = None
+        result.contacts_cleaned = len(plan.contacts_to_strip)
+        return result
+
+    def _resolve_mailboxes(self, plan: ResetPlan) -> dict[str, str]:
+        # Always resolve warning + error + screener mailboxes
+        resolve_names = list(set(list(plan.email_counts) + [
+            self._settings.mailroom.label_warning,
+            self._settings.mailroom.label_error,
+            self._settings.triage.screener_mailbox,
+        ]))
+        return self._jmap.resolve_mailboxes(resolve_names)
+
+    def _map(
+        self, fn: Callable[[T], object], items: Iterable[T]
+    ) -> list[tuple[T, object, Exception | None]]:
+        """Run ``fn`` over ``items`` on the pool: (item, result, error) in input order."""
+        items = list(items)
+        futures = [self._pool.submit(fn, item) for item in items]
+        outcomes = []
+        for item, future in zip(items, futures):
+            try:
+                outcomes.append((item, future.result(), None))
+            except Exception as exc:
+                outcomes.append((item, None, exc))
+        return outcomes
+
+    def _drain_mailbox(self, mailbox_id: str, add: Sequence[str] = ()) -> int:
+        """Remove ``mailbox_id`` from all its emails, a page at a time.
+
+        Each processed page leaves the mailbox, so position 0 always holds
+        the next page. Returns the number of emails moved.
+
+        Raises:
+            RuntimeError: If an Email/set fails, or a page does not leave
+                the mailbox (which would otherwise loop forever).
+        """
+        moved = 0
+        previous: list[str] = []
+        while True:
+            page = self._jmap.query_email_page(mailbox_id, limit=BATCH_SIZE)
+            if not page:
+                return moved
+            if page == previous:
+                raise RuntimeError(f"emails stay in mailbox {mailbox_id} after update")
+            self._jmap.batch_update_labels(page, add=list(add), remove=[mailbox_id])
+            moved += len(page)
+            previous = page
+
+    # === Step 1: Move emails to Screener, removing managed labels ===
+    def _move_to_screener(self, plan, checkpoint, result, mailbox_ids) -> None:
+        screener_mb_id = mailbox_ids[self._settings.triage.screener_mailbox]
+        for label_name, count in plan.email_counts.items():
+            if checkpoint.item_done(1, label_name):
+                result.emails_unlabeled += count
+                continue
+            try:
+                # One patch adds Screener and drops the label, so the email
+                # never has zero mailboxes (RFC 8621)
+                result.emails_unlabeled += self._drain_mailbox(
+                    mailbox_ids[label_name], add=[screener_mb_id]
+                )
+            except RuntimeError as exc:
+                result.errors.append(f"Label removal ({label_name}): {exc}")
+                continue
+            checkpoint.mark_item(1, label_name)
+
+    # === Step 2: Remove @MailroomWarning + @MailroomError from ALL emails ===
+    def _clear_system_labels(self, plan, checkpoint, result, mailbox_ids) -> None:
+        settings = self._settings
+        system_labels = [settings.mailroom.label_error]
+        if not checkpoint.started(4):
+            # Once step 4 has started, re-clearing would strip the warnings it applied
+            system_labels.insert(0, settings.mailroom.label_warning)
+        for system_label in system_labels:
+            if system_label not in mailbox_ids or checkpoint.item_done(2, system_label):
+                continue
+            try:
+                self._drain_mailbox(mailbox_ids[system_label])
+            except RuntimeError as exc:
+                result.errors.append(f"System label cleanup ({system_label}): {exc}")
+                continue
+            checkpoint.mark_item(2, system_label)
+
+    # === Step 3: Empty category groups (one PUT per group) ===
+    def _empty_groups(self, plan, checkpoint, result, mailbox_ids) -> None:
+        pending = [name for name in plan.group_members if not checkpoint.item_done(3, name)]
+        for group_name, _, exc in self._map(
+            lambda name: self._carddav.set_group_members(name, []), pending
+        ):
+            if exc is not None:
+                result.errors.append(f"Group removal ({group_name}): {exc}")
+            else:
+                checkpoint.mark_item(3, group_name)
+        result.groups_emptied = len(plan.group_members)
+
+    # === Step 4: Apply @MailroomWarning to user-modified provenance contacts' emails ===
+    def _apply_warnings(self, plan, checkpoint, result, mailbox_ids) -> None:
+        warning_mb_id = mailbox_ids.get(self._settings.mailroom.label_warning)
+        to_query: list[ContactCleanup] = []
+        for contact in plan.contacts_to_warn:
+            if checkpoint.item_done(4, contact.uid) or not (contact.email and warning_mb_id):
+                result.contacts_warned += 1
+            else:
+                to_query.append(contact)
+
+        if not to_query:
+            return
+        try:
+            by_sender = self._jmap.query_emails_by_senders(
+                list(dict.fromkeys(c.email for c in to_query))
+            )
+            # Ordered set: contacts may share a sender address
+            email_ids = dict.fromkeys(
+                email_id for sender_ids in by_sender.values() for email_id in sender_ids
+            )
+            if email_ids:
+                self._jmap.batch_add_labels(list(email_ids), [warning_mb_id])
+        except RuntimeError as exc:
+            result.errors.extend(f"Warning application ({c.fn}): {exc}" for c in to_query)
+            return
+        for contact in to_query:
+            checkpoint.mark_item(4, contact.uid)
+            result.contacts_warned += 1
+
+    # === Step 5: Remove warned contacts from provenance group (one rewrite) ===
+    def _remove_provenance(self, plan, checkpoint, result, mailbox_ids) -> None:
+        pending = [c for c in plan.contacts_to_warn if not checkpoint.item_done(5, c.uid)]
+        if not pending:
+            return
+        provenance_group = self._settings.mailroom.provenance_group
+        try:
+            self._carddav.remove_members(provenance_group, [c.uid for c in pending])
+        except RuntimeError as exc:
+            result.errors.append(f"Provenance removal ({provenance_group}): {exc}")
+            return
+        for contact in pending:
+            checkpoint.mark_item(5, contact.uid)
+
+    # === Step 6: Strip Mailroom notes from warned + adopted contacts (skip delete targets) ===
+    def _strip_notes(self, plan, checkpoint, result, mailbox_ids) -> None:
+        pending = [
+            c for c in plan.contacts_to_warn + plan.contacts_to_strip
+            if not checkpoint.item_done(6, c.href)
+        ]
+        for start in range(0, len(pending), MULTIGET_SIZE):
+            chunk = pending[start : start + MULTIGET_SIZE]
+            try:
+                fetched = {
+                    item["href"]: item
+                    for item in self._carddav.get_contacts([c.href for c in chunk])
+                }
+            except Exception as exc:
+                result.errors.extend(f"Note cleanup ({c.fn}): {exc}" for c in chunk)
+                continue
+            for contact, _, exc in self._map(
+                lambda c: self._strip_note(fetched.get(c.href)), chunk
+            ):
+                if exc is not None:
+                    result.errors.append(f"Note cleanup ({contact.fn}): {exc}")
+                else:
+                    checkpoint.mark_item(6, contact.href)
+
+    def _strip_note(self, item: dict | None) -> None:
+        """Strip the Mailroom section from a freshly fetched vCard and PUT it."""
+        if item is None:
+            return  # contact deleted since planning: nothing to strip
+        card = vobject.readOne(item["vcard_data"])
+        note_entries = card.contents.get("note", [])
+        note = note_entries[0].value if note_entries else ""
+        if MAILROOM_HEADER not in note:
+            return  # already clean (e.g. edited by hand since planning)
+
+        # Keeps pre-existing content; a Mailroom-only note becomes empty
+        note_entries[0].value = _strip_mailroom_note(note)
+
+        vcard_bytes = card.serialize().encode("utf-8")
+        self._carddav.update_contact_vcard(item["href"], item["etag"], vcard_bytes)
+
+    # === Step 7: DELETE unmodified provenance contacts ===
+    def _delete_contacts(self, plan, checkpoint, result, mailbox_ids) -> None:
+        pending = []
+        for contact in plan.contacts_to_delete:
+            if checkpoint.item_done(7, contact.href):
+                result.contacts_deleted += 1
+            else:
+                pending.append(contact)
+        for contact, _, exc in self._map(
+            lambda c: self._carddav.delete_contact(c.href, c.etag), pending
+        ):
+            if exc is not None:
+                result.errors.append(f"Contact deletion ({contact.fn}): {exc}")
+            else:
+                checkpoint.mark_item(7, contact.href)
+                result.contacts_deleted += 1
@@ -88,11 +88,10 @@ def _print_plan_report(plan: object, out: object) -> None:
     assert isinstance(plan, ResetPlan)
 
     # Email Labels section
-    if plan.email_labels:
+    if plan.email_counts:
         print("Email Labels to Clean", file=out)
-        for label_name, email_ids in plan.email_labels.items():
+        for label_name, count in plan.email_counts.items():
             symbol = color("\u2717", RED)  # X mark for removal
-            count = len(email_ids)
             print(f"  {symbol} {label_name:<30} {color(f'{count} emails', YELLOW)}", file=out)
         print(file=out)
 
@@ -130,7 +129,7 @@ def _print_plan_report(plan: object, out: object) -> None:
         print(file=out)
 
     # Summary
-    total_emails = sum(len(ids) for ids in plan.email_labels.values())
+    total_emails = sum(plan.email_counts.values())
     total_groups = len(plan.group_members)
     total_delete = len(plan.contacts_to_delete)
     total_warn = len(plan.contacts_to_warn)
@@ -8,16 +8,21 @@ from __future__ import annotations
 
 import sys
 from dataclasses import dataclass, field
-from typing import Literal
+from pathlib import Path
+from typing import TYPE_CHECKING, Literal
 
 import httpx
 import vobject
 
 from mailroom.clients.carddav import CardDAVClient
 from mailroom.clients.jmap import JMAPClient
-from mailroom.core.config import MailroomSettings
+from mailroom.clients.session_cache import session_cache_from_settings, token_key
+from mailroom.core.config import HttpSettings, MailroomSettings
 from mailroom.core.logging import configure_logging
 
+if TYPE_CHECKING:
+    from mailroom.reset.checkpoint import ResetCheckpoint
+
 MAILROOM_HEADER = "\u2014 Mailroom \u2014"
 
 # Fields that Mailroom sets on contacts it creates/manages.
@@ -76,24 +81,24 @@ class ContactCleanup:
     - created_unmodified: DELETE the contact entirely
     - created_modified: WARN (apply @MailroomWarning to emails) + strip note
     - adopted: strip note only
+
+    A compact record: the raw vCard is not kept. Note stripping re-fetches
+    it at apply time, which also picks up edits made since planning.
     """
 
     href: str
     etag: str
     fn: str
     uid: str
-    note: str
-    stripped_note: str
     provenance: Literal["created_unmodified", "created_modified", "adopted"]
     email: str | None  # sender email for warning application
-    vcard_data: str
 
 
 @dataclass
 class ResetPlan:
     """What the reset will do, built by plan_reset()."""
 
-    email_labels: dict[str, list[str]]  # mailbox_name -> email_ids
+    email_counts: dict[str, int]  # mailbox_name -> email count (IDs are paged at apply)
     group_members: dict[str, list[str]]  # group_name -> contact_uids
     contacts_to_delete: list[ContactCleanup]  # provenance + unmodified
     contacts_to_warn: list[ContactCleanup]  # provenance + user-modified
@@ -151,8 +156,9 @@ def plan_reset(
 ) -> ResetPlan:
     """Build a provenance-aware plan of what to clean.
 
-    Queries all managed mailboxes for emails, fetches all contacts,
-    identifies those with Mailroom notes, and classifies them by provenance:
+    Counts the emails in all managed mailboxes (calculateTotal, no IDs),
+    streams all contacts, identifies those with Mailroom notes, and
+    classifies them by provenance into compact records:
     - In provenance group + unmodified -> contacts_to_delete
     - In provenance group + user-modified -> contacts_to_warn
     - Not in provenance group + has note -> contacts_to_strip
@@ -163,7 +169,7 @@ def plan_reset(
         carddav: Connected CardDAV client.
 
     Returns:
-        ResetPlan with email_labels, group_members, and three contact lists.
+        ResetPlan with email_counts, group_members, and three contact lists.
     """
     managed_names = _get_managed_mailbox_names(settings)
     managed_group_names = set(settings.contact_groups)
@@ -171,19 +177,13 @@ def plan_reset(
     # Resolve managed mailbox IDs
     mailbox_ids = jmap.resolve_mailboxes(managed_names)
 
-    # Query emails per managed mailbox
-    email_labels: dict[str, list[str]] = {}
-    for name in managed_names:
-        mb_id = mailbox_ids[name]
-        ids = jmap.query_emails(mb_id)
-        if ids:
-            email_labels[name] = ids
-
-    # Fetch all contacts
-    all_contacts = carddav.list_all_contacts()
-
-    # Filter to contacts with Mailroom note
-    annotated = [c for c in all_contacts if MAILROOM_HEADER in c["note"]]
+    # Count emails per managed mailbox (one request, no IDs materialized)
+    totals = jmap.count_emails([mailbox_ids[name] for name in managed_names])
+    email_counts = {
+        name: totals[mailbox_ids[name]]
+        for name in managed_names
+        if totals.get(mailbox_ids[name])
+    }
 
     # Determine group memberships for category groups
     group_members: dict[str, list[str]] = {}
@@ -210,11 +210,12 @@ def plan_reset(
     contacts_to_warn: list[ContactCleanup] = []
     contacts_to_strip: list[ContactCleanup] = []
 
-    for contact in annotated:
-        note = contact["note"]
-        stripped = _strip_mailroom_note(note)
+    # Stream contacts: only those with a Mailroom note are kept, as compact records
+    for contact in carddav.iter_contacts():
+        if MAILROOM_HEADER not in contact["note"]:
+            continue
         sender_email = _extract_email_from_vcard(contact["vcard_data"])
-        # Fallback: try emails list from list_all_contacts
+        # Fallback: try emails list from iter_contacts
         if not sender_email and contact.get("emails"):
             sender_email = contact["emails"][0]
 
@@ -223,11 +224,8 @@ def plan_reset(
             etag=contact["etag"],
             fn=contact["fn"],
             uid=contact["uid"],
-            note=note,
-            stripped_note=stripped,
             provenance="adopted",  # default, overridden below
             email=sender_email,
-            vcard_data=contact["vcard_data"],
         )
 
         if contact["uid"] in provenance_uids:
@@ -244,7 +242,7 @@ def plan_reset(
             contacts_to_strip.append(cleanup)
 
     return ResetPlan(
-        email_labels=email_labels,
+        email_counts=email_counts,
         group_members=group_members,
         contacts_to_delete=contacts_to_delete,
         contacts_to_warn=contacts_to_warn,
@@ -257,6 +255,7 @@ def apply_reset(
     jmap: JMAPClient,
     carddav: CardDAVClient,
     settings: MailroomSettings,
+    checkpoint: ResetCheckpoint | None = None,
 ) -> ResetResult:
     """Execute the reset plan with provenance-aware 7-step order.
 
@@ -269,132 +268,69 @@ def apply_reset(
     6. Strip Mailroom notes from ALL annotated contacts
     7. DELETE unmodified provenance contacts
 
+    Work within a step is batched and runs concurrently (see ResetExecutor).
+
     Args:
         plan: The reset plan from plan_reset().
         jmap: Connected JMAP client.
         carddav: Connected CardDAV client.
         settings: Mailroom configuration.
+        checkpoint: Progress to resume from and record into (default: a
+            fresh in-memory checkpoint for ``plan``).
 
     Returns:
         ResetResult with counts and any errors.
     """
-    result = ResetResult()
-
-    # Resolve mailbox IDs for label removal
-    label_names = list(plan.email_labels.keys())
-    # Always resolve warning + error + screener mailboxes
-    resolve_names = list(set(label_names + [
-        settings.mailroom.label_warning,
-        settings.mailroom.label_error,
-        settings.triage.screener_mailbox,
-    ]))
-    if resolve_names:
-        mailbox_ids = jmap.resolve_mailboxes(resolve_names)
-    else:
-        mailbox_ids = {}
-
-    # === Step 1: Move emails to Screener, then remove managed labels ===
-    # Add Screener first to ensure emails always have at least one mailbox
-    # (RFC 8621: email must belong to >=1 mailbox at all times)
-    screener_mb_id = mailbox_ids[settings.triage.screener_mailbox]
-    for label_name, email_ids in plan.email_labels.items():
-        mb_id = mailbox_ids[label_name]
-        try:
-            jmap.batch_add_labels(email_ids, [screener_mb_id])
-            jmap.batch_remove_labels(email_ids, [mb_id])
-            result.emails_unlabeled += len(email_ids)
-        except RuntimeError as exc:
-            result.errors.append(f"Label removal ({label_name}): {exc}")
-
-    # === Step 2: Remove @MailroomWarning + @MailroomError from ALL emails ===
-    for system_label in [settings.mailroom.label_warning, settings.mailroom.label_error]:
-        if system_label in mailbox_ids:
-            mb_id = mailbox_ids[system_label]
-            try:
-                system_emails = jmap.query_emails(mb_id)
-                if system_emails:
-                    jmap.batch_remove_labels(system_emails, [mb_id])
-            except RuntimeError as exc:
-                result.errors.append(f"System label cleanup ({system_label}): {exc}")
-
-    # === Step 3: Remove contacts from category groups ===
-    groups_emptied: set[str] = set()
-    for group_name, member_uids in plan.group_members.items():
-        for uid in member_uids:
-            try:
-                carddav.remove_from_group(group_name, uid)
-            except RuntimeError as exc:
-                result.errors.append(f"Group removal ({group_name}/{uid}): {exc}")
-        groups_emptied.add(group_name)
-    result.groups_emptied = len(groups_emptied)
-
-    # === Step 4: Apply @MailroomWarning to user-modified provenance contacts' emails ===
-    warning_mb_id = mailbox_ids.get(settings.mailroom.label_warning)
-    for contact in plan.contacts_to_warn:
-        if contact.email and warning_mb_id:
-            try:
-                sender_emails = jmap.query_emails_by_sender(contact.email)
-                if sender_emails:
-                    jmap.batch_add_labels(sender_emails, [warning_mb_id])
-                result.contacts_warned += 1
-            except RuntimeError as exc:
-                result.errors.append(f"Warning application ({contact.fn}): {exc}")
-        else:
-            result.contacts_warned += 1
+    from mailroom.reset.checkpoint import ResetCheckpoint
+    from mailroom.reset.executor import ResetExecutor
 
-    # === Step 5: Remove warned contacts from provenance group ===
-    provenance_group = settings.mailroom.provenance_group
-    for contact in plan.contacts_to_warn:
-        try:
-            carddav.remove_from_group(provenance_group, contact.uid)
-        except RuntimeError as exc:
-            result.errors.append(f"Provenance removal ({contact.fn}): {exc}")
+    if checkpoint is None:
+        checkpoint = ResetCheckpoint(plan)
+    return ResetExecutor(jmap, carddav, settings).run(checkpoint)
 
-    # === Step 6: Strip Mailroom notes from warned + adopted contacts (skip delete targets) ===
-    all_contacts = plan.contacts_to_warn + plan.contacts_to_strip
-    for contact in all_contacts:
-        try:
-            card = vobject.readOne(contact.vcard_data)
-            note_entries = card.contents.get("note", [])
-
-            if contact.stripped_note:
-                # Has pre-existing content -- keep it
-                if note_entries:
-                    note_entries[0].value = contact.stripped_note
-                else:
-                    card.add("note").value = contact.stripped_note
-            else:
-                # Mailroom-only note -- clear it
-                if note_entries:
-                    note_entries[0].value = ""
 
-            vcard_bytes = card.serialize().encode("utf-8")
-            carddav.update_contact_vcard(contact.href, contact.etag, vcard_bytes)
-        except Exception as exc:
-            result.errors.append(f"Note cleanup ({contact.fn}): {exc}")
+def reset_http_settings(http: HttpSettings) -> HttpSettings:
+    """``http:`` settings for reset's clients, budgeted at ``reset_requests_per_second``.
 
-    # Count strip-only (adopted) contacts
-    result.contacts_cleaned = len(plan.contacts_to_strip)
+    Steps 6 and 7 keep ``max_connections`` requests in flight. At the
+    service's budget they would queue for tokens once the burst is spent
+    and run no faster than one request at a time.
+    """
+    rate = max(http.requests_per_second, http.reset_requests_per_second)
+    return http.model_copy(update={"requests_per_second": rate})
 
-    # === Step 7: DELETE unmodified provenance contacts ===
-    for contact in plan.contacts_to_delete:
-        try:
-            carddav.delete_contact(contact.href, contact.etag)
-            result.contacts_deleted += 1
-        except Exception as exc:
-            result.errors.append(f"Contact deletion ({contact.fn}): {exc}")
 
-    return result
+def _checkpoint_path(settings: MailroomSettings) -> Path | None:
+    """Where an applied reset records its progress (None: disabled)."""
+    if not settings.state.reset_checkpoint:
+        return None
+    # Keyed by token hash, like the other per-account state files
+    return settings.state_dir / f"reset-checkpoint-{token_key(settings.jmap_token)[:16]}.jsonl"
 
 
-def run_reset(apply: bool = False) -> int:
+def _request_failed(exc: httpx.HTTPStatusError) -> int:
+    """Report an HTTP error that outlived the client retries; returns exit code 1."""
+    print(
+        f"Request to {exc.request.url.host} failed: {exc.response.status_code} "
+        f"{exc.response.reason_phrase}",
+        file=sys.stderr,
+    )
+    return 1
+
+
+def run_reset(apply: bool = False, restart: bool = False) -> int:
     """Top-level entry point for the reset command.
 
     Loads config, connects clients, plans reset, and optionally
     applies changes. Returns exit code 0 on success, 1 on failure.
 
+    An applied reset that was interrupted (or finished with errors) left a
+    checkpoint behind; the next ``--apply`` resumes its saved plan, skipping
+    completed work, unless ``restart`` discards it.
+
     Args:
         apply: If True, execute cleanup. If False, dry-run only.
+        restart: If True, discard any checkpoint and plan from scratch.
 
     Returns:
         Exit code: 0 if no errors, 1 if any errors.
@@ -409,9 +345,14 @@ def run_reset(apply: bool = False) -> int:
         return 1
 
     configure_logging(settings.logging.level)
+    http = reset_http_settings(settings.http)
 
     # Connect JMAP
-    jmap = JMAPClient(token=settings.jmap_token)
+    jmap = JMAPClient(
+        token=settings.jmap_token,
+        http=http,
+        session_cache=session_cache_from_settings(settings.state),
+    )
     try:
         jmap.connect()
     except httpx.HTTPStatusError as exc:
@@ -429,6 +370,7 @@ def run_reset(apply: bool = False) -> int:
     carddav = CardDAVClient(
         username=settings.carddav_username,
         password=settings.carddav_password,
+        http=http,
     )
     try:
         carddav.connect()
@@ -452,9 +394,35 @@ def run_reset(apply: bool = False) -> int:
     # Show mode banner before any scanning output
     print_mode_banner(apply)
 
-    # Build plan
-    print_progress("Scanning mailboxes and contacts...")
-    reset_plan = plan_reset(settings, jmap, carddav)
+    from mailroom.reset.checkpoint import ResetCheckpoint
+
+    checkpoint_path = _checkpoint_path(settings)
+    checkpoint = None
+    if checkpoint_path is not None:
+        if restart:
+            checkpoint_path.unlink(missing_ok=True)
+        else:
+            checkpoint = ResetCheckpoint.load(checkpoint_path)
+
+    if checkpoint is not None and apply:
+        # Re-planning would miss contacts already moved out of the provenance group
+        print_progress(
+            f"Resuming interrupted reset ({len(checkpoint.completed_steps)} of 7 steps "
+            "done; use --restart to start over)..."
+        )
+        reset_plan = checkpoint.plan
+    else:
+        if checkpoint is not None:
+            print_progress(
+                "An interrupted reset will resume on --apply (use --restart to discard it)."
+            )
+        # Build plan
+        print_progress("Scanning mailboxes and contacts...")
+        try:
+            reset_plan = plan_reset(settings, jmap, carddav)
+        except httpx.HTTPStatusError as exc:
+            # A cached JMAP session means a revoked token first fails here
+            return _request_failed(exc)
 
     # Always show the plan first
     print_reset_report(reset_plan, apply=False)
@@ -467,9 +435,20 @@ def run_reset(apply: bool = False) -> int:
         print("\nAborted.", file=sys.stdout)
         return 0
 
+    if checkpoint is None:
+        checkpoint = ResetCheckpoint.create(reset_plan, checkpoint_path)
+
     # Apply
     print_progress("Applying reset...")
-    reset_result = apply_reset(reset_plan, jmap, carddav, settings)
+    try:
+        reset_result = apply_reset(reset_plan, jmap, carddav, settings, checkpoint=checkpoint)
+    except httpx.HTTPStatusError as exc:
+        # On resume, nothing has called JMAP before this point
+        return _request_failed(exc)
     print_reset_report(reset_result, apply=True)
 
-    return 1 if reset_result.errors else 0
+    if reset_result.errors:
+        # Kept so the next --apply retries only what failed
+        return 1
+    checkpoint.discard()
+    return 0
@@ -3,11 +3,13 @@
 from __future__ import annotations
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 import httpx
 
 from mailroom.clients.carddav import CardDAVClient
 from mailroom.clients.jmap import JMAPClient
+from mailroom.clients.session_cache import session_cache_from_settings
 from mailroom.core.config import MailroomSettings
 from mailroom.core.logging import configure_logging
 from mailroom.setup.reporting import ResourceAction, print_plan
@@ -35,18 +37,12 @@ def plan_resources(
         List of ResourceAction objects categorized as mailbox, label,
         or contact_group.
     """
-    # Fetch all existing mailboxes
-    responses = jmap.call(
-        [["Mailbox/get", {"accountId": jmap.account_id, "ids": None}, "m0"]]
-    )
-    mailbox_list = responses[0][1]["list"]
-
     # Build set of existing mailbox names (with Inbox role handling)
     existing_mailboxes: set[str] = set()
-    for mb in mailbox_list:
-        if mb.get("role") == "inbox":
+    for mb in jmap.get_mailboxes():
+        if mb.role == "inbox":
             existing_mailboxes.add("Inbox")
-        existing_mailboxes.add(mb["name"])
+        existing_mailboxes.add(mb.name)
 
     # Fetch all existing contact groups
     existing_groups = carddav.list_groups()
@@ -103,17 +99,21 @@ def apply_resources(
     plan: list[ResourceAction],
     jmap: JMAPClient,
     carddav: CardDAVClient,
+    concurrency: int = 4,
 ) -> list[ResourceAction]:
     """Execute the plan, creating missing resources.
 
     Processes resources in order: mailboxes first, then action labels
-    (also mailboxes), then contact groups. Tracks parent failures to
-    skip dependent children.
+    (also mailboxes), then contact groups. All missing mailboxes are
+    created with one Mailbox/set request; per-item notCreated errors
+    become "failed" actions, and children of a failed parent "skipped".
+    Missing contact groups are created concurrently.
 
     Args:
         plan: List of ResourceAction objects from plan_resources().
         jmap: Connected JMAP client.
         carddav: Connected CardDAV client.
+        concurrency: Maximum contact-group PUTs in flight at once.
 
     Returns:
         Updated list of ResourceAction objects with final statuses.
@@ -132,35 +132,52 @@ def apply_resources(
     mailroom_mailboxes = [a for a in mailroom if a.name.startswith("@")]
     mailroom_groups = [a for a in mailroom if not a.name.startswith("@")]
 
-    for action in mailboxes + labels + mailroom_mailboxes:
+    mailbox_actions = mailboxes + labels + mailroom_mailboxes
+    to_create = [a for a in mailbox_actions if a.status != "exists"]
+    created: dict[str, str] = {}
+    errors: dict[str, str] = {}
+    if to_create:
+        # One Mailbox/set for all missing mailboxes; children reference
+        # parents created in the same request by creation ID
+        try:
+            batch_names = {a.name for a in to_create}
+            outside_parents = sorted(
+                {a.parent for a in to_create if a.parent and a.parent not in batch_names}
+            )
+            parent_ids = jmap.resolve_mailboxes(outside_parents) if outside_parents else {}
+            created, errors = jmap.create_mailboxes(
+                [(a.name, parent_ids.get(a.parent, a.parent)) for a in to_create]
+            )
+        except (RuntimeError, ValueError, httpx.HTTPStatusError) as exc:
+            errors = {a.name: str(exc) for a in to_create}
+
+    for action in mailbox_actions:
         if action.status == "exists":
             result.append(action)
             continue
 
-        # Check if parent failed (for future hierarchy support)
-        if action.parent and action.parent in failed_names:
+        if action.name in created:
             result.append(
                 ResourceAction(
                     kind=action.kind,
                     name=action.name,
-                    status="skipped",
+                    status="created",
                     parent=action.parent,
-                    error="parent failed",
                 )
             )
-            continue
-
-        try:
-            jmap.create_mailbox(action.name)
+        elif action.parent and action.parent in failed_names:
+            # The server rejects children of a failed parent
             result.append(
                 ResourceAction(
                     kind=action.kind,
                     name=action.name,
-                    status="created",
+                    status="skipped",
                     parent=action.parent,
+                    error="parent failed",
                 )
             )
-        except (RuntimeError, httpx.HTTPStatusError) as exc:
+            failed_names.add(action.name)
+        else:
             failed_names.add(action.name)
             result.append(
                 ResourceAction(
@@ -168,33 +185,44 @@ def apply_resources(
                     name=action.name,
                     status="failed",
                     parent=action.parent,
-                    error=str(exc),
+                    error=errors.get(action.name, "not created"),
                 )
             )
 
-    for action in groups + mailroom_groups:
+    # Group PUTs are independent (fresh UUID hrefs, If-None-Match: *),
+    # so they run concurrently; results keep plan order
+    group_actions = groups + mailroom_groups
+    to_create_groups = [a for a in group_actions if a.status != "exists"]
+    group_errors: dict[str, str | None] = {}
+    if to_create_groups:
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(concurrency, len(to_create_groups))),
+            thread_name_prefix="mailroom-setup",
+        ) as pool:
+            futures = {
+                a.name: pool.submit(carddav.create_group, a.name) for a in to_create_groups
+            }
+            for name, future in futures.items():
+                try:
+                    future.result()
+                    group_errors[name] = None
+                except (RuntimeError, httpx.HTTPStatusError) as exc:
+                    group_errors[name] = str(exc)
+
+    for action in group_actions:
         if action.status == "exists":
             result.append(action)
             continue
 
-        try:
-            carddav.create_group(action.name)
-            result.append(
-                ResourceAction(
-                    kind=action.kind,
-                    name=action.name,
-                    status="created",
-                )
-            )
-        except (RuntimeError, httpx.HTTPStatusError) as exc:
-            result.append(
-                ResourceAction(
-                    kind=action.kind,
-                    name=action.name,
-                    status="failed",
-                    error=str(exc),
-                )
+        error = group_errors[action.name]
+        result.append(
+            ResourceAction(
+                kind=action.kind,
+                name=action.name,
+                status="created" if error is None else "failed",
+                error=error,
             )
+        )
 
     return result
 
@@ -221,7 +249,11 @@ def run_setup(apply: bool = False) -> int:
     configure_logging(settings.logging.level)
 
     # Pre-flight: connect JMAP
-    jmap = JMAPClient(token=settings.jmap_token)
+    jmap = JMAPClient(
+        token=settings.jmap_token,
+        http=settings.http,
+        session_cache=session_cache_from_settings(settings.state),
+    )
     try:
         jmap.connect()
     except httpx.HTTPStatusError as exc:
@@ -239,6 +271,7 @@ def run_setup(apply: bool = False) -> int:
     carddav = CardDAVClient(
         username=settings.carddav_username,
         password=settings.carddav_password,
+        http=settings.http,
     )
     try:
         carddav.connect()
@@ -253,8 +286,16 @@ def run_setup(apply: bool = False) -> int:
         print(f"CardDAV connection failed: {exc}", file=sys.stderr)
         return 1
 
-    # Plan resources
-    resource_plan = plan_resources(settings, jmap, carddav)
+    # Plan resources (a cached JMAP session means a revoked token first fails here)
+    try:
+        resource_plan = plan_resources(settings, jmap, carddav)
+    except httpx.HTTPStatusError as exc:
+        print(
+            f"Request to {exc.request.url.host} failed: {exc.response.status_code} "
+            f"{exc.response.reason_phrase}",
+            file=sys.stderr,
+        )
+        return 1
 
     if not apply:
         # Dry-run: show sieve guidance first, then resource plan
@@ -264,7 +305,9 @@ def run_setup(apply: bool = False) -> int:
         return 0
 
     # Apply: create missing resources
-    result = apply_resources(resource_plan, jmap, carddav)
+    result = apply_resources(
+        resource_plan, jmap, carddav, concurrency=settings.http.max_connections
+    )
     print(generate_sieve_guidance(settings))
     print()
     print_plan(result, apply=True)
@@ -0,0 +1 @@
+"""Testing helpers: offline stand-ins for Fastmail (benchmarks, integration tests)."""
@@ -0,0 +1,977 @@
+"""In-process fake Fastmail: JMAP, CardDAV and EventSource behind an httpx transport.
+
+FakeFastmail implements the subset of Fastmail that Mailroom talks to, so the
+real clients and workflow can run offline:
+
+- JMAP: session discovery, ``Mailbox/get|set``, ``Email/query|get|set|changes``
+  (with result references), and ``sessionState`` on every response.
+- CardDAV: the 3-step PROPFIND discovery chain, ``addressbook-query`` and
+  ``addressbook-multiget`` REPORTs, and GET/PUT/DELETE with ETag
+  preconditions (If-Match / If-None-Match).
+- EventSource: a ``text/event-stream`` that emits ``state`` events whenever
+  an Email or Mailbox changes.
+
+It is an httpx transport (sync, plus async for the SSE multiplexer), so it
+plugs into the clients' ``transport=`` argument (requests still pass through
+the throttled transport and deadline hook). Latency, error injection and
+mailbox/addressbook sizes are configurable, and every request is recorded
+for request-count assertions.
+
+Usage:
+    fake = FakeFastmail.for_settings(settings)
+    fake.add_email("alice@example.com", ["Screener", "@ToFeed"])
+    jmap = JMAPClient(token=fake.token, transport=fake, http=UNTHROTTLED_HTTP)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import itertools
+import json
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from collections.abc import AsyncIterator, Callable, Iterator
+from dataclasses import dataclass, field
+from xml.sax.saxutils import escape
+
+import httpx
+
+from mailroom.clients.carddav import CardDAVClient
+from mailroom.clients.jmap import JMAPClient
+from mailroom.clients.session_cache import SessionCache
+from mailroom.core.config import HttpSettings, MailroomSettings
+from mailroom.workflows.screener import ScreenerWorkflow
+
+DAV = "{DAV:}"
+CARDDAV = "{urn:ietf:params:xml:ns:carddav}"
+
+JMAP_HOST = "api.fastmail.com"
+CARDDAV_HOST = "carddav.fastmail.com"
+
+# Request budget that never throttles: use with FakeFastmail so benchmarks
+# measure Mailroom, not the client-side rate limiter.
+UNTHROTTLED_HTTP = HttpSettings(requests_per_second=1_000_000, burst=1_000_000)
+
+
+@dataclass
+class RecordedRequest:
+    """One request seen by the fake (for request-count assertions)."""
+
+    method: str
+    host: str
+    path: str
+    jmap_methods: list[str] = field(default_factory=list)
+
+    @property
+    def service(self) -> str:
+        """Which service the request hit: "jmap", "carddav" or "eventsource"."""
+        if self.host == CARDDAV_HOST:
+            return "carddav"
+        if self.path.startswith("/jmap/event"):
+            return "eventsource"
+        return "jmap"
+
+
+class _AsyncSubscriber:
+    """EventSource subscriber on an asyncio loop; ``put`` is thread-safe like Queue.put."""
+
+    def __init__(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[bytes | None] = asyncio.Queue()
+
+    def put(self, event: bytes | None) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self.queue.put_nowait, event)
+        except RuntimeError:
+            pass  # loop already closed: the stream is gone
+
+
+@dataclass
+class _Fault:
+    status: int
+    match: Callable[[httpx.Request, list[str]], bool]
+    remaining: int
+    retry_after: float | None
+
+
+class FakeFastmail(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Stateful fake Fastmail account served through an httpx transport.
+
+    Args:
+        token: JMAP bearer token the fake accepts.
+        username: CardDAV username (basic-auth password is not checked).
+        latency: Seconds added to every request (simulated round-trip).
+        latency_jitter: Extra uniformly random latency, 0..latency_jitter.
+        error_rate: Probability that any non-EventSource request fails with 503.
+        seed: Seed for latency jitter and random errors (reproducible runs).
+        sleep: Sleep function used for latency (injectable for tests).
+    """
+
+    def __init__(
+        self,
+        *,
+        token: str = "fake-token",
+        username: str = "user@fastmail.com",
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = 0,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.token = token
+        self.username = username
+        self.account_id = "u0000001"
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._sleep = sleep
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._faults: list[_Fault] = []
+        self.requests: list[RecordedRequest] = []
+
+        self.session_state = "session-1"
+        self.mailboxes: dict[str, dict] = {}
+        self.emails: dict[str, dict] = {}
+        self._email_state = 0
+        self._mailbox_state = 0
+        self._email_changes: list[tuple[int, str, str]] = []  # (state, kind, id)
+
+        self.vcards: dict[str, tuple[str, str]] = {}  # href -> (etag, vcard text)
+        self._vcard_emails: dict[str, frozenset[str]] = {}  # href -> lowercased EMAILs
+        self._subscribers: list[queue.Queue] = []
+
+        self._principal = f"/dav/principals/user/{username}/"
+        self._home = f"/dav/addressbooks/user/{username}/"
+        self.addressbook_path = f"{self._home}Default/"
+
+        self.add_mailbox("Inbox", role="inbox")
+
+    # ------------------------------------------------------------------
+    # Fixture builders
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def for_settings(cls, settings: MailroomSettings, **kwargs) -> FakeFastmail:
+        """Create a fake with every mailbox and group Mailroom requires."""
+        kwargs.setdefault("username", settings.carddav_username)
+        fake = cls(token=settings.jmap_token, **kwargs)
+        for name in settings.required_mailboxes:
+            if name != "Inbox":
+                fake.add_mailbox(name)
+        for group in settings.contact_groups + [settings.mailroom.provenance_group]:
+            fake.add_group(group)
+        return fake
+
+    def _next_id(self, prefix: str) -> str:
+        return f"{prefix}{next(self._ids):06d}"
+
+    def add_mailbox(
+        self, name: str, role: str | None = None, parent_id: str | None = None
+    ) -> str:
+        """Create a mailbox and return its ID."""
+        with self._lock:
+            mailbox_id = self._next_id("M")
+            self.mailboxes[mailbox_id] = {
+                "id": mailbox_id,
+                "name": name,
+                "role": role,
+                "parentId": parent_id,
+            }
+            self._mailbox_state += 1
+            return mailbox_id
+
+    def mailbox_id(self, name: str) -> str:
+        """Return the ID of the (first top-level) mailbox called ``name``."""
+        if name == "Inbox":
+            return next(m["id"] for m in self.mailboxes.values() if m["role"] == "inbox")
+        matches = [m for m in self.mailboxes.values() if m["name"] == name]
+        if not matches:
+            raise KeyError(name)
+        top = [m for m in matches if m["parentId"] is None]
+        return (top or matches)[0]["id"]
+
+    def add_email(
+        self,
+        sender: str,
+        mailboxes: list[str],
+        name: str | None = None,
+        received_at: str | None = None,
+    ) -> str:
+        """Create an email from ``sender`` in the named mailboxes; return its ID."""
+        with self._lock:
+            email_id = self._next_id("E")
+            self.emails[email_id] = {
+                "id": email_id,
+                "from": [{"email": sender, "name": name}],
+                "mailboxIds": {self.mailbox_id(mb): True for mb in mailboxes},
+                "receivedAt": received_at or f"2025-01-01T00:00:{len(self.emails) % 60:02d}Z",
+            }
+            self._email_changed("created", email_id)
+            self._notify()
+            return email_id
+
+    def add_filler_emails(self, count: int, mailbox: str = "Inbox") -> None:
+        """Add ``count`` unrelated emails (mailbox size for realistic queries)."""
+        for i in range(count):
+            self.add_email(f"filler{i}@example.org", [mailbox])
+
+    def add_group(self, name: str, members: list[str] | None = None) -> str:
+        """Create an Apple-style contact group vCard; return its UID."""
+        uid = str(uuid.uuid4())
+        lines = [
+            "BEGIN:VCARD",
+            "VERSION:3.0",
+            f"UID:{uid}",
+            f"FN:{name}",
+            "N:;;;;",
+            "X-ADDRESSBOOKSERVER-KIND:group",
+        ]
+        lines += [f"X-ADDRESSBOOKSERVER-MEMBER:urn:uuid:{m}" for m in members or []]
+        lines.append("END:VCARD")
+        self._put_vcard(f"{self.addressbook_path}{uid}.vcf", "\r\n".join(lines) + "\r\n")
+        return uid
+
+    def add_contact(
+        self, email: str, name: str | None = None, groups: list[str] | None = None
+    ) -> str:
+        """Create a contact (optionally in existing groups); return its UID."""
+        uid = str(uuid.uuid4())
+        fn = name or email.split("@")[0]
+        text = (
+            "BEGIN:VCARD\r\nVERSION:3.0\r\n"
+            f"UID:{uid}\r\nFN:{fn}\r\nN:;;;;\r\nORG:{fn}\r\n"
+            f"EMAIL;TYPE=INTERNET:{email}\r\nEND:VCARD\r\n"
+        )
+        self._put_vcard(f"{self.addressbook_path}{uid}.vcf", text)
+        for group in groups or []:
+            self.add_group_member(group, uid)
+        return uid
+
+    def add_filler_contacts(self, count: int) -> None:
+        """Add ``count`` unrelated contacts (addressbook size)."""
+        for i in range(count):
+            self.add_contact(f"contact{i}@example.net", name=f"Contact {i}")
+
+    def add_group_member(self, group: str, contact_uid: str) -> None:
+        """Append ``contact_uid`` to group ``group`` directly (no HTTP)."""
+        href = self.group_href(group)
+        _, text = self.vcards[href]
+        member = f"X-ADDRESSBOOKSERVER-MEMBER:urn:uuid:{contact_uid}\r\n"
+        self._put_vcard(href, text.replace("END:VCARD", member + "END:VCARD"))
+
+    def group_href(self, name: str) -> str:
+        """Return the href of the group vCard named ``name``."""
+        for href, (_, text) in self.vcards.items():
+            if _is_group(text) and _vcard_value(text, "FN") == name:
+                return href
+        raise KeyError(name)
+
+    def group_members(self, name: str) -> list[str]:
+        """Return the member contact UIDs of group ``name``."""
+        _, text = self.vcards[self.group_href(name)]
+        return [
+            value.removeprefix("urn:uuid:")
+            for value in _vcard_values(text, "X-ADDRESSBOOKSERVER-MEMBER")
+        ]
+
+    def emails_in(self, mailbox: str) -> list[str]:
+        """Return IDs of emails currently in the named mailbox."""
+        mailbox_id = self.mailbox_id(mailbox)
+        return [e["id"] for e in self.emails.values() if mailbox_id in e["mailboxIds"]]
+
+    # ------------------------------------------------------------------
+    # Error injection
+    # ------------------------------------------------------------------
+
+    def fail(
+        self,
+        status: int = 503,
+        *,
+        match: str | Callable[[httpx.Request, list[str]], bool] | None = None,
+        times: int = 1,
+        retry_after: float | None = None,
+    ) -> None:
+        """Make the next ``times`` matching requests fail with ``status``.
+
+        ``match`` is a JMAP method name (e.g. "Email/set"), an HTTP method
+        (e.g. "PUT"), a URL path substring, or a predicate taking the
+        request and its JMAP method names. None matches every request.
+        """
+        if match is None:
+            predicate = lambda request, methods: True  # noqa: E731
+        elif callable(match):
+            predicate = match
+        else:
+            text = match
+            predicate = lambda request, methods: (  # noqa: E731
+                text in methods or request.method == text or text in request.url.path
+            )
+        with self._lock:
+            self._faults.append(_Fault(status, predicate, times, retry_after))
+
+    def bump_session_state(self) -> None:
+        """Simulate a session change (e.g. new capability); clients refetch it."""
+        with self._lock:
+            n = int(self.session_state.rsplit("-", 1)[1]) + 1
+            self.session_state = f"session-{n}"
+
+    # ------------------------------------------------------------------
+    # Request accounting
+    # ------------------------------------------------------------------
+
+    def reset_requests(self) -> None:
+        """Forget recorded requests (e.g. after startup, before a poll)."""
+        with self._lock:
+            self.requests.clear()
+
+    def count(self, service: str | None = None) -> int:
+        """Number of recorded requests, optionally for one service."""
+        with self._lock:
+            return sum(1 for r in self.requests if service in (None, r.service))
+
+    # ------------------------------------------------------------------
+    # Transport entry point
+    # ------------------------------------------------------------------
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        return self._dispatch(request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Async entry point (the SSE multiplexer's client); streams stay on the loop."""
+        await request.aread()
+        if request.url.path.startswith("/jmap/event"):
+            return self._dispatch(request, async_stream=True)
+        return await asyncio.to_thread(self._dispatch, request)
+
+    def _dispatch(self, request: httpx.Request, async_stream: bool = False) -> httpx.Response:
+        jmap_methods = self._jmap_methods(request)
+        recorded = RecordedRequest(
+            request.method, request.url.host, request.url.path, jmap_methods
+        )
+        with self._lock:
+            self.requests.append(recorded)
+        if recorded.service != "eventsource":
+            self._simulate_latency()
+            fault = self._take_fault(request, jmap_methods)
+            if fault is not None:
+                return fault
+        if not self._authorized(request):
+            return httpx.Response(401, request=request)
+
+        if recorded.service == "carddav":
+            return self._handle_carddav(request)
+        if request.url.path == "/jmap/session":
+            return self._json(request, self._session())
+        if recorded.service == "eventsource":
+            return self._handle_eventsource(request, async_stream)
+        if request.url.path == "/jmap/api/" and request.method == "POST":
+            return self._handle_jmap(request)
+        return httpx.Response(404, request=request)
+
+    def close(self) -> None:
+        """End every open EventSource stream."""
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, []
+        for subscriber in subscribers:
+            subscriber.put(None)
+
+    def _simulate_latency(self) -> None:
+        delay = self.latency
+        if self.latency_jitter:
+            with self._lock:
+                delay += self._random.uniform(0, self.latency_jitter)
+        if delay > 0:
+            self._sleep(delay)
+
+    def _take_fault(self, request: httpx.Request, methods: list[str]) -> httpx.Response | None:
+        with self._lock:
+            for fault in self._faults:
+                if fault.remaining > 0 and fault.match(request, methods):
+                    fault.remaining -= 1
+                    headers = {}
+                    if fault.retry_after is not None:
+                        headers["Retry-After"] = str(int(fault.retry_after))
+                    return httpx.Response(fault.status, headers=headers, request=request)
+            if self.error_rate and self._random.random() < self.error_rate:
+                return httpx.Response(503, request=request)
+        return None
+
+    def _authorized(self, request: httpx.Request) -> bool:
+        auth = request.headers.get("authorization", "")
+        if request.url.host == CARDDAV_HOST:
+            if not auth.startswith("Basic "):
+                return False
+            user = base64.b64decode(auth[6:]).decode().split(":", 1)[0]
+            return user == self.username
+        return auth == f"Bearer {self.token}"
+
+    @staticmethod
+    def _jmap_methods(request: httpx.Request) -> list[str]:
+        if request.url.host == CARDDAV_HOST or request.method != "POST":
+            return []
+        try:
+            payload = json.loads(request.content)
+        except ValueError:
+            return []
+        return [call[0] for call in payload.get("methodCalls", [])]
+
+    @staticmethod
+    def _json(request: httpx.Request, body: dict, status: int = 200) -> httpx.Response:
+        return httpx.Response(status, json=body, request=request)
+
+    # ------------------------------------------------------------------
+    # JMAP
+    # ------------------------------------------------------------------
+
+    def _session(self) -> dict:
+        base = f"https://{JMAP_HOST}"
+        return {
+            "capabilities": {
+                "urn:ietf:params:jmap:core": {"maxObjectsInSet": 500, "maxObjectsInGet": 500},
+                "urn:ietf:params:jmap:mail": {},
+            },
+            "accounts": {self.account_id: {"name": self.username, "isPersonal": True}},
+            "primaryAccounts": {
+                "urn:ietf:params:jmap:core": self.account_id,
+                "urn:ietf:params:jmap:mail": self.account_id,
+            },
+            "username": self.username,
+            "apiUrl": f"{base}/jmap/api/",
+            "downloadUrl": f"{base}/jmap/download/{{accountId}}/{{blobId}}/{{name}}",
+            "eventSourceUrl": f"{base}/jmap/event/",
+            "state": self.session_state,
+        }
+
+    def _handle_jmap(self, request: httpx.Request) -> httpx.Response:
+        try:
+            payload = json.loads(request.content)
+        except ValueError:
+            return self._json(request, {"type": "urn:ietf:params:jmap:error:notJSON"}, 400)
+        responses: list = []
+        with self._lock:
+            for name, args, call_id in payload.get("methodCalls", []):
+                try:
+                    args = self._resolve_references(args, responses)
+                    handler = self._JMAP_METHODS.get(name)
+                    if handler is None:
+                        result = ["error", {"type": "unknownMethod"}, call_id]
+                    elif args.get("accountId") != self.account_id:
+                        result = ["error", {"type": "accountNotFound"}, call_id]
+                    else:
+                        result = [name, handler(self, args), call_id]
+                except _MethodError as exc:
+                    result = ["error", {"type": exc.type}, call_id]
+                responses.append(result)
+            return self._json(
+                request, {"methodResponses": responses, "sessionState": self.session_state}
+            )
+
+    @staticmethod
+    def _resolve_references(args: dict, responses: list) -> dict:
+        resolved = {}
+        for key, value in args.items():
+            if not key.startswith("#"):
+                resolved[key] = value
+                continue
+            source = next(
+                (r for r in responses if r[2] == value["resultOf"] and r[0] == value["name"]),
+                None,
+            )
+            if source is None:
+                raise _MethodError("invalidResultReference")
+            resolved[key[1:]] = _json_pointer(source[1], value["path"])
+        return resolved
+
+    def _mailbox_get(self, args: dict) -> dict:
+        ids = args.get("ids")
+        found = [m for m in self.mailboxes.values() if ids is None or m["id"] in ids]
+        not_found = [i for i in ids or [] if i not in self.mailboxes]
+        return {
+            "accountId": self.account_id,
+            "state": str(self._mailbox_state),
+            "list": [dict(m) for m in found],
+            "notFound": not_found,
+        }
+
+    def _mailbox_set(self, args: dict) -> dict:
+        created: dict = {}
+        not_created: dict = {}
+        creation_ids: dict[str, str] = {}
+        for cid, props in (args.get("create") or {}).items():
+            parent = props.get("parentId")
+            if isinstance(parent, str) and parent.startswith("#"):
+                parent = creation_ids.get(parent[1:])
+                if parent is None:
+                    not_created[cid] = {"type": "invalidProperties", "properties": ["parentId"]}
+                    continue
+            if parent is not None and parent not in self.mailboxes:
+                not_created[cid] = {"type": "invalidProperties", "properties": ["parentId"]}
+                continue
+            name = props.get("name", "")
+            if any(
+                m["name"] == name and m["parentId"] == parent for m in self.mailboxes.values()
+            ):
+                not_created[cid] = {
+                    "type": "invalidProperties",
+                    "properties": ["name"],
+                    "description": f"A mailbox named '{name}' already exists here",
+                }
+                continue
+            new_id = self.add_mailbox(name, parent_id=parent)
+            creation_ids[cid] = new_id
+            created[cid] = {"id": new_id}
+        destroyed = []
+        not_destroyed: dict = {}
+        for mailbox_id in args.get("destroy") or []:
+            if mailbox_id not in self.mailboxes:
+                not_destroyed[mailbox_id] = {"type": "notFound"}
+                continue
+            del self.mailboxes[mailbox_id]
+            for email in self.emails.values():
+                if email["mailboxIds"].pop(mailbox_id, None):
+                    self._email_changed("updated", email["id"])
+            self._mailbox_state += 1
+            destroyed.append(mailbox_id)
+        if created or destroyed:
+            self._notify()
+        return {
+            "accountId": self.account_id,
+            "newState": str(self._mailbox_state),
+            "created": created or None,
+            "notCreated": not_created or None,
+            "destroyed": destroyed or None,
+            "notDestroyed": not_destroyed or None,
+        }
+
+    def _email_matches(self, email: dict, condition: dict) -> bool:
+        if "operator" in condition:
+            results = [self._email_matches(email, c) for c in condition["conditions"]]
+            operator = condition["operator"]
+            if operator == "AND":
+                return all(results)
+            if operator == "OR":
+                return any(results)
+            return not any(results)  # NOT
+        if "inMailbox" in condition and condition["inMailbox"] not in email["mailboxIds"]:
+            return False
+        if "inMailboxOtherThan" in condition and set(email["mailboxIds"]) <= set(
+            condition["inMailboxOtherThan"]
+        ):
+            return False
+        if "from" in condition:
+            needle = condition["from"].lower()
+            if not any(needle in (a.get("email") or "").lower() for a in email["from"]):
+                return False
+        return True
+
+    def _email_query(self, args: dict) -> dict:
+        condition = args.get("filter") or {}
+        matched = sorted(
+            (e for e in self.emails.values() if self._email_matches(e, condition)),
+            key=lambda e: (e["receivedAt"], e["id"]),
+            reverse=True,
+        )
+        position = args.get("position", 0)
+        limit = args.get("limit")
+        page = matched[position:] if limit is None else matched[position : position + limit]
+        result = {
+            "accountId": self.account_id,
+            "queryState": str(self._email_state),
+            "canCalculateChanges": False,
+            "position": position,
+            "ids": [e["id"] for e in page],
+        }
+        if args.get("calculateTotal"):
+            result["total"] = len(matched)
+        return result
+
+    def _email_get(self, args: dict) -> dict:
+        ids = args.get("ids")
+        if ids is None:
+            ids = list(self.emails)
+        properties = args.get("properties")
+        found = []
+        not_found = []
+        for email_id in ids:
+            email = self.emails.get(email_id)
+            if email is None:
+                not_found.append(email_id)
+                continue
+            item = json.loads(json.dumps(email))  # detached copy
+            if properties is not None:
+                item = {k: v for k, v in item.items() if k in properties or k == "id"}
+            found.append(item)
+        return {
+            "accountId": self.account_id,
+            "state": str(self._email_state),
+            "list": found,
+            "notFound": not_found,
+        }
+
+    def _email_set(self, args: dict) -> dict:
+        updated: dict = {}
+        not_updated: dict = {}
+        for email_id, patch in (args.get("update") or {}).items():
+            email = self.emails.get(email_id)
+            if email is None:
+                not_updated[email_id] = {"type": "notFound", "description": "Email not found"}
+                continue
+            mailbox_ids = dict(email["mailboxIds"])
+            for key, value in patch.items():
+                if key == "mailboxIds":
+                    mailbox_ids = {k: True for k, v in value.items() if v}
+                elif key.startswith("mailboxIds/"):
+                    target = key.split("/", 1)[1]
+                    if value:
+                        mailbox_ids[target] = True
+                    else:
+                        mailbox_ids.pop(target, None)
+            unknown = [m for m in mailbox_ids if m not in self.mailboxes]
+            if unknown or not mailbox_ids:
+                not_updated[email_id] = {
+                    "type": "invalidProperties",
+                    "properties": ["mailboxIds"],
+                    "description": "Unknown mailbox" if unknown else "Email must be in a mailbox",
+                }
+                continue
+            if mailbox_ids != email["mailboxIds"]:
+                email["mailboxIds"] = mailbox_ids
+                self._email_changed("updated", email_id)
+            updated[email_id] = None
+        destroyed = []
+        not_destroyed: dict = {}
+        for email_id in args.get("destroy") or []:
+            if self.emails.pop(email_id, None) is None:
+                not_destroyed[email_id] = {"type": "notFound"}
+                continue
+            self._email_changed("destroyed", email_id)
+            destroyed.append(email_id)
+        if updated or destroyed:
+            self._notify()
+        return {
+            "accountId": self.account_id,
+            "newState": str(self._email_state),
+            "updated": updated or None,
+            "notUpdated": not_updated or None,
+            "destroyed": destroyed or None,
+            "notDestroyed": not_destroyed or None,
+        }
+
+    def _email_changes(self, args: dict) -> dict:
+        try:
+            since = int(args["sinceState"])
+        except (KeyError, ValueError):
+            raise _MethodError("cannotCalculateChanges") from None
+        if since > self._email_state:
+            raise _MethodError("cannotCalculateChanges")
+        kinds: dict[str, set[str]] = {"created": set(), "updated": set(), "destroyed": set()}
+        for state, kind, email_id in self._email_changes:
+            if state > since:
+                kinds[kind].add(email_id)
+        kinds["updated"] -= kinds["created"]
+        kinds["created"] -= kinds["destroyed"]
+        kinds["updated"] -= kinds["destroyed"]
+        return {
+            "accountId": self.account_id,
+            "oldState": str(since),
+            "newState": str(self._email_state),
+            "hasMoreChanges": False,
+            **{kind: sorted(ids) for kind, ids in kinds.items()},
+        }
+
+    def _email_changed(self, kind: str, email_id: str) -> None:
+        self._email_state += 1
+        self._email_changes.append((self._email_state, kind, email_id))
+
+    _JMAP_METHODS: dict[str, Callable[[FakeFastmail, dict], dict]] = {
+        "Mailbox/get": _mailbox_get,
+        "Mailbox/set": _mailbox_set,
+        "Email/query": _email_query,
+        "Email/get": _email_get,
+        "Email/set": _email_set,
+        "Email/changes": _email_changes,
+    }
+
+    # ------------------------------------------------------------------
+    # EventSource
+    # ------------------------------------------------------------------
+
+    def _handle_eventsource(self, request: httpx.Request, async_stream: bool) -> httpx.Response:
+        if async_stream:
+            subscriber = _AsyncSubscriber()
+            content = self._async_event_stream(subscriber)
+        else:
+            subscriber = queue.Queue()
+            content = self._event_stream(subscriber)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return httpx.Response(
+            200,
+            headers={"Content-Type": "text/event-stream"},
+            content=content,
+            request=request,
+        )
+
+    def _event_stream(self, subscriber: queue.Queue) -> Iterator[bytes]:
+        while True:
+            event = subscriber.get()
+            if event is None:
+                return
+            yield event
+
+    async def _async_event_stream(self, subscriber: _AsyncSubscriber) -> AsyncIterator[bytes]:
+        try:
+            while True:
+                event = await subscriber.queue.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            with self._lock:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+
+    def _notify(self) -> None:
+        data = json.dumps(
+            {
+                "changed": {
+                    self.account_id: {
+                        "Email": str(self._email_state),
+                        "Mailbox": str(self._mailbox_state),
+                    }
+                }
+            }
+        )
+        event = f"event: state\ndata: {data}\n\n".encode()
+        for subscriber in self._subscribers:
+            subscriber.put(event)
+
+    # ------------------------------------------------------------------
+    # CardDAV
+    # ------------------------------------------------------------------
+
+    def _handle_carddav(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        method = request.method
+        if method == "PROPFIND":
+            return self._propfind(request, path)
+        if method == "REPORT" and path == self.addressbook_path:
+            return self._report(request)
+        if method == "GET":
+            with self._lock:
+                entry = self.vcards.get(path)
+            if entry is None:
+                return httpx.Response(404, request=request)
+            etag, text = entry
+            return httpx.Response(
+                200,
+                headers={"ETag": etag, "Content-Type": "text/vcard; charset=utf-8"},
+                text=text,
+                request=request,
+            )
+        if method == "PUT":
+            return self._put(request, path)
+        if method == "DELETE":
+            with self._lock:
+                entry = self.vcards.get(path)
+                if entry is None:
+                    return httpx.Response(404, request=request)
+                if_match = request.headers.get("if-match")
+                if if_match is not None and if_match != entry[0]:
+                    return httpx.Response(412, request=request)
+                del self.vcards[path]
+                self._vcard_emails.pop(path, None)
+            return httpx.Response(204, request=request)
+        return httpx.Response(405, request=request)
+
+    def _propfind(self, request: httpx.Request, path: str) -> httpx.Response:
+        if path == "/.well-known/carddav":
+            body = _multistatus(
+                [(path, f"<D:current-user-principal><D:href>{self._principal}</D:href>"
+                        "</D:current-user-principal>")]
+            )
+        elif path == self._principal:
+            body = _multistatus(
+                [(path, f"<C:addressbook-home-set><D:href>{self._home}</D:href>"
+                        "</C:addressbook-home-set>")]
+            )
+        elif path == self._home:
+            body = _multistatus(
+                [
+                    (self._home, "<D:resourcetype><D:collection/></D:resourcetype>"),
+                    (
+                        self.addressbook_path,
+                        "<D:resourcetype><D:collection/><C:addressbook/></D:resourcetype>"
+                        "<D:displayname>Personal</D:displayname>",
+                    ),
+                ]
+            )
+        else:
+            return httpx.Response(404, request=request)
+        return _xml_response(request, body)
+
+    def _report(self, request: httpx.Request) -> httpx.Response:
+        root = ET.fromstring(request.content)
+        with self._lock:
+            items = list(self.vcards.items())
+        if root.tag == f"{CARDDAV}addressbook-multiget":
+            wanted = {href.text for href in root.findall(f"{DAV}href")}
+            items = [(href, entry) for href, entry in items if href in wanted]
+        else:
+            text_match = root.find(f".//{CARDDAV}prop-filter[@name='EMAIL']/{CARDDAV}text-match")
+            if text_match is not None and text_match.text:
+                needle = text_match.text.lower()
+                items = [
+                    (href, entry)
+                    for href, entry in items
+                    if needle in self._vcard_emails.get(href, ())
+                ]
+        want_data = root.find(f".//{CARDDAV}address-data") is not None
+        responses = []
+        for href, (etag, text) in items:
+            props = f"<D:getetag>{escape(etag)}</D:getetag>"
+            if want_data:
+                props += f"<C:address-data>{escape(text)}</C:address-data>"
+            responses.append((href, props))
+        return _xml_response(request, _multistatus(responses))
+
+    def _put(self, request: httpx.Request, path: str) -> httpx.Response:
+        if not path.startswith(self.addressbook_path):
+            return httpx.Response(403, request=request)
+        with self._lock:
+            existing = self.vcards.get(path)
+            if request.headers.get("if-none-match") == "*" and existing is not None:
+                return httpx.Response(412, request=request)
+            if_match = request.headers.get("if-match")
+            if if_match is not None and (existing is None or existing[0] != if_match):
+                return httpx.Response(412, request=request)
+            etag = self._put_vcard(path, request.content.decode("utf-8"))
+        return httpx.Response(
+            204 if existing is not None else 201, headers={"ETag": etag}, request=request
+        )
+
+    def _put_vcard(self, href: str, text: str) -> str:
+        with self._lock:
+            etag = f'"{self._next_id("etag-")}"'
+            self.vcards[href] = (etag, text)
+            self._vcard_emails[href] = frozenset(
+                e.lower() for e in _vcard_values(text, "EMAIL")
+            )
+            return etag
+
+
+def start_workflow(
+    fake: httpx.BaseTransport,
+    settings: MailroomSettings,
+    session_cache: SessionCache | None = None,
+) -> ScreenerWorkflow:
+    """Run Mailroom's startup sequence against ``fake`` and build the workflow.
+
+    Mirrors ``mailroom.__main__.main`` steps 2-6, with real clients wired to
+    the fake and client-side throttling disabled. ``fake`` is usually a
+    FakeFastmail, but any transport works (e.g. a ReplayTransport).
+    """
+    jmap = JMAPClient(
+        token=settings.jmap_token,
+        http=UNTHROTTLED_HTTP,
+        transport=fake,
+        session_cache=session_cache,
+    )
+    jmap.connect()
+    carddav = CardDAVClient(
+        username=getattr(fake, "username", settings.carddav_username),
+        password=settings.carddav_password,
+        http=UNTHROTTLED_HTTP,
+        transport=fake,
+    )
+    carddav.connect()
+    mailbox_ids = jmap.resolve_mailboxes(settings.required_mailboxes)
+    carddav.validate_groups(
+        settings.contact_groups + [settings.mailroom.provenance_group],
+        infrastructure_groups=[settings.mailroom.provenance_group],
+    )
+    return ScreenerWorkflow(jmap, carddav, settings, mailbox_ids)
+
+
+class _MethodError(Exception):
+    """A JMAP method-level error (returned as an ``error`` response)."""
+
+    def __init__(self, type_: str) -> None:
+        super().__init__(type_)
+        self.type = type_
+
+
+def _json_pointer(value, path: str):
+    """Evaluate a JMAP result-reference path (JSON pointer with ``*``)."""
+    parts = [p for p in path.split("/") if p]
+    return _walk(value, parts)
+
+
+def _walk(value, parts: list[str]):
+    if not parts:
+        return value
+    head, rest = parts[0], parts[1:]
+    if head == "*":
+        out = []
+        for item in value:
+            result = _walk(item, rest)
+            out.extend(result if isinstance(result, list) else [result])
+        return out
+    if isinstance(value, list):
+        return _walk(value[int(head)], rest)
+    return _walk(value[head], rest)
+
+
+_UNFOLD = re.compile(r"\r?\n[ \t]")
+
+
+def _vcard_values(text: str, prop: str) -> list[str]:
+    values = []
+    for line in _UNFOLD.sub("", text).splitlines():
+        name = line.split(":", 1)[0].split(";", 1)[0].upper()
+        if name == prop and ":" in line:
+            values.append(line.split(":", 1)[1])
+    return values
+
+
+def _vcard_value(text: str, prop: str) -> str | None:
+    values = _vcard_values(text, prop)
+    return values[0] if values else None
+
+
+def _is_group(text: str) -> bool:
+    kind = _vcard_value(text, "X-ADDRESSBOOKSERVER-KIND")
+    return kind is not None and kind.lower() == "group"
+
+
+def _multistatus(responses: list[tuple[str, str]]) -> str:
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<D:multistatus xmlns:D="DAV:" xmlns:C="urn:ietf:params:xml:ns:carddav">',
+    ]
+    for href, props in responses:
+        parts.append(
+            f"<D:response><D:href>{escape(href)}</D:href><D:propstat>"
+            f"<D:prop>{props}</D:prop><D:status>HTTP/1.1 200 OK</D:status>"
+            "</D:propstat></D:response>"
+        )
+    parts.append("</D:multistatus>")
+    return "".join(parts)
+
+
+def _xml_response(request: httpx.Request, body: str) -> httpx.Response:
+    return httpx.Response(
+        207,
+        headers={"Content-Type": "application/xml; charset=utf-8"},
+        content=body.encode("utf-8"),
+        request=request,
+    )
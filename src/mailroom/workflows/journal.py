@@ -0,0 +1,125 @@
+"""SenderJournal: which steps of a sender's processing already succeeded.
+
+_process_sender removes the triage label last, so a sender interrupted by
+a crash or a transient failure is simply retried. Without a journal, the
+retry redoes every step: contact search, upsert (another NOTE history
+line), group PUTs and a full label reconcile. The journal records each
+step as it completes, so the retry resumes at the first incomplete one.
+
+Entries are keyed by sender, triage label and the exact email IDs. If the
+user adds or re-labels an email, the key changes and processing starts
+over. Entries older than MAX_AGE_SECONDS are ignored, because what they
+recorded (group membership, contact UID) may have been changed by hand
+since. The journal is a shortcut, never a source of truth: losing it only
+costs a full retry.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+MAX_AGE_SECONDS = 6 * 3600
+
+log = structlog.get_logger(component="journal")
+
+
+def journal_key(sender: str, label: str, email_ids: list[str]) -> str:
+    """Key of one processing attempt: sender + label + the triggering emails."""
+    raw = "\0".join([sender, label, *sorted(email_ids)])
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+class JournalEntry:
+    """Completed steps for one sender attempt (step name -> recorded data)."""
+
+    def __init__(self, journal: SenderJournal, key: str, steps: dict[str, Any]) -> None:
+        self._journal = journal
+        self.key = key
+        self.steps = steps
+
+    def done(self, step: str) -> bool:
+        return step in self.steps
+
+    def __getitem__(self, step: str) -> Any:
+        return self.steps[step]
+
+    def record(self, step: str, data: Any = None) -> None:
+        """Mark ``step`` complete (with its result, if later steps need it)."""
+        self.steps[step] = data
+        self._journal._touch(self)
+
+
+class SenderJournal:
+    """Journal of per-sender step progress, in memory and optionally on disk.
+
+    Args:
+        path: JSON file the journal is written through to (None: memory only,
+            which still saves work on retries within one process).
+        clock: Wall clock for entry age.
+    """
+
+    def __init__(self, path: Path | None = None, clock: Callable[[], float] = time.time) -> None:
+        self._path = path
+        self._clock = clock
+        self._entries: dict[str, dict] = {}
+        if path is not None:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self._path.read_text())
+            entries = {k: v for k, v in data["entries"].items() if isinstance(v["steps"], dict)}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return  # missing or corrupt: start empty
+        cutoff = self._clock() - MAX_AGE_SECONDS
+        self._entries = {k: v for k, v in entries.items() if v.get("updated", 0) >= cutoff}
+
+    def entry(self, sender: str, label: str, email_ids: list[str]) -> JournalEntry:
+        """Return the entry for this attempt (empty if new or expired)."""
+        key = journal_key(sender, label, email_ids)
+        stored = self._entries.get(key)
+        if stored is None or stored["updated"] < self._clock() - MAX_AGE_SECONDS:
+            return JournalEntry(self, key, {})
+        return JournalEntry(self, key, dict(stored["steps"]))
+
+    def complete(self, entry: JournalEntry) -> None:
+        """Forget a finished attempt."""
+        if self._entries.pop(entry.key, None) is not None:
+            self._save()
+
+    def _touch(self, entry: JournalEntry) -> None:
+        now = self._clock()
+        cutoff = now - MAX_AGE_SECONDS
+        # Abandoned attempts (labels removed by the user) age out here
+        self._entries = {k: v for k, v in self._entries.items() if v["updated"] >= cutoff}
+        self._entries[entry.key] = {"steps": dict(entry.steps), "updated": now}
+        self._save()
+
+    def _save(self) -> None:
+        if self._path is None:
+            return
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self._path.parent, prefix=".sender-journal-")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump({"entries": self._entries}, f)
+                os.replace(tmp, self._path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError as exc:
+            # The in-memory journal still works; only a restart loses progress
+            log.warning("journal_save_failed", error=str(exc))
@@ -0,0 +1,145 @@
+"""SenderQueue: priority work queue of triaged senders that persists across polls."""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+QUEUE_FILE_VERSION = 1
+
+# A sender passed over this many times jumps ahead of everyone else, so a
+# steady stream of small triages can never starve a large one.
+STARVATION_DEFERRALS = 3
+
+
+@dataclass
+class QueuedSender:
+    """A clean (conflict-free) triaged sender waiting to be processed."""
+
+    sender: str
+    emails: list[tuple[str, str]]  # (email_id, label_name)
+    first_seen: float  # clock value when the queue first saw this sender
+    deferrals: int = 0  # polls that ran out of budget before reaching it
+
+    @property
+    def priority(self) -> tuple[int, int, float]:
+        """Sort key: starving senders first, then fewest emails, then oldest."""
+        starving = 0 if self.deferrals >= STARVATION_DEFERRALS else 1
+        return (starving, len(self.emails), self.first_seen)
+
+
+class SenderQueue:
+    """Priority queue of triaged senders, kept in sync with each poll's scan.
+
+    The poll cycle calls sync() with the senders it found, then walks
+    ordered() until its budget runs out. Entries survive across polls until
+    the sender is no longer triaged (its labels were removed, either by
+    successful processing or by the user), so a sender keeps its age and
+    deferral count while it waits.
+
+    Ordering favors interactive triage: a sender with one or two triaged
+    emails is handled before a bulk re-triage. Ties go to whoever has been
+    waiting longest, and senders deferred STARVATION_DEFERRALS times are
+    promoted to the front.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._entries: dict[str, QueuedSender] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, sender: object) -> bool:
+        return sender in self._entries
+
+    def sync(self, senders: dict[str, list[tuple[str, str]]]) -> None:
+        """Replace queue contents with the senders found by the latest scan.
+
+        Senders already queued keep their first_seen and deferral count
+        (their email list is refreshed). New senders are stamped with the
+        current clock. Queued senders missing from the scan are dropped.
+        """
+        now = self._clock()
+        entries: dict[str, QueuedSender] = {}
+        for sender, emails in senders.items():
+            existing = self._entries.get(sender)
+            if existing is None:
+                entries[sender] = QueuedSender(sender, emails, first_seen=now)
+            else:
+                existing.emails = emails
+                entries[sender] = existing
+        self._entries = entries
+
+    def ordered(self) -> list[QueuedSender]:
+        """Return all queued senders, highest priority first."""
+        return sorted(self._entries.values(), key=lambda e: e.priority)
+
+    def complete(self, sender: str) -> None:
+        """Drop a sender that was processed successfully."""
+        self._entries.pop(sender, None)
+
+    def defer(self, sender: str) -> None:
+        """Record that a poll ran out of budget before reaching this sender."""
+        entry = self._entries.get(sender)
+        if entry is not None:
+            entry.deferrals += 1
+
+    def save(self, path: Path) -> None:
+        """Write the queue to ``path`` atomically (raises OSError on failure).
+
+        Ages are stored instead of clock values: the monotonic clock means
+        nothing to the next process.
+        """
+        now = self._clock()
+        data = {
+            "version": QUEUE_FILE_VERSION,
+            "saved_at": time.time(),
+            "senders": [
+                {
+                    "sender": e.sender,
+                    "emails": e.emails,
+                    "age": now - e.first_seen,
+                    "deferrals": e.deferrals,
+                }
+                for e in self._entries.values()
+            ],
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".sender-queue-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: Path, clock: Callable[[], float] = time.monotonic) -> SenderQueue:
+        """Restore a queue saved by save(); a missing or unreadable file gives an empty queue.
+
+        Time spent between save and load counts toward each sender's age.
+        """
+        queue = cls(clock=clock)
+        try:
+            data = json.loads(path.read_text())
+            if data.get("version") != QUEUE_FILE_VERSION:
+                return queue
+            now = clock()
+            downtime = max(0.0, time.time() - float(data["saved_at"]))
+            for item in data["senders"]:
+                queue._entries[item["sender"]] = QueuedSender(
+                    sender=item["sender"],
+                    emails=[(email_id, label) for email_id, label in item["emails"]],
+                    first_seen=now - float(item["age"]) - downtime,
+                    deferrals=int(item["deferrals"]),
+                )
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return cls(clock=clock)  # a lost queue only costs the senders' place in line
+        return queue
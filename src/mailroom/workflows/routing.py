@@ -0,0 +1,65 @@
+"""RoutingTable: category routes compiled against resolved mailbox IDs.
+
+MailroomSettings.routes holds the name-level routing (parent chain,
+groups, destination mailboxes) per triage label. The workflow also needs
+mailbox IDs, which are only known after resolve_mailboxes(), so it
+compiles the table once at startup. Per sender, triage then does dict
+lookups only: no name maps, chain walks or managed-set scans.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from mailroom.core.config import CategoryRoute, MailroomSettings
+
+
+@dataclass(frozen=True)
+class MailboxRoute:
+    """A CategoryRoute with its mailbox IDs resolved."""
+
+    route: CategoryRoute
+    destination_ids: tuple[str, ...]  # destination mailbox IDs along the chain
+    # Email/set patch: strip every managed label + Screener, add the chain's
+    # destinations. Inbox is never stripped.
+    reconcile_patch: Mapping[str, bool | None]
+    # The same, also adding Inbox (for Screener emails of add_to_inbox categories)
+    inbox_patch: Mapping[str, bool | None]
+
+
+class RoutingTable:
+    """Triage label -> MailboxRoute, compiled once per workflow.
+
+    Args:
+        settings: Mailroom configuration (provides the name-level routes).
+        mailbox_ids: Resolved mailbox name -> ID mapping.
+    """
+
+    def __init__(self, settings: MailroomSettings, mailbox_ids: dict[str, str]) -> None:
+        self.screener_id = mailbox_ids[settings.triage.screener_mailbox]
+        self.inbox_id = mailbox_ids["Inbox"]
+
+        strip: dict[str, bool | None] = {
+            f"mailboxIds/{mailbox_ids[name]}": None
+            for name in sorted(settings.managed_mailboxes)
+            if mailbox_ids[name] != self.inbox_id
+        }
+        strip[f"mailboxIds/{self.screener_id}"] = None
+
+        self._routes: dict[str, MailboxRoute] = {}
+        for label, route in settings.routes.items():
+            destination_ids = tuple(mailbox_ids[name] for name in route.destinations)
+            patch = dict(strip)
+            for dest_id in destination_ids:
+                patch[f"mailboxIds/{dest_id}"] = True
+            self._routes[label] = MailboxRoute(
+                route=route,
+                destination_ids=destination_ids,
+                reconcile_patch=MappingProxyType(patch),
+                inbox_patch=MappingProxyType({**patch, f"mailboxIds/{self.inbox_id}": True}),
+            )
+
+    def __getitem__(self, label: str) -> MailboxRoute:
+        return self._routes[label]
@@ -2,12 +2,21 @@
 
 from __future__ import annotations
 
+import time
+from pathlib import Path
+
 import structlog
 import vobject
 
 from mailroom.clients.carddav import CardDAVClient
 from mailroom.clients.jmap import BATCH_SIZE, JMAPClient
-from mailroom.core.config import MailroomSettings, ResolvedCategory, get_parent_chain
+from mailroom.clients.session_cache import token_key
+from mailroom.core import metrics, tracing
+from mailroom.core.config import CategoryRoute, MailroomSettings
+from mailroom.core.deadline import Deadline, DeadlineExceeded, deadline
+from mailroom.workflows.journal import SenderJournal
+from mailroom.workflows.queue import SenderQueue
+from mailroom.workflows.routing import MailboxRoute, RoutingTable
 
 
 class ScreenerWorkflow:
@@ -21,8 +30,17 @@ class ScreenerWorkflow:
     2. Filter out emails already marked with @MailroomError
     3. Detect conflicting triage labels (same sender, different labels)
     4. Apply @MailroomError to conflicted senders
-    5. Process each clean sender: upsert contact, reconcile email labels
-       across all mailboxes, remove triage label (last step)
+    5. Sync clean senders into the persistent SenderQueue
+    6. Process queued senders in priority order until the poll budget
+       (polling.budget_seconds / polling.budget_senders) runs out:
+       upsert contact, reconcile email labels across all mailboxes,
+       remove triage label (last step). Senders left over are deferred
+       and reported via the ``backlog`` property.
+
+    The queue is saved to the state directory after every poll and restored
+    on startup, so unfinished senders keep their place in line across
+    restarts. request_stop() (SIGTERM) makes the running poll stop at the
+    next sender boundary, within polling.drain_seconds.
     """
 
     def __init__(
@@ -36,16 +54,99 @@ class ScreenerWorkflow:
         self._carddav = carddav
         self._settings = settings
         self._mailbox_ids = mailbox_ids
+        self._routing = RoutingTable(settings, mailbox_ids)
         self._log = structlog.get_logger(component="screener")
         self._label_failure_counts: dict[str, int] = {}
+        # Local state is keyed by token hash, so accounts sharing a directory never collide
+        digest = token_key(settings.jmap_token)[:16]
+        self._queue_path: Path | None = None
+        if settings.state.sender_queue:
+            self._queue_path = settings.state_dir / f"sender-queue-{digest}.json"
+            self._queue = SenderQueue.load(self._queue_path)
+        else:
+            self._queue = SenderQueue()
+        # Restored senders count as backlog: the first poll runs right away
+        self._backlog = len(self._queue)
+        if self._backlog:
+            self._log.info("sender_queue_restored", senders=self._backlog)
+        self._journal = SenderJournal(
+            settings.state_dir / f"sender-journal-{digest}.json"
+            if settings.state.sender_journal
+            else None
+        )
+        self._stop_requested = False
+        self._drain_seconds = float(settings.polling.drain_seconds)
+        self._active_deadlines: list[Deadline] = []
+
+    @property
+    def backlog(self) -> int:
+        """Number of senders the last poll deferred because its budget ran out.
+
+        Zero after a failed poll, so callers wait before retrying.
+        """
+        return self._backlog
+
+    def request_stop(self, drain_seconds: float | None = None) -> None:
+        """Stop the running poll at the next sender boundary (shutdown).
+
+        The sender in progress gets at most ``drain_seconds`` (default
+        polling.drain_seconds) to finish, then is abandoned with its
+        labels intact. Remaining senders stay queued and are saved for
+        the next process. Safe to call from a signal handler or another
+        thread; later polls process no senders.
+        """
+        if drain_seconds is None:
+            drain_seconds = self._settings.polling.drain_seconds
+        self._drain_seconds = drain_seconds
+        self._stop_requested = True
+        for active in list(self._active_deadlines):
+            active.shorten(drain_seconds, name="shutdown drain")
+
+    def resume(self) -> None:
+        """Undo request_stop(): later polls process senders again (lease regained)."""
+        self._stop_requested = False
 
     def poll(self) -> int:
-        """Execute one poll cycle. Returns count of successfully processed senders."""
+        """Execute one poll cycle. Returns count of successfully processed senders.
+
+        The whole cycle runs under polling.poll_timeout_seconds and each
+        sender under polling.sender_timeout_seconds. A sender that overruns
+        is abandoned with its triage labels intact and retried next cycle.
+        """
+        timeout = self._settings.polling.poll_timeout_seconds
+        try:
+            with deadline(timeout, name="poll deadline") as poll_deadline:
+                self._active_deadlines = [poll_deadline]
+                return self._poll(poll_deadline)
+        except Exception as exc:
+            # A failed poll is retried after the normal wait, never as a backlog poll
+            self._backlog = 0
+            if isinstance(exc, DeadlineExceeded):
+                metrics.incr("poll_deadline_exceeded")
+            raise
+        finally:
+            self._active_deadlines = []
+            self._save_queue()
+
+    def _save_queue(self) -> None:
+        """Persist the sender queue (failures only cost a cold queue next start)."""
+        if self._queue_path is None:
+            return
+        try:
+            self._queue.save(self._queue_path)
+        except OSError as exc:
+            self._log.warning("sender_queue_save_failed", error=str(exc))
+
+    def _poll(self, poll_deadline: Deadline) -> int:
+        """Poll cycle body, run inside the per-poll deadline."""
         # Step 1: Collect all triaged emails grouped by sender
-        triaged, sender_names = self._collect_triaged()
+        with tracing.span("collect_triaged"):
+            triaged, sender_names = self._collect_triaged()
 
         # Step 2: If empty, log and return
         if not triaged:
+            self._queue.sync({})
+            self._backlog = 0
             self._log.debug("poll_complete", triaged_senders=0)
             return 0
 
@@ -56,26 +157,81 @@ class ScreenerWorkflow:
         for sender, emails in conflicted.items():
             self._apply_error_label(sender, emails)
 
-        # Step 5: Process each clean sender with try/except for retry safety
+        # Step 5: Queue clean senders (priority and age persist across polls)
+        self._queue.sync(clean)
+
+        # Step 6: Process in priority order within the poll budget, with
+        # try/except per sender for retry safety
+        budget = self._settings.polling
+        budget_ends = time.monotonic() + budget.budget_seconds
         processed = 0
-        for sender, emails in clean.items():
-            try:
-                self._process_sender(sender, emails, sender_names)
-                processed += 1
-            except Exception:
-                self._log.warning(
-                    "sender_processing_failed",
-                    sender=sender,
-                    exc_info=True,
+        attempted = 0
+        deferred = 0
+        timed_out = 0
+        handed_off = 0
+        for entry in self._queue.ordered():
+            if self._stop_requested:
+                handed_off += 1  # stays queued, without a starvation deferral
+                continue
+            out_of_budget = poll_deadline.expired or (
+                attempted > 0
+                and (
+                    time.monotonic() >= budget_ends
+                    or (budget.budget_senders is not None and attempted >= budget.budget_senders)
                 )
-                # Leave triage labels in place for retry on next poll (TRIAGE-06)
+            )
+            if out_of_budget:
+                self._queue.defer(entry.sender)
+                deferred += 1
+                continue
 
-        # Step 6: Log summary
+            attempted += 1
+            with tracing.span(
+                "sender", sender=entry.sender, emails=len(entry.emails)
+            ) as span:
+                try:
+                    with deadline(
+                        budget.sender_timeout_seconds, name="sender deadline"
+                    ) as sender_deadline:
+                        self._active_deadlines = [poll_deadline, sender_deadline]
+                        if self._stop_requested:  # stop arrived between check and deadline
+                            sender_deadline.shorten(self._drain_seconds, name="shutdown drain")
+                        self._process_sender(entry.sender, entry.emails, sender_names)
+                    self._queue.complete(entry.sender)
+                    processed += 1
+                    span["outcome"] = "ok"
+                except DeadlineExceeded as exc:
+                    timed_out += 1
+                    span["outcome"] = "timeout"
+                    metrics.incr("sender_deadline_exceeded")
+                    self._log.warning(
+                        "sender_deadline_exceeded",
+                        sender=entry.sender,
+                        emails=len(entry.emails),
+                        reason=str(exc),
+                    )
+                    # Abandoned cleanly: triage labels stay for the next cycle
+                except Exception:
+                    span["outcome"] = "failed"
+                    self._log.warning(
+                        "sender_processing_failed",
+                        sender=entry.sender,
+                        exc_info=True,
+                    )
+                    # Leave triage labels in place for retry on next poll (TRIAGE-06)
+        self._backlog = deferred + handed_off
+        if handed_off:
+            metrics.incr("poll_interrupted")
+            self._log.info("poll_interrupted", handed_off=handed_off, processed=processed)
+
+        # Step 7: Log summary
         self._log.info(
             "poll_complete",
             triaged_senders=len(triaged),
             processed=processed,
             conflicts=len(conflicted),
+            deferred=deferred,
+            timed_out=timed_out,
         )
 
         return processed
@@ -107,6 +263,7 @@ class ScreenerWorkflow:
                     "accountId": self._jmap.account_id,
                     "filter": {"inMailbox": label_id},
                     "limit": 100,
+                    "calculateTotal": True,  # total is only returned on request
                 },
                 f"q{i}",
             ])
@@ -176,26 +333,9 @@ class ScreenerWorkflow:
 
         # Filter out emails that already have @MailroomError (separate call)
         error_id = self._mailbox_ids[self._settings.mailroom.label_error]
-        responses = self._jmap.call(
-            [
-                [
-                    "Email/get",
-                    {
-                        "accountId": self._jmap.account_id,
-                        "ids": all_email_ids,
-                        "properties": ["id", "mailboxIds"],
-                    },
-                    "g0",
-                ]
-            ]
-        )
-        email_list = responses[0][1]["list"]
-
-        # Build set of email IDs that have the error label
+        mailbox_ids = self._jmap.get_email_mailbox_ids(all_email_ids)
         errored_ids = {
-            e["id"]
-            for e in email_list
-            if error_id in e.get("mailboxIds", {})
+            email_id for email_id, mailboxes in mailbox_ids.items() if error_id in mailboxes
         }
 
         if not errored_ids:
@@ -375,66 +515,88 @@ class ScreenerWorkflow:
            across all mailboxes (both initial triage and re-triage)
         6. Structured logging
         7. Remove triage label from triggering emails -- LAST STEP
+
+        Steps 1-5 are recorded in the SenderJournal as they complete, so a
+        retry of the same sender/label/emails resumes where it failed.
         """
         label_name = emails[0][1]  # All emails have the same label (conflict-free)
         email_ids = [eid for eid, _ in emails]
-        category = self._settings.label_to_category_mapping[label_name]
+        routing = self._routing[label_name]
+        category = routing.route.category
         group_name = category.contact_group
         contact_type = category.contact_type
 
         log = self._log.bind(sender=sender, label=label_name, group=group_name)
-
-        # Step 1: Detect re-triage
-        contact_uid, old_group = self._detect_retriage(sender)
+        journal = self._journal.entry(sender, label_name, email_ids)
+        if journal.steps:
+            metrics.incr("journal_steps_skipped", len(journal.steps))
+            log.info("sender_resumed", completed_steps=sorted(journal.steps))
+
+        # Step 1: Detect re-triage (journaled: after the upsert below, the
+        # contact is already in the new group and would look like a re-triage)
+        if not journal.done("detect"):
+            journal.record("detect", list(self._detect_retriage(sender)))
+        contact_uid, old_group = journal["detect"]
         is_retriage = contact_uid is not None and old_group is not None
 
         # Step 1b: Clean @MailroomWarning from all sender emails (idempotent)
-        if self._settings.mailroom.warnings_enabled:
+        if self._settings.mailroom.warnings_enabled and not journal.done("warnings_cleared"):
             warning_label = self._settings.mailroom.label_warning
             warning_id = self._mailbox_ids.get(warning_label)
             if warning_id:
                 all_sender_emails = self._jmap.query_emails_by_sender(sender)
                 if all_sender_emails:
                     self._jmap.batch_remove_labels(all_sender_emails, [warning_id])
+            journal.record("warnings_cleared")
 
         # Step 2: Upsert contact into group (CardDAV)
-        display_name = (sender_names or {}).get(sender)
-        result = self._carddav.upsert_contact(
-            sender, display_name, group_name, contact_type=contact_type,
-            provenance_group=self._settings.mailroom.provenance_group,
-        )
-        log.info("contact_upserted", action=result["action"], uid=result["uid"])
+        if not journal.done("upsert"):
+            display_name = (sender_names or {}).get(sender)
+            result = self._carddav.upsert_contact(
+                sender, display_name, group_name, contact_type=contact_type,
+                provenance_group=self._settings.mailroom.provenance_group,
+            )
+            log.info("contact_upserted", action=result["action"], uid=result["uid"])
+            journal.record("upsert", result)
+        result = journal["upsert"]
 
         # Step 3: Contact group management
-        resolved_map = {c.name: c for c in self._settings.resolved_categories}
-
-        if is_retriage:
+        if journal.done("groups"):
+            pass
+        elif is_retriage:
             # Find the old category from old_group
-            old_category = next(
-                c for c in self._settings.resolved_categories
-                if c.contact_group == old_group
-            )
+            old_route = self._settings.group_routes[old_group]
             uid = contact_uid or result["uid"]
-            self._reassign_contact_groups(uid, old_category, category)
+            self._reassign_contact_groups(uid, old_route, routing.route)
+            journal.record("groups")
         else:
             # Initial triage: add to ancestor groups
-            chain = get_parent_chain(category.name, resolved_map)
+            chain = routing.route.chain
             if len(chain) > 1 and "uid" in result:
                 uid = result["uid"]
                 for ancestor in chain[1:]:
                     self._carddav.add_to_group(ancestor.contact_group, uid)
                     log.info("ancestor_group_added", group=ancestor.contact_group)
+            journal.record("groups")
 
         # Step 3a: Apply warning label if name mismatch detected
-        if result.get("name_mismatch", False) and self._settings.mailroom.warnings_enabled:
+        if (
+            result.get("name_mismatch", False)
+            and self._settings.mailroom.warnings_enabled
+            and not journal.done("warning_applied")
+        ):
             self._apply_warning_label(sender, email_ids)
+            journal.record("warning_applied")
 
         # Step 4: Email label management
         # Both initial triage and re-triage use _reconcile_email_labels to sweep
         # ALL emails from the sender across all mailboxes (not just Screener).
-        emails_reconciled = self._reconcile_email_labels(
-            sender, category, category.add_to_inbox
-        )
+        if not journal.done("reconcile"):
+            journal.record(
+                "reconcile",
+                self._reconcile_email_labels(sender, routing, category.add_to_inbox),
+            )
+        emails_reconciled = journal["reconcile"]
 
         # Step 5: Structured logging
         if is_retriage:
@@ -457,6 +619,7 @@ class ScreenerWorkflow:
         label_id = self._mailbox_ids[label_name]
         for email_id in email_ids:
             self._jmap.remove_label(email_id, label_id)
+        self._journal.complete(journal)
 
     def _detect_retriage(
         self,
@@ -487,21 +650,18 @@ class ScreenerWorkflow:
     def _reassign_contact_groups(
         self,
         contact_uid: str,
-        old_category: ResolvedCategory,
-        new_category: ResolvedCategory,
+        old_route: CategoryRoute,
+        new_route: CategoryRoute,
     ) -> None:
         """Reassign contact groups using chain diff.
 
-        Computes old and new parent chains, then:
+        Diffs the precomputed group sets of the old and new parent chains:
         1. Add to new-only groups FIRST (safe partial-failure order)
         2. Remove from old-only groups
         Shared groups are left untouched.
         """
-        resolved_map = {c.name: c for c in self._settings.resolved_categories}
-        old_chain = get_parent_chain(old_category.name, resolved_map)
-        new_chain = get_parent_chain(new_category.name, resolved_map)
-        old_groups = {c.contact_group for c in old_chain}
-        new_groups = {c.contact_group for c in new_chain}
+        old_groups = old_route.groups
+        new_groups = new_route.groups
 
         # Add to new-only groups FIRST
         for group in new_groups - old_groups:
@@ -514,7 +674,7 @@ class ScreenerWorkflow:
     def _reconcile_email_labels(
         self,
         sender: str,
-        category: ResolvedCategory,
+        routing: MailboxRoute,
         add_to_inbox: bool,
     ) -> int:
         """Reconcile all email labels for a re-triaged sender.
@@ -526,15 +686,7 @@ class ScreenerWorkflow:
 
         Returns count of emails reconciled.
         """
-        # Compute managed mailbox IDs (all destination_mailbox from every category)
-        managed_mailbox_names = {
-            c.destination_mailbox for c in self._settings.resolved_categories
-        }
-        managed_mailbox_ids = {
-            self._mailbox_ids[name] for name in managed_mailbox_names
-        }
-        screener_id = self._mailbox_ids[self._settings.triage.screener_mailbox]
-        inbox_id = self._mailbox_ids["Inbox"]
+        screener_id = self._routing.screener_id
 
         # Fetch all sender emails across all mailboxes
         all_email_ids = self._jmap.query_emails_by_sender(sender)
@@ -544,35 +696,23 @@ class ScreenerWorkflow:
         # Get per-email mailbox membership for Screener presence check
         email_mailboxes = self._jmap.get_email_mailbox_ids(all_email_ids)
 
-        # Compute new destination IDs using parent chain
-        resolved_map = {c.name: c for c in self._settings.resolved_categories}
-        chain = get_parent_chain(category.name, resolved_map)
-        new_dest_ids = [self._mailbox_ids[c.destination_mailbox] for c in chain]
+        # Each email gets one of two precompiled patches, differing only in
+        # Inbox. Every email in a request shares the same dict objects
+        # (they are only serialized), so no per-email patch is built.
+        base_patch = dict(routing.reconcile_patch)
+        inbox_patch = dict(routing.inbox_patch)
 
-        # Build per-email patches and execute in BATCH_SIZE chunks
+        # Execute in BATCH_SIZE chunks
         for chunk_start in range(0, len(all_email_ids), BATCH_SIZE):
             chunk = all_email_ids[chunk_start : chunk_start + BATCH_SIZE]
 
-            update: dict = {}
-            for email_id in chunk:
-                patch: dict = {}
-
-                # Remove all managed labels + Screener (but NEVER Inbox)
-                for managed_id in managed_mailbox_ids:
-                    if managed_id != inbox_id:
-                        patch[f"mailboxIds/{managed_id}"] = None
-                patch[f"mailboxIds/{screener_id}"] = None
-
-                # Add new destination labels
-                for dest_id in new_dest_ids:
-                    patch[f"mailboxIds/{dest_id}"] = True
-
-                # Inbox handling: add ONLY if email is in Screener AND add_to_inbox
-                current_mailboxes = email_mailboxes.get(email_id, set())
-                if add_to_inbox and screener_id in current_mailboxes:
-                    patch[f"mailboxIds/{inbox_id}"] = True
-
-                update[email_id] = patch
+            # Inbox handling: add ONLY if email is in Screener AND add_to_inbox
+            update: dict = {
+                email_id: inbox_patch
+                if add_to_inbox and screener_id in email_mailboxes.get(email_id, ())
+                else base_patch
+                for email_id in chunk
+            }
 
             responses = self._jmap.call(
                 [
@@ -2,6 +2,7 @@
 
 import pytest
 
+from mailroom.clients import session_cache
 from mailroom.core.config import MailroomSettings
 
 
@@ -26,6 +27,9 @@ def _set_config_path(monkeypatch, tmp_path):
     config = tmp_path / "config.yaml"
     config.write_text("")  # empty = all defaults
     monkeypatch.setenv("MAILROOM_CONFIG", str(config))
+    # Keep local state (session cache, ...) per-test and out of the real home
+    monkeypatch.setenv("XDG_STATE_HOME", str(tmp_path / "state"))
+    session_cache.clear_memory()
 
 
 @pytest.fixture
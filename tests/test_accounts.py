@@ -0,0 +1,388 @@
+"""Tests for multi-account hosting (manifest loading and the shared runner)."""
+
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from pydantic import ValidationError
+
+from mailroom.accounts.manifest import AccountSpec, CoordinationSettings, load_manifest
+from mailroom.accounts.runner import (
+    MAX_BACKOFF_INTERVALS,
+    MAX_CONSECUTIVE_FAILURES,
+    MultiAccountRunner,
+    fit_polling_to_lease,
+)
+from mailroom.core.config import load_settings
+from mailroom.testing.fake_fastmail import FakeFastmail
+
+
+@pytest.fixture
+def account_env(monkeypatch, tmp_path):
+    """Two accounts with their own config files and prefixed credentials."""
+    for name in ("alice", "bob"):
+        prefix = f"MAILROOM_{name.upper()}_"
+        monkeypatch.setenv(f"{prefix}JMAP_TOKEN", f"{name}-token")
+        monkeypatch.setenv(f"{prefix}CARDDAV_USERNAME", f"{name}@fastmail.com")
+        monkeypatch.setenv(f"{prefix}CARDDAV_PASSWORD", f"{name}-password")
+    (tmp_path / "alice.yaml").write_text("polling:\n  interval: 120\n")
+    (tmp_path / "bob.yaml").write_text("")
+    manifest = tmp_path / "accounts.yaml"
+    manifest.write_text(
+        "workers: 2\n"
+        "accounts:\n"
+        "  - name: alice\n"
+        "    config: alice.yaml\n"
+        "  - name: bob\n"
+        "    config: bob.yaml\n"
+    )
+    return manifest
+
+
+def _runner(manifest_path, fakes=None, **kwargs) -> MultiAccountRunner:
+    manifest = load_manifest(manifest_path)
+    accounts = [(spec.name, spec.load_settings()) for spec in manifest.accounts]
+    if fakes is None:
+        fakes = {}
+        for name, settings in accounts:
+            fakes[name] = FakeFastmail.for_settings(settings)
+    return MultiAccountRunner(
+        accounts,
+        workers=manifest.workers,
+        transports=fakes,
+        start_eventsource=False,
+        **kwargs,
+    )
+
+
+def _run_until(runner: MultiAccountRunner, condition, timeout: float = 10.0) -> None:
+    thread = threading.Thread(target=runner.run)
+    thread.start()
+    try:
+        ends = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < ends, "condition not reached"
+            time.sleep(0.01)
+    finally:
+        runner.stop()
+        thread.join(timeout)
+
+
+class TestManifest:
+    def test_paths_resolve_relative_to_manifest(self, account_env, tmp_path):
+        manifest = load_manifest(account_env)
+        assert manifest.workers == 2
+        assert [a.config for a in manifest.accounts] == [
+            str(tmp_path / "alice.yaml"),
+            str(tmp_path / "bob.yaml"),
+        ]
+
+    def test_default_credential_prefix(self):
+        assert AccountSpec(name="team-a", config="x.yaml").credential_prefix == "MAILROOM_TEAM_A_"
+        spec = AccountSpec(name="a", config="x.yaml", env_prefix="FM_A_")
+        assert spec.credential_prefix == "FM_A_"
+
+    def test_duplicate_names_rejected(self, tmp_path):
+        path = tmp_path / "accounts.yaml"
+        path.write_text("accounts:\n  - {name: a, config: a.yaml}\n  - {name: a, config: b.yaml}\n")
+        with pytest.raises(ValidationError, match="duplicate account names: a"):
+            load_manifest(path)
+
+    def test_empty_manifest_rejected(self, tmp_path):
+        path = tmp_path / "accounts.yaml"
+        path.write_text("accounts: []\n")
+        with pytest.raises(ValidationError, match="no accounts"):
+            load_manifest(path)
+
+    def test_settings_per_account(self, account_env):
+        alice, bob = load_manifest(account_env).accounts
+        alice_settings = alice.load_settings()
+        assert alice_settings.jmap_token == "alice-token"
+        assert alice_settings.carddav_username == "alice@fastmail.com"
+        assert alice_settings.polling.interval == 120
+        bob_settings = bob.load_settings()
+        assert bob_settings.jmap_token == "bob-token"
+        assert bob_settings.polling.interval == 60
+
+    def test_load_settings_does_not_leak_override(self, account_env, tmp_path, monkeypatch):
+        monkeypatch.setenv("MAILROOM_JMAP_TOKEN", "main-token")
+        load_settings(tmp_path / "alice.yaml", env_prefix="MAILROOM_ALICE_")
+        from mailroom.core.config import MailroomSettings
+
+        assert MailroomSettings().polling.interval == 60
+
+
+class TestMultiAccountRunner:
+    def test_each_account_triaged_independently(self, account_env):
+        runner = _runner(account_env)
+        fakes = runner._transports
+        fakes["alice"].add_email("shop@example.com", ["Screener", "@ToFeed"])
+        fakes["bob"].add_email("friend@example.com", ["Screener", "@ToImbox"])
+
+        _run_until(
+            runner,
+            lambda: all(h.last_successful_poll for h in runner.health.values()),
+        )
+        assert fakes["alice"].emails_in("@ToFeed") == []
+        assert fakes["alice"].group_members("Feed")
+        assert fakes["bob"].emails_in("@ToImbox") == []
+        assert fakes["bob"].group_members("Imbox")
+        assert {h.status for h in runner.health.values()} == {"running"}
+        # Requests went to each account's own backend only
+        assert fakes["alice"].count() > 0 and fakes["bob"].count() > 0
+
+    def test_startup_failure_is_isolated(self, account_env):
+        runner = _runner(account_env)
+        runner._transports["bob"].fail(401, times=100)
+        _run_until(
+            runner,
+            lambda: runner.health["alice"].last_successful_poll
+            and runner.health["bob"].last_error,
+        )
+        assert runner.health["alice"].healthy
+        bob = runner.health["bob"]
+        assert bob.status == "starting"
+        assert bob.last_error.startswith("startup failed")
+        assert not bob.healthy
+
+    def test_account_disabled_after_consecutive_failures(self, account_env):
+        runner = _runner(account_env)
+        alice = runner.accounts["alice"]
+        _run_until(runner, lambda: alice.health.last_successful_poll)
+
+        runner._transports["alice"].fail(500, match="Email/query", times=10_000)
+        for _ in range(MAX_CONSECUTIVE_FAILURES):
+            alice.in_flight = True
+            runner._job(alice, "scheduled")
+        assert alice.health.status == "failed"
+        assert alice.due(time.monotonic()) is None  # backing off
+        assert runner.accounts["bob"].health.status == "running"
+
+    def test_failed_account_restarted_after_backoff(self, account_env):
+        runner = _runner(account_env)
+        alice = runner.accounts["alice"]
+        _run_until(runner, lambda: alice.health.last_successful_poll)
+        interval = alice.settings.polling.interval
+
+        runner._transports["alice"].fail(500, match="Email/query", times=MAX_CONSECUTIVE_FAILURES)
+        for _ in range(MAX_CONSECUTIVE_FAILURES):
+            alice.in_flight = True
+            runner._job(alice, "scheduled")
+        assert alice.health.status == "failed"
+        assert alice.next_wakeup() == pytest.approx(time.monotonic() + interval, abs=5)
+
+        # The outage is over: after the backoff, the account starts again and polls
+        assert alice.due(alice.next_poll_at) == "startup"
+        alice.in_flight = True
+        runner._job(alice, "startup")
+        assert alice.health.status == "running"
+        trigger = alice.due(time.monotonic())
+        assert trigger is not None
+        alice.in_flight = True
+        runner._job(alice, trigger)
+        assert alice.health.consecutive_failures == 0
+
+    def test_failed_backlog_poll_waits_for_interval(self, account_env):
+        runner = _runner(account_env)
+        alice = runner.accounts["alice"]
+        _run_until(runner, lambda: alice.health.last_successful_poll)
+        fake = runner._transports["alice"]
+        for i in range(3):
+            fake.add_email(f"sender{i}@example.com", ["Screener", "@ToImbox"])
+        alice.settings.polling.budget_senders = 1
+        alice.in_flight = True
+        runner._job(alice, "scheduled")
+        assert alice.due(time.monotonic()) == "backlog"
+
+        fake.fail(500, match="Email/query", times=1)
+        alice.in_flight = True
+        runner._job(alice, "backlog")
+        assert alice.health.consecutive_failures == 1
+        assert alice.due(time.monotonic()) is None  # no immediate retry
+        interval = alice.settings.polling.interval
+        assert alice.next_wakeup() == pytest.approx(time.monotonic() + interval, abs=5)
+
+    def test_backoff_doubles_up_to_cap(self, account_env):
+        runner = _runner(account_env)
+        alice = runner.accounts["alice"]
+        interval = alice.settings.polling.interval
+        delays = []
+        for extra in range(5):
+            alice.health.consecutive_failures = MAX_CONSECUTIVE_FAILURES + extra
+            delays.append(alice.backoff())
+        assert delays == [interval, 2 * interval, 4 * interval] + [
+            MAX_BACKOFF_INTERVALS * interval
+        ] * 2
+
+    def test_push_event_debounced_then_polled(self, account_env):
+        runner = _runner(account_env)
+        alice = runner.accounts["alice"]
+        _run_until(runner, lambda: alice.health.last_successful_poll)
+
+        now = time.monotonic()
+        alice.next_poll_at = now + 1000
+        alice.events.put("state_changed")
+        assert alice.due(now) is None  # debouncing
+        assert alice.push_due == pytest.approx(now + alice.settings.polling.debounce_seconds)
+        assert alice.due(alice.push_due) == "push"
+
+    def test_default_eventsource_uses_account_http_settings(self, account_env):
+        runner = _runner(account_env)
+        alice = runner.accounts["alice"]
+        assert runner._mux._http is alice.settings.http
+
+    def test_eventsource_push_reaches_the_right_account(self, account_env):
+        import httpx
+
+        from mailroom.eventsource_mux import SSEMultiplexer
+
+        manifest = load_manifest(account_env)
+        accounts = [(spec.name, spec.load_settings()) for spec in manifest.accounts]
+        fakes = {name: FakeFastmail.for_settings(settings) for name, settings in accounts}
+        by_token = {f"Bearer {fake.token}": fake for fake in fakes.values()}
+
+        class ByToken(httpx.AsyncBaseTransport):
+            async def handle_async_request(self, request):
+                fake = by_token[request.headers["Authorization"]]
+                return await fake.handle_async_request(request)
+
+        runner = MultiAccountRunner(
+            accounts, transports=fakes, eventsource=SSEMultiplexer(transport=ByToken())
+        )
+        for account in runner.accounts.values():
+            account.settings.polling.debounce_seconds = 0
+        health = runner.health
+        thread = threading.Thread(target=runner.run)
+        thread.start()
+        try:
+            ends = time.monotonic() + 10
+            while not all(
+                h.sse_status == "connected" and h.last_successful_poll for h in health.values()
+            ):
+                assert time.monotonic() < ends, "accounts not connected"
+                time.sleep(0.01)
+            fakes["bob"].add_email("friend@example.com", ["Screener", "@ToImbox"])
+            while health["bob"].last_poll_trigger != "push":
+                assert time.monotonic() < ends, "no push-triggered poll"
+                time.sleep(0.01)
+            assert health["alice"].last_poll_trigger != "push"
+        finally:
+            runner.stop()
+            thread.join(10)
+
+
+class TestCoordinatedRunners:
+    def test_standby_replica_takes_over_on_release(self, account_env):
+        from mailroom.accounts.coordination import Coordinator
+        from mailroom.accounts.leases import MemoryLeaseBackend
+
+        backend = MemoryLeaseBackend()
+        manifest = load_manifest(account_env)
+        accounts = [(spec.name, spec.load_settings()) for spec in manifest.accounts]
+        fakes = {name: FakeFastmail.for_settings(settings) for name, settings in accounts}
+        runners = [
+            MultiAccountRunner(
+                accounts,
+                transports=fakes,
+                start_eventsource=False,
+                coordinator=Coordinator(backend, fakes, mode="leader", holder=holder),
+            )
+            for holder in ("pod-a", "pod-b")
+        ]
+        assert {h.status for h in runners[1].health.values()} == {"standby"}
+        for runner in runners:
+            runner.coordinate()
+        leader, standby = runners
+        assert all(a.active for a in leader.accounts.values())
+        assert not any(a.active for a in standby.accounts.values())
+        assert all(h.healthy for h in standby.health.values())
+
+        _run_until(leader, lambda: all(h.last_successful_poll for h in leader.health.values()))
+        # Clean shutdown released the lease: the standby takes over on its next refresh
+        standby._coordinator.next_refresh = 0.0
+        standby.coordinate()
+        assert all(a.active for a in standby.accounts.values())
+        assert {h.status for h in standby.health.values()} == {"starting"}
+
+
+    def test_lease_lost_mid_poll_stops_the_poll(self, account_env):
+        from mailroom.accounts.coordination import Coordinator
+        from mailroom.accounts.leases import MemoryLeaseBackend
+
+        now = [1_000_000.0]
+        backend = MemoryLeaseBackend(lambda: now[0])
+        runner = _runner(
+            account_env,
+            coordinator=Coordinator(
+                backend,
+                ["alice", "bob"],
+                mode="leader",
+                holder="pod-a",
+                lease_seconds=15,
+                renew_seconds=5,
+                clock=lambda: now[0],
+            ),
+        )
+        runner.coordinate()
+        alice = runner.accounts["alice"]
+        assert alice.active
+        # A poll is running when the lease backend starts failing
+        alice.workflow = MagicMock()
+        alice.in_flight = True
+
+        def broken(*args):
+            raise ConnectionError("backend down")
+
+        backend.acquire = broken
+        now[0] += 11  # past lease_seconds - renew_seconds since the last renewal
+        runner._coordinator.next_refresh = 0.0
+        runner.coordinate()
+
+        assert not alice.active
+        alice.workflow.request_stop.assert_called_once_with(drain_seconds=0)
+        assert not runner.accounts["bob"].active
+        # bob had no poll running: nothing to stop
+        assert runner.accounts["bob"].workflow is None
+
+        # The backend recovers and the lease comes back: polls process senders again
+        del backend.acquire
+        runner._coordinator.next_refresh = 0.0
+        runner.coordinate()
+        assert alice.active
+        alice.workflow.resume.assert_called_once_with()
+
+    def test_poll_timeout_clamped_to_lease(self, account_env):
+        manifest = load_manifest(account_env)
+        settings = manifest.accounts[0].load_settings()
+        coordination = CoordinationSettings(
+            mode="leader", path="/tmp/leases", lease_seconds=30, renew_seconds=10
+        )
+
+        fit_polling_to_lease("alice", settings, coordination)
+
+        assert settings.polling.poll_timeout_seconds == 20
+        assert settings.polling.budget_seconds == 10
+
+
+class TestAccountsHealth:
+    def test_healthz_reports_each_account(self, account_env):
+        import httpx
+
+        from mailroom.__main__ import HealthHandler, _start_health_server
+
+        runner = _runner(account_env)
+        runner.health["bob"].status = "failed"
+        HealthHandler.accounts = runner.health
+        server = _start_health_server(0, 60)
+        try:
+            response = httpx.get(f"http://127.0.0.1:{server.server_address[1]}/healthz")
+        finally:
+            HealthHandler.accounts = None
+            server.shutdown()
+            server.server_close()
+        body = response.json()
+        assert response.status_code == 200
+        assert body["status"] == "degraded"
+        assert body["accounts"]["alice"]["healthy"] is True
+        assert body["accounts"]["bob"]["status"] == "failed"
@@ -1012,6 +1012,132 @@ class TestRemoveFromGroup:
         assert result == '"etag-new"'
 
 
+class TestRemoveMembers:
+    """Tests for CardDAVClient.remove_members()."""
+
+    def test_removes_all_members_in_one_put(
+        self, client: CardDAVClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """One GET + one PUT drops every listed member and keeps the rest."""
+        _setup_client_with_groups(client, httpx_mock)
+
+        group_body = _group_vcard(
+            "Imbox", "uid-imbox", members=["contact-1", "contact-2", "contact-3"]
+        )
+        httpx_mock.add_response(
+            url=GROUP_URL,
+            status_code=200,
+            content=group_body.encode("utf-8"),
+            headers={"etag": '"etag-imbox-1"'},
+        )
+        httpx_mock.add_response(
+            url=GROUP_URL,
+            status_code=204,
+            headers={"etag": '"etag-imbox-2"'},
+        )
+
+        result = client.remove_members("Imbox", ["contact-1", "contact-3", "not-a-member"])
+
+        assert result == '"etag-imbox-2"'
+        put_requests = [r for r in httpx_mock.get_requests() if r.method == "PUT"]
+        assert len(put_requests) == 1
+        put_body = put_requests[0].content.decode("utf-8")
+        assert put_requests[0].headers["If-Match"] == '"etag-imbox-1"'
+        assert "urn:uuid:contact-1" not in put_body
+        assert "urn:uuid:contact-3" not in put_body
+        assert "urn:uuid:contact-2" in put_body
+
+    def test_no_put_when_none_are_members(
+        self, client: CardDAVClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """Nothing to remove: returns the current ETag without a PUT."""
+        _setup_client_with_groups(client, httpx_mock)
+
+        group_body = _group_vcard("Imbox", "uid-imbox", members=["other-uid"])
+        httpx_mock.add_response(
+            url=GROUP_URL,
+            status_code=200,
+            content=group_body.encode("utf-8"),
+            headers={"etag": '"etag-imbox-1"'},
+        )
+
+        assert client.remove_members("Imbox", ["a", "b"]) == '"etag-imbox-1"'
+        assert not [r for r in httpx_mock.get_requests() if r.method == "PUT"]
+
+
+class TestSetGroupMembers:
+    """Tests for CardDAVClient.set_group_members()."""
+
+    def _mock_group(self, httpx_mock: HTTPXMock, members: list[str]) -> None:
+        httpx_mock.add_response(
+            url=GROUP_URL,
+            status_code=200,
+            content=_group_vcard("Imbox", "uid-imbox", members=members).encode("utf-8"),
+            headers={"etag": '"etag-imbox-1"'},
+        )
+
+    def test_writes_final_member_list_in_one_put(
+        self, client: CardDAVClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """Adds and drops members together, keeping the vCard's other fields."""
+        _setup_client_with_groups(client, httpx_mock)
+        self._mock_group(httpx_mock, ["keep", "drop-1", "drop-2"])
+        httpx_mock.add_response(url=GROUP_URL, status_code=204, headers={"etag": '"etag-imbox-2"'})
+
+        result = client.set_group_members("Imbox", ["keep", "new", "new"])
+
+        assert result == '"etag-imbox-2"'
+        put_requests = [r for r in httpx_mock.get_requests() if r.method == "PUT"]
+        assert len(put_requests) == 1
+        put_body = put_requests[0].content.decode("utf-8")
+        assert put_body.count("X-ADDRESSBOOKSERVER-MEMBER") == 2
+        assert "urn:uuid:keep" in put_body and "urn:uuid:new" in put_body
+        assert "drop-" not in put_body
+        assert "X-ADDRESSBOOKSERVER-KIND:group" in put_body
+
+    def test_empty_list_clears_group(
+        self, client: CardDAVClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """An empty target removes every member line."""
+        _setup_client_with_groups(client, httpx_mock)
+        self._mock_group(httpx_mock, ["a", "b", "c"])
+        httpx_mock.add_response(url=GROUP_URL, status_code=204, headers={"etag": '"etag-imbox-2"'})
+
+        client.set_group_members("Imbox", [])
+
+        put_req = [r for r in httpx_mock.get_requests() if r.method == "PUT"][0]
+        assert "X-ADDRESSBOOKSERVER-MEMBER" not in put_req.content.decode("utf-8")
+
+    def test_same_members_in_any_order_skip_put(
+        self, client: CardDAVClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """Already-matching membership returns the current ETag without a PUT."""
+        _setup_client_with_groups(client, httpx_mock)
+        self._mock_group(httpx_mock, ["a", "b"])
+
+        assert client.set_group_members("Imbox", ["b", "a"]) == '"etag-imbox-1"'
+        assert not [r for r in httpx_mock.get_requests() if r.method == "PUT"]
+
+    def test_retries_on_412_against_fresh_group(
+        self, client: CardDAVClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """On 412 the group is re-fetched and the PUT uses the new ETag."""
+        _setup_client_with_groups(client, httpx_mock)
+        self._mock_group(httpx_mock, ["a"])
+        httpx_mock.add_response(url=GROUP_URL, status_code=412)
+        httpx_mock.add_response(
+            url=GROUP_URL,
+            status_code=200,
+            content=_group_vcard("Imbox", "uid-imbox", members=["a", "b"]).encode("utf-8"),
+            headers={"etag": '"etag-imbox-2"'},
+        )
+        httpx_mock.add_response(url=GROUP_URL, status_code=204, headers={"etag": '"etag-imbox-3"'})
+
+        assert client.set_group_members("Imbox", []) == '"etag-imbox-3"'
+        put_requests = [r for r in httpx_mock.get_requests() if r.method == "PUT"]
+        assert [r.headers["If-Match"] for r in put_requests] == ['"etag-imbox-1"', '"etag-imbox-2"']
+
+
 # --- Upsert Contact Tests ---
 
 
@@ -2259,6 +2385,68 @@ class TestUpsertAdoptedNote:
 # --- delete_contact Tests ---
 
 
+class TestIterContacts:
+    """iter_contacts()/get_contacts() parse REPORT responses incrementally."""
+
+    def test_streams_contacts_and_skips_groups(
+        self, client: CardDAVClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """Contacts are yielded one by one; group vCards are filtered out."""
+        _connect_client(client, httpx_mock)
+        httpx_mock.add_response(
+            url=ADDRESSBOOK_URL,
+            status_code=207,
+            content=_build_report_response([
+                ("/ab/alice.vcf", "etag-a", _contact_vcard("Alice", "uid-a", "Alice@Example.com")),
+                ("/ab/group.vcf", "etag-g", _group_vcard("Imbox", "uid-imbox", members=["uid-a"])),
+                ("/ab/bob.vcf", "etag-b", _contact_vcard("Bob", "uid-b", "bob@example.com")),
+            ]),
+        )
+
+        contacts = client.iter_contacts()
+
+        first = next(contacts)
+        assert (first["uid"], first["emails"]) == ("uid-a", ["alice@example.com"])
+        assert first["etag"] == '"etag-a"'
+        assert [c["uid"] for c in contacts] == ["uid-b"]
+
+    def test_multistatus_parsed_across_chunk_boundaries(self) -> None:
+        """Responses split anywhere between network chunks still parse."""
+        from mailroom.clients.carddav import _iter_multistatus
+
+        body = _build_report_response([
+            (f"/ab/{i}.vcf", f"etag-{i}", _contact_vcard(f"C{i}", f"uid-{i}", f"c{i}@example.com"))
+            for i in range(5)
+        ])
+        chunks = [body[i : i + 37] for i in range(0, len(body), 37)]
+
+        items = list(_iter_multistatus(chunks))
+
+        assert [item["href"] for item in items] == [f"/ab/{i}.vcf" for i in range(5)]
+        assert all("BEGIN:VCARD" in item["vcard_data"] for item in items)
+
+    def test_get_contacts_sends_one_multiget(
+        self, client: CardDAVClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """get_contacts fetches all requested hrefs with a single multiget REPORT."""
+        _connect_client(client, httpx_mock)
+        httpx_mock.add_response(
+            url=ADDRESSBOOK_URL,
+            status_code=207,
+            content=_build_report_response([
+                ("/ab/alice.vcf", "etag-a", _contact_vcard("Alice", "uid-a", "alice@example.com")),
+            ]),
+        )
+
+        items = client.get_contacts(["/ab/alice.vcf", "/ab/gone.vcf"])
+
+        assert [(i["href"], i["etag"]) for i in items] == [("/ab/alice.vcf", '"etag-a"')]
+        report = [r for r in httpx_mock.get_requests() if r.method == "REPORT"][-1]
+        body = report.content.decode("utf-8")
+        assert "addressbook-multiget" in body
+        assert "/ab/alice.vcf" in body and "/ab/gone.vcf" in body
+
+
 class TestDeleteContact:
     """delete_contact() sends HTTP DELETE with If-Match ETag."""
 
@@ -89,6 +89,19 @@ class TestYAMLConfigOverrides:
 
         assert settings.logging.level == "debug"
 
+    def test_http_override(self, monkeypatch, tmp_path):
+        """http section from YAML overrides the request budget defaults."""
+        config = tmp_path / "config.yaml"
+        config.write_text("http:\n  requests_per_second: 2.5\n  max_retries: 0\n")
+        monkeypatch.setenv("MAILROOM_CONFIG", str(config))
+        monkeypatch.setenv("MAILROOM_JMAP_TOKEN", "tok")
+
+        settings = MailroomSettings()
+
+        assert settings.http.requests_per_second == 2.5
+        assert settings.http.max_retries == 0
+        assert settings.http.burst == 20
+
     def test_mailroom_section_override(self, monkeypatch, tmp_path):
         """mailroom section from YAML overrides defaults."""
         config = tmp_path / "config.yaml"
@@ -292,6 +305,39 @@ class TestResolvedCategoriesProperty:
         assert len(settings.resolved_categories) == original_len
 
 
+class TestRoutes:
+    """Precomputed category routes on MailroomSettings."""
+
+    def test_route_holds_chain_groups_and_destinations(self, monkeypatch, tmp_path):
+        """A child category's route covers its whole parent chain."""
+        config = tmp_path / "config.yaml"
+        config.write_text("")
+        monkeypatch.setenv("MAILROOM_CONFIG", str(config))
+        monkeypatch.setenv("MAILROOM_JMAP_TOKEN", "tok")
+
+        settings = MailroomSettings()
+        route = settings.routes["@ToPerson"]
+
+        assert [c.name for c in route.chain] == ["Person", "Imbox"]
+        assert route.groups == {"Person", "Imbox"}
+        assert route.destinations == ("Person", "Imbox")
+        assert settings.group_routes["Person"] is route
+        assert "Truck" in settings.managed_mailboxes
+
+    def test_routes_are_read_only_and_shared(self, monkeypatch, tmp_path):
+        """routes returns the same read-only mapping on every access."""
+        config = tmp_path / "config.yaml"
+        config.write_text("")
+        monkeypatch.setenv("MAILROOM_CONFIG", str(config))
+        monkeypatch.setenv("MAILROOM_JMAP_TOKEN", "tok")
+
+        settings = MailroomSettings()
+
+        assert settings.routes is settings.routes
+        with pytest.raises(TypeError):
+            settings.routes["@ToFake"] = settings.routes["@ToFeed"]
+
+
 class TestComputedProperties:
     """Computed properties stay on root and access nested sub-models."""
 
@@ -0,0 +1,93 @@
+"""Tests for cooperative deadlines and their enforcement on HTTP requests."""
+
+import time
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from mailroom.clients.carddav import CardDAVClient
+from mailroom.clients.jmap import JMAPClient
+from mailroom.core.deadline import (
+    DeadlineExceeded,
+    current_deadline,
+    deadline,
+    enforce_deadline,
+)
+
+
+class TestDeadlineScope:
+    """deadline() context manager: nesting and conversion of timeouts."""
+
+    def test_no_deadline_by_default(self):
+        assert current_deadline() is None
+
+    def test_scope_sets_and_restores(self):
+        with deadline(10) as d:
+            assert current_deadline() is d
+        assert current_deadline() is None
+
+    def test_inner_deadline_cannot_extend_outer(self):
+        with deadline(1, name="poll") as outer:
+            with deadline(60, name="sender") as inner:
+                assert inner is outer
+
+    def test_inner_deadline_can_shorten_outer(self):
+        with deadline(60) as outer:
+            with deadline(1) as inner:
+                assert inner is not outer
+                assert inner.remaining() <= 1
+
+    def test_timeout_after_expiry_becomes_deadline_exceeded(self):
+        with pytest.raises(DeadlineExceeded):
+            with deadline(0):
+                raise httpx.ReadTimeout("slow")
+
+    def test_timeout_before_expiry_is_reraised(self):
+        with pytest.raises(httpx.ReadTimeout):
+            with deadline(60):
+                raise httpx.ReadTimeout("slow")
+
+
+class TestEnforceDeadline:
+    """enforce_deadline request hook."""
+
+    def test_noop_without_deadline(self):
+        request = httpx.Request("GET", "https://example.com")
+        request.extensions["timeout"] = {"connect": 5.0, "read": None, "write": 5.0, "pool": 5.0}
+        enforce_deadline(request)
+        assert request.extensions["timeout"]["read"] is None
+
+    def test_clamps_timeouts_to_remaining(self):
+        request = httpx.Request("GET", "https://example.com")
+        request.extensions["timeout"] = {"connect": 5.0, "read": None, "write": 5.0, "pool": 5.0}
+        with deadline(2):
+            enforce_deadline(request)
+        timeouts = request.extensions["timeout"]
+        assert all(0 < timeouts[k] <= 2 for k in ("connect", "read", "write", "pool"))
+
+    def test_raises_when_expired(self):
+        request = httpx.Request("GET", "https://example.com")
+        with deadline(0):
+            time.sleep(0.001)
+            with pytest.raises(DeadlineExceeded):
+                enforce_deadline(request)
+
+
+class TestClientsHonorDeadline:
+    """JMAP and CardDAV clients refuse to send requests past the deadline."""
+
+    def test_jmap_call_fails_fast(self, httpx_mock: HTTPXMock):
+        client = JMAPClient(token="tok")
+        client._api_url = "https://api.fastmail.com/jmap/api/"
+        with deadline(0):
+            with pytest.raises(DeadlineExceeded):
+                client.call([["Mailbox/get", {}, "m0"]])
+        assert httpx_mock.get_requests() == []
+
+    def test_carddav_request_fails_fast(self, httpx_mock: HTTPXMock):
+        client = CardDAVClient(username="u", password="p")
+        with deadline(0):
+            with pytest.raises(DeadlineExceeded):
+                client.connect()
+        assert httpx_mock.get_requests() == []
@@ -51,6 +51,16 @@ _RELAXED = pytest.mark.httpx_mock(
 )
 
 
+def _held_open_stream(shutdown: threading.Event):
+    """SSE body that sends one state event, then stays open until shutdown.
+
+    Keeps the listener connected while the test inspects health, instead of
+    racing the automatic reconnect after a stream that ends immediately.
+    """
+    yield b"event: state\ndata: {}\n\n"
+    shutdown.wait(5)
+
+
 class MockHealthHandler:
     """Mock health handler for SSE health status testing."""
 
@@ -343,6 +353,39 @@ class TestSSEListener:
         assert len(events) >= 2
 
 
+    @_RELAXED
+    def test_sse_reuses_one_client_across_reconnects(self, httpx_mock: HTTPXMock, monkeypatch):
+        """Reconnects reuse the pooled client (and its warm connections)."""
+        import mailroom.eventsource as eventsource
+
+        created = []
+        real_factory = eventsource.create_http_client
+
+        def counting_factory(*args, **kwargs):
+            client = real_factory(*args, **kwargs)
+            created.append(client)
+            return client
+
+        monkeypatch.setattr(eventsource, "create_http_client", counting_factory)
+        for _ in range(2):
+            httpx_mock.add_response(
+                url=SSE_URL,
+                stream=IteratorStream([b"event: state\ndata: {}\n\n"]),
+                headers={"content-type": "text/event-stream"},
+            )
+
+        event_queue = queue.Queue()
+        shutdown = threading.Event()
+        t = threading.Thread(target=self._run_listener, args=(event_queue, shutdown))
+        t.start()
+        event_queue.get(timeout=5)
+        event_queue.get(timeout=5)
+        shutdown.set()
+        t.join(timeout=5)
+
+        assert len(created) == 1
+        assert created[0].is_closed
+
 class TestHealthSSE:
     """Tests for SSE health status reporting via health_cls."""
 
@@ -361,15 +404,15 @@ class TestHealthSSE:
     @_RELAXED
     def test_sse_updates_health_on_connect(self, httpx_mock: HTTPXMock):
         """SSE sets health_cls.sse_status='connected' and sse_connected_since on connect."""
+        shutdown = threading.Event()
         httpx_mock.add_response(
             url=SSE_URL,
-            stream=IteratorStream([b"event: state\ndata: {}\n\n"]),
+            stream=IteratorStream(_held_open_stream(shutdown)),
             headers={"content-type": "text/event-stream"},
         )
 
         MockHealthHandler.reset()
         event_queue = queue.Queue()
-        shutdown = threading.Event()
 
         t = threading.Thread(
             target=self._run_listener,
@@ -422,15 +465,15 @@ class TestHealthSSE:
             status_code=500,
         )
         # Second: successful stream (so listener can exit cleanly)
+        shutdown = threading.Event()
         httpx_mock.add_response(
             url=SSE_URL,
-            stream=IteratorStream([b"event: state\ndata: {}\n\n"]),
+            stream=IteratorStream(_held_open_stream(shutdown)),
             headers={"content-type": "text/event-stream"},
         )
 
         MockHealthHandler.reset()
         event_queue = queue.Queue()
-        shutdown = threading.Event()
 
         t = threading.Thread(
             target=self._run_listener,
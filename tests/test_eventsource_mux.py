@@ -0,0 +1,166 @@
+"""Tests for the asyncio EventSource multiplexer."""
+
+import asyncio
+import queue
+import threading
+import time
+
+import httpx
+import pytest
+
+from mailroom.eventsource_mux import SSEMultiplexer, Subscription
+from mailroom.testing.fake_fastmail import FakeFastmail
+
+EVENT_SOURCE_URL = "https://api.fastmail.com/jmap/event/"
+
+
+class Health:
+    """Stand-in for an account's health object."""
+
+    def __init__(self) -> None:
+        self.sse_status = "not_started"
+        self.sse_connected_since = None
+        self.sse_last_event_at = None
+        self.sse_reconnect_count = 0
+        self.sse_last_error = None
+
+
+@pytest.fixture
+def mux_factory():
+    muxes = []
+
+    def make(**kwargs) -> SSEMultiplexer:
+        mux = SSEMultiplexer(**kwargs)
+        muxes.append(mux)
+        return mux
+
+    yield make
+    for mux in muxes:
+        mux.close()
+
+
+def _subscription(key: str, token: str = "fake-token", health=None) -> Subscription:
+    return Subscription(
+        key=key,
+        token=token,
+        event_source_url=EVENT_SOURCE_URL,
+        event_queue=queue.Queue(),
+        health=health,
+    )
+
+
+def _wait_for(condition, timeout: float = 5.0) -> None:
+    ends = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < ends, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_routes_state_events_to_each_stream_queue(mux_factory):
+    fake = FakeFastmail()
+    fake.add_mailbox("Screener")
+    mux = mux_factory(transport=fake)
+    health = Health()
+    sub = _subscription("alice", health=health)
+    mux.subscribe(sub)
+    _wait_for(lambda: health.sse_status == "connected")
+
+    fake.add_email("someone@example.com", ["Screener"])
+    assert sub.event_queue.get(timeout=5) == "state_changed"
+    assert health.sse_last_event_at is not None
+
+
+def test_many_streams_share_one_thread(mux_factory):
+    fake = FakeFastmail()
+    fake.add_mailbox("Screener")
+    mux = mux_factory(transport=fake)
+    threads_before = threading.active_count()
+    subs = [_subscription(f"account{i}", health=Health()) for i in range(50)]
+    for sub in subs:
+        mux.subscribe(sub)
+    _wait_for(lambda: all(s.health.sse_status == "connected" for s in subs))
+    assert threading.active_count() - threads_before <= 1 + 1  # loop thread (+ to_thread pool)
+
+    fake.add_email("someone@example.com", ["Screener"])
+    for sub in subs:
+        assert sub.event_queue.get(timeout=5) == "state_changed"
+    assert len(mux.streams) == 50
+
+
+def test_reconnects_with_backoff_after_error(mux_factory):
+    connects = []
+
+    async def held_open():
+        yield b"event: state\ndata: {}\n\n"
+        await asyncio.sleep(3600)
+
+    async def handler(request):
+        connects.append(time.monotonic())
+        if len(connects) < 3:
+            return httpx.Response(503)
+        return httpx.Response(
+            200, headers={"content-type": "text/event-stream"}, content=held_open()
+        )
+
+    mux = mux_factory(transport=httpx.MockTransport(handler), max_backoff=0.01)
+    health = Health()
+    sub = _subscription("alice", health=health)
+    mux.subscribe(sub)
+    assert sub.event_queue.get(timeout=5) == "state_changed"
+    assert len(connects) >= 3
+    assert health.sse_reconnect_count >= 2
+    assert "503" in health.sse_last_error
+
+
+def test_honors_server_retry_field(mux_factory):
+    connects = []
+
+    async def handler(request):
+        connects.append(time.monotonic())
+        body = b"retry: 20\n\n" if len(connects) == 1 else b"event: state\ndata: {}\n\n"
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=body)
+
+    # Backoff alone would wait 2s; the server asked for 20ms
+    mux = mux_factory(transport=httpx.MockTransport(handler), max_backoff=60)
+    sub = _subscription("alice", health=Health())
+    mux.subscribe(sub)
+    assert sub.event_queue.get(timeout=1.5) == "state_changed"
+    assert connects[1] - connects[0] < 1.0
+
+
+def test_ping_timeout_reconnects_silent_stream(mux_factory):
+    async def silent():
+        yield b": hello\n"
+        await asyncio.sleep(3600)
+
+    async def handler(request):
+        assert request.url.params["ping"] == "0"  # int(ping_interval)
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=silent())
+
+    mux = mux_factory(
+        transport=httpx.MockTransport(handler), ping_interval=0.05, max_backoff=0.01
+    )
+    health = Health()
+    mux.subscribe(_subscription("alice", health=health))
+    _wait_for(lambda: health.sse_reconnect_count >= 1)
+    assert health.sse_last_error == "no data for 0.1s"
+
+
+def test_unsubscribe_stops_stream(mux_factory):
+    fake = FakeFastmail()
+    mux = mux_factory(transport=fake)
+    health = Health()
+    mux.subscribe(_subscription("alice", health=health))
+    _wait_for(lambda: health.sse_status == "connected")
+    mux.unsubscribe("alice")
+    assert mux.streams == []
+    assert health.sse_status == "stopped"
+
+
+def test_wrong_token_is_retried_not_fatal(mux_factory):
+    fake = FakeFastmail()
+    mux = mux_factory(transport=fake, max_backoff=0.01)
+    health = Health()
+    mux.subscribe(_subscription("alice", token="wrong", health=health))
+    _wait_for(lambda: health.sse_reconnect_count >= 2)
+    assert "401" in health.sse_last_error
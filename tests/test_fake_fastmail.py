@@ -0,0 +1,209 @@
+"""Tests for the in-process fake Fastmail (JMAP + CardDAV + EventSource)."""
+
+import queue
+import threading
+
+import httpx
+import pytest
+
+from mailroom.clients.carddav import CardDAVClient
+from mailroom.clients.jmap import JMAPClient
+from mailroom.eventsource import sse_listener
+from mailroom.testing.fake_fastmail import UNTHROTTLED_HTTP, FakeFastmail
+from mailroom.workflows.screener import ScreenerWorkflow
+
+
+@pytest.fixture
+def fake(mock_settings) -> FakeFastmail:
+    return FakeFastmail.for_settings(mock_settings)
+
+
+@pytest.fixture
+def jmap(fake: FakeFastmail) -> JMAPClient:
+    client = JMAPClient(token=fake.token, transport=fake, http=UNTHROTTLED_HTTP)
+    client.connect()
+    return client
+
+
+@pytest.fixture
+def carddav(fake: FakeFastmail, mock_settings) -> CardDAVClient:
+    client = CardDAVClient(
+        username=fake.username, password="pw", transport=fake, http=UNTHROTTLED_HTTP
+    )
+    client.connect()
+    client.validate_groups(
+        mock_settings.contact_groups + [mock_settings.mailroom.provenance_group],
+        infrastructure_groups=[mock_settings.mailroom.provenance_group],
+    )
+    return client
+
+
+class TestJMAP:
+    def test_session_and_mailboxes(self, jmap, mock_settings):
+        ids = jmap.resolve_mailboxes(mock_settings.required_mailboxes)
+        assert set(ids) == set(mock_settings.required_mailboxes)
+
+    def test_bad_token_is_401(self, fake):
+        client = JMAPClient(token="wrong", transport=fake, http=UNTHROTTLED_HTTP)
+        with pytest.raises(httpx.HTTPStatusError):
+            client.connect()
+
+    def test_query_paginates_and_filters_by_sender(self, fake, jmap):
+        for _ in range(5):
+            fake.add_email("a@example.com", ["Screener"])
+        fake.add_email("b@example.com", ["Screener"])
+        screener = fake.mailbox_id("Screener")
+
+        assert len(jmap.query_emails(screener, sender="a@example.com", limit=2)) == 5
+        assert len(jmap.query_emails_by_sender("b@example.com")) == 1
+
+    def test_label_patches(self, fake, jmap):
+        email = fake.add_email("a@example.com", ["Screener", "@ToFeed"])
+        feed, label = fake.mailbox_id("Feed"), fake.mailbox_id("@ToFeed")
+
+        jmap.batch_add_labels([email], [feed])
+        jmap.remove_label(email, label)
+
+        assert jmap.get_email_mailbox_ids([email])[email] == {fake.mailbox_id("Screener"), feed}
+
+    def test_set_unknown_email_reports_not_updated(self, jmap, fake):
+        with pytest.raises(RuntimeError, match="not found"):
+            jmap.remove_label("E-missing", fake.mailbox_id("Screener"))
+
+    def test_create_mailbox_rejects_duplicate(self, jmap):
+        jmap.create_mailbox("Receipts")
+        with pytest.raises(RuntimeError, match="invalidProperties"):
+            jmap.create_mailbox("Receipts")
+
+    def test_create_mailboxes_back_references_parent(self, fake, jmap):
+        created, failed = jmap.create_mailboxes([("Archive", None), ("2024", "Archive")])
+
+        assert failed == {}
+        assert fake.mailboxes[created["2024"]]["parentId"] == created["Archive"]
+
+    def test_email_changes_and_result_references(self, fake, jmap):
+        fake.add_email("a@example.com", ["Screener"])
+        state = jmap.call([["Email/get", {"accountId": jmap.account_id, "ids": []}, "g"]])[0][1][
+            "state"
+        ]
+        created = fake.add_email("b@example.com", ["Screener"])
+
+        responses = jmap.call(
+            [
+                ["Email/changes", {"accountId": jmap.account_id, "sinceState": state}, "c"],
+                [
+                    "Email/get",
+                    {
+                        "accountId": jmap.account_id,
+                        "#ids": {"resultOf": "c", "name": "Email/changes", "path": "/created"},
+                        "properties": ["from"],
+                    },
+                    "g",
+                ],
+            ]
+        )
+
+        assert responses[0][1]["created"] == [created]
+        assert responses[1][1]["list"][0]["from"][0]["email"] == "b@example.com"
+
+    def test_unknown_method(self, jmap):
+        responses = jmap.call([["Thread/get", {"accountId": jmap.account_id}, "t"]])
+        assert responses[0] == ["error", {"type": "unknownMethod"}, "t"]
+
+
+class TestCardDAV:
+    def test_discovery_and_groups(self, carddav, mock_settings):
+        assert set(carddav.list_groups()) == set(
+            mock_settings.contact_groups + [mock_settings.mailroom.provenance_group]
+        )
+
+    def test_upsert_contact_creates_and_groups(self, fake, carddav):
+        result = carddav.upsert_contact("new@example.com", "New Co", "Feed")
+
+        assert result["action"] == "created"
+        assert result["uid"] in fake.group_members("Feed")
+        assert len(carddav.search_by_email("NEW@example.com")) == 1
+
+    def test_etag_preconditions(self, fake, carddav):
+        uid = fake.add_contact("x@example.com")
+        href = f"{fake.addressbook_path}{uid}.vcf"
+        with pytest.raises(httpx.HTTPStatusError) as exc:
+            carddav.delete_contact(href, '"stale"')
+        assert exc.value.response.status_code == 412
+        etag, _ = fake.vcards[href]
+        carddav.delete_contact(href, etag)
+        assert href not in fake.vcards
+
+    def test_create_only_put_conflicts(self, fake, carddav):
+        carddav.create_group("Receipts")
+        assert "Receipts" in carddav.list_groups()
+
+
+class TestFaultsAndLatency:
+    def test_injected_fault_is_retried_by_transport(self, fake, jmap):
+        fake.fail(503, match="Mailbox/get", retry_after=0)
+        jmap.resolve_mailboxes(["Inbox"])
+        assert [r.jmap_methods for r in fake.requests[-2:]] == [["Mailbox/get"]] * 2
+
+    def test_fault_on_write_surfaces(self, fake, jmap):
+        email = fake.add_email("a@example.com", ["Screener"])
+        fake.fail(500, match="Email/set")
+        with pytest.raises(httpx.HTTPStatusError):
+            jmap.batch_add_labels([email], [fake.mailbox_id("Feed")])
+
+    def test_latency_applied_per_request(self, mock_settings):
+        slept: list[float] = []
+        fake = FakeFastmail.for_settings(mock_settings, latency=0.05, sleep=slept.append)
+        JMAPClient(token=fake.token, transport=fake, http=UNTHROTTLED_HTTP).connect()
+        assert slept == [0.05]
+
+    def test_request_accounting(self, fake, jmap, carddav):
+        fake.reset_requests()
+        jmap.resolve_mailboxes(["Inbox"])
+        carddav.search_by_email("nobody@example.com")
+        assert fake.count("jmap") == 1
+        assert fake.count("carddav") == 1
+
+
+class TestEventSource:
+    def test_state_event_on_change(self, fake, jmap):
+        events: queue.Queue = queue.Queue()
+        shutdown = threading.Event()
+        listener = threading.Thread(
+            target=sse_listener,
+            args=(fake.token, jmap.event_source_url, events, shutdown),
+            kwargs={"transport": fake, "sleep_fn": lambda delay: shutdown.wait(delay)},
+        )
+        listener.start()
+        try:
+            # Keep changing state until the listener is subscribed and reports one
+            for _ in range(50):
+                fake.add_email("push@example.com", ["Screener"])
+                try:
+                    assert events.get(timeout=0.1) == "state_changed"
+                    break
+                except queue.Empty:
+                    continue
+            else:
+                pytest.fail("no state event received")
+        finally:
+            shutdown.set()
+            fake.close()
+            listener.join(timeout=5)
+        assert not listener.is_alive()
+
+
+class TestScreenerAgainstFake:
+    def test_poll_triages_new_sender(self, fake, jmap, carddav, mock_settings):
+        email = fake.add_email("news@example.com", ["Screener", "@ToFeed"], name="News Co")
+        mailbox_ids = jmap.resolve_mailboxes(mock_settings.required_mailboxes)
+        workflow = ScreenerWorkflow(jmap, carddav, mock_settings, mailbox_ids)
+
+        assert workflow.poll() == 1
+
+        assert fake.emails_in("@ToFeed") == []
+        assert email in fake.emails_in("Feed")
+        assert email not in fake.emails_in("Screener")
+        (contact,) = carddav.search_by_email("news@example.com")
+        assert len(fake.group_members("Feed")) == 1
+        assert "News Co" in contact["vcard_data"]
@@ -0,0 +1,76 @@
+"""Tests for the health server and its opt-in /debug endpoints."""
+
+import json
+import pstats
+
+import httpx
+import pytest
+
+from mailroom.__main__ import HealthHandler, _start_health_server
+from mailroom.core import tracing
+from mailroom.core.config import DebugSettings
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Start a health server on a free port; yields a function returning its base URL."""
+    servers = []
+    monkeypatch.setattr(HealthHandler, "debug", DebugSettings())
+
+    def start(debug: DebugSettings | None = None) -> str:
+        server = _start_health_server(0, 300, debug)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+    tracing.reset()
+
+
+def test_healthz(serve):
+    response = httpx.get(f"{serve()}/healthz")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+
+
+def test_debug_endpoints_disabled_by_default(serve):
+    base = serve()
+    assert httpx.get(f"{base}/debug/profile?seconds=0.1").status_code == 404
+    assert httpx.get(f"{base}/debug/poll-trace").status_code == 404
+
+
+def test_profile_collapsed(serve):
+    base = serve(DebugSettings(enabled=True))
+    response = httpx.get(f"{base}/debug/profile?seconds=0.1")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    # The server's own accept loop is always on a stack
+    assert "serve_forever" in response.text
+
+
+def test_profile_pstats(serve, tmp_path):
+    base = serve(DebugSettings(enabled=True))
+    response = httpx.get(f"{base}/debug/profile?seconds=0.1&format=pstats")
+    assert response.status_code == 200
+    path = tmp_path / "profile.pstats"
+    path.write_bytes(response.content)
+    assert pstats.Stats(str(path)).stats
+
+
+@pytest.mark.parametrize("query", ["seconds=0", "seconds=61", "seconds=abc", "format=svg"])
+def test_profile_rejects_bad_parameters(serve, query):
+    base = serve(DebugSettings(enabled=True))
+    assert httpx.get(f"{base}/debug/profile?{query}").status_code == 400
+
+
+def test_poll_trace(serve):
+    base = serve(DebugSettings(enabled=True, poll_traces=5))
+    for trigger in ("scheduled", "push"):
+        with tracing.poll_trace(trigger):
+            with tracing.span("collect_triaged"):
+                pass
+    body = json.loads(httpx.get(f"{base}/debug/poll-trace?limit=1").text)
+    assert [p["trigger"] for p in body["polls"]] == ["push"]
+    assert body["polls"][0]["spans"][0]["name"] == "collect_triaged"
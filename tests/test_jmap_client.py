@@ -1,10 +1,13 @@
 """Tests for JMAP client: session discovery, mailbox resolution, and email operations."""
 
+import json
+
 import httpx
 import pytest
 from pytest_httpx import HTTPXMock
 
-from mailroom.clients.jmap import JMAPClient
+from mailroom.clients.jmap import QUERIES_PER_REQUEST, JMAPClient
+from mailroom.clients.models import Email, Mailbox
 
 # --- Fixtures ---
 
@@ -403,6 +406,104 @@ class TestCreateMailbox:
         assert "invalidProperties" in str(exc_info.value)
 
 
+class TestCreateMailboxes:
+    """Tests for JMAPClient.create_mailboxes()."""
+
+    def _setup_connected_client(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """Helper: connect the client with a mocked session."""
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/session",
+            json=FASTMAIL_SESSION_RESPONSE,
+        )
+        client.connect()
+
+    def test_one_request_with_back_references(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """All mailboxes go in one Mailbox/set; in-batch parents become #creationId."""
+        self._setup_connected_client(client, httpx_mock)
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/api/",
+            json={
+                "methodResponses": [
+                    [
+                        "Mailbox/set",
+                        {
+                            "accountId": "u1234",
+                            "created": {
+                                "mb0": {"id": "Ma1"},
+                                "mb1": {"id": "Ma2"},
+                                "mb2": {"id": "Ma3"},
+                            },
+                        },
+                        "c0",
+                    ]
+                ]
+            },
+        )
+
+        created, failed = client.create_mailboxes(
+            [("Triage", None), ("Feed", "Triage"), ("Archive", "MaExisting")]
+        )
+
+        assert created == {"Triage": "Ma1", "Feed": "Ma2", "Archive": "Ma3"}
+        assert failed == {}
+        api_requests = httpx_mock.get_requests()[1:]
+        assert len(api_requests) == 1
+        create = json.loads(api_requests[0].read())["methodCalls"][0][1]["create"]
+        assert "parentId" not in create["mb0"]
+        assert create["mb1"]["parentId"] == "#mb0"
+        assert create["mb2"]["parentId"] == "MaExisting"
+
+    def test_not_created_mapped_per_name(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """notCreated entries come back as error messages keyed by mailbox name."""
+        self._setup_connected_client(client, httpx_mock)
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/api/",
+            json={
+                "methodResponses": [
+                    [
+                        "Mailbox/set",
+                        {
+                            "accountId": "u1234",
+                            "created": {"mb0": {"id": "Ma1"}},
+                            "notCreated": {
+                                "mb1": {
+                                    "type": "invalidProperties",
+                                    "description": "Name exists",
+                                }
+                            },
+                        },
+                        "c0",
+                    ]
+                ]
+            },
+        )
+
+        created, failed = client.create_mailboxes([("Feed", None), ("Imbox", None)])
+
+        assert created == {"Feed": "Ma1"}
+        assert list(failed) == ["Imbox"]
+        assert "invalidProperties - Name exists" in failed["Imbox"]
+
+    def test_method_error_raises(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """A method-level error fails the whole batch with RuntimeError."""
+        self._setup_connected_client(client, httpx_mock)
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/api/",
+            json={"methodResponses": [["error", {"type": "accountReadOnly"}, "c0"]]},
+        )
+
+        with pytest.raises(RuntimeError, match="accountReadOnly"):
+            client.create_mailboxes([("Feed", None)])
+
+
 # --- JMAP call() Tests ---
 
 
@@ -1139,6 +1240,190 @@ class TestQueryEmailsBySender:
         assert "inMailbox" not in filt
 
 
+class TestQueryEmailsBySenders:
+    """Tests for JMAPClient.query_emails_by_senders()."""
+
+    def _setup_connected_client(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """Helper: connect the client with a mocked session."""
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/session",
+            json=FASTMAIL_SESSION_RESPONSE,
+        )
+        client.connect()
+
+    @staticmethod
+    def _query_responses(ids_per_call: list[list[str]]) -> dict:
+        return {
+            "methodResponses": [
+                ["Email/query", {"accountId": "u1234", "ids": ids, "position": 0}, f"q{i}"]
+                for i, ids in enumerate(ids_per_call)
+            ]
+        }
+
+    def test_batches_senders_into_one_request(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """Several senders are queried with one Email/query each, in one request."""
+        self._setup_connected_client(client, httpx_mock)
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/api/",
+            json=self._query_responses([["a1", "a2"], [], ["c1"]]),
+        )
+
+        result = client.query_emails_by_senders(
+            ["a@example.com", "b@example.com", "c@example.com"]
+        )
+
+        assert result == {
+            "a@example.com": ["a1", "a2"],
+            "b@example.com": [],
+            "c@example.com": ["c1"],
+        }
+        payload = json.loads(httpx_mock.get_requests()[-1].read())
+        filters = [call[1]["filter"] for call in payload["methodCalls"]]
+        assert filters == [
+            {"from": "a@example.com"},
+            {"from": "b@example.com"},
+            {"from": "c@example.com"},
+        ]
+
+    def test_splits_requests_and_paginates_full_pages(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """Senders beyond QUERIES_PER_REQUEST go in a later request, with full pages continued."""
+        self._setup_connected_client(client, httpx_mock)
+        senders = [f"s{i}@example.com" for i in range(QUERIES_PER_REQUEST + 1)]
+        # Request 1: first sender fills its page (limit 2), the rest have one email
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/api/",
+            json=self._query_responses(
+                [["s0-1", "s0-2"]] + [[f"s{i}-1"] for i in range(1, QUERIES_PER_REQUEST)]
+            ),
+        )
+        # Request 2: the last sender, plus the second page of the first
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/api/",
+            json=self._query_responses([[f"s{QUERIES_PER_REQUEST}-1"], ["s0-3"]]),
+        )
+
+        result = client.query_emails_by_senders(senders, limit=2)
+
+        assert result["s0@example.com"] == ["s0-1", "s0-2", "s0-3"]
+        assert result[f"s{QUERIES_PER_REQUEST}@example.com"] == [f"s{QUERIES_PER_REQUEST}-1"]
+        api_requests = httpx_mock.get_requests()[1:]
+        assert len(api_requests) == 2
+        second = json.loads(api_requests[1].read())["methodCalls"]
+        assert second[1][1]["filter"] == {"from": "s0@example.com"}
+        assert second[1][1]["position"] == 2
+
+    def test_error_response_raises(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """A method-level error for any sender raises RuntimeError."""
+        self._setup_connected_client(client, httpx_mock)
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/api/",
+            json={"methodResponses": [["error", {"type": "invalidArguments"}, "q0"]]},
+        )
+
+        with pytest.raises(RuntimeError, match="invalidArguments"):
+            client.query_emails_by_senders(["a@example.com"])
+
+
+class TestGetEmails:
+    """Tests for JMAPClient.get_emails() and the Email/Mailbox records."""
+
+    def _setup_connected_client(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """Helper: connect the client with a mocked session."""
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/session",
+            json=FASTMAIL_SESSION_RESPONSE,
+        )
+        client.connect()
+
+    def test_returns_slotted_records(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """Email/get results come back as Email records with normalized fields."""
+        self._setup_connected_client(client, httpx_mock)
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/api/",
+            json={
+                "methodResponses": [
+                    [
+                        "Email/get",
+                        {
+                            "list": [
+                                {
+                                    "id": "e1",
+                                    "from": [{"email": "a@example.com", "name": "  "}],
+                                    "mailboxIds": {"mb1": True, "mb2": True},
+                                },
+                                {"id": "e2", "from": None},
+                            ]
+                        },
+                        "g0",
+                    ]
+                ]
+            },
+        )
+
+        emails = client.get_emails(["e1", "e2"], ["from", "mailboxIds"])
+
+        assert emails == [
+            Email("e1", "a@example.com", None, frozenset({"mb1", "mb2"})),
+            Email("e2"),
+        ]
+        assert not hasattr(emails[0], "__dict__")
+        payload = json.loads(httpx_mock.get_requests()[-1].read())
+        assert payload["methodCalls"][0][1]["properties"] == ["id", "from", "mailboxIds"]
+
+    def test_method_error_raises(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """A method-level Email/get error raises RuntimeError."""
+        self._setup_connected_client(client, httpx_mock)
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/api/",
+            json={"methodResponses": [["error", {"type": "requestTooLarge"}, "g0"]]},
+        )
+
+        with pytest.raises(RuntimeError, match="requestTooLarge"):
+            client.get_emails(["e1"], ["mailboxIds"])
+
+    def test_get_mailboxes(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """Mailbox/get results come back as Mailbox records."""
+        self._setup_connected_client(client, httpx_mock)
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/api/",
+            json={
+                "methodResponses": [
+                    [
+                        "Mailbox/get",
+                        {
+                            "list": [
+                                {"id": "mb1", "name": "Inbox", "role": "inbox", "parentId": None},
+                                {"id": "mb2", "name": "Feed", "parentId": "mb1"},
+                            ]
+                        },
+                        "m0",
+                    ]
+                ]
+            },
+        )
+
+        assert client.get_mailboxes() == [
+            Mailbox("mb1", "Inbox", "inbox", None),
+            Mailbox("mb2", "Feed", None, "mb1"),
+        ]
+
+
 # --- Get Email Mailbox IDs Tests ---
 
 
@@ -1342,3 +1627,90 @@ class TestBatchAddLabels:
 
         with pytest.raises(RuntimeError, match="Failed to add labels"):
             client.batch_add_labels(["e1"], ["mb-warning"])
+
+
+class TestCountEmails:
+    """Tests for count_emails() and query_email_page()."""
+
+    def test_counts_all_mailboxes_in_one_request(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """One Email/query per mailbox, limit 0 + calculateTotal, one round-trip."""
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/session",
+            json=FASTMAIL_SESSION_RESPONSE,
+        )
+        client.connect()
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/api/",
+            json={
+                "methodResponses": [
+                    ["Email/query", {"ids": [], "total": 1200}, "q0"],
+                    ["Email/query", {"ids": [], "total": 0}, "q1"],
+                ]
+            },
+        )
+
+        counts = client.count_emails(["mb-feed", "mb-imbox"])
+
+        assert counts == {"mb-feed": 1200, "mb-imbox": 0}
+        api_requests = [
+            r for r in httpx_mock.get_requests()
+            if str(r.url) == "https://api.fastmail.com/jmap/api/"
+        ]
+        assert len(api_requests) == 1
+        import json
+        calls = json.loads(api_requests[0].read())["methodCalls"]
+        assert [c[1]["limit"] for c in calls] == [0, 0]
+        assert all(c[1]["calculateTotal"] for c in calls)
+
+    def test_query_email_page_returns_single_page(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """query_email_page does not follow pagination."""
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/session",
+            json=FASTMAIL_SESSION_RESPONSE,
+        )
+        client.connect()
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/api/",
+            json={"methodResponses": [["Email/query", {"ids": ["e1", "e2"]}, "q0"]]},
+        )
+
+        assert client.query_email_page("mb-feed", limit=2) == ["e1", "e2"]
+        assert len(httpx_mock.get_requests()) == 2  # session + one query
+
+
+class TestBatchUpdateLabels:
+    """Tests for batch_update_labels() — adds and removes labels in one patch."""
+
+    def test_adds_and_removes_in_one_email_set(
+        self, client: JMAPClient, httpx_mock: HTTPXMock
+    ) -> None:
+        """Each email gets one patch with both True (add) and None (remove) values."""
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/session",
+            json=FASTMAIL_SESSION_RESPONSE,
+        )
+        client.connect()
+        httpx_mock.add_response(
+            url="https://api.fastmail.com/jmap/api/",
+            json={
+                "methodResponses": [
+                    ["Email/set", {"accountId": "u1234", "updated": {"e1": None}}, "s0"]
+                ]
+            },
+        )
+
+        client.batch_update_labels(["e1"], add=["mb-screener"], remove=["mb-feed"])
+
+        api_requests = [
+            r for r in httpx_mock.get_requests()
+            if str(r.url) == "https://api.fastmail.com/jmap/api/"
+        ]
+        assert len(api_requests) == 1
+        import json
+        payload = json.loads(api_requests[0].read())
+        update = payload["methodCalls"][0][1]["update"]
+        assert update["e1"] == {"mailboxIds/mb-screener": True, "mailboxIds/mb-feed": None}
@@ -0,0 +1,44 @@
+"""Tests for the JSON codec shared by the JMAP client and log renderer."""
+
+import json
+
+import pytest
+
+from mailroom.core import jsoncodec
+
+
+class TestJsonCodec:
+    """dumps/loads round-trip JMAP-shaped data through the active backend."""
+
+    def test_round_trip(self) -> None:
+        payload = {
+            "using": ["urn:ietf:params:jmap:core"],
+            "methodCalls": [["Email/set", {"update": {"e1": {"mailboxIds/mb1": None}}}, "s0"]],
+            "n": 3,
+            "ok": True,
+        }
+
+        encoded = jsoncodec.dumps(payload)
+
+        assert isinstance(encoded, bytes)
+        assert jsoncodec.loads(encoded) == payload
+        assert json.loads(encoded) == payload  # interoperable with stdlib
+
+    def test_loads_accepts_str(self) -> None:
+        assert jsoncodec.loads('{"a": [1, "é"]}') == {"a": [1, "é"]}
+
+    def test_dumps_str_uses_default_for_unknown_types(self) -> None:
+        """dumps_str is a structlog serializer: default= handles odd values."""
+        text = jsoncodec.dumps_str({"value": object()}, default=lambda o: "<obj>")
+
+        assert json.loads(text) == {"value": "<obj>"}
+
+    def test_dumps_str_ignores_stdlib_kwargs(self) -> None:
+        assert json.loads(jsoncodec.dumps_str({"a": 1}, sort_keys=True)) == {"a": 1}
+
+    def test_unknown_type_without_default_raises(self) -> None:
+        with pytest.raises(TypeError):
+            jsoncodec.dumps({"value": object()})
+
+    def test_backend_reported(self) -> None:
+        assert jsoncodec.BACKEND in {"orjson", "msgspec", "json"}
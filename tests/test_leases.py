@@ -0,0 +1,210 @@
+"""Tests for lease backends and replica coordination."""
+
+import json
+import threading
+
+import httpx
+import pytest
+
+from mailroom.accounts.coordination import Coordinator
+from mailroom.accounts.leases import (
+    FileLeaseBackend,
+    KubernetesLeaseBackend,
+    MemoryLeaseBackend,
+    SQLiteLeaseBackend,
+)
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeLeaseAPI:
+    """Just enough of the coordination.k8s.io/v1 Lease API (with resourceVersion checks)."""
+
+    def __init__(self) -> None:
+        self.leases: dict[str, dict] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def _bump(self, lease: dict) -> dict:
+        self._version += 1
+        lease["metadata"]["resourceVersion"] = str(self._version)
+        return lease
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        name = request.url.path.rsplit("/leases", 1)[1].strip("/")
+        with self._lock:
+            if request.method == "GET" and not name:
+                return httpx.Response(200, json={"items": list(self.leases.values())})
+            if request.method == "GET":
+                if name not in self.leases:
+                    return httpx.Response(404)
+                return httpx.Response(200, json=self.leases[name])
+            lease = json.loads(request.content)
+            if request.method == "POST":
+                name = lease["metadata"]["name"]
+                if name in self.leases:
+                    return httpx.Response(409)
+                self.leases[name] = self._bump(lease)
+                return httpx.Response(201, json=lease)
+            current = self.leases.get(name)
+            if current is None or (
+                current["metadata"]["resourceVersion"] != lease["metadata"]["resourceVersion"]
+            ):
+                return httpx.Response(409)
+            self.leases[name] = self._bump(lease)
+            return httpx.Response(200, json=lease)
+
+
+@pytest.fixture(params=["memory", "file", "sqlite", "kubernetes"])
+def backend_factory(request, tmp_path):
+    """Build backends sharing one store, each with the given clock."""
+    shared = {"memory": None}
+    api = FakeLeaseAPI()
+
+    def make(clock):
+        if request.param == "memory":
+            if shared["memory"] is None:
+                shared["memory"] = MemoryLeaseBackend(clock)
+            return shared["memory"]
+        if request.param == "file":
+            return FileLeaseBackend(tmp_path / "leases", clock)
+        if request.param == "sqlite":
+            return SQLiteLeaseBackend(tmp_path / "leases.db", clock)
+        return KubernetesLeaseBackend(
+            namespace="mail",
+            api_url="https://k8s.invalid",
+            transport=httpx.MockTransport(api),
+            clock=clock,
+        )
+
+    return make
+
+
+class TestLeaseBackends:
+    def test_exclusive_until_expiry(self, backend_factory):
+        clock = Clock()
+        a, b = backend_factory(clock), backend_factory(clock)
+        assert a.acquire("mailroom-account-alice", "pod-a", 10)
+        assert not b.acquire("mailroom-account-alice", "pod-b", 10)
+        assert a.acquire("mailroom-account-alice", "pod-a", 10)  # renew
+        clock.now += 11
+        assert b.acquire("mailroom-account-alice", "pod-b", 10)
+        assert not a.acquire("mailroom-account-alice", "pod-a", 10)
+
+    def test_release_frees_immediately(self, backend_factory):
+        clock = Clock()
+        a, b = backend_factory(clock), backend_factory(clock)
+        assert a.acquire("mailroom-leader", "pod-a", 10)
+        b.release("mailroom-leader", "pod-b")  # not the holder: no-op
+        assert not b.acquire("mailroom-leader", "pod-b", 10)
+        a.release("mailroom-leader", "pod-a")
+        assert b.acquire("mailroom-leader", "pod-b", 10)
+
+    def test_holders_lists_live_leases_by_prefix(self, backend_factory):
+        clock = Clock()
+        backend = backend_factory(clock)
+        backend.acquire("mailroom-member-pod-a", "pod-a", 10)
+        backend.acquire("mailroom-member-pod-b", "pod-b", 5)
+        backend.acquire("mailroom-leader", "pod-a", 10)
+        assert backend.holders("mailroom-member-") == {
+            "mailroom-member-pod-a": "pod-a",
+            "mailroom-member-pod-b": "pod-b",
+        }
+        clock.now += 6
+        assert backend.holders("mailroom-member-") == {"mailroom-member-pod-a": "pod-a"}
+
+
+def test_kubernetes_names_are_sanitized_and_unique():
+    name = "mailroom-account-alice"
+    assert KubernetesLeaseBackend.resource_name(name) == name
+    upper = KubernetesLeaseBackend.resource_name("mailroom-account-Alice_B")
+    lower = KubernetesLeaseBackend.resource_name("mailroom-account-alice-b")
+    assert upper.startswith("mailroom-account-alice-b-") and upper != lower
+
+
+def _coordinators(backend, clock, holders, accounts, mode="shard"):
+    return [
+        Coordinator(
+            backend, accounts, mode=mode, holder=h, lease_seconds=15, renew_seconds=5, clock=clock
+        )
+        for h in holders
+    ]
+
+
+def _refresh_all(coordinators, busy=()) -> list[set[str]]:
+    for c in coordinators:
+        c.next_refresh = 0.0
+    # Two rounds: the first registers members, the second settles ownership
+    for _ in range(2):
+        owned = [c.refresh(busy) for c in coordinators]
+        for c in coordinators:
+            c.next_refresh = 0.0
+    return owned
+
+
+class TestCoordinator:
+    ACCOUNTS = [f"account{i}" for i in range(12)]
+
+    def test_shards_split_accounts_without_overlap(self):
+        clock = Clock()
+        backend = MemoryLeaseBackend(clock)
+        coordinators = _coordinators(backend, clock, ["pod-a", "pod-b", "pod-c"], self.ACCOUNTS)
+        owned = _refresh_all(coordinators)
+        assert sorted(a for shard in owned for a in shard) == sorted(self.ACCOUNTS)
+        assert all(shard for shard in owned)
+
+    def test_failover_after_lease_expiry(self):
+        clock = Clock()
+        backend = MemoryLeaseBackend(clock)
+        a, b = _coordinators(backend, clock, ["pod-a", "pod-b"], self.ACCOUNTS)
+        _refresh_all([a, b])
+        a_share = a.owned()
+        clock.now += 16  # pod-a stops renewing
+        (owned_b,) = _refresh_all([b])
+        assert owned_b == set(self.ACCOUNTS)
+        assert a.owned() == set()  # pod-a no longer trusts its stale leases
+        assert a_share
+
+    def test_new_member_takes_its_share_but_not_busy_accounts(self):
+        clock = Clock()
+        backend = MemoryLeaseBackend(clock)
+        a, b = _coordinators(backend, clock, ["pod-a", "pod-b"], self.ACCOUNTS)
+        (owned_a,) = _refresh_all([a])
+        assert owned_a == set(self.ACCOUNTS)
+        busy = sorted(owned_a)
+        owned_a, owned_b = _refresh_all([a, b], busy=busy)
+        assert owned_a == set(self.ACCOUNTS) and owned_b == set()  # nothing handed off mid-poll
+        owned_a, owned_b = _refresh_all([a, b])
+        assert owned_a and owned_b and not owned_a & owned_b
+
+    def test_release_all_hands_over_immediately(self):
+        clock = Clock()
+        backend = MemoryLeaseBackend(clock)
+        a, b = _coordinators(backend, clock, ["pod-a", "pod-b"], self.ACCOUNTS, mode="leader")
+        assert _refresh_all([a, b]) == [set(self.ACCOUNTS), set()]
+        a.release_all()
+        (owned_b,) = _refresh_all([b])
+        assert owned_b == set(self.ACCOUNTS)
+
+    def test_backend_error_keeps_leases_until_they_would_expire(self):
+        clock = Clock()
+        backend = MemoryLeaseBackend(clock)
+        (a,) = _coordinators(backend, clock, ["pod-a"], self.ACCOUNTS, mode="leader")
+        _refresh_all([a])
+
+        def broken(*args):
+            raise ConnectionError("backend down")
+
+        backend.acquire = broken
+        clock.now += 5
+        a.next_refresh = 0.0
+        assert a.refresh() == set(self.ACCOUNTS)
+        clock.now += 6  # past lease_seconds - renew_seconds since the last renewal
+        a.next_refresh = 0.0
+        assert a.refresh() == set()
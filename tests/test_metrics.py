@@ -0,0 +1,25 @@
+"""Tests for process-wide metrics counters."""
+
+import pytest
+
+from mailroom.core import metrics
+
+
+@pytest.fixture(autouse=True)
+def _clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_incr_creates_and_increments():
+    metrics.incr("polls")
+    metrics.incr("polls", 2)
+    assert metrics.snapshot() == {"polls": 3}
+
+
+def test_snapshot_is_a_copy():
+    metrics.incr("polls")
+    snap = metrics.snapshot()
+    snap["polls"] = 99
+    assert metrics.snapshot()["polls"] == 1
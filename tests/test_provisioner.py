@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+import threading
 from io import StringIO
 from unittest.mock import MagicMock
 
 import pytest
 
+from mailroom.clients.models import Mailbox
 from mailroom.setup.provisioner import apply_resources, plan_resources
 from mailroom.setup.reporting import ResourceAction, print_plan
 
@@ -32,7 +34,7 @@ def _mock_jmap(existing_mailboxes: list[str]) -> MagicMock:
     jmap = MagicMock()
     jmap.account_id = "u1234"
     mailbox_list = _make_mailbox_list(existing_mailboxes)
-    jmap.call.return_value = [["Mailbox/get", {"list": mailbox_list}, "m0"]]
+    jmap.get_mailboxes.return_value = [Mailbox.from_json(mb) for mb in mailbox_list]
     return jmap
 
 
@@ -168,7 +170,7 @@ class TestApplyResources:
         ]
 
         jmap = MagicMock()
-        jmap.create_mailbox.return_value = "new-mb-id"
+        jmap.create_mailboxes.return_value = ({"Feed": "new-mb-id"}, {})
         carddav = MagicMock()
         carddav.create_group.return_value = {
             "href": "/feed.vcf",
@@ -181,7 +183,7 @@ class TestApplyResources:
         assert result[0].status == "exists"  # Inbox unchanged
         assert result[1].status == "created"  # Feed mailbox created
         assert result[2].status == "created"  # Feed group created
-        jmap.create_mailbox.assert_called_once_with("Feed")
+        jmap.create_mailboxes.assert_called_once_with([("Feed", None)])
         carddav.create_group.assert_called_once_with("Feed")
 
     def test_handles_failure(self) -> None:
@@ -191,7 +193,7 @@ class TestApplyResources:
         ]
 
         jmap = MagicMock()
-        jmap.create_mailbox.side_effect = RuntimeError("403 Forbidden")
+        jmap.create_mailboxes.side_effect = RuntimeError("403 Forbidden")
         carddav = MagicMock()
 
         result = apply_resources(plan, jmap, carddav)
@@ -211,7 +213,13 @@ class TestApplyResources:
         ]
 
         jmap = MagicMock()
-        jmap.create_mailbox.side_effect = RuntimeError("creation failed")
+        jmap.create_mailboxes.return_value = (
+            {},
+            {
+                "Parent": "Failed to create mailbox 'Parent': forbidden - ",
+                "Child": "Failed to create mailbox 'Child': invalidProperties - ",
+            },
+        )
         carddav = MagicMock()
 
         result = apply_resources(plan, jmap, carddav)
@@ -219,8 +227,86 @@ class TestApplyResources:
         assert result[0].status == "failed"
         assert result[1].status == "skipped"
         assert result[1].error == "parent failed"
-        # create_mailbox only called once (for Parent, not Child)
-        jmap.create_mailbox.assert_called_once_with("Parent")
+        # One request; Child references Parent by name (back-referenced by the client)
+        jmap.create_mailboxes.assert_called_once_with([("Parent", None), ("Child", "Parent")])
+        jmap.resolve_mailboxes.assert_not_called()
+
+    def test_creates_all_missing_mailboxes_in_one_request(self) -> None:
+        """Mailboxes, labels and mailroom labels go in one create_mailboxes call."""
+        plan = [
+            ResourceAction(kind="mailbox", name="Feed", status="create"),
+            ResourceAction(kind="mailbox", name="Imbox", status="exists"),
+            ResourceAction(kind="label", name="@ToFeed", status="create"),
+            ResourceAction(kind="mailroom", name="@MailroomError", status="create"),
+        ]
+
+        jmap = MagicMock()
+        jmap.create_mailboxes.return_value = (
+            {"Feed": "mb-1", "@MailroomError": "mb-3"},
+            {"@ToFeed": "Failed to create mailbox '@ToFeed': invalidProperties - Name exists"},
+        )
+        carddav = MagicMock()
+
+        result = apply_resources(plan, jmap, carddav)
+
+        jmap.create_mailboxes.assert_called_once_with(
+            [("Feed", None), ("@ToFeed", None), ("@MailroomError", None)]
+        )
+        assert [(a.name, a.status) for a in result] == [
+            ("Feed", "created"),
+            ("Imbox", "exists"),
+            ("@ToFeed", "failed"),
+            ("@MailroomError", "created"),
+        ]
+        assert "Name exists" in result[2].error
+
+    def test_existing_parent_resolved_to_id(self) -> None:
+        """A parent that already exists is passed to create_mailboxes by ID."""
+        plan = [
+            ResourceAction(kind="mailbox", name="Triage", status="exists"),
+            ResourceAction(kind="mailbox", name="Feed", status="create", parent="Triage"),
+        ]
+
+        jmap = MagicMock()
+        jmap.resolve_mailboxes.return_value = {"Triage": "mb-triage"}
+        jmap.create_mailboxes.return_value = ({"Feed": "mb-feed"}, {})
+        carddav = MagicMock()
+
+        result = apply_resources(plan, jmap, carddav)
+
+        jmap.create_mailboxes.assert_called_once_with([("Feed", "mb-triage")])
+        assert result[1].status == "created"
+
+    def test_creates_groups_concurrently_in_plan_order(self) -> None:
+        """Group PUTs overlap; results keep plan order and per-group failures."""
+        plan = [
+            ResourceAction(kind="contact_group", name="Feed", status="create"),
+            ResourceAction(kind="contact_group", name="Imbox", status="exists"),
+            ResourceAction(kind="contact_group", name="Paper Trail", status="create"),
+            ResourceAction(kind="mailroom", name="Mailroom", status="create"),
+        ]
+        # All three PUTs must be in flight at once to pass the barrier
+        barrier = threading.Barrier(3, timeout=5)
+
+        def create_group(name: str) -> dict:
+            barrier.wait()
+            if name == "Paper Trail":
+                raise RuntimeError("412 Precondition Failed")
+            return {"href": f"/{name}.vcf", "etag": '"e"', "uid": name}
+
+        jmap = MagicMock()
+        carddav = MagicMock()
+        carddav.create_group.side_effect = create_group
+
+        result = apply_resources(plan, jmap, carddav, concurrency=3)
+
+        assert [(a.name, a.status) for a in result] == [
+            ("Feed", "created"),
+            ("Imbox", "exists"),
+            ("Paper Trail", "failed"),
+            ("Mailroom", "created"),
+        ]
+        assert "412" in result[2].error
 
     def test_existing_resources_unchanged(self) -> None:
         """Resources with 'exists' status pass through without API calls."""
@@ -238,7 +324,7 @@ class TestApplyResources:
         result = apply_resources(plan, jmap, carddav)
 
         assert all(a.status == "exists" for a in result)
-        jmap.create_mailbox.assert_not_called()
+        jmap.create_mailboxes.assert_not_called()
         carddav.create_group.assert_not_called()
 
 
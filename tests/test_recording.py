@@ -0,0 +1,159 @@
+"""Tests for the record-and-replay transports."""
+
+import gzip
+import json
+
+import httpx
+import pytest
+
+from mailroom.clients.recording import (
+    RecordingTransport,
+    ReplayMismatch,
+    ReplayTransport,
+    Sanitizer,
+    request_key,
+)
+from mailroom.clients.transport import build_transport
+from mailroom.core.config import HttpSettings
+from mailroom.testing.fake_fastmail import FakeFastmail, start_workflow
+
+
+@pytest.fixture
+def recording(tmp_path):
+    return tmp_path / "recordings" / "poll.jsonl"
+
+
+def _entries(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def _record_poll(fake, settings, path) -> None:
+    workflow = start_workflow(RecordingTransport(fake, path), settings)
+    workflow.poll()
+
+
+class TestSanitizer:
+    def test_emails_get_stable_pseudonyms(self):
+        s = Sanitizer()
+        out = s.json({"from": [{"email": "Alice@Example.com"}], "to": "alice@example.com"})
+        assert out["from"][0]["email"] == "user1@example.invalid"
+        assert out["to"] == "user1@example.invalid"
+        assert s.json("bob@example.com") == "user2@example.invalid"
+
+    def test_address_names_and_free_text_are_removed(self):
+        s = Sanitizer()
+        out = s.json(
+            {"from": [{"name": "Alice Smith", "email": "a@x.com"}], "subject": "Your invoice"}
+        )
+        assert out["from"][0]["name"] == "Name 1"
+        assert out["subject"] == "redacted"
+
+    def test_mailbox_names_are_kept(self):
+        mailbox = {"id": "mb1", "name": "@ToFeed"}
+        assert Sanitizer().json(mailbox) == mailbox
+
+    def test_vcard_personal_fields_sanitized_group_names_kept(self):
+        s = Sanitizer()
+        text = (
+            "BEGIN:VCARD\r\nVERSION:3.0\r\nFN:Alice Smith\r\nN:Smith;Alice;;;\r\n"
+            "EMAIL;TYPE=INTERNET:alice@example.com\r\nTEL:+44 1234\r\nEND:VCARD\r\n"
+            "BEGIN:VCARD\r\nVERSION:3.0\r\nX-ADDRESSBOOKSERVER-KIND:group\r\nFN:Feed\r\nEND:VCARD"
+        )
+        out = s.text(text)
+        assert "Alice" not in out and "Smith" not in out and "1234" not in out
+        assert "EMAIL;TYPE=INTERNET:user1@example.invalid" in out
+        assert "FN:Feed" in out
+
+
+class TestRecordingTransport:
+    def test_records_sanitized_pairs_without_credentials(self, mock_settings, recording):
+        fake = FakeFastmail.for_settings(mock_settings)
+        fake.add_email("secret.sender@example.com", ["Screener", "@ToFeed"], name="Secret Co")
+        _record_poll(fake, mock_settings, recording)
+
+        raw = recording.read_text()
+        assert "secret.sender@example.com" not in raw
+        assert "Secret Co" not in raw
+        assert mock_settings.jmap_token not in raw
+        entries = _entries(recording)
+        assert len(entries) == fake.count()
+        for entry in entries:
+            assert "authorization" not in {k.lower() for k in entry["request_headers"]}
+        assert all(e["elapsed"] >= 0 for e in entries)
+
+    def test_event_stream_is_not_recorded(self, recording):
+        def handler(request):
+            return httpx.Response(
+                200, headers={"content-type": "text/event-stream"}, stream=httpx.ByteStream(b"")
+            )
+
+        transport = RecordingTransport(httpx.MockTransport(handler), recording)
+        with httpx.Client(transport=transport) as client:
+            client.get("https://api.fastmail.com/events")
+        assert not recording.exists() or recording.read_text() == ""
+
+    def test_gzip_response_decoded_once(self, recording):
+        def handler(request):
+            return httpx.Response(
+                200,
+                headers={"content-type": "application/json", "content-encoding": "gzip"},
+                content=gzip.compress(b'{"ok": true}'),
+            )
+
+        transport = RecordingTransport(httpx.MockTransport(handler), recording)
+        with httpx.Client(transport=transport) as client:
+            response = client.get("https://api.fastmail.com/jmap/session")
+        assert response.json() == {"ok": True}
+        assert "content-encoding" not in response.headers
+        assert _entries(recording)[0]["response_body"] == '{"ok": true}'
+
+    def test_build_transport_records_when_configured(self, recording):
+        inner = httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": True}))
+        http = HttpSettings(record_file=str(recording))
+        with httpx.Client(transport=build_transport(http, inner=inner)) as client:
+            client.get("https://api.fastmail.com/jmap/session")
+        assert _entries(recording)[0]["url"] == "https://api.fastmail.com/jmap/session"
+
+
+class TestReplayTransport:
+    def test_replay_reproduces_poll_offline(self, mock_settings, recording):
+        fake = FakeFastmail.for_settings(mock_settings)
+        fake.add_email("new@example.com", ["Screener", "@ToFeed"], name="New Co")
+        _record_poll(fake, mock_settings, recording)
+
+        replay = ReplayTransport(recording)
+        workflow = start_workflow(replay, mock_settings)
+        assert workflow.poll() == 1
+        assert replay.remaining == 0
+
+    def test_recorded_latency(self, recording):
+        recording.parent.mkdir()
+        entry = {
+            "method": "GET",
+            "url": "https://api.fastmail.com/jmap/session",
+            "request_headers": {},
+            "request_body": "",
+            "status": 200,
+            "response_headers": {"content-type": "application/json"},
+            "response_body": "{}",
+            "elapsed": 0.25,
+        }
+        recording.write_text(json.dumps(entry) + "\n")
+        slept = []
+        replay = ReplayTransport(recording, latency="recorded", sleep=slept.append)
+        with httpx.Client(transport=replay) as client:
+            assert client.get("https://api.fastmail.com/jmap/session").json() == {}
+        assert slept == [0.25]
+
+    def test_unrecorded_request_raises(self, recording):
+        recording.parent.mkdir()
+        recording.write_text("")
+        with httpx.Client(transport=ReplayTransport(recording)) as client:
+            with pytest.raises(ReplayMismatch):
+                client.get("https://api.fastmail.com/jmap/session")
+
+    def test_key_wildcards_uids_and_addresses(self):
+        assert request_key(
+            "PUT", "https://carddav.fastmail.com/dav/addressbooks/user/a@b.com/Default/"
+            "0b7c4e1a-1111-4222-8333-944445555666.vcf"
+        ) == "PUT https://carddav.fastmail.com/dav/addressbooks/user/{email}/Default/{uuid}.vcf"
@@ -0,0 +1,102 @@
+"""Request-count regression harness for ScreenerWorkflow.
+
+Latency is dominated by round-trips, so these tests pin an upper bound on the
+HTTP requests one poll makes for each canonical scenario. They run the real
+JMAP and CardDAV clients against the in-process fake Fastmail, which records
+every request (JMAP calls and raw CardDAV requests alike).
+
+A change that adds a round-trip inside _process_sender fails here. If the
+extra request is intended, raise the budget in the same commit and say why.
+A change that saves requests should lower the budget.
+"""
+
+from collections import Counter
+
+import pytest
+
+from mailroom.testing.fake_fastmail import FakeFastmail, start_workflow
+
+# Upper bounds per poll: (JMAP requests, CardDAV requests)
+BUDGETS = {
+    "empty_poll": (1, 0),
+    "new_sender": (9, 7),
+    "new_person_with_parent": (9, 9),
+    "retriage": (9, 10),
+    "conflict": (5, 0),
+}
+
+# Label scan (1 batched query) + sender fetch + mailbox-id fetch per poll
+SCAN_REQUESTS = 3
+PER_NEW_SENDER = 13
+
+
+@pytest.fixture
+def fake(mock_settings) -> FakeFastmail:
+    return FakeFastmail.for_settings(mock_settings)
+
+
+def _poll_and_count(fake: FakeFastmail, settings) -> FakeFastmail:
+    workflow = start_workflow(fake, settings)
+    fake.reset_requests()  # startup is measured by the benchmarks, not here
+    workflow.poll()
+    return fake
+
+
+def _assert_within(fake: FakeFastmail, scenario: str) -> None:
+    jmap_budget, carddav_budget = BUDGETS[scenario]
+    breakdown = Counter(
+        f"{r.method} {'+'.join(r.jmap_methods) or r.path.rsplit('/', 1)[-1][:8]}"
+        for r in fake.requests
+    )
+    detail = "\n".join(f"  {n} x {k}" for k, n in breakdown.most_common())
+    assert fake.count("jmap") <= jmap_budget, (
+        f"{scenario}: {fake.count('jmap')} JMAP requests > budget {jmap_budget}\n{detail}"
+    )
+    assert fake.count("carddav") <= carddav_budget, (
+        f"{scenario}: {fake.count('carddav')} CardDAV requests > budget {carddav_budget}\n{detail}"
+    )
+
+
+class TestRequestBudgets:
+    def test_empty_poll(self, fake, mock_settings):
+        _assert_within(_poll_and_count(fake, mock_settings), "empty_poll")
+
+    def test_new_sender(self, fake, mock_settings):
+        fake.add_email("new@example.com", ["Screener", "@ToFeed"], name="New Co")
+        _assert_within(_poll_and_count(fake, mock_settings), "new_sender")
+
+    def test_new_person_with_parent(self, fake, mock_settings):
+        # Person's parent is Imbox: one extra group membership to write
+        fake.add_email("jane@example.com", ["Screener", "@ToPerson"], name="Jane Doe")
+        _assert_within(_poll_and_count(fake, mock_settings), "new_person_with_parent")
+
+    def test_retriage(self, fake, mock_settings):
+        fake.add_contact("known@example.com", groups=["Feed", "Mailroom"])
+        for _ in range(3):
+            fake.add_email("known@example.com", ["Feed"])
+        fake.add_email("known@example.com", ["Screener", "@ToImbox"])
+        _assert_within(_poll_and_count(fake, mock_settings), "retriage")
+
+    def test_conflict(self, fake, mock_settings):
+        fake.add_email("torn@example.com", ["Screener", "@ToFeed"])
+        fake.add_email("torn@example.com", ["Screener", "@ToJail"])
+        _assert_within(_poll_and_count(fake, mock_settings), "conflict")
+
+    def test_requests_scale_linearly_with_senders(self, fake, mock_settings):
+        senders = 5
+        for i in range(senders):
+            fake.add_email(f"s{i}@example.com", ["Screener", "@ToFeed"])
+        _poll_and_count(fake, mock_settings)
+        assert fake.count() <= SCAN_REQUESTS + senders * PER_NEW_SENDER
+
+    def test_history_size_does_not_add_requests(self, mock_settings):
+        """Mailbox size must not change the request count (pagination aside)."""
+        counts = []
+        for history in (0, 50):
+            fake = FakeFastmail.for_settings(mock_settings)
+            fake.add_contact("known@example.com", groups=["Feed", "Mailroom"])
+            for _ in range(history):
+                fake.add_email("known@example.com", ["Feed"])
+            fake.add_email("known@example.com", ["Screener", "@ToImbox"])
+            counts.append(_poll_and_count(fake, mock_settings).count())
+        assert counts[0] == counts[1]
@@ -7,6 +7,7 @@ from unittest.mock import MagicMock, call, patch
 
 import pytest
 
+from mailroom.core.config import HttpSettings
 from mailroom.reset.resetter import (
     ContactCleanup,
     ResetPlan,
@@ -14,6 +15,7 @@ from mailroom.reset.resetter import (
     _is_user_modified,
     apply_reset,
     plan_reset,
+    reset_http_settings,
 )
 from mailroom.reset.reporting import print_confirmation_prompt, print_reset_report
 
@@ -95,10 +97,10 @@ class TestPlanReset:
 
         jmap = MagicMock()
         jmap.resolve_mailboxes.return_value = _STANDARD_MAILBOXES
-        jmap.query_emails.return_value = []
+        jmap.count_emails.return_value = {}
 
         carddav = MagicMock()
-        carddav.list_all_contacts.return_value = contacts
+        carddav.iter_contacts.return_value = contacts
         carddav._groups = {
             "Feed": {"href": "/feed.vcf", "etag": '"etag"', "uid": "uid-feed"},
             "Imbox": {"href": "/imbox.vcf", "etag": '"etag"', "uid": "uid-imbox"},
@@ -116,18 +118,19 @@ class TestPlanReset:
         """Screener and Inbox mailboxes are excluded from label cleanup."""
         jmap = MagicMock()
         jmap.resolve_mailboxes.return_value = _STANDARD_MAILBOXES
-        jmap.query_emails.return_value = ["email-1"]
+        jmap.count_emails.side_effect = lambda mailbox_ids: {mb: 1 for mb in mailbox_ids}
 
         carddav = MagicMock()
-        carddav.list_all_contacts.return_value = []
+        carddav.iter_contacts.return_value = []
         carddav._groups = {}
         carddav.get_group_members.return_value = []
 
         plan = plan_reset(mock_settings, jmap, carddav)
 
-        # Screener and Inbox should not be in email_labels
-        assert "Screener" not in plan.email_labels
-        assert "Inbox" not in plan.email_labels
+        # Screener and Inbox should not be in email_counts
+        assert "Feed" in plan.email_counts
+        assert "Screener" not in plan.email_counts
+        assert "Inbox" not in plan.email_counts
 
     def test_contacts_without_mailroom_note_excluded(self, mock_settings) -> None:
         """Contacts with no Mailroom note section are excluded."""
@@ -138,10 +141,10 @@ class TestPlanReset:
 
         jmap = MagicMock()
         jmap.resolve_mailboxes.return_value = _STANDARD_MAILBOXES
-        jmap.query_emails.return_value = []
+        jmap.count_emails.return_value = {}
 
         carddav = MagicMock()
-        carddav.list_all_contacts.return_value = contacts
+        carddav.iter_contacts.return_value = contacts
         carddav._groups = {}
         carddav.get_group_members.return_value = []
 
@@ -161,10 +164,10 @@ class TestPlanReset:
 
         jmap = MagicMock()
         jmap.resolve_mailboxes.return_value = _STANDARD_MAILBOXES
-        jmap.query_emails.return_value = []
+        jmap.count_emails.return_value = {}
 
         carddav = MagicMock()
-        carddav.list_all_contacts.return_value = contacts
+        carddav.iter_contacts.return_value = contacts
         carddav._groups = {
             "Feed": {"href": "/feed.vcf", "etag": '"etag"', "uid": "uid-feed"},
             "Imbox": {"href": "/imbox.vcf", "etag": '"etag"', "uid": "uid-imbox"},
@@ -190,10 +193,10 @@ class TestPlanReset:
 
         jmap = MagicMock()
         jmap.resolve_mailboxes.return_value = _STANDARD_MAILBOXES
-        jmap.query_emails.return_value = []
+        jmap.count_emails.return_value = {}
 
         carddav = MagicMock()
-        carddav.list_all_contacts.return_value = contacts
+        carddav.iter_contacts.return_value = contacts
         carddav._groups = {
             "Feed": {"href": "/feed.vcf", "etag": '"etag"', "uid": "uid-feed"},
             "Imbox": {"href": "/imbox.vcf", "etag": '"etag"', "uid": "uid-imbox"},
@@ -218,10 +221,10 @@ class TestPlanReset:
 
         jmap = MagicMock()
         jmap.resolve_mailboxes.return_value = _STANDARD_MAILBOXES
-        jmap.query_emails.return_value = []
+        jmap.count_emails.return_value = {}
 
         carddav = MagicMock()
-        carddav.list_all_contacts.return_value = contacts
+        carddav.iter_contacts.return_value = contacts
         carddav._groups = {
             "Feed": {"href": "/feed.vcf", "etag": '"etag"', "uid": "uid-feed"},
             "Imbox": {"href": "/imbox.vcf", "etag": '"etag"', "uid": "uid-imbox"},
@@ -235,138 +238,201 @@ class TestPlanReset:
         assert plan.contacts_to_strip[0].provenance == "adopted"
 
     def test_plan_includes_correct_email_counts(self, mock_settings) -> None:
-        """Plan correctly maps mailbox names to email IDs."""
+        """Plan maps mailbox names to email counts, without fetching IDs."""
         jmap = MagicMock()
         jmap.resolve_mailboxes.return_value = _STANDARD_MAILBOXES
-
-        def _query_emails(mailbox_id, **kwargs):
-            if mailbox_id == "mb-feed":
-                return ["e1", "e2", "e3"]
-            if mailbox_id == "mb-toimbox":
-                return ["e4"]
-            return []
-
-        jmap.query_emails.side_effect = _query_emails
+        jmap.count_emails.side_effect = lambda mailbox_ids: {
+            mb: {"mb-feed": 3, "mb-toimbox": 1}.get(mb, 0) for mb in mailbox_ids
+        }
 
         carddav = MagicMock()
-        carddav.list_all_contacts.return_value = []
+        carddav.iter_contacts.return_value = []
         carddav._groups = {}
         carddav.get_group_members.return_value = []
 
         plan = plan_reset(mock_settings, jmap, carddav)
 
-        assert plan.email_labels.get("Feed") == ["e1", "e2", "e3"]
-        assert plan.email_labels.get("@ToImbox") == ["e4"]
+        assert plan.email_counts == {"Feed": 3, "@ToImbox": 1}
+        # One request counts every managed mailbox
+        jmap.count_emails.assert_called_once()
+        jmap.query_emails.assert_not_called()
 
 
 # --- TestApplyReset ---
 
+_APPLY_MAILBOXES = {
+    "Feed": "mb-feed", "@ToImbox": "mb-toimbox",
+    "@MailroomWarning": "mb-warning", "@MailroomError": "mb-error",
+    "Screener": "mb-screener",
+}
+
+# vCards as they are on the server at apply time (the plan keeps none)
+_PLAN_VCARDS = {
+    "/uid-del.vcf": (
+        "BEGIN:VCARD\nVERSION:3.0\nUID:uid-del\nFN:Delete Corp\nEMAIL:delete@example.com\n"
+        f"NOTE:{MAILROOM_HEADER}\\nTriaged to Feed on 2026-01-15\nEND:VCARD"
+    ),
+    "/uid-warn.vcf": (
+        "BEGIN:VCARD\nVERSION:3.0\nUID:uid-warn\nFN:Warn Corp\nEMAIL:warn@example.com\n"
+        f"TEL:+123\nNOTE:{MAILROOM_HEADER}\\nTriaged to Feed on 2026-01-15\nEND:VCARD"
+    ),
+    "/uid-strip.vcf": (
+        "BEGIN:VCARD\nVERSION:3.0\nUID:uid-strip\nFN:Strip Corp\nEMAIL:strip@example.com\n"
+        f"NOTE:Old note\\n\\n{MAILROOM_HEADER}\\nAdopted by Mailroom\nEND:VCARD"
+    ),
+}
+
+
+class FakeMailboxes:
+    """Paged Email/query + label-moving Email/set over in-memory mailboxes."""
+
+    def __init__(self, jmap: MagicMock, contents: dict[str, list[str]]) -> None:
+        self.contents = {mb: list(ids) for mb, ids in contents.items()}
+        self.updates: list[tuple[list[str], list[str], list[str]]] = []
+        jmap.query_email_page.side_effect = self.page
+        jmap.batch_update_labels.side_effect = self.update
+
+    def page(self, mailbox_id, limit=100, position=0):
+        return self.contents.get(mailbox_id, [])[position : position + limit]
+
+    def update(self, email_ids, add=(), remove=()):
+        self.updates.append((list(email_ids), list(add), list(remove)))
+        for mb_id in remove:
+            self.contents[mb_id] = [e for e in self.contents.get(mb_id, []) if e not in email_ids]
+        for mb_id in add:
+            self.contents.setdefault(mb_id, []).extend(email_ids)
+
+
+def _apply_clients(mailboxes=None, vcards=None):
+    """JMAP/CardDAV mocks for apply_reset: paged mailboxes and multiget vCards."""
+    vcards = _PLAN_VCARDS if vcards is None else vcards
+    jmap = MagicMock()
+    jmap.resolve_mailboxes.return_value = _APPLY_MAILBOXES
+    jmap.query_emails_by_senders.return_value = {}
+    fake = FakeMailboxes(
+        jmap, {"mb-feed": ["e1", "e2"], "mb-toimbox": ["e3"]} if mailboxes is None else mailboxes
+    )
+    carddav = MagicMock()
+    carddav.update_contact_vcard.return_value = '"new-etag"'
+    carddav.get_contacts.side_effect = lambda hrefs: [
+        {"href": h, "etag": f'"fresh-{h}"', "vcard_data": vcards[h]} for h in hrefs if h in vcards
+    ]
+    return jmap, carddav, fake
+
+
+def _put_vcard(carddav: MagicMock, href: str) -> str:
+    """The vCard body PUT for ``href``."""
+    for c in carddav.update_contact_vcard.call_args_list:
+        if c[0][0] == href:
+            return c[0][2].decode("utf-8")
+    raise AssertionError(f"no PUT for {href}")
+
+
+def _make_plan() -> ResetPlan:
+    """Build a provenance-aware reset plan for testing."""
+    return ResetPlan(
+        email_counts={
+            "Feed": 2,
+            "@ToImbox": 1,
+        },
+        group_members={
+            "Feed": ["uid-del", "uid-warn"],
+            "Imbox": ["uid-strip"],
+        },
+        contacts_to_delete=[
+            ContactCleanup(
+                href="/uid-del.vcf",
+                etag='"etag-del"',
+                fn="Delete Corp",
+                uid="uid-del",
+                provenance="created_unmodified",
+                email="delete@example.com",
+            ),
+        ],
+        contacts_to_warn=[
+            ContactCleanup(
+                href="/uid-warn.vcf",
+                etag='"etag-warn"',
+                fn="Warn Corp",
+                uid="uid-warn",
+                provenance="created_modified",
+                email="warn@example.com",
+            ),
+        ],
+        contacts_to_strip=[
+            ContactCleanup(
+                href="/uid-strip.vcf",
+                etag='"etag-strip"',
+                fn="Strip Corp",
+                uid="uid-strip",
+                provenance="adopted",
+                email="strip@example.com",
+            ),
+        ],
+    )
+
+
+def _strip_only_plan(uid: str, fn: str) -> ResetPlan:
+    return ResetPlan(
+        email_counts={}, group_members={},
+        contacts_to_delete=[], contacts_to_warn=[],
+        contacts_to_strip=[
+            ContactCleanup(
+                href=f"/{uid}.vcf", etag=f'"etag-{uid}"', fn=fn, uid=uid,
+                provenance="adopted", email=None,
+            ),
+        ],
+    )
+
 
 class TestApplyReset:
     """Tests for apply_reset() execution with provenance-aware 7-step order."""
 
-    def _make_plan(self) -> ResetPlan:
-        """Build a provenance-aware reset plan for testing."""
-        return ResetPlan(
-            email_labels={
-                "Feed": ["e1", "e2"],
-                "@ToImbox": ["e3"],
-            },
-            group_members={
-                "Feed": ["uid-del", "uid-warn"],
-                "Imbox": ["uid-strip"],
-            },
-            contacts_to_delete=[
-                ContactCleanup(
-                    href="/uid-del.vcf",
-                    etag='"etag-del"',
-                    fn="Delete Corp",
-                    uid="uid-del",
-                    note=f"{MAILROOM_HEADER}\nCreated by Mailroom\nTriaged to Feed on 2026-01-15",
-                    stripped_note="",
-                    provenance="created_unmodified",
-                    email="delete@example.com",
-                    vcard_data=f"BEGIN:VCARD\nVERSION:3.0\nUID:uid-del\nFN:Delete Corp\nEMAIL:delete@example.com\nNOTE:{MAILROOM_HEADER}\\nTriaged to Feed on 2026-01-15\nEND:VCARD",
-                ),
-            ],
-            contacts_to_warn=[
-                ContactCleanup(
-                    href="/uid-warn.vcf",
-                    etag='"etag-warn"',
-                    fn="Warn Corp",
-                    uid="uid-warn",
-                    note=f"{MAILROOM_HEADER}\nCreated by Mailroom\nTriaged to Feed on 2026-01-15",
-                    stripped_note="",
-                    provenance="created_modified",
-                    email="warn@example.com",
-                    vcard_data=f"BEGIN:VCARD\nVERSION:3.0\nUID:uid-warn\nFN:Warn Corp\nEMAIL:warn@example.com\nTEL:+123\nNOTE:{MAILROOM_HEADER}\\nTriaged to Feed on 2026-01-15\nEND:VCARD",
-                ),
-            ],
-            contacts_to_strip=[
-                ContactCleanup(
-                    href="/uid-strip.vcf",
-                    etag='"etag-strip"',
-                    fn="Strip Corp",
-                    uid="uid-strip",
-                    note=f"Old note\n\n{MAILROOM_HEADER}\nAdopted by Mailroom\nRe-triaged to Imbox on 2026-03-01",
-                    stripped_note="Old note",
-                    provenance="adopted",
-                    email="strip@example.com",
-                    vcard_data=f"BEGIN:VCARD\nVERSION:3.0\nUID:uid-strip\nFN:Strip Corp\nEMAIL:strip@example.com\nNOTE:Old note\\n\\n{MAILROOM_HEADER}\\nAdopted by Mailroom\nEND:VCARD",
-                ),
-            ],
-        )
+    def test_step1_moves_emails_to_screener_in_one_patch(self, mock_settings) -> None:
+        """Step 1: each page gets one batch_update_labels adding Screener and removing the label."""
+        jmap, carddav, fake = _apply_clients()
 
-    def test_step1_moves_emails_to_screener_before_removing_label(self, mock_settings) -> None:
-        """Step 1: batch_add_labels with Screener ID before batch_remove_labels for each managed label."""
-        plan = self._make_plan()
-        call_order = []
+        apply_reset(_make_plan(), jmap, carddav, mock_settings)
 
-        jmap = MagicMock()
-        jmap.resolve_mailboxes.return_value = {
-            "Feed": "mb-feed", "@ToImbox": "mb-toimbox",
-            "@MailroomWarning": "mb-warning", "@MailroomError": "mb-error",
-            "Screener": "mb-screener",
-        }
-        jmap.query_emails.return_value = []
-        jmap.query_emails_by_sender.return_value = []
-        jmap.batch_add_labels.side_effect = lambda ids, mbs: call_order.append(("add", ids, mbs))
-        jmap.batch_remove_labels.side_effect = lambda ids, mbs: call_order.append(("remove", ids, mbs))
-        carddav = MagicMock()
-        carddav.update_contact_vcard.return_value = '"new-etag"'
+        # Same patch, so emails never lose their last mailbox (RFC 8621)
+        assert fake.updates[:2] == [
+            (["e1", "e2"], ["mb-screener"], ["mb-feed"]),
+            (["e3"], ["mb-screener"], ["mb-toimbox"]),
+        ]
+        assert fake.contents["mb-feed"] == [] and fake.contents["mb-toimbox"] == []
+        assert fake.contents["mb-screener"] == ["e1", "e2", "e3"]
+        jmap.batch_add_labels.assert_not_called()
+
+    def test_step1_pages_through_large_mailboxes(self, mock_settings) -> None:
+        """Email IDs are fetched a page at a time, never all at once."""
+        emails = [f"e{i}" for i in range(250)]
+        jmap, carddav, fake = _apply_clients(mailboxes={"mb-feed": emails})
+        plan = ResetPlan(
+            email_counts={"Feed": 250}, group_members={},
+            contacts_to_delete=[], contacts_to_warn=[], contacts_to_strip=[],
+        )
 
-        apply_reset(plan, jmap, carddav, mock_settings)
+        result = apply_reset(plan, jmap, carddav, mock_settings)
 
-        # For each managed label in step 1, add-Screener must come before remove-label
-        # Plan has Feed: [e1, e2] and @ToImbox: [e3]
-        # Extract step 1 calls (before step 2 system label cleanup)
-        step1_adds = [c for c in call_order if c[0] == "add" and c[2] == ["mb-screener"]]
-        step1_removes = [c for c in call_order if c[0] == "remove" and c[2] in [["mb-feed"], ["mb-toimbox"]]]
+        assert [len(u[0]) for u in fake.updates if u[2] == ["mb-feed"]] == [100, 100, 50]
+        assert all(c.kwargs["limit"] == 100 for c in jmap.query_email_page.call_args_list)
+        assert result.emails_unlabeled == 250
+        jmap.query_emails.assert_not_called()
 
-        # Must have add-Screener calls for each managed label batch
-        assert len(step1_adds) >= 2, f"Expected at least 2 add-Screener calls, got {step1_adds}"
-        assert len(step1_removes) >= 2, f"Expected at least 2 remove calls, got {step1_removes}"
+    def test_step1_stuck_page_is_an_error_not_a_loop(self, mock_settings) -> None:
+        """If emails do not leave the mailbox, the label is reported instead of looping."""
+        jmap, carddav, fake = _apply_clients()
+        jmap.batch_update_labels.side_effect = None  # the server silently ignores the patch
 
-        # For Feed: add-Screener before remove-Feed
-        feed_add_idx = next(i for i, c in enumerate(call_order) if c[0] == "add" and c[1] == ["e1", "e2"])
-        feed_remove_idx = next(i for i, c in enumerate(call_order) if c[0] == "remove" and c[2] == ["mb-feed"])
-        assert feed_add_idx < feed_remove_idx, "Screener add must precede label removal for Feed"
+        result = apply_reset(_make_plan(), jmap, carddav, mock_settings)
+
+        assert any(e.startswith("Label removal (Feed)") for e in result.errors)
 
     def test_step1_resolves_screener_mailbox(self, mock_settings) -> None:
         """resolve_mailboxes call includes the screener_mailbox name."""
-        plan = self._make_plan()
-        jmap = MagicMock()
-        jmap.resolve_mailboxes.return_value = {
-            "Feed": "mb-feed", "@ToImbox": "mb-toimbox",
-            "@MailroomWarning": "mb-warning", "@MailroomError": "mb-error",
-            "Screener": "mb-screener",
-        }
-        jmap.query_emails.return_value = []
-        jmap.query_emails_by_sender.return_value = []
-        carddav = MagicMock()
-        carddav.update_contact_vcard.return_value = '"new-etag"'
+        jmap, carddav, _ = _apply_clients()
 
-        apply_reset(plan, jmap, carddav, mock_settings)
+        apply_reset(_make_plan(), jmap, carddav, mock_settings)
 
         # Screener must be in the resolve_mailboxes call
         resolve_call = jmap.resolve_mailboxes.call_args[0][0]
@@ -375,79 +441,42 @@ class TestApplyReset:
     def test_step2_removes_warning_and_error_labels(self, mock_settings) -> None:
         """Step 2: Remove @MailroomWarning and @MailroomError from ALL emails."""
         plan = ResetPlan(
-            email_labels={}, group_members={},
+            email_counts={}, group_members={},
             contacts_to_delete=[], contacts_to_warn=[], contacts_to_strip=[],
         )
-        jmap = MagicMock()
-        jmap.resolve_mailboxes.return_value = {
-            "@MailroomWarning": "mb-warning", "@MailroomError": "mb-error",
-            "Screener": "mb-screener",
-        }
         # Warning mailbox has 2 emails, error has 1
-        def _query_emails(mailbox_id, **kwargs):
-            if mailbox_id == "mb-warning":
-                return ["ew1", "ew2"]
-            if mailbox_id == "mb-error":
-                return ["ee1"]
-            return []
-        jmap.query_emails.side_effect = _query_emails
-        carddav = MagicMock()
+        jmap, carddav, fake = _apply_clients(
+            mailboxes={"mb-warning": ["ew1", "ew2"], "mb-error": ["ee1"]}
+        )
 
         apply_reset(plan, jmap, carddav, mock_settings)
 
-        # batch_remove_labels should be called for warning and error cleanup
-        remove_calls = jmap.batch_remove_labels.call_args_list
-        # Find calls that remove warning/error labels
-        warning_calls = [c for c in remove_calls if "mb-warning" in str(c)]
-        error_calls = [c for c in remove_calls if "mb-error" in str(c)]
-        assert len(warning_calls) >= 1
-        assert len(error_calls) >= 1
+        assert (["ew1", "ew2"], [], ["mb-warning"]) in fake.updates
+        assert (["ee1"], [], ["mb-error"]) in fake.updates
+        assert fake.contents == {"mb-warning": [], "mb-error": []}
 
     def test_step3_removes_contacts_from_groups(self, mock_settings) -> None:
-        """Step 3: Remove contacts from category groups."""
-        plan = self._make_plan()
-        jmap = MagicMock()
-        jmap.resolve_mailboxes.return_value = {
-            "Feed": "mb-feed", "@ToImbox": "mb-toimbox",
-            "@MailroomWarning": "mb-warning", "@MailroomError": "mb-error",
-            "Screener": "mb-screener",
-        }
-        jmap.query_emails.return_value = []
-        jmap.query_emails_by_sender.return_value = []
-        carddav = MagicMock()
-        carddav.update_contact_vcard.return_value = '"new-etag"'
+        """Step 3: Empty each category group with a single set_group_members call."""
+        jmap, carddav, _ = _apply_clients()
 
-        apply_reset(plan, jmap, carddav, mock_settings)
+        apply_reset(_make_plan(), jmap, carddav, mock_settings)
 
-        # remove_from_group: Feed(uid-del, uid-warn) + Imbox(uid-strip) = 3 category calls
-        # + 1 provenance group removal (step 5) = 4 total
-        category_removals = [
-            c for c in carddav.remove_from_group.call_args_list
-            if c[0][0] != "Mailroom"
+        # One PUT per category group, not one GET+PUT per member
+        assert sorted(c[0] for c in carddav.set_group_members.call_args_list) == [
+            ("Feed", []), ("Imbox", []),
         ]
-        assert len(category_removals) == 3
+        carddav.remove_from_group.assert_not_called()
 
     def test_step4_applies_warning_to_modified_contacts(self, mock_settings) -> None:
         """Step 4: Apply @MailroomWarning to user-modified provenance contacts' emails."""
-        plan = self._make_plan()
-        jmap = MagicMock()
-        jmap.resolve_mailboxes.return_value = {
-            "Feed": "mb-feed", "@ToImbox": "mb-toimbox",
-            "@MailroomWarning": "mb-warning", "@MailroomError": "mb-error",
-            "Screener": "mb-screener",
-        }
-        jmap.query_emails.return_value = []
+        jmap, carddav, _ = _apply_clients()
         # Sender has 3 emails
-        jmap.query_emails_by_sender.return_value = ["we1", "we2", "we3"]
-        carddav = MagicMock()
-        carddav.update_contact_vcard.return_value = '"new-etag"'
+        jmap.query_emails_by_senders.return_value = {"warn@example.com": ["we1", "we2", "we3"]}
 
-        apply_reset(plan, jmap, carddav, mock_settings)
+        apply_reset(_make_plan(), jmap, carddav, mock_settings)
 
-        # query_emails_by_sender called for warn contact's email
-        jmap.query_emails_by_sender.assert_called_with("warn@example.com")
-        # batch_add_labels called with warning mailbox (step 4)
-        # Note: batch_add_labels is also called in step 1 (Screener), so check specific call
+        # One batched query covering the warn contact's email
+        jmap.query_emails_by_senders.assert_called_once_with(["warn@example.com"])
         warning_calls = [
             c for c in jmap.batch_add_labels.call_args_list
             if c[0][1] == ["mb-warning"]
@@ -457,99 +486,83 @@ class TestApplyReset:
 
     def test_step5_removes_warned_from_provenance_group(self, mock_settings) -> None:
         """Step 5: Remove warned contacts from provenance group."""
-        plan = self._make_plan()
-        jmap = MagicMock()
-        jmap.resolve_mailboxes.return_value = {
-            "Feed": "mb-feed", "@ToImbox": "mb-toimbox",
-            "@MailroomWarning": "mb-warning", "@MailroomError": "mb-error",
-            "Screener": "mb-screener",
-        }
-        jmap.query_emails.return_value = []
-        jmap.query_emails_by_sender.return_value = []
-        carddav = MagicMock()
-        carddav.update_contact_vcard.return_value = '"new-etag"'
+        jmap, carddav, _ = _apply_clients()
 
-        apply_reset(plan, jmap, carddav, mock_settings)
+        apply_reset(_make_plan(), jmap, carddav, mock_settings)
 
-        # remove_from_group should include provenance group removal for warned contact
+        # remove_members should include provenance group removal for warned contact
         provenance_removals = [
-            c for c in carddav.remove_from_group.call_args_list
+            c for c in carddav.remove_members.call_args_list
             if c[0][0] == "Mailroom"  # group_name = provenance group
         ]
         assert len(provenance_removals) == 1
-        assert provenance_removals[0][0][1] == "uid-warn"
+        assert provenance_removals[0][0][1] == ["uid-warn"]
 
     def test_step6_skips_contacts_to_delete(self, mock_settings) -> None:
         """Step 6: Strip notes from warn + strip contacts only, skip delete targets."""
-        plan = self._make_plan()
-        jmap = MagicMock()
-        jmap.resolve_mailboxes.return_value = {
-            "Feed": "mb-feed", "@ToImbox": "mb-toimbox",
-            "@MailroomWarning": "mb-warning", "@MailroomError": "mb-error",
-            "Screener": "mb-screener",
-        }
-        jmap.query_emails.return_value = []
-        jmap.query_emails_by_sender.return_value = []
-        carddav = MagicMock()
-        carddav.update_contact_vcard.return_value = '"new-etag"'
+        jmap, carddav, _ = _apply_clients()
 
-        apply_reset(plan, jmap, carddav, mock_settings)
+        apply_reset(_make_plan(), jmap, carddav, mock_settings)
 
-        # update_contact_vcard called for warn + strip only (NOT delete targets)
+        # vCards are re-fetched in one multiget, only for the contacts being edited
+        carddav.get_contacts.assert_called_once_with(["/uid-warn.vcf", "/uid-strip.vcf"])
         assert carddav.update_contact_vcard.call_count == 2
-        # Verify the hrefs are for warn and strip contacts only
-        updated_hrefs = [c[0][0] for c in carddav.update_contact_vcard.call_args_list]
-        assert "/uid-del.vcf" not in updated_hrefs
-        assert "/uid-warn.vcf" in updated_hrefs
-        assert "/uid-strip.vcf" in updated_hrefs
+        updated = {c[0][0]: c[0][1] for c in carddav.update_contact_vcard.call_args_list}
+        assert "/uid-del.vcf" not in updated
+        # The PUT is conditional on the fresh ETag, not the one from planning
+        assert updated["/uid-warn.vcf"] == '"fresh-/uid-warn.vcf"'
+        assert updated["/uid-strip.vcf"] == '"fresh-/uid-strip.vcf"'
+
+    def test_step6_skips_deleted_or_already_clean_contacts(self, mock_settings) -> None:
+        """Contacts gone or hand-cleaned since planning need no PUT and are not errors."""
+        plan = _make_plan()
+        vcards = {
+            "/uid-warn.vcf": (
+                "BEGIN:VCARD\nVERSION:3.0\nUID:uid-warn\nFN:Warn Corp\nNOTE:mine now\nEND:VCARD"
+            ),
+        }  # /uid-strip.vcf was deleted by the user
+        jmap, carddav, _ = _apply_clients(vcards=vcards)
+
+        result = apply_reset(plan, jmap, carddav, mock_settings)
+
+        carddav.update_contact_vcard.assert_not_called()
+        assert result.errors == []
 
     def test_step7_deletes_unmodified_provenance_contacts(self, mock_settings) -> None:
         """Step 7: DELETE unmodified provenance contacts."""
-        plan = self._make_plan()
-        jmap = MagicMock()
-        jmap.resolve_mailboxes.return_value = {
-            "Feed": "mb-feed", "@ToImbox": "mb-toimbox",
-            "@MailroomWarning": "mb-warning", "@MailroomError": "mb-error",
-            "Screener": "mb-screener",
-        }
-        jmap.query_emails.return_value = []
-        jmap.query_emails_by_sender.return_value = []
-        carddav = MagicMock()
-        carddav.update_contact_vcard.return_value = '"new-etag"'
+        jmap, carddav, _ = _apply_clients()
 
-        apply_reset(plan, jmap, carddav, mock_settings)
+        apply_reset(_make_plan(), jmap, carddav, mock_settings)
 
         # delete_contact called for uid-del
         carddav.delete_contact.assert_called_once_with("/uid-del.vcf", '"etag-del"')
 
     def test_7step_operation_order(self, mock_settings) -> None:
         """Operations execute in exact 7-step order from CONTEXT.md."""
-        plan = self._make_plan()
         call_order = []
-
-        jmap = MagicMock()
-        jmap.resolve_mailboxes.return_value = {
-            "Feed": "mb-feed", "@ToImbox": "mb-toimbox",
-            "@MailroomWarning": "mb-warning", "@MailroomError": "mb-error",
-            "Screener": "mb-screener",
-        }
-        jmap.query_emails.return_value = []
-        jmap.batch_remove_labels.side_effect = lambda *a, **kw: call_order.append("step1_or_2_remove_labels")
-        jmap.query_emails_by_sender.return_value = ["we1"]
-        jmap.batch_add_labels.side_effect = lambda *a, **kw: call_order.append(
-            "step1_add_screener" if a[1] == ["mb-screener"] else "step4_add_warning"
+        jmap, carddav, fake = _apply_clients(
+            mailboxes={"mb-feed": ["e1", "e2"], "mb-toimbox": ["e3"], "mb-warning": ["w1"]}
         )
 
-        carddav = MagicMock()
-        carddav.remove_from_group.side_effect = lambda *a, **kw: call_order.append(
-            "step5_provenance_remove" if a[0] == "Mailroom" else "step3_group_remove"
-        )
-        carddav.update_contact_vcard.side_effect = lambda *a, **kw: call_order.append("step6_strip_notes")
-        carddav.delete_contact.side_effect = lambda *a, **kw: call_order.append("step7_delete")
+        def update(ids, add=(), remove=()):
+            call_order.append("step1_move_to_screener" if add else "step2_clear_labels")
+            fake.update(ids, add, remove)
 
-        apply_reset(plan, jmap, carddav, mock_settings)
+        def record(step):
+            return lambda *a, **kw: call_order.append(step)
 
-        # Verify ordering: step1/2 < step3 < step4 < step5 < step6 < step7
+        jmap.batch_update_labels.side_effect = update
+        jmap.query_emails_by_senders.return_value = {"warn@example.com": ["we1"]}
+        jmap.batch_add_labels.side_effect = record("step4_add_warning")
+
+        carddav.set_group_members.side_effect = record("step3_group_remove")
+        carddav.remove_members.side_effect = record("step5_provenance_remove")
+        carddav.update_contact_vcard.side_effect = record("step6_strip_notes")
+        carddav.delete_contact.side_effect = record("step7_delete")
+
+        apply_reset(_make_plan(), jmap, carddav, mock_settings)
+
+        # Verify ordering: step1 < step2 < step3 < step4 < step5 < step6 < step7
         def first_index(prefix):
             for i, x in enumerate(call_order):
                 if x.startswith(prefix):
@@ -562,8 +575,8 @@ class TestApplyReset:
                     return i
             return -1
 
-        # Step 1 includes both add-screener and remove-labels
-        assert last_index("step1_") < first_index("step3")
+        assert last_index("step1_") < first_index("step2")
+        assert last_index("step2") < first_index("step3")
         assert last_index("step3") < first_index("step4")
         assert last_index("step4") < first_index("step5")
         assert last_index("step5") < first_index("step6")
@@ -571,19 +584,10 @@ class TestApplyReset:
 
     def test_result_counts(self, mock_settings) -> None:
         """ResetResult has correct counts for all categories."""
-        plan = self._make_plan()
-        jmap = MagicMock()
-        jmap.resolve_mailboxes.return_value = {
-            "Feed": "mb-feed", "@ToImbox": "mb-toimbox",
-            "@MailroomWarning": "mb-warning", "@MailroomError": "mb-error",
-            "Screener": "mb-screener",
-        }
-        jmap.query_emails.return_value = []
-        jmap.query_emails_by_sender.return_value = ["we1"]
-        carddav = MagicMock()
-        carddav.update_contact_vcard.return_value = '"new-etag"'
+        jmap, carddav, _ = _apply_clients()
+        jmap.query_emails_by_senders.return_value = {"warn@example.com": ["we1"]}
 
-        result = apply_reset(plan, jmap, carddav, mock_settings)
+        result = apply_reset(_make_plan(), jmap, carddav, mock_settings)
 
         assert result.emails_unlabeled == 3  # e1, e2, e3
         assert result.groups_emptied == 2  # Feed, Imbox
@@ -594,73 +598,32 @@ class TestApplyReset:
 
     def test_note_stripping_mailroom_only(self, mock_settings) -> None:
         """Note that is ONLY mailroom section gets cleared to empty."""
-        plan = ResetPlan(
-            email_labels={}, group_members={},
-            contacts_to_delete=[], contacts_to_warn=[],
-            contacts_to_strip=[
-                ContactCleanup(
-                    href="/uid-1.vcf",
-                    etag='"etag-1"',
-                    fn="Acme Corp",
-                    uid="uid-1",
-                    note=f"{MAILROOM_HEADER}\nTriaged to Feed on 2026-01-15",
-                    stripped_note="",
-                    provenance="adopted",
-                    email="acme@example.com",
-                    vcard_data=f"BEGIN:VCARD\nVERSION:3.0\nUID:uid-1\nFN:Acme Corp\nNOTE:{MAILROOM_HEADER}\\nTriaged to Feed on 2026-01-15\nEND:VCARD",
-                ),
-            ],
-        )
-        jmap = MagicMock()
-        jmap.resolve_mailboxes.return_value = {
-            "@MailroomWarning": "mb-warning", "@MailroomError": "mb-error",
-            "Screener": "mb-screener",
-        }
-        jmap.query_emails.return_value = []
-        carddav = MagicMock()
-        carddav.update_contact_vcard.return_value = '"new-etag"'
+        plan = _strip_only_plan("uid-1", "Acme Corp")
+        jmap, carddav, _ = _apply_clients(mailboxes={}, vcards={
+            "/uid-1.vcf": (
+                "BEGIN:VCARD\nVERSION:3.0\nUID:uid-1\nFN:Acme Corp\n"
+                f"NOTE:{MAILROOM_HEADER}\\nTriaged to Feed on 2026-01-15\nEND:VCARD"
+            ),
+        })
 
-        result = apply_reset(plan, jmap, carddav, mock_settings)
+        apply_reset(plan, jmap, carddav, mock_settings)
 
         assert carddav.update_contact_vcard.call_count == 1
-        call_args = carddav.update_contact_vcard.call_args
-        vcard_bytes = call_args[0][2] if len(call_args[0]) > 2 else call_args[1].get("vcard_bytes", b"")
-        vcard_str = vcard_bytes.decode("utf-8") if isinstance(vcard_bytes, bytes) else str(vcard_bytes)
-        assert MAILROOM_HEADER not in vcard_str
+        assert MAILROOM_HEADER not in _put_vcard(carddav, "/uid-1.vcf")
 
     def test_note_stripping_preserves_preexisting(self, mock_settings) -> None:
         """Note with pre-existing content preserves the pre-existing text."""
-        plan = ResetPlan(
-            email_labels={}, group_members={},
-            contacts_to_delete=[], contacts_to_warn=[],
-            contacts_to_strip=[
-                ContactCleanup(
-                    href="/uid-2.vcf",
-                    etag='"etag-2"',
-                    fn="Old Corp",
-                    uid="uid-2",
-                    note=f"Pre-existing note\n\n{MAILROOM_HEADER}\nRe-triaged to Imbox on 2026-03-01",
-                    stripped_note="Pre-existing note",
-                    provenance="adopted",
-                    email="old@example.com",
-                    vcard_data=f"BEGIN:VCARD\nVERSION:3.0\nUID:uid-2\nFN:Old Corp\nNOTE:Pre-existing note\\n\\n{MAILROOM_HEADER}\\nRe-triaged to Imbox on 2026-03-01\nEND:VCARD",
-                ),
-            ],
-        )
-        jmap = MagicMock()
-        jmap.resolve_mailboxes.return_value = {
-            "@MailroomWarning": "mb-warning", "@MailroomError": "mb-error",
-            "Screener": "mb-screener",
-        }
-        jmap.query_emails.return_value = []
-        carddav = MagicMock()
-        carddav.update_contact_vcard.return_value = '"new-etag"'
+        plan = _strip_only_plan("uid-2", "Old Corp")
+        jmap, carddav, _ = _apply_clients(mailboxes={}, vcards={
+            "/uid-2.vcf": (
+                "BEGIN:VCARD\nVERSION:3.0\nUID:uid-2\nFN:Old Corp\nNOTE:Pre-existing note\\n\\n"
+                f"{MAILROOM_HEADER}\\nRe-triaged to Imbox on 2026-03-01\nEND:VCARD"
+            ),
+        })
 
-        result = apply_reset(plan, jmap, carddav, mock_settings)
+        apply_reset(plan, jmap, carddav, mock_settings)
 
-        call_args = carddav.update_contact_vcard.call_args
-        vcard_bytes = call_args[0][2] if len(call_args[0]) > 2 else call_args[1].get("vcard_bytes", b"")
-        vcard_str = vcard_bytes.decode("utf-8") if isinstance(vcard_bytes, bytes) else str(vcard_bytes)
+        vcard_str = _put_vcard(carddav, "/uid-2.vcf")
         assert "Pre-existing note" in vcard_str
         assert MAILROOM_HEADER not in vcard_str
 
@@ -674,10 +637,10 @@ class TestApplyReset:
 
         jmap = MagicMock()
         jmap.resolve_mailboxes.return_value = _STANDARD_MAILBOXES
-        jmap.query_emails.return_value = []
+        jmap.count_emails.return_value = {}
 
         carddav = MagicMock()
-        carddav.list_all_contacts.return_value = contacts
+        carddav.iter_contacts.return_value = contacts
         carddav._groups = {
             "Feed": {"href": "/feed.vcf", "etag": '"etag"', "uid": "uid-feed"},
         }
@@ -689,6 +652,184 @@ class TestApplyReset:
         assert len(all_contacts) == 0
 
 
+# --- TestResetCheckpoint ---
+
+
+class TestResetCheckpoint:
+    """Tests for resuming an interrupted reset from its checkpoint."""
+
+    def test_resume_retries_only_unfinished_work(self, mock_settings, tmp_path) -> None:
+        """A rerun skips completed steps, so step 2 never strips step 4's warnings."""
+        from mailroom.reset.checkpoint import ResetCheckpoint
+
+        plan = _make_plan()
+        path = tmp_path / "reset-checkpoint.jsonl"
+        jmap, carddav, _ = _apply_clients()
+        jmap.query_emails_by_senders.return_value = {"warn@example.com": ["we1"]}
+        carddav.update_contact_vcard.side_effect = lambda href, etag, data: (
+            _raise(RuntimeError("server error")) if href == "/uid-strip.vcf" else '"new-etag"'
+        )
+
+        first = apply_reset(plan, jmap, carddav, mock_settings,
+                            checkpoint=ResetCheckpoint.create(plan, path))
+
+        assert first.errors == ["Note cleanup (Strip Corp): server error"]
+
+        checkpoint = ResetCheckpoint.load(path)
+        assert checkpoint.completed_steps == {1, 2, 3, 4, 5, 7}
+        # The warning label now holds the warned sender's email again
+        jmap, carddav, _ = _apply_clients(mailboxes={"mb-warning": ["we1"]})
+
+        second = apply_reset(checkpoint.plan, jmap, carddav, mock_settings, checkpoint=checkpoint)
+
+        assert second.errors == []
+        jmap.batch_update_labels.assert_not_called()
+        jmap.batch_add_labels.assert_not_called()
+        carddav.set_group_members.assert_not_called()
+        carddav.remove_members.assert_not_called()
+        carddav.delete_contact.assert_not_called()
+        carddav.get_contacts.assert_called_once_with(["/uid-strip.vcf"])
+        carddav.update_contact_vcard.assert_called_once()
+        assert carddav.update_contact_vcard.call_args[0][0] == "/uid-strip.vcf"
+        # Counts still describe the whole reset
+        assert second.emails_unlabeled == 3
+        assert (second.contacts_warned, second.contacts_deleted) == (1, 1)
+
+    def test_resume_after_step4_still_drains_error_label(self, mock_settings, tmp_path) -> None:
+        """Step 2 retries a failed error-label drain but keeps step 4's warnings."""
+        from mailroom.reset.checkpoint import ResetCheckpoint
+
+        plan = _make_plan()
+        checkpoint = ResetCheckpoint.create(plan, tmp_path / "reset-checkpoint.jsonl")
+        checkpoint.mark_step(1)
+        checkpoint.mark_item(2, mock_settings.mailroom.label_warning)
+        # The error-label drain failed, then step 4 warned one contact before the interruption
+        checkpoint.mark_item(4, plan.contacts_to_warn[0].uid)
+        jmap, carddav, fake = _apply_clients(
+            mailboxes={"mb-warning": ["we1"], "mb-error": ["ee1"]}
+        )
+
+        result = apply_reset(plan, jmap, carddav, mock_settings, checkpoint=checkpoint)
+
+        assert result.errors == []
+        assert fake.contents["mb-error"] == []
+        assert fake.contents["mb-warning"] == ["we1"]
+
+    def test_checkpoint_round_trip_ignores_torn_line(self, tmp_path) -> None:
+        """Plan and progress survive a reload; a half-written last line is dropped."""
+        from mailroom.reset.checkpoint import ResetCheckpoint
+
+        plan = _make_plan()
+        path = tmp_path / "reset-checkpoint.jsonl"
+        checkpoint = ResetCheckpoint.create(plan, path)
+        checkpoint.mark_item(6, "/uid-warn.vcf")
+        checkpoint.mark_step(1)
+        with path.open("a") as f:
+            f.write('{"step": 7, "it')
+
+        loaded = ResetCheckpoint.load(path)
+
+        assert loaded.plan == plan
+        assert loaded.completed_steps == {1}
+        assert loaded.item_done(6, "/uid-warn.vcf")
+        assert not loaded.started(7)
+        loaded.discard()
+        assert ResetCheckpoint.load(path) is None
+
+
+def _raise(exc: Exception):
+    raise exc
+
+
+class TestResetAgainstFakeFastmail:
+    """plan_reset + apply_reset end to end over the in-process fake."""
+
+    def test_large_mailbox_and_contacts_are_fully_reset(self, mock_settings) -> None:
+        from mailroom.clients.carddav import CardDAVClient
+        from mailroom.clients.jmap import JMAPClient
+        from mailroom.testing.fake_fastmail import UNTHROTTLED_HTTP, FakeFastmail
+
+        fake = FakeFastmail.for_settings(mock_settings)
+        for i in range(230):
+            fake.add_email(f"news{i % 3}@example.com", ["Feed"])
+        jmap = JMAPClient(token=fake.token, transport=fake, http=UNTHROTTLED_HTTP)
+        jmap.connect()
+        carddav = CardDAVClient(
+            username=fake.username, password="pw", transport=fake, http=UNTHROTTLED_HTTP
+        )
+        carddav.connect()
+        carddav.validate_groups(
+            mock_settings.contact_groups + [mock_settings.mailroom.provenance_group],
+            infrastructure_groups=[mock_settings.mailroom.provenance_group],
+        )
+        for i in range(3):
+            carddav.upsert_contact(
+                f"news{i}@example.com", f"News {i}", "Feed",
+                provenance_group=mock_settings.mailroom.provenance_group,
+            )
+        fake.add_filler_contacts(5)
+
+        plan = plan_reset(mock_settings, jmap, carddav)
+        assert plan.email_counts == {"Feed": 230}
+        assert len(plan.contacts_to_delete) == 3
+
+        result = apply_reset(plan, jmap, carddav, mock_settings)
+
+        assert result.errors == []
+        assert result.emails_unlabeled == 230
+        assert jmap.query_emails(fake.mailbox_id("Feed")) == []
+        assert len(jmap.query_emails(fake.mailbox_id("Screener"), limit=500)) == 230
+        assert carddav.get_group_members("Feed") == []
+        remaining = carddav.list_all_contacts()
+        assert len(remaining) == 5
+        assert not any(MAILROOM_HEADER in c["note"] for c in remaining)
+
+
+    def test_default_budget_keeps_parallel_deletes_fast(self, mock_settings) -> None:
+        """Under default http settings, 60 deletes at 50 ms RTT are not held to 10/s."""
+        import time
+
+        from mailroom.clients.carddav import CardDAVClient
+        from mailroom.clients.jmap import JMAPClient
+        from mailroom.testing.fake_fastmail import UNTHROTTLED_HTTP, FakeFastmail
+
+        fake = FakeFastmail.for_settings(mock_settings)
+        groups = mock_settings.contact_groups + [mock_settings.mailroom.provenance_group]
+        provenance = mock_settings.mailroom.provenance_group
+
+        def connect_carddav(http):
+            client = CardDAVClient(username=fake.username, password="pw", transport=fake, http=http)
+            client.connect()
+            client.validate_groups(groups, infrastructure_groups=[provenance])
+            return client
+
+        seeder = connect_carddav(UNTHROTTLED_HTTP)
+        for i in range(60):
+            seeder.upsert_contact(
+                f"news{i}@example.com", f"News {i}", "Feed", provenance_group=provenance
+            )
+
+        http = reset_http_settings(HttpSettings())
+        jmap = JMAPClient(token=fake.token, transport=fake, http=http)
+        jmap.connect()
+        carddav = connect_carddav(http)
+        plan = plan_reset(mock_settings, jmap, carddav)
+        assert len(plan.contacts_to_delete) == 60
+        fake.latency = 0.05
+        fake.reset_requests()
+
+        started = time.monotonic()
+        result = apply_reset(plan, jmap, carddav, mock_settings)
+        elapsed = time.monotonic() - started
+
+        assert result.errors == []
+        assert result.contacts_deleted == 60
+        # At the service's 10 requests/s the CardDAV requests past the burst
+        # alone would take 4+ s; sequentially, 60 deletes take 3 s.
+        assert fake.count("carddav") > 60
+        assert elapsed < 2.5
+
+
 # --- TestResetReporting ---
 
 
@@ -698,9 +839,9 @@ class TestResetReporting:
     def test_dry_run_report_shows_sections(self, capsys) -> None:
         """Dry-run report shows DELETE, WARN, and strip sections."""
         plan = ResetPlan(
-            email_labels={
-                "Feed": ["e1", "e2"],
-                "@ToImbox": ["e3"],
+            email_counts={
+                "Feed": 2,
+                "@ToImbox": 1,
             },
             group_members={
                 "Feed": ["uid-1", "uid-2"],
@@ -708,25 +849,22 @@ class TestResetReporting:
             contacts_to_delete=[
                 ContactCleanup(
                     href="/uid-del.vcf", etag='"etag"', fn="Delete Corp",
-                    uid="uid-del", note="note", stripped_note="",
+                    uid="uid-del",
                     provenance="created_unmodified", email="del@example.com",
-                    vcard_data="",
                 ),
             ],
             contacts_to_warn=[
                 ContactCleanup(
                     href="/uid-warn.vcf", etag='"etag"', fn="Warn Corp",
-                    uid="uid-warn", note="note", stripped_note="",
+                    uid="uid-warn",
                     provenance="created_modified", email="warn@example.com",
-                    vcard_data="",
                 ),
             ],
             contacts_to_strip=[
                 ContactCleanup(
                     href="/uid-strip.vcf", etag='"etag"', fn="Strip Corp",
-                    uid="uid-strip", note="note", stripped_note="pre",
+                    uid="uid-strip",
                     provenance="adopted", email="strip@example.com",
-                    vcard_data="",
                 ),
             ],
         )
@@ -914,7 +1052,7 @@ class TestRunResetConfirmation:
 
         call_order = []
         fake_plan = ResetPlan(
-            email_labels={}, group_members={},
+            email_counts={}, group_members={},
             contacts_to_delete=[], contacts_to_warn=[], contacts_to_strip=[],
         )
         fake_result = ResetResult()
@@ -922,18 +1060,20 @@ class TestRunResetConfirmation:
         # Mock settings
         settings_inst = MagicMock()
         settings_inst.logging.level = "info"
+        settings_inst.state.reset_checkpoint = False
+        settings_inst.http = HttpSettings()
         monkeypatch.setattr(resetter_mod, "MailroomSettings", lambda: settings_inst)
 
         # Mock JMAP client
         jmap_inst = MagicMock()
         jmap_inst.connect.return_value = None
-        monkeypatch.setattr(resetter_mod, "JMAPClient", lambda token: jmap_inst)
+        monkeypatch.setattr(resetter_mod, "JMAPClient", lambda token, **kw: jmap_inst)
 
         # Mock CardDAV client
         carddav_inst = MagicMock()
         carddav_inst.connect.return_value = None
         monkeypatch.setattr(resetter_mod, "CardDAVClient",
-                            lambda username, password: carddav_inst)
+                            lambda username, password, **kw: carddav_inst)
 
         # Mock plan_reset
         monkeypatch.setattr(resetter_mod, "plan_reset", lambda *a, **kw: fake_plan)
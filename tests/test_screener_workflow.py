@@ -5,22 +5,20 @@ from unittest.mock import MagicMock, call
 import pytest
 import vobject
 
+from mailroom.core import metrics
+from mailroom.core.deadline import DeadlineExceeded
+from mailroom.workflows.routing import RoutingTable
 from mailroom.workflows.screener import ScreenerWorkflow
 
 
 def _default_call_side_effect(method_calls):
-    """Default jmap.call() handler: batched Email/query returns empty, Email/get returns empty."""
+    """Default jmap.call() handler: batched Email/query returns empty, Email/set succeeds."""
     first_method = method_calls[0][0]
     if first_method == "Email/query":
         return [
             ["Email/query", {"ids": [], "total": 0}, mc[2]]
             for mc in method_calls
         ]
-    if first_method == "Email/get":
-        ids = method_calls[0][1].get("ids", [])
-        return [["Email/get", {"list": [
-            {"id": eid, "mailboxIds": {}} for eid in ids
-        ]}, "g0"]]
     if first_method == "Email/set":
         return [["Email/set", {"updated": {}}, method_calls[0][2]]]
     return []
@@ -35,8 +33,9 @@ def jmap(mock_mailbox_ids):
     # Default: no emails in any triage label (used by _process_sender sweep)
     client.query_emails.return_value = []
     client.get_email_senders.return_value = {}
+    client.get_email_mailbox_ids.return_value = {}
 
-    # Default: handles batched Email/query (empty), Email/get, Email/set
+    # Default: handles batched Email/query (empty) and Email/set
     client.call.side_effect = _default_call_side_effect
 
     return client
@@ -105,7 +104,6 @@ class TestPollSingleSenderSingleLabel:
         """No error label applied for non-conflicted sender."""
         workflow.poll()
         # The Email/set call for error labeling should NOT happen
-        # Only call should be the Email/get for error filtering
         email_set_calls = [
             c
             for c in jmap.call.call_args_list
@@ -224,6 +222,10 @@ class TestAlreadyErroredEmailFiltered:
     @pytest.fixture(autouse=True)
     def setup_errored(self, jmap, mock_mailbox_ids):
         jmap.get_email_senders.return_value = {"email-1": ("alice@example.com", "Alice")}
+        # email-1 already has the error label
+        jmap.get_email_mailbox_ids.return_value = {
+            "email-1": frozenset({"mb-toimbox", "mb-error"}),
+        }
 
         def call_side_effect(method_calls):
             first_method = method_calls[0][0]
@@ -237,11 +239,6 @@ class TestAlreadyErroredEmailFiltered:
                     else:
                         responses.append(["Email/query", {"ids": [], "total": 0}, call_id])
                 return responses
-            if first_method == "Email/get":
-                # email-1 already has the error label
-                return [["Email/get", {"list": [
-                    {"id": "email-1", "mailboxIds": {"mb-toimbox": True, "mb-error": True}},
-                ]}, "g0"]]
             return [["Email/set", {"updated": {}}, method_calls[0][2]]]
 
         jmap.call.side_effect = call_side_effect
@@ -303,11 +300,6 @@ class TestApplyErrorLabelTransientFailure:
                     else:
                         responses.append(["Email/query", {"ids": [], "total": 0}, call_id])
                 return responses
-            if first_method == "Email/get":
-                ids = method_calls[0][1].get("ids", [])
-                return [["Email/get", {"list": [
-                    {"id": eid, "mailboxIds": {"mb-toimbox": True}} for eid in ids
-                ]}, "g0"]]
             # Email/set for error labeling -> transient failure
             raise ConnectionError("Network timeout")
 
@@ -340,6 +332,191 @@ class TestProcessSenderException:
         jmap.remove_label.assert_not_called()
 
 
+class TestPollBudget:
+    """Senders are processed in priority order until the poll budget runs out."""
+
+    @pytest.fixture(autouse=True)
+    def setup_three_senders(self, jmap, mock_mailbox_ids, workflow):
+        jmap.get_email_senders.return_value = {
+            "email-1": ("bulk@example.com", "Bulk"),
+            "email-2": ("bulk@example.com", "Bulk"),
+            "email-3": ("bulk@example.com", "Bulk"),
+            "email-4": ("alice@example.com", "Alice"),
+            "email-5": ("carol@example.com", "Carol"),
+        }
+        jmap.call.side_effect = _make_batched_call_side_effect(
+            {"mb-tofeed": ["email-1", "email-2", "email-3", "email-4", "email-5"]},
+            mock_mailbox_ids,
+        )
+        workflow._process_sender = MagicMock()
+
+    def test_unlimited_budget_processes_everyone(self, workflow):
+        assert workflow.poll() == 3
+        assert workflow.backlog == 0
+
+    def test_smallest_senders_processed_first(self, workflow):
+        workflow.poll()
+        order = [c.args[0] for c in workflow._process_sender.call_args_list]
+        assert order[-1] == "bulk@example.com"
+
+    def test_sender_budget_defers_rest(self, workflow, mock_settings):
+        mock_settings.polling.budget_senders = 1
+        assert workflow.poll() == 1
+        assert workflow.backlog == 2
+        assert workflow._process_sender.call_args_list[0].args[0] != "bulk@example.com"
+
+    def test_time_budget_always_processes_one(self, workflow, mock_settings):
+        mock_settings.polling.budget_seconds = 0
+        assert workflow.poll() == 1
+        assert workflow.backlog == 2
+
+    def test_deferred_senders_picked_up_next_poll(
+        self, workflow, jmap, mock_settings, mock_mailbox_ids
+    ):
+        mock_settings.polling.budget_senders = 2
+        workflow.poll()
+        # Processed senders had their triage labels removed
+        jmap.call.side_effect = _make_batched_call_side_effect(
+            {"mb-tofeed": ["email-1", "email-2", "email-3"]}, mock_mailbox_ids
+        )
+        workflow.poll()
+        processed = [c.args[0] for c in workflow._process_sender.call_args_list]
+        assert processed[2] == "bulk@example.com"
+        assert workflow.backlog == 0
+
+    def test_failed_sender_not_counted_as_backlog(self, workflow):
+        workflow._process_sender.side_effect = RuntimeError("boom")
+        assert workflow.poll() == 0
+        assert workflow.backlog == 0
+
+    def test_failed_poll_clears_backlog(self, workflow, jmap, mock_settings):
+        mock_settings.polling.budget_senders = 1
+        workflow.poll()
+        assert workflow.backlog == 2
+        jmap.call.side_effect = RuntimeError("JMAP outage")
+        with pytest.raises(RuntimeError):
+            workflow.poll()
+        assert workflow.backlog == 0  # the retry waits for the interval
+
+
+class TestSenderDeadline:
+    """A sender that overruns its deadline is abandoned, counted, and retried."""
+
+    @pytest.fixture(autouse=True)
+    def setup_two_senders(self, jmap, mock_mailbox_ids, workflow):
+        jmap.get_email_senders.return_value = {
+            "email-1": ("slow@example.com", "Slow"),
+            "email-2": ("fast@example.com", "Fast"),
+        }
+        jmap.call.side_effect = _make_batched_call_side_effect(
+            {"mb-tofeed": ["email-1", "email-2"]}, mock_mailbox_ids
+        )
+
+        def process(sender, emails, sender_names):
+            if sender == "slow@example.com":
+                raise DeadlineExceeded("sender deadline of 60s exceeded")
+
+        workflow._process_sender = MagicMock(side_effect=process)
+        metrics.reset()
+        yield
+        metrics.reset()
+
+    def test_other_senders_still_processed(self, workflow):
+        assert workflow.poll() == 1
+
+    def test_counted_in_metrics(self, workflow):
+        workflow.poll()
+        assert metrics.snapshot()["sender_deadline_exceeded"] == 1
+
+    def test_triage_labels_left_in_place(self, workflow, jmap):
+        workflow.poll()
+        jmap.remove_label.assert_not_called()
+
+    def test_abandoned_sender_retried_next_poll(self, workflow):
+        workflow.poll()
+        workflow.poll()
+        calls = [c.args[0] for c in workflow._process_sender.call_args_list]
+        assert calls.count("slow@example.com") == 2
+
+    def test_expired_poll_deadline_defers_remaining(self, workflow, mock_settings):
+        mock_settings.polling.poll_timeout_seconds = 0
+        assert workflow.poll() == 0
+        assert workflow.backlog == 2
+        workflow._process_sender.assert_not_called()
+
+    def test_poll_deadline_during_scan_counted(self, workflow, jmap, mock_settings):
+        jmap.call.side_effect = DeadlineExceeded("poll deadline of 90s exceeded")
+        with pytest.raises(DeadlineExceeded):
+            workflow.poll()
+        assert metrics.snapshot()["poll_deadline_exceeded"] == 1
+        assert workflow.backlog == 0
+
+
+class TestShutdownDrain:
+    """request_stop() ends a poll at a sender boundary and saves what is left."""
+
+    @pytest.fixture(autouse=True)
+    def setup_three_senders(self, jmap, mock_mailbox_ids, workflow):
+        jmap.get_email_senders.return_value = {
+            "email-1": ("alice@example.com", "Alice"),
+            "email-2": ("bob@example.com", "Bob"),
+            "email-3": ("carol@example.com", "Carol"),
+        }
+        jmap.call.side_effect = _make_batched_call_side_effect(
+            {"mb-tofeed": ["email-1", "email-2", "email-3"]}, mock_mailbox_ids
+        )
+        metrics.reset()
+        yield
+        metrics.reset()
+
+    def test_stops_after_current_sender(self, workflow):
+        workflow._process_sender = MagicMock(side_effect=lambda *a: workflow.request_stop())
+        assert workflow.poll() == 1
+        assert workflow._process_sender.call_count == 1
+        assert workflow.backlog == 2
+        assert metrics.snapshot()["poll_interrupted"] == 1
+
+    def test_drain_deadline_bounds_sender_in_progress(self, workflow):
+        from mailroom.core.deadline import current_deadline
+
+        def slow(*args):
+            workflow.request_stop(drain_seconds=0)
+            current_deadline().check()  # the next request would fail fast
+
+        workflow._process_sender = MagicMock(side_effect=slow)
+        assert workflow.poll() == 0
+        assert metrics.snapshot()["sender_deadline_exceeded"] == 1
+        assert workflow.backlog == 2  # the abandoned sender stays queued too (no labels removed)
+
+    def test_next_process_resumes_saved_queue(
+        self, workflow, jmap, carddav, mock_settings, mock_mailbox_ids
+    ):
+        workflow._process_sender = MagicMock(side_effect=lambda *a: workflow.request_stop())
+        workflow.poll()
+        first = workflow._process_sender.call_args.args[0]
+
+        restarted = ScreenerWorkflow(jmap, carddav, mock_settings, mock_mailbox_ids)
+        assert restarted.backlog == 2  # first poll runs right away
+        restarted._process_sender = MagicMock()
+        remaining = [
+            email_id
+            for email_id, (sender, _) in jmap.get_email_senders.return_value.items()
+            if sender != first
+        ]
+        jmap.call.side_effect = _make_batched_call_side_effect(
+            {"mb-tofeed": remaining}, mock_mailbox_ids
+        )
+        assert restarted.poll() == 2
+        assert restarted.backlog == 0
+
+    def test_queue_not_saved_when_disabled(self, jmap, carddav, mock_settings, mock_mailbox_ids):
+        mock_settings.state.sender_queue = False
+        workflow = ScreenerWorkflow(jmap, carddav, mock_settings, mock_mailbox_ids)
+        workflow._process_sender = MagicMock(side_effect=lambda *a: workflow.request_stop())
+        workflow.poll()
+        assert not list(mock_settings.state_dir.glob("sender-queue-*.json"))
+
+
 class TestDetectConflicts:
     """Unit tests for _detect_conflicts method."""
 
@@ -393,6 +570,11 @@ class TestCollectTriagedFilterErrorLabel:
             "email-1": ("alice@example.com", "Alice"),
             "email-2": ("bob@example.com", "Bob"),
         }
+        # email-1 has the error label, email-2 does not
+        jmap.get_email_mailbox_ids.return_value = {
+            "email-1": frozenset({"mb-toimbox", "mb-error"}),
+            "email-2": frozenset({"mb-toimbox"}),
+        }
 
         def call_side_effect(method_calls):
             first_method = method_calls[0][0]
@@ -406,12 +588,6 @@ class TestCollectTriagedFilterErrorLabel:
                     else:
                         responses.append(["Email/query", {"ids": [], "total": 0}, call_id])
                 return responses
-            if first_method == "Email/get":
-                # email-1 has error label, email-2 does not
-                return [["Email/get", {"list": [
-                    {"id": "email-1", "mailboxIds": {"mb-toimbox": True, "mb-error": True}},
-                    {"id": "email-2", "mailboxIds": {"mb-toimbox": True}},
-                ]}, "g0"]]
             return [["Email/set", {"updated": {}}, method_calls[0][2]]]
 
         jmap.call.side_effect = call_side_effect
@@ -1036,6 +1212,63 @@ class TestJMAPFailureDuringRemoveLabel:
         jmap.query_emails_by_sender.assert_called()
 
 
+class TestSenderJournalResume:
+    """A retried sender resumes at the first step that did not complete."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, jmap, carddav):
+        carddav.search_by_email.return_value = []
+        carddav.upsert_contact.return_value = {
+            "action": "created",
+            "uid": "journal-uid",
+            "group": "Imbox",
+            "name_mismatch": False,
+        }
+        jmap.query_emails_by_sender.return_value = ["email-1"]
+        jmap.get_email_mailbox_ids.return_value = {"email-1": {"mb-screener"}}
+        jmap.remove_label.side_effect = [RuntimeError("Failed to remove label"), None]
+        metrics.reset()
+        yield
+        metrics.reset()
+
+    def _fail_then_retry(self, workflow) -> None:
+        with pytest.raises(RuntimeError):
+            workflow._process_sender("alice@example.com", [("email-1", "@ToImbox")])
+        workflow._process_sender("alice@example.com", [("email-1", "@ToImbox")])
+
+    def test_completed_steps_not_repeated(self, workflow, carddav, jmap):
+        self._fail_then_retry(workflow)
+        carddav.upsert_contact.assert_called_once()
+        carddav.search_by_email.assert_called_once()
+        assert jmap.remove_label.call_count == 2
+        assert metrics.snapshot()["journal_steps_skipped"] > 0
+
+    def test_journal_survives_restart(
+        self, workflow, jmap, carddav, mock_settings, mock_mailbox_ids
+    ):
+        with pytest.raises(RuntimeError):
+            workflow._process_sender("alice@example.com", [("email-1", "@ToImbox")])
+        restarted = ScreenerWorkflow(jmap, carddav, mock_settings, mock_mailbox_ids)
+        restarted._process_sender("alice@example.com", [("email-1", "@ToImbox")])
+        carddav.upsert_contact.assert_called_once()
+
+    def test_different_emails_start_over(self, workflow, carddav, jmap):
+        with pytest.raises(RuntimeError):
+            workflow._process_sender("alice@example.com", [("email-1", "@ToImbox")])
+        jmap.remove_label.side_effect = None
+        workflow._process_sender(
+            "alice@example.com", [("email-1", "@ToImbox"), ("email-2", "@ToImbox")]
+        )
+        assert carddav.upsert_contact.call_count == 2
+
+    def test_entry_dropped_after_success(self, workflow, carddav, jmap):
+        self._fail_then_retry(workflow)
+        jmap.remove_label.side_effect = None
+        workflow._process_sender("alice@example.com", [("email-1", "@ToImbox")])
+        assert carddav.upsert_contact.call_count == 2  # fresh attempt, not a resume
+        assert len(workflow._journal) == 0
+
+
 class TestProcessSenderEmptyReconciliation:
     """Reconciliation finds no emails from sender: no Email/set patches applied."""
 
@@ -2207,7 +2440,7 @@ def _make_batched_call_side_effect(
     mailbox_ids: dict[str, str],
     error_labels: dict[str, dict] | None = None,
 ):
-    """Build a jmap.call side_effect that handles batched Email/query, Email/get, and Email/set.
+    """Build a jmap.call side_effect that handles batched Email/query and Email/set.
 
     Args:
         label_emails: Mapping of label mailbox ID -> list of email IDs returned.
@@ -2236,23 +2469,9 @@ def _make_batched_call_side_effect(
                     )
             return responses
 
-        # Email/get for error filtering or sender fetching
+        # Email lookups go through the typed client methods (get_email_senders, ...)
         if first_method == "Email/get":
-            ids = method_calls[0][1].get("ids", [])
-            props = method_calls[0][1].get("properties", [])
-            # Sender fetch: properties include "from"
-            if "from" in props:
-                raise AssertionError("Sender fetch should use get_email_senders, not call()")
-            # Error filtering: return emails with their mailbox IDs
-            email_list = []
-            for eid in ids:
-                # Find which label mailbox this email belongs to
-                mbox_ids = {}
-                for label_mbid, eids in label_emails.items():
-                    if eid in eids:
-                        mbox_ids[label_mbid] = True
-                email_list.append({"id": eid, "mailboxIds": mbox_ids})
-            return [["Email/get", {"list": email_list}, "g0"]]
+            raise AssertionError("Email/get should use a typed JMAPClient method, not call()")
 
         # Email/set for error/warning labeling
         if first_method == "Email/set":
@@ -2376,7 +2595,7 @@ class TestBatchedCollectTriaged:
     def test_error_filtering_is_separate_call(
         self, workflow, jmap, mock_mailbox_ids
     ):
-        """Error filtering (@MailroomError check) is a separate jmap.call() after batch."""
+        """Error filtering (@MailroomError check) is a separate typed lookup after the batch."""
         jmap.call.side_effect = _make_batched_call_side_effect(
             {"mb-toimbox": ["email-1"]},
             mock_mailbox_ids,
@@ -2385,12 +2604,11 @@ class TestBatchedCollectTriaged:
             "email-1": ("alice@example.com", "Alice"),
         }
         workflow._collect_triaged()
-        # Should have 2 jmap.call() invocations: 1 batch + 1 error filter
-        assert jmap.call.call_count == 2
-        # First call: batched Email/query
+        # One jmap.call() for the batched Email/query
+        assert jmap.call.call_count == 1
         assert jmap.call.call_args_list[0].args[0][0][0] == "Email/query"
-        # Second call: Email/get for error filtering
-        assert jmap.call.call_args_list[1].args[0][0][0] == "Email/get"
+        # Error filtering: chunked Email/get through the typed client method
+        jmap.get_email_mailbox_ids.assert_called_once_with(["email-1"])
 
 
 class TestBatchedPerMethodError:
@@ -2545,12 +2763,6 @@ class TestBatchedPagination:
                             )
                     return responses
 
-            if first_method == "Email/get":
-                ids = method_calls[0][1].get("ids", [])
-                return [["Email/get", {"list": [
-                    {"id": eid, "mailboxIds": {"mb-toimbox": True}} for eid in ids
-                ]}, "g0"]]
-
             return []
 
         jmap.call.side_effect = side_effect
@@ -2774,3 +2986,47 @@ def _make_vcard(email: str, uid: str) -> str:
     email_prop.value = email
     email_prop.type_param = "INTERNET"
     return card.serialize()
+
+
+# =============================================================================
+# Precompiled routing and reconcile patches
+# =============================================================================
+
+
+class TestRoutingTable:
+    """RoutingTable compiles each category's reconcile patches once."""
+
+    def test_patches_differ_only_in_inbox(self, mock_settings, mock_mailbox_ids):
+        """inbox_patch is reconcile_patch plus Inbox; Inbox is never stripped."""
+        route = RoutingTable(mock_settings, mock_mailbox_ids)["@ToPerson"]
+
+        assert route.destination_ids == ("mb-person", "mb-imbox")
+        assert route.reconcile_patch["mailboxIds/mb-person"] is True
+        assert route.reconcile_patch["mailboxIds/mb-imbox"] is True
+        assert route.reconcile_patch["mailboxIds/mb-feed"] is None
+        assert route.reconcile_patch["mailboxIds/mb-screener"] is None
+        assert "mailboxIds/mb-inbox" not in route.reconcile_patch
+        assert dict(route.inbox_patch) == {
+            **route.reconcile_patch,
+            "mailboxIds/mb-inbox": True,
+        }
+
+    def test_reconcile_shares_one_patch_per_variant(
+        self, workflow, jmap, mock_mailbox_ids
+    ):
+        """Emails with the same Inbox handling share one patch object in the request."""
+        jmap.query_emails_by_sender.return_value = ["e1", "e2", "e3"]
+        jmap.get_email_mailbox_ids.return_value = {
+            "e1": {"mb-screener"},
+            "e2": {"mb-feed"},
+            "e3": {"mb-screener"},
+        }
+
+        workflow._reconcile_email_labels(
+            "a@example.com", workflow._routing["@ToImbox"], add_to_inbox=True
+        )
+
+        update = jmap.call.call_args[0][0][0][1]["update"]
+        assert update["e1"] is update["e3"]
+        assert update["e1"]["mailboxIds/mb-inbox"] is True
+        assert "mailboxIds/mb-inbox" not in update["e2"]
@@ -0,0 +1,98 @@
+"""Tests for SenderQueue: priority ordering, persistence across polls, starvation guard."""
+
+import pytest
+
+from mailroom.workflows.queue import STARVATION_DEFERRALS, SenderQueue
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _emails(count: int, label: str = "@ToFeed") -> list[tuple[str, str]]:
+    return [(f"e{i}", label) for i in range(count)]
+
+
+class TestOrdering:
+    """Fewest emails first, then oldest first."""
+
+    def test_fewest_emails_first(self):
+        q = SenderQueue(clock=FakeClock())
+        q.sync({"bulk@example.com": _emails(500), "alice@example.com": _emails(1)})
+        assert [e.sender for e in q.ordered()] == ["alice@example.com", "bulk@example.com"]
+
+    def test_ties_go_to_oldest(self):
+        clock = FakeClock()
+        q = SenderQueue(clock=clock)
+        q.sync({"old@example.com": _emails(1)})
+        clock.now = 10.0
+        q.sync({"old@example.com": _emails(1), "new@example.com": _emails(1)})
+        assert [e.sender for e in q.ordered()] == ["old@example.com", "new@example.com"]
+
+    def test_starving_sender_jumps_ahead(self):
+        q = SenderQueue(clock=FakeClock())
+        q.sync({"bulk@example.com": _emails(500), "alice@example.com": _emails(1)})
+        for _ in range(STARVATION_DEFERRALS):
+            q.defer("bulk@example.com")
+        assert q.ordered()[0].sender == "bulk@example.com"
+
+
+class TestSync:
+    """sync() keeps age for queued senders and drops vanished ones."""
+
+    def test_keeps_first_seen_and_deferrals(self):
+        clock = FakeClock()
+        q = SenderQueue(clock=clock)
+        q.sync({"alice@example.com": _emails(1)})
+        q.defer("alice@example.com")
+        clock.now = 30.0
+        q.sync({"alice@example.com": _emails(2)})
+        entry = q.ordered()[0]
+        assert entry.first_seen == 0.0
+        assert entry.deferrals == 1
+        assert len(entry.emails) == 2
+
+    def test_drops_senders_no_longer_triaged(self):
+        q = SenderQueue(clock=FakeClock())
+        q.sync({"alice@example.com": _emails(1), "bob@example.com": _emails(1)})
+        q.sync({"bob@example.com": _emails(1)})
+        assert "alice@example.com" not in q
+        assert len(q) == 1
+
+    def test_complete_removes_sender(self):
+        q = SenderQueue(clock=FakeClock())
+        q.sync({"alice@example.com": _emails(1)})
+        q.complete("alice@example.com")
+        assert len(q) == 0
+
+
+class TestPersistence:
+    """save()/load() keep order, age and deferrals across processes."""
+
+    def test_round_trip(self, tmp_path):
+        clock = FakeClock()
+        q = SenderQueue(clock=clock)
+        q.sync({"bulk@example.com": _emails(3), "alice@example.com": _emails(1)})
+        q.defer("bulk@example.com")
+        clock.now = 100.0
+        q.save(tmp_path / "queue.json")
+
+        other = FakeClock()
+        other.now = 5.0  # a new process: unrelated monotonic clock
+        restored = SenderQueue.load(tmp_path / "queue.json", clock=other)
+        assert [e.sender for e in restored.ordered()] == ["alice@example.com", "bulk@example.com"]
+        bulk = restored.ordered()[1]
+        assert bulk.deferrals == 1
+        assert bulk.emails == _emails(3)
+        assert bulk.first_seen == pytest.approx(5.0 - 100.0, abs=1.0)
+
+    def test_missing_or_corrupt_file_gives_empty_queue(self, tmp_path):
+        assert len(SenderQueue.load(tmp_path / "missing.json")) == 0
+        (tmp_path / "bad.json").write_text("{not json")
+        assert len(SenderQueue.load(tmp_path / "bad.json")) == 0
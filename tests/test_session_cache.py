@@ -0,0 +1,187 @@
+"""Tests for the JMAP session cache and JMAPClient session revalidation."""
+
+import importlib
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from pytest_httpx import HTTPXMock
+
+from mailroom.clients.jmap import JMAPClient
+from mailroom.clients.session_cache import (
+    SessionCache,
+    clear_memory,
+    session_cache_from_settings,
+    token_key,
+)
+from mailroom.core.config import HttpSettings, StateSettings
+
+SESSION_URL = "https://api.fastmail.com/jmap/session"
+API_URL = "https://api.fastmail.com/jmap/api/"
+
+SESSION = {
+    "apiUrl": API_URL,
+    "primaryAccounts": {"urn:ietf:params:jmap:mail": "u1234"},
+    "eventSourceUrl": "https://api.fastmail.com/jmap/event/",
+    "state": "s1",
+}
+
+
+def _mailbox_get_response(session_state: str = "s1") -> dict:
+    return {
+        "methodResponses": [["Mailbox/get", {"list": []}, "m0"]],
+        "sessionState": session_state,
+    }
+
+
+@pytest.fixture
+def state_dir(tmp_path):
+    return tmp_path / "cache"
+
+
+@pytest.fixture(autouse=True)
+def _fresh_memory():
+    clear_memory()
+    yield
+    clear_memory()
+
+
+class TestSessionCache:
+    def test_round_trip_through_disk(self, state_dir):
+        SessionCache(state_dir).store("tok", SESSION)
+        clear_memory()
+        assert SessionCache(state_dir).load("tok") == SESSION
+
+    def test_token_never_written(self, state_dir):
+        SessionCache(state_dir).store("fmu1-secret", SESSION)
+        for path in state_dir.iterdir():
+            assert "fmu1-secret" not in path.name
+            assert "fmu1-secret" not in path.read_text()
+
+    def test_keyed_by_token(self, state_dir):
+        SessionCache(state_dir).store("tok-a", SESSION)
+        clear_memory()
+        assert SessionCache(state_dir).load("tok-b") is None
+
+    def test_corrupt_file_is_a_miss(self, state_dir):
+        cache = SessionCache(state_dir)
+        cache.store("tok", SESSION)
+        clear_memory()
+        for path in state_dir.iterdir():
+            path.write_text("{not json")
+        assert cache.load("tok") is None
+
+    def test_unwritable_directory_falls_back_to_memory(self, state_dir):
+        state_dir.mkdir()
+        blocker = state_dir / "file"
+        blocker.write_text("")
+        cache = SessionCache(blocker / "sub")  # cannot mkdir under a file
+        cache.store("tok", SESSION)
+        assert cache.load("tok") == SESSION
+
+    def test_invalidate(self, state_dir):
+        cache = SessionCache(state_dir)
+        cache.store("tok", SESSION)
+        cache.invalidate("tok")
+        assert cache.load("tok") is None
+        assert list(state_dir.iterdir()) == []
+
+    def test_disabled_by_settings(self):
+        assert session_cache_from_settings(StateSettings(session_cache=False)) is None
+
+    def test_file_records_key(self, state_dir):
+        SessionCache(state_dir).store("tok", SESSION)
+        (path,) = state_dir.iterdir()
+        assert json.loads(path.read_text())["key"] == token_key("tok")
+
+
+class TestJMAPClientSessionCache:
+    def test_second_connect_served_from_cache(self, state_dir, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(url=SESSION_URL, json=SESSION)
+
+        JMAPClient(token="tok", session_cache=SessionCache(state_dir)).connect()
+        clear_memory()  # force the disk path, as in a fresh CLI invocation
+        client = JMAPClient(token="tok", session_cache=SessionCache(state_dir))
+        client.connect()
+
+        assert client.account_id == "u1234"
+        assert client.event_source_url == "https://api.fastmail.com/jmap/event/"
+        assert len(httpx_mock.get_requests(url=SESSION_URL)) == 1
+
+    def test_session_state_change_refreshes(self, state_dir, httpx_mock: HTTPXMock):
+        moved = {**SESSION, "apiUrl": "https://api2.fastmail.com/jmap/api/", "state": "s2"}
+        httpx_mock.add_response(url=SESSION_URL, json=SESSION)
+        httpx_mock.add_response(url=API_URL, json=_mailbox_get_response("s2"))
+        httpx_mock.add_response(url=SESSION_URL, json=moved)
+        httpx_mock.add_response(
+            url="https://api2.fastmail.com/jmap/api/", json=_mailbox_get_response("s2")
+        )
+        cache = SessionCache(state_dir)
+        client = JMAPClient(token="tok", session_cache=cache)
+        client.connect()
+
+        client.call([["Mailbox/get", {"accountId": "u1234", "ids": None}, "m0"]])
+        client.call([["Mailbox/get", {"accountId": "u1234", "ids": None}, "m0"]])
+
+        assert cache.load("tok")["apiUrl"] == "https://api2.fastmail.com/jmap/api/"
+
+    def test_unchanged_session_state_does_not_refresh(self, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(url=SESSION_URL, json=SESSION)
+        httpx_mock.add_response(url=API_URL, json=_mailbox_get_response("s1"))
+        client = JMAPClient(token="tok", session_cache=SessionCache())
+        client.connect()
+        client.call([["Mailbox/get", {"accountId": "u1234", "ids": None}, "m0"]])
+        assert len(httpx_mock.get_requests(url=SESSION_URL)) == 1
+
+    def test_stale_cached_api_url_is_refetched(self, state_dir, httpx_mock: HTTPXMock):
+        stale = {**SESSION, "apiUrl": "https://old.fastmail.com/jmap/api/"}
+        SessionCache(state_dir).store("tok", stale)
+        httpx_mock.add_response(url="https://old.fastmail.com/jmap/api/", status_code=404)
+        httpx_mock.add_response(url=SESSION_URL, json=SESSION)
+        httpx_mock.add_response(url=API_URL, json=_mailbox_get_response())
+
+        client = JMAPClient(token="tok", session_cache=SessionCache(state_dir))
+        client.connect()
+        responses = client.call([["Mailbox/get", {"accountId": "u1234", "ids": None}, "m0"]])
+
+        assert responses[0][0] == "Mailbox/get"
+
+    def test_no_cache_by_default(self, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(url=SESSION_URL, json=SESSION)
+        httpx_mock.add_response(url=SESSION_URL, json=SESSION)
+        JMAPClient(token="tok").connect()
+        JMAPClient(token="tok").connect()
+        assert len(httpx_mock.get_requests(url=SESSION_URL)) == 2
+
+
+class TestOneShotCommandsRevalidate:
+    """setup and reset start from the cache and report auth errors from the first call."""
+
+    @pytest.mark.parametrize(
+        ("module", "run", "plan"),
+        [
+            ("mailroom.setup.provisioner", "run_setup", "plan_resources"),
+            ("mailroom.reset.resetter", "run_reset", "plan_reset"),
+        ],
+    )
+    def test_revoked_token_fails_on_first_call(
+        self, module, run, plan, state_dir, monkeypatch, capsys, httpx_mock: HTTPXMock
+    ):
+        mod = importlib.import_module(module)
+        settings = MagicMock()
+        settings.jmap_token = "revoked"
+        settings.http = HttpSettings(max_retries=0)
+        settings.state = StateSettings(directory=str(state_dir))
+        settings.state_dir = state_dir
+        monkeypatch.setattr(mod, "MailroomSettings", lambda: settings)
+        monkeypatch.setattr(mod, "configure_logging", lambda level: None)
+        monkeypatch.setattr(mod, "CardDAVClient", MagicMock())
+        monkeypatch.setattr(mod, plan, lambda settings, jmap, carddav: jmap.get_mailboxes())
+        SessionCache(state_dir).store("revoked", SESSION)
+        httpx_mock.add_response(url=API_URL, method="POST", status_code=401)
+        httpx_mock.add_response(url=SESSION_URL, status_code=401)
+
+        assert getattr(mod, run)() == 1
+        assert "Request to api.fastmail.com failed: 401" in capsys.readouterr().err
+        # The pre-flight used the cache; only call()'s revalidation fetched the session
+        assert len(httpx_mock.get_requests(url=SESSION_URL)) == 1
@@ -0,0 +1,133 @@
+"""Tests for per-poll timelines and the sampling profiler."""
+
+import marshal
+import pstats
+import threading
+
+import pytest
+
+from mailroom.core import profiling, tracing
+from mailroom.testing.fake_fastmail import FakeFastmail, start_workflow
+
+
+@pytest.fixture(autouse=True)
+def _clean_traces():
+    tracing.set_capacity(20)
+    tracing.reset()
+    yield
+    tracing.reset()
+
+
+class TestPollTrace:
+    def test_span_without_trace_is_a_noop(self):
+        with tracing.span("http", method="GET") as span:
+            span["status"] = 200
+        assert tracing.recent() == []
+
+    def test_spans_recorded_in_active_trace(self):
+        with tracing.poll_trace("push"):
+            with tracing.span("http", method="GET") as span:
+                span["status"] = 200
+        (trace,) = tracing.recent()
+        assert trace["trigger"] == "push"
+        assert trace["outcome"] == "ok"
+        assert trace["duration_ms"] >= 0
+        assert trace["spans"] == [
+            {"name": "http", "start_ms": pytest.approx(0, abs=50),
+             "duration_ms": pytest.approx(0, abs=50), "method": "GET", "status": 200}
+        ]
+
+    def test_failed_poll_and_span_marked(self):
+        with pytest.raises(RuntimeError):
+            with tracing.poll_trace("scheduled"):
+                with tracing.span("collect_triaged"):
+                    raise RuntimeError("boom")
+        (trace,) = tracing.recent()
+        assert trace["outcome"] == "error"
+        assert trace["spans"][0]["error"] == "RuntimeError"
+
+    def test_ring_buffer_keeps_newest_first(self):
+        tracing.set_capacity(2)
+        for trigger in ("a", "b", "c"):
+            with tracing.poll_trace(trigger):
+                pass
+        assert [t["trigger"] for t in tracing.recent()] == ["c", "b"]
+        assert [t["trigger"] for t in tracing.recent(limit=1)] == ["c"]
+
+    def test_capacity_zero_disables(self):
+        tracing.set_capacity(0)
+        with tracing.poll_trace("push") as trace:
+            assert trace is None
+        assert tracing.recent() == []
+
+    def test_poll_timeline_has_scan_sender_and_http_spans(self, mock_settings):
+        fake = FakeFastmail.for_settings(mock_settings)
+        fake.add_email("new@example.com", ["Screener", "@ToFeed"])
+        workflow = start_workflow(fake, mock_settings)
+        with tracing.poll_trace("push"):
+            workflow.poll()
+        spans = tracing.recent()[0]["spans"]
+        names = {s["name"] for s in spans}
+        assert {"collect_triaged", "sender", "http"} <= names
+        (sender,) = [s for s in spans if s["name"] == "sender"]
+        assert sender["sender"] == "new@example.com"
+        assert sender["outcome"] == "ok"
+        assert all(s["status"] < 400 for s in spans if s["name"] == "http")
+
+
+class TestProfiler:
+    def _busy_thread(self, stop):
+        def spin():
+            while not stop.is_set():
+                sum(range(100))
+
+        thread = threading.Thread(target=spin, name="spinner")
+        thread.start()
+        return thread
+
+    def test_samples_other_threads_as_collapsed_stacks(self):
+        stop = threading.Event()
+        thread = self._busy_thread(stop)
+        try:
+            samples = profiling.sample(0.1, hz=200)
+        finally:
+            stop.set()
+            thread.join()
+        assert samples.rounds > 0
+        text = profiling.collapsed(samples)
+        spinner = [line for line in text.splitlines() if line.startswith("spinner;")]
+        assert spinner
+        assert any("spin (test_tracing.py:" in line for line in spinner)
+        assert int(spinner[0].rsplit(" ", 1)[1]) > 0
+
+    def test_pstats_output_loads(self, tmp_path):
+        stop = threading.Event()
+        thread = self._busy_thread(stop)
+        try:
+            samples = profiling.sample(0.1, hz=200)
+        finally:
+            stop.set()
+            thread.join()
+        path = tmp_path / "profile.pstats"
+        path.write_bytes(profiling.pstats_bytes(samples))
+        stats = pstats.Stats(str(path))
+        assert any(func[2].endswith("spin") for func in stats.stats)
+        assert marshal.loads(path.read_bytes())
+
+    def test_one_profile_at_a_time(self):
+        started = threading.Event()
+        result = {}
+
+        def run():
+            started.set()
+            result["samples"] = profiling.sample(0.3)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        started.wait()
+        try:
+            with pytest.raises(profiling.ProfileBusy):
+                for _ in range(100):  # wait until the other profile holds the lock
+                    profiling.sample(0.001)
+        finally:
+            thread.join()
@@ -0,0 +1,230 @@
+"""Tests for the HTTP transport layer: client factory, request budget, retries."""
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from mailroom.clients import transport as transport_module
+from mailroom.clients.jmap import JMAPClient
+from mailroom.clients.transport import (
+    IDEMPOTENT_EXTENSION,
+    ThrottledTransport,
+    TokenBucket,
+    create_http_client,
+    parse_retry_after,
+)
+from mailroom.core import metrics
+from mailroom.core.config import HttpSettings
+from mailroom.core.deadline import DeadlineExceeded, deadline
+
+URL = "https://api.fastmail.com/jmap/api/"
+
+
+@pytest.fixture(autouse=True)
+def _clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _client(sleeps: list[float], **kwargs) -> httpx.Client:
+    transport = ThrottledTransport(
+        httpx.HTTPTransport(),
+        sleep=sleeps.append,
+        jitter=lambda low, high: high,
+        **kwargs,
+    )
+    return httpx.Client(transport=transport)
+
+
+class TestTokenBucket:
+    def test_burst_is_free(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+        for _ in range(3):
+            assert bucket.acquire() == 0
+        assert clock.slept == []
+
+    def test_waits_when_empty(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=1, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+        assert bucket.acquire() == pytest.approx(0.5)
+
+    def test_pause_blocks_following_requests(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=10, clock=clock, sleep=clock.sleep)
+        bucket.pause(2.0)
+        assert bucket.acquire() >= 2.0
+
+    def test_wait_past_deadline_raises(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=0.1, capacity=1, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+        with deadline(1):
+            with pytest.raises(DeadlineExceeded):
+                bucket.acquire()
+
+
+class TestParseRetryAfter:
+    def test_seconds(self):
+        assert parse_retry_after("7") == 7.0
+
+    def test_http_date(self):
+        assert parse_retry_after("Thu, 01 Jan 1970 00:00:10 GMT", now=lambda: 4.0) == 6.0
+
+    def test_garbage(self):
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after(None) is None
+
+
+class TestRetries:
+    def test_429_retried_with_retry_after(self, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(url=URL, status_code=429, headers={"Retry-After": "2"})
+        httpx_mock.add_response(url=URL, json={"ok": True})
+        sleeps: list[float] = []
+
+        resp = _client(sleeps).post(URL, json={})
+
+        assert resp.status_code == 200
+        assert sleeps and sleeps[0] >= 2.0
+        assert metrics.snapshot()["http_throttled"] == 1
+        assert metrics.snapshot()["http_retries"] == 1
+
+    def test_429_retried_for_non_idempotent_post(self, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(url=URL, status_code=429)
+        httpx_mock.add_response(url=URL, json={"ok": True})
+        assert _client([]).post(URL, json={}).status_code == 200
+
+    def test_503_not_retried_for_writes(self, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(url=URL, status_code=503)
+        resp = _client([]).post(URL, json={})
+        assert resp.status_code == 503
+        assert metrics.snapshot()["http_unavailable"] == 1
+
+    def test_503_retried_for_idempotent_reads(self, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(url=URL, status_code=503)
+        httpx_mock.add_response(url=URL, json={"ok": True})
+        sleeps: list[float] = []
+        resp = _client(sleeps, backoff_base=0.25).post(
+            URL, json={}, extensions={IDEMPOTENT_EXTENSION: True}
+        )
+        assert resp.status_code == 200
+        assert sleeps[0] >= 0.25  # jittered backoff (jitter pinned to the ceiling)
+
+    def test_create_only_put_not_retried_on_503(self, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(status_code=503)
+        resp = _client([]).put(
+            "https://carddav.fastmail.com/x.vcf", headers={"If-None-Match": "*"}
+        )
+        assert resp.status_code == 503
+
+    def test_conditional_put_not_retried_on_503(self, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(status_code=503)
+        resp = _client([]).put("https://carddav.fastmail.com/x.vcf", headers={"If-Match": '"e1"'})
+        assert resp.status_code == 503
+        assert len(httpx_mock.get_requests()) == 1
+
+    def test_delete_not_retried_on_503(self, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(status_code=503)
+        resp = _client([]).delete("https://carddav.fastmail.com/x.vcf")
+        assert resp.status_code == 503
+        assert len(httpx_mock.get_requests()) == 1
+
+    def test_503_retried_for_propfind(self, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(status_code=503)
+        httpx_mock.add_response(status_code=207)
+        resp = _client([]).request("PROPFIND", "https://carddav.fastmail.com/")
+        assert resp.status_code == 207
+
+    def test_gives_up_after_max_retries(self, httpx_mock: HTTPXMock):
+        for _ in range(3):
+            httpx_mock.add_response(url=URL, status_code=429, headers={"Retry-After": "0"})
+        resp = _client([], max_retries=2).post(URL, json={})
+        assert resp.status_code == 429
+
+    def test_excessive_retry_after_not_waited(self, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(url=URL, status_code=429, headers={"Retry-After": "3600"})
+        sleeps: list[float] = []
+        resp = _client(sleeps, max_retry_after=60).post(URL, json={})
+        assert resp.status_code == 429
+        assert sleeps == []
+
+    def test_retry_not_waited_past_deadline(self, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(url=URL, status_code=429, headers={"Retry-After": "30"})
+        with deadline(5):
+            resp = _client([]).post(URL, json={})
+        assert resp.status_code == 429
+
+
+class TestJMAPReadOnlyMarking:
+    def test_read_only_call_is_retried_on_503(self, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(url=URL, status_code=503, headers={"Retry-After": "0"})
+        httpx_mock.add_response(
+            url=URL, json={"methodResponses": [["Mailbox/get", {"list": []}, "m0"]]}
+        )
+        client = JMAPClient(token="tok")
+        client._api_url = URL
+        responses = client.call([["Mailbox/get", {"accountId": "a", "ids": None}, "m0"]])
+        assert responses[0][0] == "Mailbox/get"
+
+    def test_write_call_is_not_retried_on_503(self, httpx_mock: HTTPXMock):
+        httpx_mock.add_response(url=URL, status_code=503, headers={"Retry-After": "0"})
+        client = JMAPClient(token="tok")
+        client._api_url = URL
+        with pytest.raises(httpx.HTTPStatusError):
+            client.call([["Email/set", {"accountId": "a", "update": {}}, "s0"]])
+
+
+class TestCreateHttpClient:
+    def test_applies_timeouts_from_settings(self):
+        client = create_http_client(
+            HttpSettings(connect_timeout_seconds=3, read_timeout_seconds=12)
+        )
+        assert client.timeout.connect == 3
+        assert client.timeout.read == 12
+
+    def test_pool_limits_from_settings(self):
+        client = create_http_client(
+            HttpSettings(max_connections=4, max_keepalive_connections=2, http2=False)
+        )
+        pool = client._transport._inner._pool
+        assert pool._max_connections == 4
+        assert pool._max_keepalive_connections == 2
+        assert pool._keepalive_expiry == 120.0
+
+    def test_http2_falls_back_without_h2(self, monkeypatch):
+        monkeypatch.setattr(transport_module, "http2_available", lambda: False)
+        client = create_http_client(HttpSettings(http2=True))
+        assert client._transport._inner._pool._http2 is False
+
+    def test_shares_one_ssl_context(self):
+        a = create_http_client()._transport._inner._pool._ssl_context
+        b = create_http_client()._transport._inner._pool._ssl_context
+        assert a is b
+
+    def test_injected_transport_still_throttled_and_deadlined(self):
+        seen: list[httpx.Request] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request)
+            return httpx.Response(200)
+
+        client = create_http_client(transport=httpx.MockTransport(handler))
+        assert isinstance(client._transport, ThrottledTransport)
+        with deadline(5):
+            client.get("https://example.test/")
+        assert seen[0].extensions["timeout"]["read"] <= 5